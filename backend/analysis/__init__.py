@@ -0,0 +1,30 @@
+"""
+测量数据分析包
+"""
+
+from .complex_trace import (
+    COMPLEX_COLUMNS, VECTOR_PARAMETERS, complex_trace, magnitude_db,
+    magnitude_phase_columns, parse_complex, phase_deg, polar_complex, trace_magnitude, trace_phase
+)
+from .consistency import ChannelConsistency, channel_deviation, wrap_phase
+from .correction import CorrectionPipeline, ErrorCorrection, correct_one_port, correct_response, correct_two_port
+from .group_delay import DERIVED_OUTPUTS, DerivedTraces, group_delay, linear_phase_fit
+from .limits import LIMIT_ACTIONS, LimitEvaluator, LimitMask
+from .statistics import (
+    ComplexRunningStatistics, ConvergenceCriterion, P2Quantile, PhaseStatistics, RunningStatistics, TraceStatistics
+)
+from .time_domain import TimeDomainTransform, gate_function, make_window
+from .uncertainty import UncertaintyBudget, UncertaintyComponent, build_budget
+
+__all__ = [
+    'COMPLEX_COLUMNS', 'VECTOR_PARAMETERS', 'complex_trace', 'magnitude_db',
+    'magnitude_phase_columns', 'parse_complex', 'phase_deg', 'polar_complex', 'trace_magnitude', 'trace_phase',
+    'ChannelConsistency', 'channel_deviation', 'wrap_phase',
+    'CorrectionPipeline', 'ErrorCorrection', 'correct_one_port', 'correct_response', 'correct_two_port',
+    'DERIVED_OUTPUTS', 'DerivedTraces', 'group_delay', 'linear_phase_fit',
+    'LIMIT_ACTIONS', 'LimitEvaluator', 'LimitMask',
+    'ComplexRunningStatistics', 'ConvergenceCriterion', 'P2Quantile', 'PhaseStatistics', 'RunningStatistics',
+    'TraceStatistics',
+    'TimeDomainTransform', 'gate_function', 'make_window',
+    'UncertaintyBudget', 'UncertaintyComponent', 'build_budget',
+]
@@ -0,0 +1,98 @@
+"""
+复数轨迹工具
+SDATA（实部/虚部交替）解析，以及按需由复数数据导出 dB 幅度与相位
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 可获取复数数据（SDATA）的矢量参数；变频与功率参数只有标量数据
+VECTOR_PARAMETERS = ('S11', 'S21', 'S12', 'S22')
+COMPLEX_COLUMNS = ['real', 'imag']
+MIN_LINEAR_MAGNITUDE = 1e-10  # 对应 -200 dB，避免 log10(0)
+
+
+def parse_complex(text: str) -> np.ndarray:
+    """
+    解析 SDATA 响应（re0,im0,re1,im1,...）
+
+    Args:
+        text: 设备返回的ASCII数据
+
+    Returns:
+        复数数组
+    """
+    values = np.array([x for x in text.split(',') if x.strip()], dtype=np.float64)
+    if values.size % 2:
+        raise ValueError(f"复数数据长度必须为偶数，实际为 {values.size}")
+    return values.view(np.complex128)
+
+
+def magnitude_db(values: np.ndarray) -> np.ndarray:
+    """复数 → dB 幅度（20·log10|S|）"""
+    return 20 * np.log10(np.maximum(np.abs(values), MIN_LINEAR_MAGNITUDE))
+
+
+def phase_deg(values: np.ndarray) -> np.ndarray:
+    """复数 → 相位（度，-180 ~ 180）"""
+    return np.degrees(np.angle(values))
+
+
+def polar_complex(magnitude: np.ndarray, phase: np.ndarray) -> np.ndarray:
+    """dB 幅度 + 相位（度） → 复数"""
+    return 10 ** (np.asarray(magnitude, dtype=np.float64) / 20) * np.exp(1j * np.radians(phase))
+
+
+def combine_columns(values: np.ndarray, columns: Sequence[str]) -> np.ndarray:
+    """由 [..., column, point] 数组中的 real/imag 列组成复数数组"""
+    return values[..., columns.index('real'), :] + 1j * values[..., columns.index('imag'), :]
+
+
+def magnitude_phase_columns(values: np.ndarray, columns: Sequence[str]
+                            ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    从按列存储的数据中取幅度与相位，复数存储时按需导出
+
+    Args:
+        values: 数据数组，形状 [..., column, point]
+        columns: 列名（'magnitude'/'phase' 或 'real'/'imag'）
+
+    Returns:
+        (幅度, 相位)，没有相位时相位为 None
+    """
+    if 'real' in columns:
+        data = combine_columns(values, columns)
+        return magnitude_db(data), phase_deg(data)
+    magnitude = values[..., columns.index('magnitude'), :]
+    phase = values[..., columns.index('phase'), :] if 'phase' in columns else None
+    return magnitude, phase
+
+
+def complex_trace(frequencies: List[float], values: np.ndarray) -> dict:
+    """
+    由复数测量数据生成驱动返回的数据字典
+
+    只保存频率轴与原始复数数组（complex 字段，供复数域平均和存储使用）；
+    magnitude/phase 不在每次测量时生成，需要时由 trace_magnitude/trace_phase 导出。
+    """
+    return {
+        'frequencies': frequencies,
+        'complex': values
+    }
+
+
+def trace_magnitude(data: dict):
+    """测量数据的幅度；复数数据首次访问时导出并缓存到 magnitude 字段"""
+    magnitude = data.get('magnitude')
+    if magnitude is None and data.get('complex') is not None:
+        magnitude = data['magnitude'] = magnitude_db(data['complex'])
+    return magnitude
+
+
+def trace_phase(data: dict):
+    """测量数据的相位（没有相位时为 None）；复数数据首次访问时导出并缓存到 phase 字段"""
+    phase = data.get('phase')
+    if phase is None and data.get('complex') is not None:
+        phase = data['phase'] = phase_deg(data['complex'])
+    return phase if phase is not None and len(phase) else None
@@ -0,0 +1,157 @@
+"""
+通道一致性分析
+将各输出通道同一参数的测量结果组成 [通道, 频点] 数组，按频点一次性计算：
+    spread       通道间离散度（标准差）
+    delta        最差通道对的差值（最大值 - 最小值）及对应通道对
+    deviation    各通道相对通道均值的偏差
+并按容差找出超差通道。相位按圆周均值计算，偏差折算到 ±180°。
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from analysis.complex_trace import magnitude_db, phase_deg
+
+QUANTITIES = ('magnitude', 'phase')
+
+
+def wrap_phase(phase: np.ndarray) -> np.ndarray:
+    """相位折算到 [-180, 180)"""
+    return (phase + 180.0) % 360.0 - 180.0
+
+
+def channel_deviation(values: np.ndarray, circular: bool = False) -> Dict[str, np.ndarray]:
+    """
+    按频点计算通道间一致性指标
+
+    Args:
+        values: 形状 [通道, 频点]
+        circular: 是否为相位（度），按圆周均值计算
+
+    Returns:
+        {'mean', 'deviation', 'spread', 'delta', 'low', 'high'}，
+        low/high 为每个频点最小/最大偏差的通道下标（即最差通道对）
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if circular:
+        mean = np.degrees(np.angle(np.exp(1j * np.radians(values)).mean(axis=0)))
+        deviation = wrap_phase(values - mean)
+    else:
+        mean = values.mean(axis=0)
+        deviation = values - mean
+    low = deviation.argmin(axis=0)
+    high = deviation.argmax(axis=0)
+    points = np.arange(values.shape[1])
+    return {
+        'mean': mean,
+        'deviation': deviation,
+        'spread': deviation.std(axis=0),
+        'delta': deviation[high, points] - deviation[low, points],
+        'low': low,
+        'high': high,
+    }
+
+
+class ChannelConsistency:
+    """多通道一致性分析结果"""
+
+    def __init__(self, parameter: str, channels: Sequence[str], frequencies: Sequence[float],
+                 magnitude: np.ndarray, phase: Optional[np.ndarray] = None,
+                 runs: Optional[Sequence[str]] = None):
+        """
+        Args:
+            parameter: 测量参数
+            channels: 通道名称（与数组第一维对应）
+            frequencies: 频率轴（Hz）
+            magnitude: 幅度 [通道, 频点]（dB，功率参数为 dBm）
+            phase: 相位 [通道, 频点]（度），无相位时为 None
+            runs: 各通道数据来源的运行ID
+        """
+        self.parameter = parameter.upper()
+        self.channels = list(channels)
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.runs = list(runs) if runs is not None else [None] * len(self.channels)
+        if len(self.channels) < 2:
+            raise ValueError("一致性分析至少需要2个通道")
+
+        self.metrics = {'magnitude': channel_deviation(magnitude)}
+        if phase is not None:
+            self.metrics['phase'] = channel_deviation(phase, circular=True)
+
+    @classmethod
+    def from_complex(cls, parameter: str, channels: Sequence[str], frequencies: Sequence[float],
+                     values: np.ndarray, runs: Optional[Sequence[str]] = None) -> 'ChannelConsistency':
+        """由复数数据 [通道, 频点] 创建"""
+        values = np.asarray(values, dtype=np.complex128)
+        return cls(parameter, channels, frequencies, magnitude_db(values), phase_deg(values), runs)
+
+    def offenders(self, tolerances: Dict[str, Optional[float]]) -> List[Dict]:
+        """
+        逐通道汇总偏差并按容差判定
+
+        Args:
+            tolerances: {'magnitude': dB, 'phase': 度}，None 表示该量不判定
+
+        Returns:
+            每个通道一项：最大偏差、所在频率、超差点数与是否超差
+        """
+        report = []
+        for idx, channel in enumerate(self.channels):
+            item = {'channel': channel, 'run_id': self.runs[idx], 'failed': False}
+            for quantity, metric in self.metrics.items():
+                deviation = np.abs(metric['deviation'][idx])
+                worst = int(deviation.argmax())
+                summary = {
+                    'max_deviation': float(deviation[worst]),
+                    'max_deviation_frequency': float(self.frequencies[worst]),
+                    'rms_deviation': float(np.sqrt(np.mean(deviation ** 2))),
+                }
+                tolerance = tolerances.get(quantity)
+                if tolerance is not None:
+                    failing = int(np.count_nonzero(deviation > tolerance))
+                    summary['failed_points'] = failing
+                    item['failed'] = item['failed'] or failing > 0
+                item[quantity] = summary
+            report.append(item)
+        return report
+
+    def to_dict(self, tolerances: Optional[Dict[str, Optional[float]]] = None,
+                max_points: Optional[int] = None) -> Dict:
+        """
+        转换为可JSON序列化的字典（超差判定按全部频点，按频点曲线可抽取）
+
+        Args:
+            tolerances: 容差 {'magnitude': dB, 'phase': 度}
+            max_points: 按频点曲线的最大点数
+        """
+        tolerances = tolerances or {}
+        n_points = len(self.frequencies)
+        index = np.arange(n_points)
+        if max_points and n_points > max_points > 1:
+            index = np.unique(np.linspace(0, n_points - 1, int(max_points)).round().astype(np.int64))
+
+        channels = self.offenders(tolerances)
+        result = {
+            'parameter': self.parameter,
+            'channels': self.channels,
+            'total_points': int(n_points),
+            'decimated': len(index) < n_points,
+            'frequencies': self.frequencies[index].tolist(),
+            'tolerances': {q: tolerances.get(q) for q in self.metrics},
+            'offenders': [item['channel'] for item in channels if item['failed']],
+            'summary': channels,
+        }
+        for quantity, metric in self.metrics.items():
+            worst = int(metric['delta'].argmax())
+            result[quantity] = {
+                'mean': metric['mean'][index].tolist(),
+                'spread': metric['spread'][index].tolist(),
+                'delta': metric['delta'][index].tolist(),
+                'worst_pair': np.stack([metric['high'][index], metric['low'][index]], axis=1).tolist(),
+                'max_delta': float(metric['delta'][worst]),
+                'max_delta_frequency': float(self.frequencies[worst]),
+                'max_delta_pair': [self.channels[metric['high'][worst]], self.channels[metric['low'][worst]]],
+                'deviation': metric['deviation'][:, index].tolist(),
+            }
+        return result
@@ -0,0 +1,267 @@
+"""
+误差修正引擎（全链路幅相误差修正）
+将已存储的误差项应用到原始复数测量数据，支持：
+    one_port   单端口三项误差修正（方向性、源匹配、反射跟踪）
+    response   传输响应修正（传输跟踪，可选隔离）
+    two_port   双端口12项误差修正
+
+误差项形状为 [point] 或 [channel, point]，测量数据形状为 [..., point]，
+按 NumPy 广播规则计算，多通道（如64路输出）一次批量完成。
+逐通道误差项的第 n 行对应矩阵输出通道 CH(n+1)；逐通道测量时只使用当前通道的一行。
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 各误差模型需要的误差项
+ERROR_TERMS = {
+    'one_port': ('ed', 'es', 'er'),
+    'response': ('et',),
+    'two_port': ('edf', 'esf', 'erf', 'exf', 'elf', 'etf',
+                 'edr', 'esr', 'err', 'exr', 'elr', 'etr'),
+}
+OPTIONAL_TERMS = {
+    'response': ('ex',),
+}
+TWO_PORT_PARAMETERS = ('S11', 'S21', 'S12', 'S22')
+
+
+def correct_one_port(s11m: np.ndarray, ed: np.ndarray, es: np.ndarray, er: np.ndarray) -> np.ndarray:
+    """单端口修正: S11 = (S11m - Ed) / (Er + Es·(S11m - Ed))"""
+    delta = s11m - ed
+    return delta / (er + es * delta)
+
+
+def correct_response(s21m: np.ndarray, et: np.ndarray, ex: Optional[np.ndarray] = None) -> np.ndarray:
+    """传输响应修正: S21 = (S21m - Ex) / Et"""
+    if ex is not None:
+        s21m = s21m - ex
+    return s21m / et
+
+
+def correct_two_port(s11m: np.ndarray, s21m: np.ndarray, s12m: np.ndarray, s22m: np.ndarray,
+                     terms: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    双端口12项误差修正
+
+    Args:
+        s11m/s21m/s12m/s22m: 原始测量数据
+        terms: 正向 edf/esf/erf/exf/elf/etf 与反向 edr/esr/err/exr/elr/etr 误差项
+
+    Returns:
+        修正后的 (S11, S21, S12, S22)
+    """
+    a = (s11m - terms['edf']) / terms['erf']
+    b = (s21m - terms['exf']) / terms['etf']
+    c = (s12m - terms['exr']) / terms['etr']
+    d = (s22m - terms['edr']) / terms['err']
+    esf, esr, elf, elr = terms['esf'], terms['esr'], terms['elf'], terms['elr']
+
+    bc = b * c
+    denominator = (1 + a * esf) * (1 + d * esr) - bc * elf * elr
+    s11 = (a * (1 + d * esr) - elf * bc) / denominator
+    s21 = b * (1 + d * (esr - elf)) / denominator
+    s12 = c * (1 + a * (esf - elr)) / denominator
+    s22 = (d * (1 + a * esf) - elr * bc) / denominator
+    return s11, s21, s12, s22
+
+
+class ErrorCorrection:
+    """一组误差项及其适用的频率轴"""
+
+    def __init__(self, kind: str, frequencies: Sequence[float], terms: Dict[str, np.ndarray],
+                 port: str = None, name: str = '', set_id: str = None):
+        """
+        Args:
+            kind: 误差模型 'one_port' / 'response' / 'two_port'
+            frequencies: 误差项的频率轴（Hz）
+            terms: 误差项 {名称: 复数数组}，形状 [point] 或 [channel, point]
+            port: 单端口/响应修正对应的测量参数（如 'S11'、'S21'），双端口忽略
+            name: 名称（用于显示）
+            set_id: 来自校准集存储时的校准集ID
+        """
+        if kind not in ERROR_TERMS:
+            raise ValueError(f"不支持的误差模型: {kind}")
+        missing = [t for t in ERROR_TERMS[kind] if t not in terms]
+        if missing:
+            raise ValueError(f"误差模型 {kind} 缺少误差项: {', '.join(missing)}")
+        if kind != 'two_port' and not port:
+            raise ValueError(f"误差模型 {kind} 需要指定测量参数")
+
+        self.kind = kind
+        self.name = name
+        self.set_id = set_id
+        self.port = port.upper() if port else None
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        allowed = ERROR_TERMS[kind] + OPTIONAL_TERMS.get(kind, ())
+        self.terms = {k: np.asarray(v, dtype=np.complex128) for k, v in terms.items() if k in allowed}
+        for key, value in self.terms.items():
+            if value.shape[-1] != len(self.frequencies):
+                raise ValueError(f"误差项 {key} 的点数({value.shape[-1]})与频率点数({len(self.frequencies)})不一致")
+
+    @property
+    def parameters(self) -> Tuple[str, ...]:
+        """需要（并输出）的测量参数"""
+        return TWO_PORT_PARAMETERS if self.kind == 'two_port' else (self.port,)
+
+    @property
+    def channels(self) -> Optional[int]:
+        """误差项的通道数，误差项与通道无关时为 None"""
+        shapes = [v.shape for v in self.terms.values()]
+        return shapes[0][0] if shapes and len(shapes[0]) == 2 else None
+
+    def matches_grid(self, frequencies: Sequence[float]) -> bool:
+        """测量频率轴是否与误差项的频率轴一致"""
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        return frequencies.shape == self.frequencies.shape and np.allclose(
+            frequencies, self.frequencies, rtol=1e-9, atol=1e-3
+        )
+
+    def channel_index(self, label: Optional[str]) -> Optional[int]:
+        """
+        测量通道（如 'CH12'）对应的误差项行号
+
+        Returns:
+            误差项与通道无关时返回 None
+
+        Raises:
+            ValueError: 逐通道误差项未指定通道，或通道超出误差项的通道数
+        """
+        channels = self.channels
+        if channels is None:
+            return None
+        if not label:
+            raise ValueError(f"误差项包含 {channels} 个通道，需要指定测量通道")
+        text = str(label).strip().upper()
+        number = text[2:] if text.startswith('CH') else text
+        if not number.isdigit() or not 1 <= int(number) <= channels:
+            raise ValueError(f"测量通道 {label} 超出误差项的通道范围 CH1-CH{channels}")
+        return int(number) - 1
+
+    def _select(self, channel: Optional[int]) -> Dict[str, np.ndarray]:
+        """选择单个通道的误差项；未指定时保留通道维，与测量数据广播"""
+        if channel is None or self.channels is None:
+            return self.terms
+        return {k: v[channel] for k, v in self.terms.items()}
+
+    def apply(self, measured: Dict[str, np.ndarray], channel: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        修正原始测量数据
+
+        Args:
+            measured: {测量参数: 复数数组}，形状 [point] 或 [channel, point]
+            channel: 只使用该通道的误差项（逐通道测量时）
+
+        Returns:
+            {测量参数: 修正后的复数数组}
+        """
+        terms = self._select(channel)
+        if self.kind == 'one_port':
+            return {self.port: correct_one_port(measured[self.port], terms['ed'], terms['es'], terms['er'])}
+        if self.kind == 'response':
+            return {self.port: correct_response(measured[self.port], terms['et'], terms.get('ex'))}
+        return dict(zip(TWO_PORT_PARAMETERS, correct_two_port(
+            *(measured[p] for p in TWO_PORT_PARAMETERS), terms
+        )))
+
+    def to_dict(self) -> Dict:
+        """概要信息"""
+        return {
+            'name': self.name,
+            'set_id': self.set_id,
+            'kind': self.kind,
+            'port': self.port,
+            'parameters': list(self.parameters),
+            'points': int(len(self.frequencies)),
+            'channels': self.channels,
+            'start_frequency': float(self.frequencies[0]) if len(self.frequencies) else None,
+            'stop_frequency': float(self.frequencies[-1]) if len(self.frequencies) else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ErrorCorrection':
+        """
+        由JSON数据创建
+
+        误差项格式: {名称: {'real': [...], 'imag': [...]}}
+        """
+        terms = {}
+        for key, value in (data.get('terms') or {}).items():
+            real = np.asarray(value.get('real', []), dtype=np.float64)
+            imag = np.asarray(value.get('imag', np.zeros_like(real)), dtype=np.float64)
+            terms[key.lower()] = real + 1j * imag
+        return cls(
+            data.get('kind', ''),
+            data.get('frequencies', []),
+            terms,
+            port=data.get('port'),
+            name=data.get('name', '')
+        )
+
+
+class CorrectionPipeline:
+    """
+    测量流水线中的实时修正
+
+    单端口/响应修正在每次测量到达时立即输出；双端口修正需要同一序号的
+    S11/S21/S12/S22 全部到达后一次输出四个修正结果，因此测量按序号交错进行
+    （每个序号依次测量四个参数）。缓存最多保留一个序号的原始数据：新序号到达时，
+    未收齐的旧序号被丢弃并记为未完成。
+    运行结束时调用 flush() 清空缓存，取得未收齐参数的测量序号。
+    """
+
+    def __init__(self, correction: ErrorCorrection, channel: Optional[int] = None):
+        """
+        Args:
+            correction: 误差修正
+            channel: 使用的误差项通道
+        """
+        self.correction = correction
+        self.channel = channel
+        self._pending = {}  # 测量序号 -> {参数: 原始复数数据}
+        self._incomplete = []  # 被丢弃的未收齐测量序号
+
+    def accepts(self, parameter: str) -> bool:
+        """该参数是否参与修正"""
+        return parameter.upper() in self.correction.parameters
+
+    def process(self, parameter: str, sweep_id: int, values: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+        """
+        处理一次原始测量
+
+        Args:
+            parameter: 测量参数
+            sweep_id: 测量序号
+            values: 原始复数数据
+
+        Returns:
+            本次可输出的 [(参数, 修正后数据)]
+        """
+        parameter = parameter.upper()
+        if not self.accepts(parameter):
+            return []
+        if self.correction.kind != 'two_port':
+            return list(self.correction.apply({parameter: values}, self.channel).items())
+
+        for stale in [sid for sid in self._pending if sid != sweep_id]:
+            del self._pending[stale]
+            self._incomplete.append(stale)
+        pending = self._pending.setdefault(sweep_id, {})
+        pending[parameter] = values
+        if len(pending) < len(TWO_PORT_PARAMETERS):
+            return []
+        del self._pending[sweep_id]
+        return list(self.correction.apply(pending, self.channel).items())
+
+    def flush(self) -> List[int]:
+        """
+        结束处理：丢弃未收齐四个参数的测量（各参数测量次数不同，如自适应提前结束、跳过或停止时）
+
+        Returns:
+            未输出修正结果的测量序号
+        """
+        incomplete = sorted(self._incomplete + list(self._pending))
+        self._pending.clear()
+        self._incomplete = []
+        return incomplete
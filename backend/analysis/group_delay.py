@@ -0,0 +1,121 @@
+"""
+群时延与相位线性度
+由复数测量数据（SDATA）计算派生曲线，数据形状为 [..., 频点]，沿最后一维向量化计算：
+    UPH   展开相位（度）
+    GD    孔径平滑群时延（ns）：τ = -Δφ / (2π·Δf)，Δ 取孔径两端
+    PDEV  相对线性相位的偏差（度）：展开相位减去最小二乘直线拟合
+
+派生曲线以 <参数>_<输出> 命名（如 S21_GD），按标量曲线保存与统计。
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# 输出代码 -> (说明, 单位, CSV列名)
+DERIVED_OUTPUTS = {
+    'UPH': ('展开相位', 'deg', 'UnwrappedPhase(deg)'),
+    'GD': ('群时延', 'ns', 'GroupDelay(ns)'),
+    'PDEV': ('线性相位偏差', 'deg', 'PhaseDeviation(deg)'),
+}
+DERIVED_HEADERS = tuple(header for _, _, header in DERIVED_OUTPUTS.values())
+
+
+def unwrap_phase(values: np.ndarray) -> np.ndarray:
+    """复数数据 → 展开相位（弧度）"""
+    return np.unwrap(np.angle(values), axis=-1)
+
+
+def group_delay(frequencies: Sequence[float], phase: np.ndarray, aperture: int = 1) -> np.ndarray:
+    """
+    孔径平滑群时延
+
+    Args:
+        frequencies: 频率轴（Hz）
+        phase: 展开相位（弧度），形状 [..., 频点]
+        aperture: 孔径（频率步进数），两端点处孔径向内平移保持宽度不变
+
+    Returns:
+        群时延（秒）
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    n_points = len(frequencies)
+    aperture = int(aperture)
+    if not 1 <= aperture < n_points:
+        raise ValueError(f"群时延孔径必须在 1 - {n_points - 1} 个频率步进之间")
+    lo = np.clip(np.arange(n_points) - aperture // 2, 0, n_points - 1 - aperture)
+    hi = lo + aperture
+    return -(phase[..., hi] - phase[..., lo]) / (2 * np.pi * (frequencies[hi] - frequencies[lo]))
+
+
+def linear_phase_fit(frequencies: Sequence[float], phase: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    展开相位的最小二乘直线拟合
+
+    Args:
+        frequencies: 频率轴（Hz）
+        phase: 展开相位（弧度），形状 [..., 频点]
+
+    Returns:
+        (残差（弧度，形状同 phase）, 拟合得到的电延时（秒，形状 [...]))
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    centered = frequencies - frequencies.mean()
+    phase_mean = phase.mean(axis=-1, keepdims=True)
+    slope = ((phase - phase_mean) @ centered) / (centered @ centered)
+    residual = phase - phase_mean - slope[..., None] * centered
+    return residual, -slope / (2 * np.pi)
+
+
+class DerivedTraces:
+    """测量流水线中的派生曲线计算"""
+
+    def __init__(self, outputs: Sequence[str], aperture: int = 1):
+        """
+        Args:
+            outputs: 输出代码列表（'UPH' / 'GD' / 'PDEV'）
+            aperture: 群时延孔径（频率步进数）
+        """
+        outputs = [str(o).strip().upper() for o in outputs]
+        unknown = [o for o in outputs if o not in DERIVED_OUTPUTS]
+        if unknown:
+            raise ValueError(f"不支持的派生输出: {', '.join(unknown)}")
+        if not outputs:
+            raise ValueError("派生输出不能为空")
+        if int(aperture) < 1:
+            raise ValueError("群时延孔径至少为1个频率步进")
+        self.outputs = list(dict.fromkeys(outputs))
+        self.aperture = int(aperture)
+
+    def compute(self, parameter: str, frequencies: Sequence[float], values: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+        """
+        计算一次测量的派生曲线
+
+        Args:
+            parameter: 测量参数（派生曲线名称前缀）
+            frequencies: 频率轴（Hz）
+            values: 复数数据 [..., 频点]
+
+        Returns:
+            [(派生参数名, 数值数组)]
+        """
+        phase = unwrap_phase(values)
+        results = []
+        for output in self.outputs:
+            if output == 'UPH':
+                data = np.degrees(phase)
+            elif output == 'GD':
+                data = group_delay(frequencies, phase, self.aperture) * 1e9
+            else:
+                data = np.degrees(linear_phase_fit(frequencies, phase)[0])
+            results.append((f"{parameter.upper()}_{output}", data))
+        return results
+
+    def to_dict(self) -> Dict:
+        return {'outputs': self.outputs, 'aperture': self.aperture}
+
+
+def derived_header(parameter: str) -> str:
+    """派生参数在CSV中的列名；不是派生参数时返回空字符串"""
+    suffix = parameter.upper().rsplit('_', 1)[-1]
+    return DERIVED_OUTPUTS[suffix][2] if '_' in parameter and suffix in DERIVED_OUTPUTS else ''
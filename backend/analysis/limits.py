@@ -0,0 +1,212 @@
+"""
+极限线（模板）判定
+每个模板为某测量参数的分段线性上限/下限，按测量频率轴插值后逐次测量向量化比较。
+边界只在模板定义的频率范围内生效，范围外的频点不参与判定。
+
+失败处理动作：
+    continue        只记录判定结果
+    skip_parameter  硬模板失败后跳过该参数剩余的测量次数
+    abort           硬模板失败后结束本次运行（多通道测试中即转入下一通道）
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+LIMIT_ACTIONS = ('continue', 'skip_parameter', 'abort')
+LIMIT_QUANTITIES = ('magnitude', 'phase')
+
+
+def limit_line(points: Optional[Sequence[Sequence[float]]]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    解析分段线性边界 [[频率Hz, 值], ...]
+
+    Returns:
+        (频率, 值)，未定义时为 None
+    """
+    if not points:
+        return None
+    array = np.asarray(points, dtype=np.float64)
+    if array.ndim != 2 or array.shape[1] != 2 or len(array) < 2:
+        raise ValueError("极限线至少需要2个 [频率, 值] 点")
+    if np.any(np.diff(array[:, 0]) < 0):
+        raise ValueError("极限线的频率必须递增")
+    return array[:, 0], array[:, 1]
+
+
+class LimitMask:
+    """单个测量参数的极限模板"""
+
+    def __init__(self, parameter: str, upper=None, lower=None, quantity: str = 'magnitude',
+                 hard: bool = True, name: str = ''):
+        """
+        Args:
+            parameter: 测量参数（如 'S21'、'S21_CORR'）
+            upper: 上限 [[频率Hz, 值], ...]
+            lower: 下限 [[频率Hz, 值], ...]
+            quantity: 判定的量 'magnitude'（dB/dBm）或 'phase'（度）
+            hard: 硬模板失败时触发失败处理动作，软模板只记录
+            name: 名称（用于显示）
+        """
+        if quantity not in LIMIT_QUANTITIES:
+            raise ValueError(f"不支持的判定量: {quantity}")
+        self.parameter = str(parameter).strip().upper()
+        if not self.parameter:
+            raise ValueError("极限模板缺少测量参数")
+        self.upper = limit_line(upper)
+        self.lower = limit_line(lower)
+        if self.upper is None and self.lower is None:
+            raise ValueError(f"参数 {self.parameter} 的极限模板没有上限或下限")
+        self.quantity = quantity
+        self.hard = bool(hard)
+        self.name = name or f"{self.parameter} {quantity}"
+        self._grid = None  # (频率轴, 上限, 下限) 缓存
+
+    def bounds(self, frequencies: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """边界插值到测量频率轴（范围外为 NaN），同一频率轴只计算一次"""
+        if self._grid is not None and np.array_equal(self._grid[0], frequencies):
+            return self._grid[1], self._grid[2]
+        upper = None if self.upper is None else np.interp(frequencies, *self.upper, left=np.nan, right=np.nan)
+        lower = None if self.lower is None else np.interp(frequencies, *self.lower, left=np.nan, right=np.nan)
+        self._grid = (np.array(frequencies), upper, lower)
+        return upper, lower
+
+    def margin(self, frequencies: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """各频点到最近边界的余量（负值为超限，模板范围外为 NaN）"""
+        upper, lower = self.bounds(frequencies)
+        margins = [m for m in (None if upper is None else upper - values,
+                               None if lower is None else values - lower) if m is not None]
+        return margins[0] if len(margins) == 1 else np.fmin(margins[0], margins[1])
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'parameter': self.parameter,
+            'quantity': self.quantity,
+            'hard': self.hard,
+            'upper': None if self.upper is None else np.column_stack(self.upper).tolist(),
+            'lower': None if self.lower is None else np.column_stack(self.lower).tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LimitMask':
+        return cls(
+            data.get('parameter', ''),
+            upper=data.get('upper'),
+            lower=data.get('lower'),
+            quantity=data.get('quantity', 'magnitude'),
+            hard=data.get('hard', True),
+            name=data.get('name', '')
+        )
+
+
+class LimitEvaluator:
+    """一次测量运行的极限判定（逐次测量更新判定结果）"""
+
+    def __init__(self, masks: Sequence[LimitMask], on_fail: str = 'continue'):
+        """
+        Args:
+            masks: 极限模板列表
+            on_fail: 硬模板失败时的处理动作
+        """
+        if on_fail not in LIMIT_ACTIONS:
+            raise ValueError(f"不支持的失败处理动作: {on_fail}")
+        self.masks = list(masks)
+        self.on_fail = on_fail
+        self.results = {}  # 模板下标 -> 累计判定结果
+        self.pending_action = None
+
+    def accepts(self, parameter: str) -> bool:
+        """该参数是否有极限模板"""
+        parameter = parameter.upper()
+        return any(mask.parameter == parameter for mask in self.masks)
+
+    def evaluate(self, parameter: str, sweep_id: int, frequencies: Sequence[float],
+                 magnitude: Sequence[float], phase: Optional[Sequence[float]] = None) -> bool:
+        """
+        判定一次测量
+
+        Args:
+            parameter: 测量参数
+            sweep_id: 测量序号
+            frequencies: 频率轴（Hz）
+            magnitude: 幅度（dB/dBm）
+            phase: 相位（度）
+
+        Returns:
+            是否通过（无对应模板时为 True）；硬模板失败时设置 pending_action
+        """
+        parameter = parameter.upper()
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        values = {'magnitude': magnitude, 'phase': phase}
+        passed = True
+        for idx, mask in enumerate(self.masks):
+            if mask.parameter != parameter or values[mask.quantity] is None:
+                continue
+            margin = mask.margin(frequencies, np.asarray(values[mask.quantity], dtype=np.float64))
+            failed = np.less(margin, 0, where=~np.isnan(margin), out=np.zeros(margin.shape, dtype=bool))
+            n_failed = int(np.count_nonzero(failed))
+
+            result = self.results.setdefault(idx, {
+                'sweeps': 0, 'failed_sweeps': 0, 'first_failed_sweep': None,
+                'max_failed_points': 0, 'worst_margin': None, 'worst_frequency': None
+            })
+            result['sweeps'] += 1
+            if not np.all(np.isnan(margin)):
+                worst = int(np.nanargmin(margin))
+                if result['worst_margin'] is None or margin[worst] < result['worst_margin']:
+                    result['worst_margin'] = float(margin[worst])
+                    result['worst_frequency'] = float(frequencies[worst])
+            if n_failed:
+                result['failed_sweeps'] += 1
+                result['max_failed_points'] = max(result['max_failed_points'], n_failed)
+                if result['first_failed_sweep'] is None:
+                    result['first_failed_sweep'] = int(sweep_id)
+                if mask.hard:
+                    passed = False
+                    if self.on_fail != 'continue' and self.pending_action is None:
+                        self.pending_action = self.on_fail
+        return passed
+
+    def take_action(self) -> Optional[str]:
+        """取出待执行的失败处理动作"""
+        action, self.pending_action = self.pending_action, None
+        return action
+
+    def verdict(self) -> Dict:
+        """判定结论：所有已判定的硬模板均无超限为 PASS；没有任何判定时为 NOT_TESTED"""
+        masks = []
+        for idx, mask in enumerate(self.masks):
+            result = self.results.get(idx)
+            masks.append({
+                **mask.to_dict(),
+                'verdict': 'NOT_TESTED' if result is None else ('FAIL' if result['failed_sweeps'] else 'PASS'),
+                **(result or {})
+            })
+        tested = [m for m in masks if m['verdict'] != 'NOT_TESTED']
+        if not tested:
+            overall = 'NOT_TESTED'
+        elif any(m['verdict'] == 'FAIL' and m['hard'] for m in tested):
+            overall = 'FAIL'
+        else:
+            overall = 'PASS'
+        return {
+            'verdict': overall,
+            'on_fail': self.on_fail,
+            'warnings': [m['name'] for m in tested if m['verdict'] == 'FAIL' and not m['hard']],
+            'masks': masks,
+        }
+
+    def to_dict(self) -> Dict:
+        return {'on_fail': self.on_fail, 'masks': [mask.to_dict() for mask in self.masks]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LimitEvaluator':
+        masks = data.get('masks') or []
+        if not masks:
+            raise ValueError("极限模板不能为空")
+        return cls([LimitMask.from_dict(m) for m in masks], data.get('on_fail', 'continue'))
+
+    def reset(self) -> 'LimitEvaluator':
+        """新运行使用同一组模板重新判定"""
+        return LimitEvaluator(self.masks, self.on_fail)
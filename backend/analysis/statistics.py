@@ -0,0 +1,406 @@
+"""
+在线统计引擎
+每次测量到达时按频点更新均值、方差（Welford算法）、最值和可选的分位数，
+无需保存全部测量数据，也无需二次遍历。
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .complex_trace import magnitude_db, phase_deg
+from .consistency import wrap_phase
+
+
+def finite_list(values: np.ndarray) -> List[Optional[float]]:
+    """转换为列表，非有限值（NaN、±inf）转换为 None（JSON 中为 null，NaN 不是合法的 JSON）"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+class P2Quantile:
+    """
+    P² 分位数估计（Jain & Chlamtac），对所有频点向量化
+
+    每个频点只维护 5 个标记，内存与测量次数无关。
+    """
+
+    def __init__(self, p: float, n_points: int):
+        """
+        Args:
+            p: 分位数（0-1）
+            n_points: 频点数
+        """
+        self.p = float(p)
+        self.count = 0
+        self._init = []
+        self.q = np.zeros((5, n_points))  # 标记高度
+        self.n = np.tile(np.arange(5, dtype=np.float64)[:, None], (1, n_points))  # 标记位置
+        self.desired = np.array([0, 2 * p, 4 * p, 2 + 2 * p, 4])[:, None] * np.ones((1, n_points))
+        self.increment = np.array([0, p / 2, p, (1 + p) / 2, 1])[:, None]
+
+    def update(self, x: np.ndarray):
+        """加入一次测量"""
+        self.count += 1
+        if self.count <= 5:
+            self._init.append(np.array(x, dtype=np.float64))
+            if self.count == 5:
+                self.q = np.sort(np.stack(self._init), axis=0)
+                self._init = []
+            return
+
+        q, n = self.q, self.n
+        # 更新两端标记并确定 x 所在单元
+        np.minimum(q[0], x, out=q[0])
+        np.maximum(q[4], x, out=q[4])
+        k = (x >= q[1]).astype(np.int64) + (x >= q[2]) + (x >= q[3])
+        n[1:] += (np.arange(1, 5)[:, None] > k[None, :])
+        self.desired += self.increment
+
+        # 调整中间三个标记
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            move_up = (d >= 1) & (n[i + 1] - n[i] > 1)
+            move_down = (d <= -1) & (n[i - 1] - n[i] < -1)
+            move = move_up | move_down
+            if not move.any():
+                continue
+            step = np.where(move_up, 1.0, -1.0)
+            span = n[i + 1] - n[i - 1]
+            right = n[i + 1] - n[i]
+            left = n[i] - n[i - 1]
+            parabolic = q[i] + step / span * (
+                (left + step) * (q[i + 1] - q[i]) / right
+                + (right - step) * (q[i] - q[i - 1]) / left
+            )
+            neighbour = np.where(move_up, q[i + 1], q[i - 1])
+            neighbour_pos = np.where(move_up, n[i + 1], n[i - 1])
+            linear = q[i] + step * (neighbour - q[i]) / (neighbour_pos - n[i])
+            ok = (q[i - 1] < parabolic) & (parabolic < q[i + 1])
+            q[i] = np.where(move, np.where(ok, parabolic, linear), q[i])
+            n[i] = np.where(move, n[i] + step, n[i])
+
+    def value(self) -> np.ndarray:
+        """当前分位数估计"""
+        if self.count == 0:
+            return np.full(self.q.shape[1], np.nan)
+        if self.count < 5:
+            return np.percentile(np.stack(self._init), self.p * 100, axis=0)
+        return self.q[2].copy()
+
+
+class RunningStatistics:
+    """按频点的在线统计（均值、方差、最值、分位数）"""
+
+    def __init__(self, n_points: int, percentiles: Optional[Sequence[float]] = None):
+        """
+        Args:
+            n_points: 频点数
+            percentiles: 需要估计的百分位数（如 [5, 50, 95]），None 表示不估计
+        """
+        self.n_points = int(n_points)
+        self.count = 0
+        self.mean = np.zeros(self.n_points)
+        self._m2 = np.zeros(self.n_points)
+        self.min = np.full(self.n_points, np.inf)
+        self.max = np.full(self.n_points, -np.inf)
+        self.quantiles = {float(p): P2Quantile(p / 100.0, self.n_points) for p in (percentiles or [])}
+
+    def update(self, values: Sequence[float]):
+        """
+        加入一次测量（Welford 增量更新）
+
+        Args:
+            values: 本次测量各频点的值
+        """
+        x = np.asarray(values, dtype=np.float64)
+        if x.shape != (self.n_points,):
+            raise ValueError(f"数据点数({x.size})与频率点数({self.n_points})不一致")
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        np.minimum(self.min, x, out=self.min)
+        np.maximum(self.max, x, out=self.max)
+        for estimator in self.quantiles.values():
+            estimator.update(x)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """样本方差（ddof=1）"""
+        if self.count < 2:
+            return np.zeros(self.n_points)
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        """样本标准差"""
+        return np.sqrt(self.variance)
+
+    @property
+    def sem(self) -> np.ndarray:
+        """均值的标准误差"""
+        if self.count < 2:
+            return np.full(self.n_points, np.inf)
+        return self.std / np.sqrt(self.count)
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """当前统计量（NumPy数组）"""
+        result = {
+            'mean': self.mean.copy(),
+            'std': self.std,
+            'min': self.min.copy(),
+            'max': self.max.copy(),
+        }
+        for p, estimator in self.quantiles.items():
+            result[f"p{p:g}"] = estimator.value()
+        return result
+
+    def to_dict(self, point_index: Optional[np.ndarray] = None) -> Dict:
+        """
+        转换为可JSON序列化的字典
+
+        Args:
+            point_index: 只输出这些频点（用于抽取），None 输出全部
+        """
+        data = {'count': self.count}
+        for key, values in self.summary().items():
+            if point_index is not None:
+                values = values[point_index]
+            data[key] = finite_list(values)
+        return data
+
+
+class PhaseStatistics(RunningStatistics):
+    """
+    按频点的相位在线统计（度）
+
+    每次测量先折算到当前均值 ±180° 范围内再累积，避免在 ±180° 附近回绕时
+    均值趋向 0°、标准差接近 180°；输出时均值折算回 [-180, 180)，
+    最值与分位数随均值平移相同的整周数。
+    """
+
+    def update(self, values: Sequence[float]):
+        x = np.asarray(values, dtype=np.float64)
+        if self.count and x.shape == self.mean.shape:
+            x = self.mean + wrap_phase(x - self.mean)
+        super().update(x)
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        result = super().summary()
+        offset = self.mean - wrap_phase(self.mean)
+        for key, values in result.items():
+            if key != 'std':
+                result[key] = values - offset
+        return result
+
+
+class ComplexRunningStatistics:
+    """
+    按频点的复数域在线平均
+
+    噪声在复数域平均时相互抵消，而在 dB 幅度上平均会引入偏差；
+    幅度与相位由复数均值按需导出。
+    """
+
+    def __init__(self, n_points: int):
+        """
+        Args:
+            n_points: 频点数
+        """
+        self.n_points = int(n_points)
+        self.count = 0
+        self.mean = np.zeros(self.n_points, dtype=np.complex128)
+        self._m2 = np.zeros(self.n_points)
+
+    def update(self, values: np.ndarray):
+        """加入一次复数测量"""
+        x = np.asarray(values, dtype=np.complex128)
+        if x.shape != (self.n_points,):
+            raise ValueError(f"数据点数({x.size})与频率点数({self.n_points})不一致")
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += (delta * np.conj(x - self.mean)).real
+
+    @property
+    def variance(self) -> np.ndarray:
+        """复数样本方差 E|x - mean|²（ddof=1，线性单位）"""
+        if self.count < 2:
+            return np.zeros(self.n_points)
+        return self._m2 / (self.count - 1)
+
+    @property
+    def sem(self) -> np.ndarray:
+        """均值的标准误差（线性单位）"""
+        if self.count < 2:
+            return np.full(self.n_points, np.inf)
+        return np.sqrt(self.variance / self.count)
+
+    @property
+    def magnitude(self) -> np.ndarray:
+        """复数均值的 dB 幅度"""
+        return magnitude_db(self.mean)
+
+    @property
+    def phase(self) -> np.ndarray:
+        """复数均值的相位（度）"""
+        return phase_deg(self.mean)
+
+    def to_dict(self, point_index: Optional[np.ndarray] = None) -> Dict:
+        """转换为可JSON序列化的字典"""
+        index = slice(None) if point_index is None else point_index
+        return {
+            'count': self.count,
+            'magnitude': finite_list(self.magnitude[index]),
+            'phase': finite_list(self.phase[index]),
+            'real': finite_list(self.mean.real[index]),
+            'imag': finite_list(self.mean.imag[index]),
+            'std': finite_list(np.sqrt(self.variance[index])),
+            'sem': finite_list(self.sem[index]),
+        }
+
+
+class TraceStatistics:
+    """单个测量参数的在线统计（幅度/功率，及可选的相位）"""
+
+    def __init__(self, parameter: str, frequencies: Sequence[float], has_phase: bool,
+                 percentiles: Optional[Sequence[float]] = None, has_complex: bool = False):
+        """
+        Args:
+            parameter: 测量参数
+            frequencies: 频率轴（Hz）
+            has_phase: 是否统计相位
+            percentiles: 需要估计的百分位数
+            has_complex: 是否同时进行复数域平均（SDATA）
+        """
+        self.parameter = parameter.upper()
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        n_points = len(self.frequencies)
+        self.magnitude = RunningStatistics(n_points, percentiles)
+        self.phase = PhaseStatistics(n_points, percentiles) if has_phase else None
+        self.vector = ComplexRunningStatistics(n_points) if has_complex else None
+
+    @property
+    def count(self) -> int:
+        return self.magnitude.count
+
+    def update(self, magnitude: Sequence[float], phase: Optional[Sequence[float]] = None,
+               values: Optional[np.ndarray] = None):
+        """加入一次测量（values 为复数数据，可选）"""
+        self.magnitude.update(magnitude)
+        if self.phase is not None and phase is not None:
+            self.phase.update(phase)
+        if self.vector is not None and values is not None:
+            self.vector.update(values)
+
+    def digest(self) -> Dict:
+        """用于测量状态的简要统计（与频点数无关的大小）"""
+        std = self.magnitude.std
+        return {
+            'count': self.count,
+            'points': len(self.frequencies),
+            'mean_std': float(std.mean()) if std.size else 0.0,
+            'max_std': float(std.max()) if std.size else 0.0,
+            'max_std_frequency': float(self.frequencies[int(std.argmax())]) if std.size else None,
+            'max_sem': self.max_sem(),
+        }
+
+    def max_sem(self) -> Optional[float]:
+        """各频点幅度均值标准误差的最大值（少于2次测量时为 None）"""
+        if self.count < 2 or not len(self.frequencies):
+            return None
+        return float(self.magnitude.sem.max())
+
+    def metadata(self) -> Dict:
+        """统计结果中与频点数无关的部分（保存为 JSON，按频点数组见 arrays()）"""
+        n_points = len(self.frequencies)
+        result = {
+            'parameter': self.parameter,
+            'count': self.count,
+            'total_points': n_points,
+            'decimated': False,
+            'start_frequency': float(self.frequencies[0]) if n_points else None,
+            'stop_frequency': float(self.frequencies[-1]) if n_points else None,
+            'magnitude': {'count': self.magnitude.count},
+        }
+        if self.phase is not None and self.phase.count:
+            result['phase'] = {'count': self.phase.count}
+        if self.vector is not None and self.vector.count:
+            result['complex'] = {'count': self.vector.count}
+        return result
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """按频点的统计数组（保存为二进制文件），键为 '<量>.<统计量>'，如 'magnitude.mean'"""
+        result = {'frequencies': self.frequencies}
+        for name, stats in (('magnitude', self.magnitude), ('phase', self.phase)):
+            if stats is not None and stats.count:
+                for key, values in stats.summary().items():
+                    result[f"{name}.{key}"] = values
+        if self.vector is not None and self.vector.count:
+            result['complex.mean'] = self.vector.mean.copy()
+            result['complex.std'] = np.sqrt(self.vector.variance)
+            result['complex.sem'] = self.vector.sem
+        return result
+
+    def to_dict(self, max_points: Optional[int] = None) -> Dict:
+        """
+        完整统计结果
+
+        Args:
+            max_points: 最大返回频点数（超出时等间隔抽取）
+        """
+        n_points = len(self.frequencies)
+        index = None
+        if max_points and 0 < max_points < n_points:
+            index = np.unique(np.linspace(0, n_points - 1, max_points).round().astype(np.int64))
+        frequencies = self.frequencies if index is None else self.frequencies[index]
+        result = {
+            'parameter': self.parameter,
+            'count': self.count,
+            'total_points': n_points,
+            'decimated': index is not None,
+            'frequencies': frequencies.tolist(),
+            'magnitude': self.magnitude.to_dict(index),
+        }
+        if self.phase is not None and self.phase.count:
+            result['phase'] = self.phase.to_dict(index)
+        if self.vector is not None and self.vector.count:
+            result['complex'] = self.vector.to_dict(index)
+        return result
+
+
+class ConvergenceCriterion:
+    """
+    自适应测量次数
+
+    每次测量更新在线统计后判定：测量次数达到最少次数且各频点幅度均值的标准误差
+    均不超过目标值时停止，否则继续测量直到最大次数。
+    """
+
+    def __init__(self, target_sem: float, min_count: int = 5, max_count: int = 50):
+        """
+        Args:
+            target_sem: 目标标准误差（dB/dBm）
+            min_count: 最少测量次数（至少2次）
+            max_count: 最大测量次数
+        """
+        self.target_sem = float(target_sem)
+        self.min_count = int(min_count)
+        self.max_count = int(max_count)
+        if not self.target_sem > 0:
+            raise ValueError("目标标准误差必须大于0")
+        if self.min_count < 2:
+            raise ValueError("自适应测量的最少次数至少为2")
+        if self.max_count < self.min_count:
+            raise ValueError("最大测量次数不能小于最少测量次数")
+
+    def converged(self, statistics: TraceStatistics) -> bool:
+        """当前统计是否已满足目标"""
+        if statistics.count < self.min_count:
+            return False
+        sem = statistics.max_sem()
+        return sem is not None and sem <= self.target_sem
+
+    def to_dict(self) -> Dict:
+        return {'target_sem': self.target_sem, 'min_count': self.min_count, 'max_count': self.max_count}
@@ -0,0 +1,205 @@
+"""
+时域变换与门控
+由复数频域数据计算时域响应，用于定位电缆、开关通路中的不连续点：
+    bandpass  带通冲激响应（任意均匀频率轴，结果为复数，通常看幅度）
+    lowpass   低通冲激/阶跃响应（需要谐波频率轴：起始频率 = 频率步进，DC 由外推得到，结果为实数）
+
+数据形状为 [..., 频点]，沿最后一维批量FFT，多次测量、多通道一次完成。
+门控在时域乘以门函数后变换回频域，得到去除（或只保留）某段时间内反射的频率响应。
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+TRANSFORM_MODES = ('bandpass', 'lowpass')
+RESPONSES = ('impulse', 'step')
+WINDOWS = ('rectangular', 'hann', 'hamming', 'kaiser')
+GATE_SHAPES = ('rectangular', 'tukey')
+
+
+def make_window(name: str, length: int, beta: float = 6.0) -> np.ndarray:
+    """频域窗函数（对称）"""
+    if name == 'rectangular':
+        return np.ones(length)
+    if name == 'hann':
+        return np.hanning(length)
+    if name == 'hamming':
+        return np.hamming(length)
+    if name == 'kaiser':
+        return np.kaiser(length, beta)
+    raise ValueError(f"不支持的窗函数: {name}")
+
+
+def uniform_step(frequencies: np.ndarray) -> float:
+    """均匀频率轴的步进（Hz），非均匀时报错"""
+    if len(frequencies) < 2:
+        raise ValueError("时域变换至少需要2个频点")
+    steps = np.diff(frequencies)
+    step = float(steps.mean())
+    if step <= 0 or not np.allclose(steps, step, rtol=1e-6, atol=1e-3):
+        raise ValueError("时域变换需要均匀递增的频率轴（线性扫描）")
+    return step
+
+
+def gate_function(times: np.ndarray, start: float, stop: float, shape: str = 'tukey',
+                  taper: float = 0.2, notch: bool = False) -> np.ndarray:
+    """
+    时间门
+
+    Args:
+        times: 时间轴（秒）
+        start/stop: 门的起止时间（秒）
+        shape: 'rectangular' 或 'tukey'（平顶，两侧余弦过渡）
+        taper: tukey 门两侧过渡段占门宽的比例（合计）
+        notch: True 时为陷波门（去除门内响应）
+    """
+    if stop <= start:
+        raise ValueError("门的结束时间必须大于起始时间")
+    if shape not in GATE_SHAPES:
+        raise ValueError(f"不支持的门形状: {shape}")
+    position = (times - start) / (stop - start)
+    gate = ((position >= 0) & (position <= 1)).astype(np.float64)
+    if shape == 'tukey' and taper > 0:
+        edge = min(float(taper), 1.0) / 2
+        rising = (position >= 0) & (position < edge)
+        falling = (position > 1 - edge) & (position <= 1)
+        gate[rising] = 0.5 * (1 - np.cos(np.pi * position[rising] / edge))
+        gate[falling] = 0.5 * (1 - np.cos(np.pi * (1 - position[falling]) / edge))
+    return 1 - gate if notch else gate
+
+
+class TimeDomainTransform:
+    """某一频率轴上的时域变换（窗函数、FFT长度与时间轴预先计算，可重复用于多组数据）"""
+
+    def __init__(self, frequencies: Sequence[float], mode: str = 'bandpass', response: str = 'impulse',
+                 window: str = 'kaiser', beta: float = 6.0, pad: int = 4):
+        """
+        Args:
+            frequencies: 频率轴（Hz，均匀）
+            mode: 'bandpass' 或 'lowpass'
+            response: 'impulse' 或 'step'（阶跃只用于低通）
+            window: 频域窗函数
+            beta: Kaiser 窗参数（0 最小旁瓣抑制，6 常规，13 最大）
+            pad: 补零倍数（时间轴插值）
+        """
+        if mode not in TRANSFORM_MODES:
+            raise ValueError(f"不支持的变换模式: {mode}")
+        if response not in RESPONSES:
+            raise ValueError(f"不支持的响应类型: {response}")
+        if mode == 'bandpass' and response == 'step':
+            raise ValueError("阶跃响应只能使用低通模式")
+        if not 1 <= int(pad) <= 64:
+            raise ValueError("补零倍数范围为 1-64")
+
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.mode = mode
+        self.response = response
+        self.step = uniform_step(self.frequencies)
+        n_points = len(self.frequencies)
+
+        if mode == 'lowpass':
+            if abs(self.frequencies[0] - self.step) > 1e-3 * self.step:
+                raise ValueError("低通模式需要谐波频率轴（起始频率等于频率步进）")
+            # 单边窗：窗中心对应 DC
+            self.window = make_window(window, 2 * n_points + 1, beta)[n_points:]
+            self.n_fft = int(2 ** np.ceil(np.log2(2 * n_points * int(pad))))
+            self.scale = self.n_fft / (self.window[0] + 2 * self.window[1:].sum())
+        else:
+            self.window = make_window(window, n_points, beta)
+            self.n_fft = int(2 ** np.ceil(np.log2(n_points * int(pad))))
+            self.scale = self.n_fft / self.window.sum()
+        self.time = np.fft.fftshift(np.fft.fftfreq(self.n_fft, d=self.step))
+        # 门控使用带通方式（任意均匀频率轴），窗函数压低旁瓣泄漏，变换回频域后再除去窗函数
+        self.gate_window = np.maximum(make_window(window, n_points, beta), 1e-6)
+
+    @property
+    def time_resolution(self) -> float:
+        """时间轴步进（秒）"""
+        return 1.0 / (self.n_fft * self.step)
+
+    @property
+    def alias_free_range(self) -> float:
+        """无混叠时间范围（秒）"""
+        return 1.0 / self.step
+
+    def _lowpass_spectrum(self, values: np.ndarray) -> np.ndarray:
+        """补上外推的DC点（取实部）"""
+        if values.shape[-1] > 1:
+            dc = (2 * values[..., 0] - values[..., 1]).real
+        else:
+            dc = values[..., 0].real
+        return np.concatenate([dc[..., None].astype(np.complex128), values], axis=-1)
+
+    def transform(self, values: np.ndarray) -> np.ndarray:
+        """
+        频域 → 时域
+
+        Args:
+            values: 复数数据 [..., 频点]
+
+        Returns:
+            时域响应 [..., 时间点]（与 self.time 对应）；带通为复数，低通为实数。
+            冲激响应按直通（全1）峰值为1归一化，阶跃响应终值为外推的DC值。
+        """
+        values = np.asarray(values, dtype=np.complex128)
+        if values.shape[-1] != len(self.frequencies):
+            raise ValueError(f"数据点数({values.shape[-1]})与频率点数({len(self.frequencies)})不一致")
+        if self.mode == 'bandpass':
+            result = np.fft.ifft(values * self.window, n=self.n_fft, axis=-1) * self.scale
+            return np.fft.fftshift(result, axes=-1)
+
+        spectrum = self._lowpass_spectrum(values) * self.window
+        impulse = np.fft.fftshift(np.fft.irfft(spectrum, n=self.n_fft, axis=-1), axes=-1)
+        if self.response == 'step':
+            return np.cumsum(impulse, axis=-1)
+        return impulse * self.scale
+
+    def gate(self, values: np.ndarray, start: float, stop: float, shape: str = 'tukey',
+             taper: float = 0.2, notch: bool = False) -> np.ndarray:
+        """
+        时域门控后的频率响应
+
+        加窗后变换到时域，乘以门函数再变换回频域并除去窗函数，门全开时与原数据一致。
+        频段两端窗函数很小，除去窗函数后误差放大，是门控的固有边缘效应。
+
+        Args:
+            values: 复数数据 [..., 频点]
+            start/stop: 门的起止时间（秒）
+            shape/taper/notch: 见 gate_function
+
+        Returns:
+            门控后的复数数据 [..., 频点]
+        """
+        values = np.asarray(values, dtype=np.complex128)
+        times = np.fft.fftfreq(self.n_fft, d=self.step)
+        gate = gate_function(times, start, stop, shape, taper, notch)
+        response = np.fft.ifft(values * self.gate_window, n=self.n_fft, axis=-1)
+        return np.fft.fft(response * gate, axis=-1)[..., :values.shape[-1]] / self.gate_window
+
+    def select(self, time_start: Optional[float] = None, time_stop: Optional[float] = None,
+               max_points: Optional[int] = None) -> np.ndarray:
+        """时间窗口与抽取后的时间点下标"""
+        lo = 0 if time_start is None else int(np.searchsorted(self.time, time_start, side='left'))
+        hi = len(self.time) if time_stop is None else int(np.searchsorted(self.time, time_stop, side='right'))
+        index = np.arange(lo, hi)
+        if max_points and len(index) > max_points > 1:
+            index = index[np.unique(np.linspace(0, len(index) - 1, int(max_points)).round().astype(np.int64))]
+        return index
+
+    def to_dict(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'response': self.response,
+            'points': int(len(self.frequencies)),
+            'fft_size': self.n_fft,
+            'time_resolution': self.time_resolution,
+            'alias_free_range': self.alias_free_range,
+        }
+
+
+def response_values(transform: TimeDomainTransform, response: np.ndarray) -> Tuple[str, np.ndarray]:
+    """时域响应的显示量：带通为 dB 幅度，低通为线性实数"""
+    if transform.mode == 'bandpass':
+        return 'dB', 20 * np.log10(np.maximum(np.abs(response), 1e-15))
+    return 'linear', response
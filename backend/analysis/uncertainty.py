@@ -0,0 +1,248 @@
+"""
+不确定度评定（GUM）
+按频点由重复测量统计（A类）、校准残差与用户给定的B类分量计算合成标准不确定度，
+可选蒙特卡洛法（GUM 补充文件1）传播，试验次数与频点在同一数组中批量计算。
+
+测量模型为各输入量的线性叠加：Y = y + Σ cᵢ·Xᵢ，Xᵢ 为均值为零的误差分量。
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .statistics import finite_list
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# 已知半宽 a 的分布，标准不确定度 u = a / 除数
+DISTRIBUTION_DIVISORS = {
+    'rectangular': math.sqrt(3),
+    'triangular': math.sqrt(6),
+    'u_shaped': math.sqrt(2),
+}
+DISTRIBUTIONS = ('normal',) + tuple(DISTRIBUTION_DIVISORS)
+
+
+class UncertaintyComponent:
+    """不确定度分量"""
+
+    def __init__(self, name: str, standard_uncertainty: ArrayLike, distribution: str = 'normal',
+                 sensitivity: ArrayLike = 1.0, dof: float = math.inf, category: str = 'B'):
+        """
+        Args:
+            name: 分量名称
+            standard_uncertainty: 标准不确定度（标量或按频点数组）
+            distribution: 'normal' / 'rectangular' / 'triangular' / 'u_shaped'
+            sensitivity: 灵敏系数
+            dof: 自由度（B类通常取无穷大）
+            category: 'A' 或 'B'
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"不支持的分布: {distribution}")
+        self.name = name
+        self.u = np.abs(np.asarray(standard_uncertainty, dtype=np.float64))
+        self.distribution = distribution
+        self.sensitivity = np.asarray(sensitivity, dtype=np.float64)
+        self.dof = float(dof)
+        self.category = category
+
+    @classmethod
+    def type_a(cls, name: str, std: ArrayLike, count: int) -> 'UncertaintyComponent':
+        """由重复测量的样本标准差创建A类分量（均值的标准不确定度 s/√n）"""
+        if count < 2:
+            raise ValueError("A类评定至少需要2次重复测量")
+        u = np.asarray(std, dtype=np.float64) / math.sqrt(count)
+        return cls(name, u, 'normal', dof=count - 1, category='A')
+
+    @classmethod
+    def type_b(cls, name: str, value: ArrayLike, distribution: str = 'rectangular',
+               coverage_factor: float = 2.0, sensitivity: ArrayLike = 1.0,
+               dof: float = math.inf) -> 'UncertaintyComponent':
+        """
+        创建B类分量
+
+        Args:
+            value: 正态分布为扩展不确定度 U（u = U/k），其余分布为半宽 a
+            coverage_factor: 正态分布的包含因子 k
+        """
+        if distribution == 'normal':
+            u = np.asarray(value, dtype=np.float64) / coverage_factor
+        elif distribution in DISTRIBUTION_DIVISORS:
+            u = np.asarray(value, dtype=np.float64) / DISTRIBUTION_DIVISORS[distribution]
+        else:
+            raise ValueError(f"不支持的分布: {distribution}")
+        return cls(name, u, distribution, sensitivity, dof, 'B')
+
+    def contribution(self, n_points: int) -> np.ndarray:
+        """对合成不确定度的贡献 |cᵢ|·uᵢ（按频点）"""
+        return np.broadcast_to(np.abs(self.sensitivity) * self.u, (n_points,))
+
+    def draw(self, rng: np.random.Generator, trials: int) -> np.ndarray:
+        """
+        抽取标准化误差样本（均值为零，按 uᵢ 缩放前），形状 [trials]
+
+        A类分量按GUM-S1使用缩放的t分布（自由度 n-1），其余按给定分布。
+        """
+        if self.category == 'A' and math.isfinite(self.dof) and self.dof > 0:
+            return rng.standard_t(self.dof, trials)
+        if self.distribution == 'normal':
+            return rng.standard_normal(trials)
+        if self.distribution == 'rectangular':
+            return rng.uniform(-math.sqrt(3), math.sqrt(3), trials)
+        if self.distribution == 'triangular':
+            return rng.triangular(-math.sqrt(6), 0.0, math.sqrt(6), trials)
+        # u_shaped（反正弦分布）
+        return math.sqrt(2) * np.sin(rng.uniform(0, 2 * math.pi, trials))
+
+    def to_dict(self, n_points: int, point_index: Optional[np.ndarray] = None) -> Dict:
+        contribution = self.contribution(n_points)
+        if point_index is not None:
+            contribution = contribution[point_index]
+        return {
+            'name': self.name,
+            'category': self.category,
+            'distribution': self.distribution,
+            'dof': self.dof if math.isfinite(self.dof) else None,
+            'contribution': contribution.tolist(),
+        }
+
+
+class UncertaintyBudget:
+    """按频点的不确定度预算"""
+
+    def __init__(self, estimate: ArrayLike, coverage_factor: float = 2.0):
+        """
+        Args:
+            estimate: 被测量的最佳估计（如多次测量均值），按频点
+            coverage_factor: 扩展不确定度的包含因子 k
+        """
+        self.estimate = np.asarray(estimate, dtype=np.float64)
+        self.n_points = self.estimate.shape[0]
+        self.coverage_factor = float(coverage_factor)
+        self.components: List[UncertaintyComponent] = []
+
+    def add(self, component: UncertaintyComponent) -> 'UncertaintyBudget':
+        """添加不确定度分量"""
+        try:
+            component.contribution(self.n_points)
+        except ValueError:
+            raise ValueError(f"分量 {component.name} 的点数与频率点数({self.n_points})不一致")
+        self.components.append(component)
+        return self
+
+    def combined(self) -> np.ndarray:
+        """合成标准不确定度 u_c = √Σ(cᵢuᵢ)²"""
+        total = np.zeros(self.n_points)
+        for component in self.components:
+            total += component.contribution(self.n_points) ** 2
+        return np.sqrt(total)
+
+    def effective_dof(self) -> np.ndarray:
+        """有效自由度（Welch-Satterthwaite 公式）"""
+        uc = self.combined()
+        denominator = np.zeros(self.n_points)
+        for component in self.components:
+            if math.isfinite(component.dof) and component.dof > 0:
+                denominator += component.contribution(self.n_points) ** 4 / component.dof
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(denominator > 0, uc ** 4 / denominator, np.inf)
+
+    def expanded(self) -> np.ndarray:
+        """扩展不确定度 U = k·u_c"""
+        return self.coverage_factor * self.combined()
+
+    def monte_carlo(self, trials: int = 10000, probability: float = 0.95,
+                    seed: Optional[int] = None, block_elements: int = 4_000_000) -> Dict[str, np.ndarray]:
+        """
+        蒙特卡洛法传播不确定度
+
+        每个分量只抽取一组标准化样本 [trials]，各频点的样本由矩阵乘法
+        draws[trials, 分量] @ 贡献[分量, 频点] 一次得到。每个频点的结果与
+        使用同一随机种子逐点单独进行蒙特卡洛完全相同，计算量却与频点数几乎无关；
+        只有分位数按频点分块计算，块大小由 block_elements（试验数 × 频点数）限制内存。
+
+        Args:
+            trials: 试验次数
+            probability: 包含概率
+            seed: 随机种子
+            block_elements: 每块最大元素数
+
+        Returns:
+            {'mean', 'std', 'low', 'high'}，包含区间为概率对称区间
+        """
+        if trials < 2:
+            raise ValueError("蒙特卡洛试验次数至少为2")
+        rng = np.random.default_rng(seed)
+        draws = np.column_stack([c.draw(rng, trials) for c in self.components]) if self.components \
+            else np.zeros((trials, 0))
+        contributions = np.stack([c.contribution(self.n_points) for c in self.components]) if self.components \
+            else np.zeros((0, self.n_points))
+
+        block = max(1, block_elements // trials)
+        tail = (1 - probability) / 2 * 100
+        result = {key: np.empty(self.n_points) for key in ('mean', 'std', 'low', 'high')}
+        for start in range(0, self.n_points, block):
+            points = slice(start, min(start + block, self.n_points))
+            samples = draws @ contributions[:, points]
+            samples += self.estimate[points]
+            result['mean'][points] = samples.mean(axis=0)
+            result['std'][points] = samples.std(axis=0, ddof=1)
+            result['low'][points], result['high'][points] = np.percentile(samples, [tail, 100 - tail], axis=0)
+        return result
+
+    def to_dict(self, point_index: Optional[np.ndarray] = None) -> Dict:
+        """转换为可JSON序列化的字典"""
+        index = slice(None) if point_index is None else point_index
+        return {
+            'coverage_factor': self.coverage_factor,
+            'estimate': self.estimate[index].tolist(),
+            'combined': self.combined()[index].tolist(),
+            'expanded': self.expanded()[index].tolist(),
+            'effective_dof': finite_list(self.effective_dof()[index]),
+            'components': [c.to_dict(self.n_points, point_index) for c in self.components],
+        }
+
+
+def build_budget(statistics: Dict, quantity: str = 'magnitude',
+                 calibration_residual: Optional[ArrayLike] = None,
+                 residual_distribution: str = 'rectangular',
+                 type_b: Optional[List[Dict]] = None,
+                 coverage_factor: float = 2.0) -> UncertaintyBudget:
+    """
+    由保存的测量统计结果构建不确定度预算
+
+    Args:
+        statistics: 在线统计结果（TraceStatistics.to_dict() 的格式）
+        quantity: 评定的量 'magnitude' 或 'phase'
+        calibration_residual: 校准残差（标量或按频点），按给定分布的半宽处理
+        residual_distribution: 校准残差的分布
+        type_b: B类分量列表 [{'name', 'value', 'distribution', 'coverage_factor', 'sensitivity', 'dof'}]
+        coverage_factor: 包含因子 k
+
+    Returns:
+        不确定度预算
+    """
+    stats = statistics.get(quantity)
+    if not stats:
+        raise ValueError(f"统计结果中没有 {quantity} 数据")
+    count = int(stats.get('count', 0))
+    budget = UncertaintyBudget(stats['mean'], coverage_factor)
+    budget.add(UncertaintyComponent.type_a('重复性', stats['std'], count))
+
+    if calibration_residual is not None:
+        budget.add(UncertaintyComponent.type_b('校准残差', calibration_residual, residual_distribution))
+
+    for idx, term in enumerate(type_b or [], 1):
+        if 'value' not in term:
+            raise ValueError(f"第 {idx} 个B类分量缺少 value")
+        dof = term.get('dof')
+        budget.add(UncertaintyComponent.type_b(
+            term.get('name') or f'B{idx}',
+            term['value'],
+            term.get('distribution', 'rectangular'),
+            coverage_factor=float(term.get('coverage_factor', 2.0)),
+            sensitivity=term.get('sensitivity', 1.0),
+            dof=float(dof) if dof is not None else math.inf
+        ))
+    return budget
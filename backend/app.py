@@ -3,7 +3,7 @@
 整合矩阵开关控制和矢量网络分析仪测量功能
 """
 
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, Response, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
 import os
 import sys
@@ -30,6 +30,12 @@ from matrix_controller import MatrixController
 # 导入网络分析仪模块（logger已配置好）
 from vna_controller import VNAController
 
+# 导入测量结果模块（logger已配置好）
+from results_controller import ResultsController
+
+# 运行指标（/api/metrics）
+from monitoring import CONTENT_TYPE, instrument_app, registry
+
 # 计算静态目录（兼容 PyInstaller）
 BASE_PATH = getattr(sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__)))
 STATIC_FOLDER = os.path.join(BASE_PATH, "dist")
@@ -41,10 +47,12 @@ if not os.path.exists(STATIC_FOLDER):
 # 创建Flask应用
 app = Flask(__name__, static_folder=STATIC_FOLDER, static_url_path="")
 CORS(app)
+instrument_app(app)
 
 # 全局控制器实例
 matrix_controller = MatrixController()
 vna_controller = VNAController()
+results_controller = ResultsController()
 
 # ==================== 前端静态托管 ====================
 @app.route('/')
@@ -127,7 +135,10 @@ def get_vna_status():
 @app.route('/api/vna/start-measurement', methods=['POST'])
 def start_vna_measurement():
     """开始VNA测量"""
-    data = request.json
+    data = request.json or {}
+    # 未指定通道时使用矩阵开关当前路由的输出通道
+    if not data.get('channel') and matrix_controller.current_channel:
+        data['channel'] = matrix_controller.current_channel
     return vna_controller.start_measurement(data)
 
 @app.route('/api/vna/stop-measurement', methods=['POST'])
@@ -140,12 +151,33 @@ def get_vna_measurement_status():
     """获取VNA测量状态"""
     return vna_controller.get_measurement_status()
 
+@app.route('/api/vna/measurement-statistics', methods=['GET'])
+def get_vna_measurement_statistics():
+    """获取测量过程中的实时统计结果"""
+    return vna_controller.get_measurement_statistics(request.args)
+
 @app.route('/api/vna/export-data', methods=['POST'])
 def export_vna_data():
-    """导出VNA测量数据"""
+    """导出VNA测量数据（未能及时完成时返回 202 与导出任务ID）"""
     data = request.json
     return vna_controller.export_data(data)
 
+@app.route('/api/vna/export-jobs', methods=['POST'])
+def start_vna_export_job():
+    """提交后台导出任务"""
+    data = request.json
+    return vna_controller.start_export_job(data)
+
+@app.route('/api/vna/export-jobs/<job_id>', methods=['GET'])
+def get_vna_export_job(job_id):
+    """查询导出任务进度"""
+    return vna_controller.get_export_job(job_id)
+
+@app.route('/api/vna/export-jobs/<job_id>/download', methods=['GET'])
+def download_vna_export(job_id):
+    """下载导出文件"""
+    return vna_controller.download_export(job_id)
+
 @app.route('/api/vna/connection-history', methods=['GET'])
 def get_vna_connection_history():
     """获取VNA历史连接记录"""
@@ -161,6 +193,101 @@ def clear_vna_connection_history():
     """清除VNA所有历史连接记录"""
     return vna_controller.clear_connection_history()
 
+@app.route('/api/vna/correction', methods=['GET'])
+def get_vna_correction():
+    """获取当前启用的误差修正"""
+    return vna_controller.get_correction()
+
+@app.route('/api/vna/correction', methods=['POST'])
+def set_vna_correction():
+    """启用误差修正（一端口/传输响应/双端口12项）"""
+    return vna_controller.set_correction(request.json)
+
+@app.route('/api/vna/correction', methods=['DELETE'])
+def clear_vna_correction():
+    """停用误差修正"""
+    return vna_controller.clear_correction()
+
+@app.route('/api/vna/limits', methods=['GET'])
+def get_vna_limits():
+    """获取当前启用的极限模板"""
+    return vna_controller.get_limits()
+
+@app.route('/api/vna/limits', methods=['POST'])
+def set_vna_limits():
+    """启用极限模板（测量时逐次判定）"""
+    return vna_controller.set_limits(request.json)
+
+@app.route('/api/vna/limits', methods=['DELETE'])
+def clear_vna_limits():
+    """停用极限模板"""
+    return vna_controller.clear_limits()
+
+@app.route('/api/vna/io-metrics', methods=['GET'])
+def get_vna_io_metrics():
+    """获取仪器读写统计（按命令类别）"""
+    return vna_controller.get_io_metrics()
+
+@app.route('/api/vna/io-metrics', methods=['POST'])
+def set_vna_io_metrics():
+    """开启/关闭仪器读写统计"""
+    return vna_controller.set_io_metrics(request.json)
+
+@app.route('/api/vna/io-metrics', methods=['DELETE'])
+def clear_vna_io_metrics():
+    """清空仪器读写统计"""
+    return vna_controller.clear_io_metrics()
+
+@app.route('/api/vna/timeline', methods=['GET'])
+def get_vna_timelines():
+    """获取测量时间线的运行列表"""
+    return vna_controller.get_timelines()
+
+@app.route('/api/vna/timeline', methods=['POST'])
+def set_vna_timeline():
+    """开启/关闭测量时间线记录"""
+    return vna_controller.set_timeline(request.json)
+
+@app.route('/api/vna/timeline/<run_id>', methods=['GET'])
+def download_vna_timeline(run_id):
+    """下载运行的时间线（Chrome trace JSON）"""
+    return vna_controller.download_timeline(run_id)
+
+@app.route('/api/vna/recording', methods=['GET'])
+def get_vna_recording():
+    """获取SCPI会话录制状态与录制文件列表"""
+    return vna_controller.get_recording()
+
+@app.route('/api/vna/recording', methods=['POST'])
+def set_vna_recording():
+    """开始/结束SCPI会话录制"""
+    return vna_controller.set_recording(request.json)
+
+@app.route('/api/vna/recording/<name>', methods=['GET'])
+def download_vna_recording(name):
+    """下载SCPI会话录制文件"""
+    return vna_controller.download_recording(name)
+
+@app.route('/api/vna/calibrations', methods=['GET'])
+def list_vna_calibrations():
+    """获取已保存的校准集列表"""
+    return vna_controller.list_calibrations()
+
+@app.route('/api/vna/calibrations', methods=['POST'])
+def save_vna_calibration():
+    """保存校准集（误差项）"""
+    return vna_controller.save_calibration(request.json)
+
+@app.route('/api/vna/calibrations/<set_id>', methods=['GET'])
+def get_vna_calibration(set_id):
+    """获取校准集概要"""
+    return vna_controller.get_calibration(set_id)
+
+@app.route('/api/vna/calibrations/<set_id>', methods=['DELETE'])
+def delete_vna_calibration(set_id):
+    """删除校准集"""
+    return vna_controller.delete_calibration(set_id)
+
 @app.route('/api/vna/mixer-config', methods=['GET'])
 def get_mixer_config():
     """获取混频器配置"""
@@ -277,6 +404,73 @@ def set_mixer_config():
         traceback.print_exc()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# ==================== 测量结果回放API ====================
+
+@app.route('/api/results', methods=['GET'])
+def list_results():
+    """获取已保存的测量运行列表"""
+    return results_controller.list_runs()
+
+@app.route('/api/results/<run_id>', methods=['GET'])
+def get_result_run(run_id):
+    """获取测量运行概要"""
+    return results_controller.get_run(run_id)
+
+@app.route('/api/results/<run_id>/trace', methods=['GET'])
+def get_result_trace(run_id):
+    """回放测量数据（支持测量序号范围与频率窗口）"""
+    return results_controller.get_trace(run_id, request.args)
+
+@app.route('/api/results/<run_id>/trace/<int:sweep>', methods=['GET'])
+def get_result_sweep(run_id, sweep):
+    """回放单次测量数据"""
+    return results_controller.get_trace(run_id, request.args, sweep=sweep)
+
+@app.route('/api/results/<run_id>/statistics', methods=['GET'])
+def get_result_statistics(run_id):
+    """获取测量运行的按频点统计结果"""
+    return results_controller.get_statistics(run_id, request.args)
+
+@app.route('/api/results/<run_id>/uncertainty', methods=['POST'])
+def evaluate_result_uncertainty(run_id):
+    """按频点评定测量不确定度（GUM / 蒙特卡洛）"""
+    return results_controller.evaluate_uncertainty(run_id, request.json)
+
+@app.route('/api/results/<run_id>/time-domain', methods=['POST'])
+def transform_result_run(run_id):
+    """测量运行的时域变换与门控（所有参数与测量次数批量变换）"""
+    return results_controller.transform_run(run_id, request.json)
+
+@app.route('/api/results/time-domain', methods=['POST'])
+def transform_result_channels():
+    """多通道时域变换（按结果索引取各通道均值曲线）"""
+    return results_controller.transform_channels(request.json)
+
+@app.route('/api/results/<run_id>/verdict', methods=['GET'])
+def get_result_verdict(run_id):
+    """获取测量运行的极限判定结论"""
+    return results_controller.get_verdict(run_id)
+
+@app.route('/api/results/index', methods=['GET'])
+def query_result_index():
+    """查询结果索引（按参数/通道）"""
+    return results_controller.query_index(request.args)
+
+@app.route('/api/results/index/rebuild', methods=['POST'])
+def rebuild_result_index():
+    """重建结果索引"""
+    return results_controller.rebuild_index()
+
+@app.route('/api/results/consistency', methods=['POST'])
+def start_result_consistency():
+    """提交多通道一致性分析任务"""
+    return results_controller.start_consistency(request.json)
+
+@app.route('/api/results/analysis-jobs/<job_id>', methods=['GET'])
+def get_result_analysis_job(job_id):
+    """查询分析任务状态与结果"""
+    return results_controller.get_analysis_job(job_id)
+
 # ==================== 系统健康检查 ====================
 
 @app.route('/api/health', methods=['GET'])
@@ -293,6 +487,11 @@ def health_check():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """运行指标（Prometheus 文本格式）"""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
 # ==================== 启动服务器 ====================
 
 if __name__ == '__main__':
@@ -3,7 +3,7 @@
 使用 Pywebview 创建独立桌面窗口
 """
 
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, Response, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
 import os
 import sys
@@ -30,6 +30,12 @@ from matrix_controller import MatrixController
 # 导入网络分析仪模块（logger已配置好）
 from vna_controller import VNAController
 
+# 导入测量结果模块（logger已配置好）
+from results_controller import ResultsController
+
+# 运行指标（/api/metrics）
+from monitoring import CONTENT_TYPE, instrument_app, registry
+
 # 计算静态目录（兼容 PyInstaller）
 if getattr(sys, 'frozen', False):
     # 打包后的环境
@@ -43,10 +49,12 @@ STATIC_FOLDER = os.path.join(BASE_PATH, "dist")
 # 创建Flask应用
 app = Flask(__name__, static_folder=STATIC_FOLDER, static_url_path="")
 CORS(app)
+instrument_app(app)
 
 # 创建控制器实例
 matrix_controller = MatrixController()
 vna_controller = VNAController()
+results_controller = ResultsController()
 
 # ==================== 静态文件路由 ====================
 
@@ -113,7 +121,10 @@ def vna_status():
 
 @app.route('/api/vna/start-measurement', methods=['POST'])
 def start_vna_measurement():
-    return vna_controller.start_measurement(request.json)
+    data = request.json or {}
+    if not data.get('channel') and matrix_controller.current_channel:
+        data['channel'] = matrix_controller.current_channel
+    return vna_controller.start_measurement(data)
 
 @app.route('/api/vna/stop-measurement', methods=['POST'])
 def stop_vna_measurement():
@@ -123,6 +134,86 @@ def stop_vna_measurement():
 def vna_measurement_status():
     return vna_controller.get_measurement_status()
 
+@app.route('/api/vna/measurement-statistics', methods=['GET'])
+def vna_measurement_statistics():
+    return vna_controller.get_measurement_statistics(request.args)
+
+@app.route('/api/vna/correction', methods=['GET'])
+def get_vna_correction():
+    return vna_controller.get_correction()
+
+@app.route('/api/vna/correction', methods=['POST'])
+def set_vna_correction():
+    return vna_controller.set_correction(request.json)
+
+@app.route('/api/vna/correction', methods=['DELETE'])
+def clear_vna_correction():
+    return vna_controller.clear_correction()
+
+@app.route('/api/vna/limits', methods=['GET'])
+def get_vna_limits():
+    return vna_controller.get_limits()
+
+@app.route('/api/vna/limits', methods=['POST'])
+def set_vna_limits():
+    return vna_controller.set_limits(request.json)
+
+@app.route('/api/vna/limits', methods=['DELETE'])
+def clear_vna_limits():
+    return vna_controller.clear_limits()
+
+@app.route('/api/vna/io-metrics', methods=['GET'])
+def get_vna_io_metrics():
+    return vna_controller.get_io_metrics()
+
+@app.route('/api/vna/io-metrics', methods=['POST'])
+def set_vna_io_metrics():
+    return vna_controller.set_io_metrics(request.json)
+
+@app.route('/api/vna/io-metrics', methods=['DELETE'])
+def clear_vna_io_metrics():
+    return vna_controller.clear_io_metrics()
+
+@app.route('/api/vna/timeline', methods=['GET'])
+def get_vna_timelines():
+    return vna_controller.get_timelines()
+
+@app.route('/api/vna/timeline', methods=['POST'])
+def set_vna_timeline():
+    return vna_controller.set_timeline(request.json)
+
+@app.route('/api/vna/timeline/<run_id>', methods=['GET'])
+def download_vna_timeline(run_id):
+    return vna_controller.download_timeline(run_id)
+
+@app.route('/api/vna/recording', methods=['GET'])
+def get_vna_recording():
+    return vna_controller.get_recording()
+
+@app.route('/api/vna/recording', methods=['POST'])
+def set_vna_recording():
+    return vna_controller.set_recording(request.json)
+
+@app.route('/api/vna/recording/<name>', methods=['GET'])
+def download_vna_recording(name):
+    return vna_controller.download_recording(name)
+
+@app.route('/api/vna/calibrations', methods=['GET'])
+def list_vna_calibrations():
+    return vna_controller.list_calibrations()
+
+@app.route('/api/vna/calibrations', methods=['POST'])
+def save_vna_calibration():
+    return vna_controller.save_calibration(request.json)
+
+@app.route('/api/vna/calibrations/<set_id>', methods=['GET'])
+def get_vna_calibration(set_id):
+    return vna_controller.get_calibration(set_id)
+
+@app.route('/api/vna/calibrations/<set_id>', methods=['DELETE'])
+def delete_vna_calibration(set_id):
+    return vna_controller.delete_calibration(set_id)
+
 @app.route('/api/vna/mixer-config', methods=['GET'])
 def get_mixer_config():
     """获取混频器配置"""
@@ -243,10 +334,76 @@ def set_mixer_config():
 def export_vna_data():
     return vna_controller.export_data(request.json)
 
+@app.route('/api/vna/export-jobs', methods=['POST'])
+def start_vna_export_job():
+    return vna_controller.start_export_job(request.json)
+
+@app.route('/api/vna/export-jobs/<job_id>', methods=['GET'])
+def get_vna_export_job(job_id):
+    return vna_controller.get_export_job(job_id)
+
+@app.route('/api/vna/export-jobs/<job_id>/download', methods=['GET'])
+def download_vna_export(job_id):
+    return vna_controller.download_export(job_id)
+
 @app.route('/api/vna/open-results-folder', methods=['POST'])
 def open_vna_results_folder():
     return vna_controller.open_results_folder(request.json)
 
+# ==================== 测量结果回放 API ====================
+
+@app.route('/api/results', methods=['GET'])
+def list_results():
+    return results_controller.list_runs()
+
+@app.route('/api/results/<run_id>', methods=['GET'])
+def get_result_run(run_id):
+    return results_controller.get_run(run_id)
+
+@app.route('/api/results/<run_id>/trace', methods=['GET'])
+def get_result_trace(run_id):
+    return results_controller.get_trace(run_id, request.args)
+
+@app.route('/api/results/<run_id>/trace/<int:sweep>', methods=['GET'])
+def get_result_sweep(run_id, sweep):
+    return results_controller.get_trace(run_id, request.args, sweep=sweep)
+
+@app.route('/api/results/<run_id>/statistics', methods=['GET'])
+def get_result_statistics(run_id):
+    return results_controller.get_statistics(run_id, request.args)
+
+@app.route('/api/results/<run_id>/uncertainty', methods=['POST'])
+def evaluate_result_uncertainty(run_id):
+    return results_controller.evaluate_uncertainty(run_id, request.json)
+
+@app.route('/api/results/<run_id>/time-domain', methods=['POST'])
+def transform_result_run(run_id):
+    return results_controller.transform_run(run_id, request.json)
+
+@app.route('/api/results/time-domain', methods=['POST'])
+def transform_result_channels():
+    return results_controller.transform_channels(request.json)
+
+@app.route('/api/results/<run_id>/verdict', methods=['GET'])
+def get_result_verdict(run_id):
+    return results_controller.get_verdict(run_id)
+
+@app.route('/api/results/index', methods=['GET'])
+def query_result_index():
+    return results_controller.query_index(request.args)
+
+@app.route('/api/results/index/rebuild', methods=['POST'])
+def rebuild_result_index():
+    return results_controller.rebuild_index()
+
+@app.route('/api/results/consistency', methods=['POST'])
+def start_result_consistency():
+    return results_controller.start_consistency(request.json)
+
+@app.route('/api/results/analysis-jobs/<job_id>', methods=['GET'])
+def get_result_analysis_job(job_id):
+    return results_controller.get_analysis_job(job_id)
+
 @app.route('/api/system/info', methods=['GET'])
 def system_info():
     """系统信息"""
@@ -257,6 +414,10 @@ def system_info():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
 # ==================== Flask 服务器启动函数 ====================
 
 def start_flask_server(port=5000):
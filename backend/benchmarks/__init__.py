@@ -0,0 +1,4 @@
+"""
+性能基准测试
+在本地模拟器上运行完整的测量与路由流程，记录吞吐量与各阶段耗时并与基线比较
+"""
@@ -0,0 +1,404 @@
+"""
+HTTP API 负载测试
+在本地模拟器（VNA + 矩阵开关）上用 waitress 运行 Flask 应用，按给定的客户端组合并发访问 HTTP API，
+记录各类请求的延迟分布与 waitress 线程池的占用情况，用于确定服务器线程数
+（app.py 为 4，app_desktop.py 为 6）并评估把轮询改为推送后能节省的负载。
+
+客户端类型（每个客户端一个线程、一条 keep-alive 连接，按前端的轮询间隔发请求）：
+    ui       界面：每 0.8 秒查询测量状态，每 5 秒查询 VNA 与矩阵连接状态
+    matrix   矩阵操作：随机切换 COM1 的输出通道，间隔 0.5 秒，每 5 次切换查询一次当前路径（手动命令）
+    export   导出：提交最近测量结果的导出任务，每 0.5 秒查询进度，完成后下载 ZIP，间隔 5 秒
+    measure  测量：测量结束后重新开始一次（S11/S21 × 1601 点 × 20 次），使状态轮询有真实数据
+开始负载前先完成一次短测量，导出客户端从一开始就有可导出的结果。
+--think-scale 缩放所有间隔（0.1 即请求频率 ×10），用于找到线程池饱和的负载。
+
+线程池占用每 10 毫秒采样一次：busy 为正在处理请求的线程数，queue 为等待线程的请求数；
+saturated 为所有线程都在忙的采样比例，queue 持续大于 0 说明线程数不足。
+
+运行（在 backend 目录下）：
+    python -m benchmarks.load_test                                  # 4 与 6 线程各 20 秒
+    python -m benchmarks.load_test --threads 4 --clients ui=16,matrix=4,export=2,measure=1
+    python -m benchmarks.load_test --think-scale 0.1 --output load.json
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.throughput import MATRIX_CHANNELS, VNA_DEVICES, VNA_HOST, VNA_PORT, _environment
+from simulators import LatencyModel, MatrixSimulator, SimulatorServer, VnaSimulator
+
+DEFAULT_CLIENTS = {'ui': 4, 'matrix': 2, 'export': 1, 'measure': 1}
+MEASUREMENT = {'parameters': ['S11', 'S21'], 'measurementCount': 20, 'frequencyPoints': 1601,
+               'startFrequency': 500, 'stopFrequency': 2500}
+SAMPLE_INTERVAL = 0.01  # 线程池采样间隔（秒）
+
+
+class LatencyRecorder:
+    """按请求类别记录客户端看到的延迟（线程安全）"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, ok: bool):
+        with self._lock:
+            self.samples[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self, duration: float) -> Dict[str, Dict]:
+        """各类请求的次数、错误数、速率与延迟分布（毫秒）"""
+        with self._lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+            errors = dict(self.errors)
+        result = {}
+        for name, values in sorted(samples.items()):
+            data = np.asarray(values) * 1e3
+            result[name] = {
+                'count': len(values),
+                'errors': errors.get(name, 0),
+                'rps': round(len(values) / duration, 3) if duration > 0 else None,
+                'p50_ms': round(float(np.percentile(data, 50)), 3),
+                'p95_ms': round(float(np.percentile(data, 95)), 3),
+                'p99_ms': round(float(np.percentile(data, 99)), 3),
+                'max_ms': round(float(data.max()), 3),
+            }
+        return result
+
+
+class PoolSampler:
+    """定时采样 waitress 线程池的忙碌线程数与排队请求数"""
+
+    def __init__(self, dispatcher, threads: int):
+        self.dispatcher = dispatcher
+        self.threads = threads
+        self.busy = []
+        self.queued = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='pool-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            # active_count 包含在锁外处理请求的线程，读取不加锁，单次采样可能略有偏差
+            self.busy.append(min(self.dispatcher.active_count, self.threads))
+            self.queued.append(len(self.dispatcher.queue))
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict:
+        self._stop.set()
+        self._thread.join()
+        if not self.busy:
+            return {'threads': self.threads, 'samples': 0}
+        busy = np.asarray(self.busy)
+        queued = np.asarray(self.queued)
+        return {
+            'threads': self.threads,
+            'samples': len(busy),
+            'busy_mean': round(float(busy.mean()), 3),
+            'busy_max': int(busy.max()),
+            'utilization': round(float(busy.mean()) / self.threads, 4),
+            'saturated': round(float((busy >= self.threads).mean()), 4),
+            'queue_mean': round(float(queued.mean()), 3),
+            'queue_p95': round(float(np.percentile(queued, 95)), 3),
+            'queue_max': int(queued.max()),
+        }
+
+
+class Client(threading.Thread):
+    """虚拟客户端（一条 keep-alive 连接，按场景循环发请求直到结束）"""
+
+    def __init__(self, kind: str, number: int, test: 'LoadTest'):
+        super().__init__(name=f"client-{kind}-{number}", daemon=True)
+        self.kind = kind
+        self.test = test
+        self.random = random.Random(f"{kind}-{number}-{test.seed}")
+        self._connection = None
+
+    def request(self, name: str, method: str, path: str, body: Optional[Dict] = None):
+        """发送请求并记录延迟，返回 (状态码, 响应体)"""
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        start = time.perf_counter()
+        try:
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.test.host, self.test.port, timeout=60)
+            self._connection.request(method, path, payload, headers)
+            response = self._connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            status, data = None, b''
+        self.test.latency.record(name, time.perf_counter() - start, status is not None and status < 400)
+        return status, data
+
+    def request_json(self, name: str, method: str, path: str, body: Optional[Dict] = None) -> Dict:
+        status, data = self.request(name, method, path, body)
+        try:
+            return json.loads(data) if status is not None and data else {}
+        except ValueError:
+            return {}
+
+    def sleep(self, seconds: float) -> bool:
+        """等待（按 think_scale 缩放），测试结束时返回 False"""
+        return not self.test.stopping.wait(seconds * self.test.think_scale)
+
+    def run(self):
+        try:
+            getattr(self, f"run_{self.kind}")()
+        finally:
+            if self._connection is not None:
+                self._connection.close()
+
+    def run_ui(self):
+        # 错开各客户端的轮询相位
+        if not self.sleep(self.random.uniform(0, 0.8)):
+            return
+        next_status = 0.0
+        while True:
+            self.request('GET measurement-status', 'GET', '/api/vna/measurement-status')
+            now = time.perf_counter()
+            if now >= next_status:
+                self.request('GET vna/status', 'GET', '/api/vna/status')
+                self.request('GET matrix/status', 'GET', '/api/matrix/status')
+                next_status = now + 5.0 * self.test.think_scale
+            if not self.sleep(0.8):
+                return
+
+    def run_matrix(self):
+        count = 0
+        while True:
+            channel = self.random.choice(MATRIX_CHANNELS)
+            self.request('POST matrix/route', 'POST', '/api/matrix/route', {'from_port': 'COM1', 'to_port': channel})
+            count += 1
+            if count % 5 == 0:
+                self.request('POST matrix/command', 'POST', '/api/matrix/command', {'command': 'ROUTE:PATHSWITCH?'})
+            if not self.sleep(0.5):
+                return
+
+    def run_export(self):
+        while True:
+            results = self.test.latest_results()
+            if results:
+                job = self.request_json('POST export-jobs', 'POST', '/api/vna/export-jobs', {'results': results})
+                job_id = job.get('job_id')
+                while job_id:
+                    state = self.request_json('GET export-jobs/<id>', 'GET', f'/api/vna/export-jobs/{job_id}')
+                    if state.get('state') == 'done':
+                        self.request('GET export-jobs/<id>/download', 'GET', f'/api/vna/export-jobs/{job_id}/download')
+                        break
+                    if state.get('state') not in ('pending', 'running') or not self.sleep(0.5):
+                        break
+            if not self.sleep(5.0):
+                return
+
+    def run_measure(self):
+        while True:
+            status = self.request_json('GET measurement-status', 'GET', '/api/vna/measurement-status')
+            if not status.get('is_running'):
+                if status.get('results'):
+                    self.test.set_results(status['results'])
+                self.request('POST start-measurement', 'POST', '/api/vna/start-measurement', MEASUREMENT)
+            if not self.sleep(1.0):
+                return
+
+
+class LoadTest:
+    """在模拟器上运行 Flask 应用并施加并发客户端负载"""
+
+    def __init__(self, device_type: str = 'rohde-zna26', time_scale: float = 1.0, think_scale: float = 1.0,
+                 seed: int = 0):
+        """
+        Args:
+            device_type: VNA 设备类型
+            time_scale: 模拟器时间缩放系数（1 为按仪器模型计入扫描与开关动作时间）
+            think_scale: 客户端请求间隔缩放系数（越小负载越大）
+            seed: 模拟器与客户端的随机种子
+        """
+        self.device_type = device_type
+        self.time_scale = float(time_scale)
+        self.think_scale = float(think_scale)
+        self.seed = seed
+        self.host = '127.0.0.1'
+        self.port = None
+        self.latency = LatencyRecorder()
+        self.stopping = threading.Event()
+        self._results = []
+        self._results_lock = threading.Lock()
+
+    def set_results(self, results: List[Dict]):
+        with self._results_lock:
+            self._results = results
+
+    def latest_results(self) -> List[Dict]:
+        """最近一次测量的结果文件（导出客户端使用）"""
+        with self._results_lock:
+            return list(self._results)
+
+    def run(self, thread_counts: List[int], clients: Dict[str, int], duration: float, warmup: float,
+            progress=None) -> List[Dict]:
+        """依次以各线程数启动服务器并运行负载（在临时目录中，结果文件测试后删除）"""
+        from waitress.server import create_server
+
+        latency = LatencyModel(0, 0, 0) if self.time_scale == 0 else LatencyModel()
+        vna = SimulatorServer(VnaSimulator(VNA_DEVICES[self.device_type], seed=self.seed), VNA_HOST, VNA_PORT,
+                              latency, self.time_scale).start()
+        matrix = SimulatorServer(MatrixSimulator(seed=self.seed), '127.0.0.1', 0, LatencyModel(0, 0, 0),
+                                 self.time_scale).start()
+        results = []
+        cwd = os.getcwd()
+        workdir = tempfile.mkdtemp(prefix='load-test-')
+        try:
+            os.chdir(workdir)
+            import app as application
+            logging.getLogger('multi_channel_system').setLevel(logging.WARNING)
+            logging.getLogger('waitress').setLevel(logging.ERROR)
+            flask_app = application.app
+            client = flask_app.test_client()
+            response = client.post('/api/vna/connect', json={
+                'device_type': self.device_type, 'ip_address': VNA_HOST, 'port': VNA_PORT})
+            if response.status_code != 200:
+                raise RuntimeError(f"连接VNA模拟器失败: {response.get_json().get('message')}")
+            host, port = matrix.address
+            response = client.post('/api/matrix/connect', json={'type': 'network', 'ip': host, 'port': port})
+            if response.status_code != 200:
+                raise RuntimeError(f"连接矩阵模拟器失败: {response.get_json().get('message')}")
+            response = client.post('/api/vna/start-measurement', json={**MEASUREMENT, 'measurementCount': 1})
+            if response.status_code != 200:
+                raise RuntimeError(f"开始测量失败: {response.get_json().get('message')}")
+            application.vna_controller.measurement_thread.join()
+            self.set_results(application.vna_controller.measurement_status.get('results', []))
+
+            for threads in thread_counts:
+                server = create_server(flask_app, host=self.host, port=0, threads=threads)
+                self.port = server.effective_port
+                server_thread = threading.Thread(target=server.run, name='waitress', daemon=True)
+                server_thread.start()
+                try:
+                    results.append(self._run_load(server, threads, clients, duration, warmup))
+                finally:
+                    server.close()
+                    server_thread.join()
+                    server.task_dispatcher.shutdown()
+                    client.post('/api/vna/stop-measurement')
+                    thread = application.vna_controller.measurement_thread
+                    if thread is not None:
+                        thread.join()
+                if progress:
+                    progress(results[-1])
+            client.post('/api/matrix/disconnect')
+            client.post('/api/vna/disconnect')
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+            vna.stop()
+            matrix.stop()
+        return results
+
+    def _run_load(self, server, threads: int, clients: Dict[str, int], duration: float, warmup: float) -> Dict:
+        self.stopping.clear()
+        workers = [Client(kind, number, self) for kind, count in clients.items() for number in range(count)]
+        for worker in workers:
+            worker.start()
+        # 预热阶段的请求不计入结果
+        time.sleep(warmup)
+        self.latency = LatencyRecorder()
+        sampler = PoolSampler(server.task_dispatcher, threads).start()
+        start = time.perf_counter()
+        time.sleep(duration)
+        elapsed = time.perf_counter() - start
+        pool = sampler.stop()
+        latency = self.latency.summary(elapsed)
+        self.stopping.set()
+        for worker in workers:
+            worker.join()
+        requests = sum(item['count'] for item in latency.values())
+        return {
+            'case': f"http/{threads}t/" + ','.join(f"{kind}={count}" for kind, count in clients.items()),
+            'threads': threads,
+            'clients': clients,
+            'duration_s': round(elapsed, 3),
+            'requests': requests,
+            'rps': round(requests / elapsed, 3) if elapsed > 0 else None,
+            'errors': sum(item['errors'] for item in latency.values()),
+            'latency': latency,
+            'pool': pool,
+        }
+
+
+def parse_clients(text: str) -> Dict[str, int]:
+    """'ui=4,matrix=2' -> {'ui': 4, 'matrix': 2}"""
+    clients = {}
+    for item in text.split(','):
+        kind, _, count = item.partition('=')
+        kind = kind.strip()
+        if not hasattr(Client, f"run_{kind}"):
+            raise argparse.ArgumentTypeError(f"未知的客户端类型: {kind}")
+        try:
+            clients[kind] = int(count)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"客户端数量必须为整数: {item}")
+    return {kind: count for kind, count in clients.items() if count > 0}
+
+
+def _format_result(result: Dict) -> str:
+    pool = result['pool']
+    lines = [f"{result['case']}  {result['requests']} 请求 {result['rps']:.1f} req/s  错误 {result['errors']}  "
+             f"线程池 忙碌 {pool.get('busy_mean', 0):.2f}/{result['threads']} 饱和 {pool.get('saturated', 0):.1%} "
+             f"排队 p95={pool.get('queue_p95', 0):g} max={pool.get('queue_max', 0)}"]
+    for name, item in result['latency'].items():
+        lines.append(f"    {name:<32} {item['count']:6d}  p50={item['p50_ms']:8.2f}ms  p95={item['p95_ms']:8.2f}ms  "
+                     f"p99={item['p99_ms']:8.2f}ms  max={item['max_ms']:8.2f}ms  错误={item['errors']}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP API 负载测试')
+    parser.add_argument('--threads', type=int, nargs='+', default=[4, 6], help='waitress 线程数（依次测试）')
+    parser.add_argument('--clients', type=parse_clients, default=DEFAULT_CLIENTS,
+                        help='客户端组合，如 ui=4,matrix=2,export=1,measure=1')
+    parser.add_argument('--duration', type=float, default=20.0, help='每个线程数的测试时间（秒）')
+    parser.add_argument('--warmup', type=float, default=3.0, help='预热时间（秒，不计入结果）')
+    parser.add_argument('--think-scale', type=float, default=1.0, help='客户端请求间隔缩放系数（越小负载越大）')
+    parser.add_argument('--device', choices=sorted(VNA_DEVICES), default='rohde-zna26')
+    parser.add_argument('--time-scale', type=float, default=1.0, help='模拟器时间缩放系数（0 为不等待）')
+    parser.add_argument('--output', help='结果文件')
+    args = parser.parse_args(argv)
+
+    options = {'threads': args.threads, 'clients': args.clients, 'duration': args.duration,
+               'warmup': args.warmup, 'think_scale': args.think_scale, 'device': args.device,
+               'time_scale': args.time_scale}
+    test = LoadTest(args.device, args.time_scale, args.think_scale)
+    print(f"负载测试: 线程数 {args.threads}，客户端 {args.clients}，每轮 {args.duration:g} 秒")
+    results = test.run(args.threads, args.clients, args.duration, args.warmup,
+                       progress=lambda result: print(_format_result(result)))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({**_environment(options), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    return 1 if any(result['errors'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
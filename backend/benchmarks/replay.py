@@ -0,0 +1,182 @@
+"""
+SCPI 会话回放基准测试
+把台架上录制的 SCPI 会话（POST /api/vna/recording 录制，storage/recordings/*.scpi.gz）
+通过 ReplayTransport 交还给对应型号的驱动，重新发起录制时的每个测量请求，
+不需要仪器或模拟器即可对线缆以上的代码（驱动解析、控制器、统计、存储）做可重复的性能回归测试。
+
+阶段与 benchmarks.throughput 相同（setup / acquire / io / journal / statistics / commit / save_statistics）；
+每个测量请求重复 --repeat 次，各指标取中位数（与 benchmarks.throughput 相同，比较时计入运行间噪声）。
+--time-scale 0（默认）时不等待，结果只反映软件开销；--time-scale 1 按录制时的仪器读写耗时等待。
+
+运行（在 backend 目录下）：
+    python -m benchmarks.replay storage/recordings/<文件>.scpi.gz
+    python -m benchmarks.replay <文件> --repeat 5 --output replay.json
+    python -m benchmarks.replay <文件> --baseline replay.json      # 与之前的结果比较，存在退化时退出码为 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from flask import Flask
+
+from benchmarks.throughput import (
+    StageTimer, _directory_size, _environment, _format_result, _response, check_environment, compare, merge_runs
+)
+from devices import KeysightE5071C, RohdeZNA26, Siyi3674L
+from devices.session_recording import ReplayTransport
+
+DRIVERS = {'siyi-3674l': Siyi3674L, 'rohde-zna26': RohdeZNA26, 'keysight-e5071c': KeysightE5071C}
+
+
+class ReplayBenchmark:
+    """在回放的会话上运行 VNAController"""
+
+    def __init__(self, path: str, time_scale: float = 0.0, strict: bool = False, results_format: str = None):
+        """
+        Args:
+            path: 录制文件路径
+            time_scale: 读写耗时缩放系数（0 为不等待）
+            strict: 命令与录制不一致时是否报错
+            results_format: 结果存储格式（None 为配置文件中的默认值）
+        """
+        self.path = os.path.abspath(path)
+        self.transport = ReplayTransport(self.path, time_scale, strict)
+        if self.transport.device_type not in DRIVERS:
+            raise ValueError(f"录制文件的设备类型不受支持: {self.transport.device_type}")
+        self.results_format = results_format
+        self.app = Flask(__name__)
+
+    def run(self, repeat: int = 1, progress=None) -> List[Dict]:
+        """重新发起录制中的每个测量请求（在临时目录中，结果文件测量后删除）"""
+        from vna_controller import VNAController
+
+        markers = self.transport.markers('measurement')
+        if not markers:
+            raise ValueError("录制文件中没有测量请求")
+        timer = StageTimer()
+        results = []
+        cwd = os.getcwd()
+        workdir = tempfile.mkdtemp(prefix='vna-replay-')
+        try:
+            os.chdir(workdir)
+            with self.app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+                controller = VNAController()
+                if self.results_format:
+                    controller.results_format = self.results_format
+                device_type = self.transport.device_type
+                driver = DRIVERS[device_type](device_type, f"REPLAY::{os.path.basename(self.path)}")
+                driver.attach_transport(self.transport)
+                controller.device_driver = driver
+                controller.device_type = device_type
+                controller.current_device = {'connected': True, 'ip_address': 'replay', 'port': 0}
+                controller.device_info = {'type': device_type, 'idn': driver.idn, 'resource_name': driver.resource_name}
+                timer.wrap(driver, 'set_frequency_range', 'setup')
+                timer.wrap(driver, 'get_measurement_data', 'acquire')
+                timer.wrap(driver, 'write', 'io')
+                timer.wrap(driver, 'query', 'io')
+                timer.wrap(controller, '_append_journal', 'journal')
+                timer.wrap(controller, '_update_statistics', 'statistics')
+                timer.wrap(controller, '_commit_journal', 'commit')
+                timer.wrap(controller, '_save_statistics', 'save_statistics')
+            for number, (position, _, request, state) in enumerate(markers, 1):
+                case = f"replay/{os.path.basename(self.path)}/m{number}"
+                runs = []
+                for _ in range(max(int(repeat), 1)):
+                    timer.reset()
+                    self.transport.rewind(position + 1)
+                    driver.restore_session_state(state)
+                    with self.app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+                        runs.append(self._run_request(controller, case, request, timer))
+                result = merge_runs(runs)
+                results.append(result)
+                if progress:
+                    progress(result)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+        return results
+
+    def _run_request(self, controller, case: str, request: Dict, timer: StageTimer) -> Dict:
+        start = time.perf_counter()
+        body, status = _response(controller.start_measurement(request))
+        if status != 200:
+            return {'case': case, 'error': body.get('message')}
+        controller.measurement_thread.join()
+        wall = time.perf_counter() - start
+
+        measurement = controller.measurement_status
+        sweeps = measurement.get('current_measurement', 0)
+        run_dirs = {os.path.dirname(item['filename']) for item in measurement.get('results', [])}
+        written = sum(_directory_size(path) for path in run_dirs)
+        for path in run_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+        result = {
+            'case': case,
+            'parameters': request.get('parameters'),
+            'points': request.get('frequencyPoints'),
+            'wall_s': round(wall, 6),
+            'sweeps': sweeps,
+            'sweeps_per_s': round(sweeps / wall, 3) if wall > 0 else None,
+            'bytes_written': written,
+            'replay': self.transport.summary(),
+            'stages': timer.summary(),
+        }
+        if measurement.get('error'):
+            result['error'] = measurement['error']
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SCPI 会话回放基准测试')
+    parser.add_argument('recording', help='录制文件（.scpi.gz）')
+    parser.add_argument('--time-scale', type=float, default=0.0, help='读写耗时缩放系数（0 为不等待）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个测量请求的重复次数')
+    parser.add_argument('--strict', action='store_true', help='命令与录制不一致时报错')
+    parser.add_argument('--format', choices=['csv', 'trace', 'both'], help='结果存储格式')
+    parser.add_argument('--output', help='结果文件')
+    parser.add_argument('--baseline', help='用于比较的结果文件')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='允许的相对变慢比例')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='忽略小于该值的绝对差（毫秒）')
+    parser.add_argument('--noise-factor', type=float, default=3.0, help='绝对差需超过运行间噪声的倍数')
+    args = parser.parse_args(argv)
+
+    benchmark = ReplayBenchmark(args.recording, args.time_scale, args.strict, args.format)
+    header = benchmark.transport.header
+    print(f"回放 {os.path.basename(args.recording)}（{header.get('device_type')}，录制于 {header.get('started')}，"
+          f"{len(benchmark.transport.records)} 条记录，time_scale={args.time_scale:g}）")
+    results = benchmark.run(args.repeat, progress=lambda result: print(_format_result(result)))
+
+    options = {'recording': os.path.basename(args.recording), 'time_scale': args.time_scale,
+               'repeat': args.repeat, 'strict': args.strict, 'format': args.format}
+    report = {**_environment(options), 'session': header, 'results': results}
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+
+    failed = [result for result in results if 'error' in result]
+    if not args.baseline:
+        return 1 if failed else 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    check_environment(baseline)
+    if baseline.get('options', {}).get('time_scale') != args.time_scale:
+        print("警告: 基线的 time_scale 与本次不同，比较结果仅供参考")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms, args.noise_factor)
+    for item in regressions:
+        print(f"[退化] {item['case']} {item['metric']}: {item['baseline']} -> {item['current']} (x{item['ratio']})")
+    print(f"与基线比较: {len(regressions)} 项退化")
+    return 1 if regressions or failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
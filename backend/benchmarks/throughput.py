@@ -0,0 +1,501 @@
+"""
+端到端吞吐量基准测试
+在本地模拟器上运行 VNAController（测量→日志→统计→结果文件）与 MatrixController（路由切换），
+按 频点数 × 参数个数 × 测量次数 × 存储格式 的组合记录各阶段耗时，写入结果文件并与基线比较。
+
+阶段（驱动与控制器实例上的方法计时，不修改业务代码）：
+    setup            设置频率范围
+    acquire          单次测量（触发、等待、取数与解析）
+    io               仪器读写（acquire 的一部分）
+    journal          追加测量日志
+    statistics       在线统计更新
+    commit           提交日志、生成结果文件
+    save_statistics  保存统计摘要
+    route            矩阵路由切换
+wall_s 为整个用例的耗时（含测量间隔等未计时部分）。
+
+模拟器默认不等待（time_scale=0），结果只反映软件本身的开销；--time-scale 1 按仪器模型计入扫描与开关动作时间。
+
+每个用例运行 --runs 次，各指标取中位数，并保留每次的值（samples）；与基线比较时，
+差值需同时超过相对容差、绝对阈值和 --noise-factor 倍的运行间噪声（MAD）才算退化。
+
+基线：
+    本机基线     benchmarks/results/baseline.json（不纳入版本库，--update-baseline 生成），
+                 计时数据与机器相关，默认容差 50%
+    参考基线     benchmarks/baselines.json（纳入版本库），在模拟器上以默认参数（完整组合，time_scale=0，
+                 每个用例 5 次）生成；本机没有基线时（如新检出的代码、CI）与之比较。参考基线来自
+                 其他机器，默认容差放宽为 REFERENCE_TOLERANCE（慢 3 倍以内不算退化），只用于发现明显的退化
+--baseline 指定的基线文件不存在时退出码为 2。
+
+运行（在 backend 目录下）：
+    python -m benchmarks.throughput --update-baseline  # 在本机生成基线
+    python -m benchmarks.throughput                    # 完整组合，与本机基线（没有时为参考基线）比较
+    python -m benchmarks.throughput --quick            # 小规模组合（完整组合的子集）
+    python -m benchmarks.throughput --update-baseline --baseline benchmarks/baselines.json  # 更新参考基线
+存在退化时退出码为 1。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from flask import Flask
+
+from simulators import LatencyModel, MatrixSimulator, SimulatorServer, VnaSimulator
+from simulators.vna import VNA_MODELS
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+BASELINE_FILE = os.path.join(RESULTS_DIR, 'baseline.json')  # 本机基线（计时数据与机器相关，不纳入版本库）
+REFERENCE_BASELINE = os.path.join(BENCHMARK_DIR, 'baselines.json')  # 参考基线（纳入版本库）
+LOCAL_TOLERANCE = 0.5  # 与本机基线比较的默认容差
+REFERENCE_TOLERANCE = 2.0  # 与参考基线比较的默认容差（不同机器的计时差异较大）
+
+PARAMETER_SETS = {1: ['S21'], 2: ['S11', 'S21'], 4: ['S11', 'S21', 'S12', 'S22']}
+FULL_MATRIX = {'points': [201, 1601, 16001, 100001], 'parameters': [1, 4], 'repeats': [1, 10],
+               'formats': ['csv', 'trace', 'both']}
+QUICK_MATRIX = {'points': [201, 1601], 'parameters': [1], 'repeats': [1, 10], 'formats': ['csv', 'trace']}
+MATRIX_CHANNELS = ['CH%d' % n for n in range(1, 73)]
+
+# 设备类型 -> 模拟器型号（思仪/罗德的直接TCP连接固定使用 5025 端口，模拟器监听 127.0.0.1:5025）
+VNA_DEVICES = {'rohde-zna26': 'rohde', 'siyi-3674l': 'siyi', 'keysight-e5071c': 'keysight'}
+VNA_HOST = '127.0.0.1'
+VNA_PORT = 5025
+
+
+class StageTimer:
+    """按阶段累计方法调用耗时（线程安全）"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def wrap(self, obj, name: str, stage: str):
+        """用计时包装替换实例上的方法"""
+        method = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+
+        setattr(obj, name, timed)
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+
+    def summary(self) -> Dict[str, Dict]:
+        """各阶段的调用次数、总耗时与单次耗时分布（毫秒）"""
+        result = {}
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self.samples.items()}
+        for stage, values in samples.items():
+            data = np.asarray(values) * 1e3
+            result[stage] = {
+                'count': len(values),
+                'total_s': round(float(data.sum()) / 1e3, 6),
+                'mean_ms': round(float(data.mean()), 4),
+                'p50_ms': round(float(np.percentile(data, 50)), 4),
+                'p95_ms': round(float(np.percentile(data, 95)), 4),
+            }
+        return result
+
+
+class ByteCounter:
+    """统计模拟器发送给客户端的字节数"""
+
+    def __init__(self, server: SimulatorServer):
+        self.count = 0
+        process = server.process
+
+        def counted(raw):
+            output = process(raw)
+            self.count += len(output)
+            return output
+
+        server.process = counted
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _response(result):
+    """控制器返回值（Response 或 (Response, 状态码)）-> (数据, 状态码)"""
+    if isinstance(result, tuple):
+        return result[0].get_json(), result[1]
+    return result.get_json(), result.status_code
+
+
+def vna_cases(matrix: Dict, max_points: int) -> List[Dict]:
+    """测量用例组合（超出仪器最大点数的组合跳过）"""
+    cases = []
+    for points in matrix['points']:
+        if points > max_points:
+            continue
+        for n_params in matrix['parameters']:
+            for repeats in matrix['repeats']:
+                for results_format in matrix['formats']:
+                    cases.append({
+                        'case': f"vna/{points}pts/{n_params}p/x{repeats}/{results_format}",
+                        'points': points, 'parameters': n_params,
+                        'repeats': repeats, 'format': results_format,
+                    })
+    return cases
+
+
+class ThroughputBenchmark:
+    """在模拟器上运行控制器并记录各阶段耗时"""
+
+    def __init__(self, device_type: str = 'rohde-zna26', data_format: str = 'FDATA', time_scale: float = 0.0,
+                 seed: int = 0):
+        """
+        Args:
+            device_type: VNA 设备类型（决定驱动与模拟器型号）
+            data_format: 矢量参数数据格式（FDATA / SDATA）
+            time_scale: 模拟器时间缩放系数（0 为不等待）
+            seed: 模拟器随机种子
+        """
+        self.device_type = device_type
+        self.data_format = data_format
+        self.time_scale = float(time_scale)
+        self.seed = seed
+        self.model = VNA_DEVICES[device_type]
+        self.app = Flask(__name__)
+
+    def run_vna(self, cases: List[Dict], runs: int = 1, progress=None) -> List[Dict]:
+        """运行测量用例（在临时目录中，结果文件测量后删除），每个用例运行 runs 次后取中位数"""
+        from vna_controller import VNAController
+
+        latency = LatencyModel(0, 0, 0) if self.time_scale == 0 else LatencyModel()
+        server = SimulatorServer(VnaSimulator(self.model, seed=self.seed), VNA_HOST, VNA_PORT,
+                                 latency, self.time_scale).start()
+        counter = ByteCounter(server)
+        timer = StageTimer()
+        results = []
+        cwd = os.getcwd()
+        workdir = tempfile.mkdtemp(prefix='vna-bench-')
+        try:
+            os.chdir(workdir)
+            # 驱动的 print 输出不计入结果
+            with self.app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+                controller = VNAController()
+                body, status = _response(controller.connect({
+                    'device_type': self.device_type, 'ip_address': VNA_HOST, 'port': VNA_PORT}))
+                if status != 200:
+                    raise RuntimeError(f"连接模拟器失败: {body.get('message')}")
+                driver = controller.device_driver
+                timer.wrap(driver, 'set_frequency_range', 'setup')
+                timer.wrap(driver, 'get_measurement_data', 'acquire')
+                timer.wrap(driver, 'write', 'io')
+                timer.wrap(driver, 'query', 'io')
+                timer.wrap(controller, '_append_journal', 'journal')
+                timer.wrap(controller, '_update_statistics', 'statistics')
+                timer.wrap(controller, '_commit_journal', 'commit')
+                timer.wrap(controller, '_save_statistics', 'save_statistics')
+            for case in cases:
+                samples = []
+                for _ in range(max(int(runs), 1)):
+                    timer.reset()
+                    counter.count = 0
+                    with self.app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+                        samples.append(self._run_vna_case(controller, case, timer, counter))
+                results.append(merge_runs(samples))
+                if progress:
+                    progress(results[-1])
+            with self.app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+                controller.disconnect()
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+            server.stop()
+        return results
+
+    def _run_vna_case(self, controller, case: Dict, timer: StageTimer, counter: ByteCounter) -> Dict:
+        controller.results_format = case['format']
+        payload = {
+            'parameters': PARAMETER_SETS[case['parameters']],
+            'measurementCount': case['repeats'],
+            'frequencyPoints': case['points'],
+            'startFrequency': 500,
+            'stopFrequency': 2500,
+            'dataFormat': self.data_format,
+        }
+        start = time.perf_counter()
+        body, status = _response(controller.start_measurement(payload))
+        if status != 200:
+            return {**case, 'error': body.get('message')}
+        controller.measurement_thread.join()
+        wall = time.perf_counter() - start
+
+        measurement = controller.measurement_status
+        sweeps = measurement.get('current_measurement', 0)
+        run_dirs = {os.path.dirname(item['filename']) for item in measurement.get('results', [])}
+        written = sum(_directory_size(path) for path in run_dirs)
+        for path in run_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+        result = {
+            **case,
+            'wall_s': round(wall, 6),
+            'sweeps': sweeps,
+            'sweeps_per_s': round(sweeps / wall, 3) if wall > 0 else None,
+            'bytes_received': counter.count,
+            'bytes_per_s': round(counter.count / wall, 1) if wall > 0 else None,
+            'bytes_written': written,
+            'stages': timer.summary(),
+        }
+        if measurement.get('error'):
+            result['error'] = measurement['error']
+        return result
+
+    def run_matrix(self, channels: List[str], rounds: int = 1) -> Dict:
+        """矩阵路由切换：依次把 COM1 切换到各通道"""
+        from matrix_controller import MatrixController
+
+        simulator = MatrixSimulator(seed=self.seed)
+        server = SimulatorServer(simulator, '127.0.0.1', 0, LatencyModel(0, 0, 0), self.time_scale).start()
+        counter = ByteCounter(server)
+        timer = StageTimer()
+        host, port = server.address
+        try:
+            with self.app.app_context():
+                controller = MatrixController()
+                body, status = _response(controller.connect({'type': 'network', 'ip': host, 'port': port}))
+                if status != 200:
+                    raise RuntimeError(f"连接矩阵模拟器失败: {body.get('message')}")
+                timer.wrap(controller, 'set_route', 'route')
+                mismatches = 0
+                errors = 0
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    for channel in channels:
+                        body, status = _response(controller.set_route({'from_port': 'COM1', 'to_port': channel}))
+                        replies = str(body.get('response', '')).split('\n')
+                        if status != 200 or any(reply != 'OK' for reply in replies):
+                            errors += 1
+                        if simulator.connected()['COM1'] != channel:
+                            mismatches += 1
+                wall = time.perf_counter() - start
+                controller.disconnect()
+        finally:
+            server.stop()
+        routes = len(channels) * rounds
+        return {
+            'case': f"matrix/route/{len(channels)}ch/x{rounds}",
+            'routes': routes,
+            'wall_s': round(wall, 6),
+            'routes_per_s': round(routes / wall, 3) if wall > 0 else None,
+            'bytes_received': counter.count,
+            'switch_count': sum(simulator.counts.values()),
+            'errors': errors,
+            'mismatches': mismatches,
+            'stages': timer.summary(),
+        }
+
+
+def merge_runs(runs: List[Dict]) -> Dict:
+    """
+    合并同一用例多次运行的结果：wall_s 与各阶段平均耗时分别取中位数，
+    samples 中保留每次运行的值，供比较时估计运行间噪声
+
+    Args:
+        runs: 各次运行的结果
+
+    Returns:
+        合并后的结果（其余字段取 wall_s 为中位数的一次）
+    """
+    valid = sorted((run for run in runs if 'error' not in run), key=lambda run: run['wall_s'])
+    if not valid:
+        return runs[-1]
+    result = dict(valid[len(valid) // 2])
+    samples = {'wall_s': [run['wall_s'] for run in valid]}
+    stages = {}
+    for stage, values in result.get('stages', {}).items():
+        series = [run['stages'][stage]['mean_ms'] for run in valid if stage in run.get('stages', {})]
+        samples[f"{stage}.mean_ms"] = series
+        stages[stage] = {**values, 'mean_ms': round(float(np.median(series)), 4)}
+    wall = round(float(np.median(samples['wall_s'])), 6)
+    result.update(wall_s=wall, stages=stages, runs=len(valid), samples=samples)
+    for count, rate in (('sweeps', 'sweeps_per_s'), ('routes', 'routes_per_s'), ('bytes_received', 'bytes_per_s')):
+        if rate in result:
+            result[rate] = round(result[count] / wall, 3) if wall > 0 else None
+    if len(valid) < len(runs):
+        result['failed_runs'] = len(runs) - len(valid)
+    return result
+
+
+def _noise(samples: Optional[List[float]]) -> float:
+    """运行间噪声：中位数绝对偏差（换算为正态分布的标准差）"""
+    if not samples or len(samples) < 2:
+        return 0.0
+    values = np.asarray(samples, dtype=np.float64)
+    return float(1.4826 * np.median(np.abs(values - np.median(values))))
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float, min_delta_ms: float,
+            noise_factor: float = 3.0) -> List[Dict]:
+    """
+    与基线比较，找出退化的指标（wall_s 与各阶段平均耗时，均为多次运行的中位数）
+
+    Args:
+        results: 本次结果
+        baseline: 基线文件内容
+        tolerance: 允许的相对变慢比例（0.5 表示慢 50% 以内不算退化）
+        min_delta_ms: 绝对差小于该值时不算退化（避免短耗时的计时噪声）
+        noise_factor: 绝对差还需超过基线与本次运行间噪声（较大者）的倍数
+
+    Returns:
+        退化列表 [{'case', 'metric', 'baseline', 'current', 'ratio'}]
+    """
+    reference = {item['case']: item for item in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        base = reference.get(result['case'])
+        if not base or 'error' in result or 'error' in base:
+            continue
+        metrics = [('wall_s', base.get('wall_s'), result.get('wall_s'), 1e3)]
+        for stage, values in result.get('stages', {}).items():
+            base_stage = base.get('stages', {}).get(stage)
+            if base_stage:
+                metrics.append((f"{stage}.mean_ms", base_stage['mean_ms'], values['mean_ms'], 1.0))
+        for metric, old, new, to_ms in metrics:
+            if not old or new is None:
+                continue
+            noise = max(_noise(base.get('samples', {}).get(metric)), _noise(result.get('samples', {}).get(metric)))
+            if (new > old * (1 + tolerance) and (new - old) * to_ms > min_delta_ms
+                    and new - old > noise_factor * noise):
+                regressions.append({'case': result['case'], 'metric': metric, 'baseline': old,
+                                    'current': new, 'ratio': round(new / old, 3)})
+    return regressions
+
+
+def check_environment(baseline: Dict):
+    """基线与本机环境不同时给出警告（计时数据只在同一台机器上可比）"""
+    current = _environment({})
+    different = [key for key in ('platform', 'machine', 'cpu_count', 'python') if baseline.get(key) != current[key]]
+    if different:
+        print(f"警告: 基线来自不同的环境（{', '.join(different)}），比较结果仅供参考；"
+              f"请先在本机用 --update-baseline 生成基线")
+
+
+def _environment(options: Dict) -> Dict:
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'options': options,
+    }
+
+
+def _format_result(result: Dict) -> str:
+    if 'error' in result:
+        return f"{result['case']:<40} 错误: {result['error']}"
+    stages = result.get('stages', {})
+    parts = ' '.join(f"{stage}={values['mean_ms']:.2f}ms" for stage, values in stages.items())
+    rate = (f"{result['sweeps_per_s']:.2f} sweep/s" if 'sweeps_per_s' in result
+            else f"{result['routes_per_s']:.2f} route/s")
+    return f"{result['case']:<40} {result['wall_s']:8.3f}s {rate:>16}  {parts}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='端到端吞吐量基准测试')
+    parser.add_argument('--quick', action='store_true', help='小规模组合')
+    parser.add_argument('--points', type=int, nargs='+', help='频点数')
+    parser.add_argument('--parameters', type=int, nargs='+', choices=sorted(PARAMETER_SETS), help='参数个数')
+    parser.add_argument('--repeats', type=int, nargs='+', help='测量次数')
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'trace', 'both'], help='结果存储格式')
+    parser.add_argument('--device', choices=sorted(VNA_DEVICES), default='rohde-zna26')
+    parser.add_argument('--data-format', choices=['FDATA', 'SDATA'], default='FDATA')
+    parser.add_argument('--time-scale', type=float, default=0.0, help='模拟器时间缩放系数（0 为不等待）')
+    parser.add_argument('--matrix-rounds', type=int, default=1, help='矩阵通道轮询次数（0 为不测试矩阵）')
+    parser.add_argument('--runs', type=int, default=5, help='每个用例的运行次数（取中位数）')
+    parser.add_argument('--output', help='结果文件（默认 benchmarks/results/<时间>.json）')
+    parser.add_argument('--baseline', help='基线文件（默认为本机基线，没有时为参考基线）')
+    parser.add_argument('--update-baseline', action='store_true', help='用本次结果更新基线（默认为本机基线）')
+    parser.add_argument('--tolerance', type=float,
+                        help=f'允许的相对变慢比例（默认本机基线 {LOCAL_TOLERANCE}，参考基线 {REFERENCE_TOLERANCE}）')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='忽略小于该值的绝对差（毫秒）')
+    parser.add_argument('--noise-factor', type=float, default=3.0, help='绝对差需超过运行间噪声的倍数')
+    args = parser.parse_args(argv)
+
+    matrix = dict(QUICK_MATRIX if args.quick else FULL_MATRIX)
+    for key in ('points', 'parameters', 'repeats', 'formats'):
+        if getattr(args, key):
+            matrix[key] = getattr(args, key)
+    options = {'matrix': matrix, 'device': args.device, 'data_format': args.data_format,
+               'time_scale': args.time_scale, 'matrix_rounds': args.matrix_rounds, 'runs': args.runs}
+
+    benchmark = ThroughputBenchmark(args.device, args.data_format, args.time_scale)
+    cases = vna_cases(matrix, VNA_MODELS[benchmark.model]['max_points'])
+    print(f"运行 {len(cases)} 个测量用例 × {args.runs} 次（{args.device}，time_scale={args.time_scale:g}）")
+    results = benchmark.run_vna(cases, args.runs, progress=lambda result: print(_format_result(result)))
+    if args.matrix_rounds > 0:
+        results.append(merge_runs([benchmark.run_matrix(MATRIX_CHANNELS, args.matrix_rounds)
+                                   for _ in range(max(args.runs, 1))]))
+        print(_format_result(results[-1]))
+
+    report = {**_environment(options), 'results': results}
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {output}")
+
+    if args.update_baseline:
+        path = args.baseline or BASELINE_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"基线已更新: {path}")
+        return 0
+
+    path, tolerance = args.baseline, args.tolerance
+    if path is None:
+        reference = not os.path.exists(BASELINE_FILE)
+        path = REFERENCE_BASELINE if reference else BASELINE_FILE
+        if tolerance is None:
+            tolerance = REFERENCE_TOLERANCE if reference else LOCAL_TOLERANCE
+        if reference:
+            print(f"本机没有基线，与参考基线比较（容差 {tolerance:g}；用 --update-baseline 在本机生成基线）")
+    if not os.path.exists(path):
+        print(f"错误: 基线文件不存在: {path}")
+        return 2
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if tolerance is None:
+        tolerance = LOCAL_TOLERANCE
+    check_environment(baseline)
+    if baseline.get('options', {}).get('time_scale') != args.time_scale:
+        print("警告: 基线的 time_scale 与本次不同，比较结果仅供参考")
+    regressions = compare(results, baseline, tolerance, args.min_delta_ms, args.noise_factor)
+    for item in regressions:
+        print(f"[退化] {item['case']} {item['metric']}: {item['baseline']} -> {item['current']} (x{item['ratio']})")
+    print(f"与基线比较: {len(regressions)} 项退化")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,6 +17,8 @@ class AppSettings:
     LOG_BACKUP_COUNT = 20
     LOG_ERROR_BACKUP_COUNT = 5
     LOG_NAME = 'multi_channel_system'  # 统一的logger名称
+    LOG_LEVEL = 'DEBUG'  # 日志级别；设为 'TRACE' 时额外记录每条 SCPI 命令与响应（测量热路径默认不记录）
+    LOG_QUEUE = True  # 日志经队列交给后台线程写入文件与控制台，调用线程不等待 I/O
     
     # ==================== VNA配置 ====================
     VNA_DEFAULT_TIMEOUT = 60  # 秒
@@ -32,6 +34,27 @@ class AppSettings:
     VNA_POWER_MIN = -30
     VNA_POWER_MAX = 10
     
+    # 矢量参数数据格式：'FDATA'（dB幅度） / 'SDATA'（复数，复数域平均）
+    VNA_DATA_FORMAT = 'FDATA'
+    IO_METRICS_ENABLED = True  # 按命令类别统计仪器读写耗时、字节数与超时（运行时可通过 API 开关）
+    TRACING_ENABLED = True  # 记录每次扫描各阶段的时间线（按运行导出 Chrome trace JSON）
+    TRACING_BUFFER_SPANS = 50000  # 时间线环形缓冲区容量（span 数，超出后丢弃最旧的）
+    
+    # 扫描时间预测（等待扫描完成的超时与测量剩余时间）
+    SWEEP_TIME_HISTORY_FILE = 'storage/sweep_time_history.json'  # 实测扫描时间历史
+    SWEEP_TIMEOUT_FACTOR = 3.0  # 等待超时 = 估计扫描时间 × 系数 + 余量
+    SWEEP_TIMEOUT_MARGIN = 2.0  # 秒
+    SWEEP_TIMEOUT_MIN = 5.0  # 秒
+    SWEEP_TIMEOUT_MAX = 600.0  # 秒
+    
+    # SCPI 会话录制（回放用于本地性能回归测试，见 benchmarks/replay.py）
+    SCPI_RECORDING_DIR = 'storage/recordings'
+    SCPI_RECORD_ON_CONNECT = False  # 连接设备后自动开始录制
+    
+    # 校准集存储（误差项）与插值缓存
+    CALIBRATION_DIR = 'storage/calibration'
+    CALIBRATION_CACHE_SIZE = 16  # 插值结果缓存数量（校准集 × 频率轴）
+    
     # ==================== 矩阵开关配置 ====================
     MATRIX_BAUDRATE = 9600
     MATRIX_TIMEOUT = 1.0  # 秒
@@ -40,6 +63,33 @@ class AppSettings:
     # ==================== 测量结果配置 ====================
     RESULTS_DIR = 'results'
     RESULTS_AUTOSAVE = True
+    RESULT_CACHE_BLOCKS = 64  # 结果回放LRU缓存的数据块数量
+    RESULTS_FORMAT = 'both'  # 'csv' / 'trace'（压缩轨迹.vtr） / 'both'
+    TRACE_CHUNK_SWEEPS = 16  # 压缩轨迹每个数据块包含的测量次数
+    TRACE_COMPRESSION = 'zlib'  # 'zlib' / 'lzma' / 'none'
+    TRACE_QUANTUM = None  # 量化步长（如 1e-4），None 为无损存储
+    JOURNAL_FSYNC_RECORDS = 8  # 测量日志每累计多少条记录 fsync 一次
+    JOURNAL_FSYNC_INTERVAL = 2.0  # 距上次 fsync 超过该秒数时强制 fsync
+    CSV_LAYOUT = 'legacy'  # 'legacy'（每次测量重复频率列，原有格式） / 'compact'（单列频率，需要时显式启用）
+    CSV_FREQ_FORMAT = '%r'  # CSV频率列格式（'%r' 与原有 csv.writer 输出一致：最短无损表示，如 500000000.0）
+    CSV_VALUE_FORMAT = '%r'  # CSV幅度/相位/功率列格式（可改为如 '%.6g' 缩小文件，但会损失精度）
+    EXPORT_CACHE_DIR = 'storage/export_cache'  # 导出ZIP缓存目录
+    EXPORT_CACHE_MAX_FILES = 20  # 最多保留的导出缓存数量
+    EXPORT_SYNC_WAIT = 5.0  # /api/vna/export-data 等待导出完成的最长时间（秒），超时后返回任务ID（202）
+    STATISTICS_PERCENTILES = [5, 50, 95]  # 在线统计估计的百分位数，空列表表示不估计
+    UNCERTAINTY_COVERAGE_FACTOR = 2.0  # 扩展不确定度的包含因子 k
+    UNCERTAINTY_MC_TRIALS = 10000  # 蒙特卡洛默认试验次数
+    UNCERTAINTY_MC_MAX_TRIALS = 100000  # 蒙特卡洛最大试验次数
+    CONSISTENCY_MAGNITUDE_TOLERANCE = 0.5  # 通道一致性默认幅度容差（dB，相对通道均值）
+    CONSISTENCY_PHASE_TOLERANCE = 5.0  # 通道一致性默认相位容差（度，相对通道均值）
+    CONSISTENCY_MAX_POINTS = 1001  # 通道一致性结果按频点曲线的最大点数
+    TIME_DOMAIN_WINDOW = 'kaiser'  # 时域变换默认窗函数
+    TIME_DOMAIN_BETA = 6.0  # Kaiser 窗参数（0 最小旁瓣抑制，6 常规，13 最大）
+    TIME_DOMAIN_PAD = 4  # 时域变换补零倍数
+    TIME_DOMAIN_MAX_POINTS = 2001  # 时域结果每条曲线的最大返回点数
+    GROUP_DELAY_APERTURE = 2  # 群时延默认孔径（频率步进数）
+    ADAPTIVE_TARGET_SEM = 0.01  # 自适应测量次数的默认目标：各频点幅度均值标准误差（dB）
+    ADAPTIVE_MIN_COUNT = 5  # 自适应测量的最少次数（样本过少时标准误差估计不可靠）
     
     # ==================== Flask服务器配置 ====================
     FLASK_HOST = '127.0.0.1'
@@ -8,12 +8,25 @@ from typing import Dict, List, Optional, Tuple, Union
 import socket
 import re
 import logging
+import time
+
+from analysis.complex_trace import VECTOR_PARAMETERS
+from logger_config import TRACE
+from .io_metrics import io_metrics
+from .session_recording import SessionRecorder
+from .sweep_time import sweep_predictor
+
+# 测量数据格式：FDATA 为设备格式化后的标量数据（dB），SDATA 为复数原始数据
+DATA_FORMATS = ('FDATA', 'SDATA')
 
 logger = logging.getLogger('multi_channel_system')
 
 class NetworkAnalyzerBase(ABC):
     """网络分析仪基类"""
     
+    # 录制会话时保存、回放时恢复的驱动状态（回放不经过连接初始化）
+    SESSION_STATE = ('points', 'if_bandwidth', 'sweep_type', 'sweep_count', 'data_format')
+    
     def __init__(self, device_type: str, resource_name: str):
         """
         初始化网络分析仪
@@ -29,6 +42,20 @@ class NetworkAnalyzerBase(ABC):
         self.connected = False
         self.idn = None  # 设备标识字符串
         self.timeout = 10000  # 默认超时时间（毫秒）
+        self.data_format = 'FDATA'  # 矢量参数的数据格式
+        self.transport = None  # 替代 VISA / TCP 的读写对象（如 ReplayTransport）
+        self.recorder = None  # SCPI 会话录制（SessionRecorder）
+        
+        # 扫描配置（用于预测扫描时间）
+        self.model = device_type.split('-')[0]
+        self.points = None
+        self.if_bandwidth = None
+        self.sweep_type = 'LIN'
+        self.sweep_count = 1
+        self.sweep_time_query = 'SENS:SWE:TIME?'
+        self.bandwidth_query = 'SENS:BAND?'
+        self.sweep_estimate = None
+        self._sweep_start = None
         
         # 从配置加载设备参数
         self.load_device_config()
@@ -156,6 +183,8 @@ class NetworkAnalyzerBase(ABC):
             
             # 创建TCP连接（使用较短超时，快速检测失败）
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # 关闭 Nagle：命令后紧跟查询时（如 *WAI 后的 *OPC?）不等待上一包的延迟确认
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             sock.settimeout(3)  # 连接超时3秒
             sock.connect((ip, port))
             
@@ -240,6 +269,7 @@ class NetworkAnalyzerBase(ABC):
             (success, message) 元组
         """
         try:
+            self.stop_recording()
             if self.instrument:
                 self.instrument.close()
             if self.tcp_socket:
@@ -247,6 +277,7 @@ class NetworkAnalyzerBase(ABC):
             self.connected = False
             self.instrument = None
             self.tcp_socket = None
+            self.transport = None
             self.idn = None
             return True, "设备已断开连接"
         except Exception as e:
@@ -259,17 +290,23 @@ class NetworkAnalyzerBase(ABC):
         Args:
             command: SCPI命令字符串
         """
-        if self.tcp_socket:
-            # 使用TCP socket
-            if not command.endswith('\n'):
-                command += '\n'
-            self.tcp_socket.send(command.encode('utf-8'))
-        elif self.instrument:
-            # 使用VISA
-            logger.debug(f"发送命令: {command}")
-            self.instrument.write(command)
-        else:
-            raise RuntimeError("设备未连接")
+        recorder = self.recorder
+        if not io_metrics.enabled and recorder is None:
+            self._write(command)
+            return
+        start = time.perf_counter()
+        sent, error = 0, None
+        try:
+            sent = self._write(command)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if io_metrics.enabled:
+                io_metrics.record(command, False, elapsed, sent, 0, error)
+            if recorder is not None:
+                recorder.record(command, False, start, elapsed, None, error)
     
     def query(self, command: str, timeout: Optional[float] = None) -> str:
         """
@@ -282,17 +319,108 @@ class NetworkAnalyzerBase(ABC):
         Returns:
             设备响应字符串
         """
+        recorder = self.recorder
+        if not io_metrics.enabled and recorder is None:
+            return self._query(command, timeout)[0]
+        start = time.perf_counter()
+        response, received, error = None, 0, None
+        try:
+            response, received = self._query(command, timeout)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if io_metrics.enabled:
+                io_metrics.record(command, True, elapsed, len(command) + 1, received, error)
+            if recorder is not None:
+                recorder.record(command, True, start, elapsed, response, error)
+    
+    def start_recording(self, path: str) -> SessionRecorder:
+        """
+        开始录制 SCPI 会话（已在录制时先结束之前的录制）
+        
+        Args:
+            path: 录制文件路径（.scpi.gz）
+        """
+        self.stop_recording()
+        self.recorder = SessionRecorder(path, self.device_type, self.idn, self.resource_name,
+                                        self.session_state())
+        logger.info(f"开始录制SCPI会话: {path}")
+        return self.recorder
+    
+    def stop_recording(self) -> Optional[Dict]:
+        """结束录制，返回录制概况（未在录制时返回 None）"""
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return None
+        summary = recorder.close()
+        logger.info(f"SCPI会话录制结束: {summary['path']}（{summary['records']} 条记录）")
+        return summary
+    
+    def mark_recording(self, kind: str, data=None):
+        """录制中时记录标记（如测量请求）及当前驱动状态"""
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.mark(kind, data, self.session_state())
+    
+    def session_state(self) -> Dict:
+        """录制会话时保存的驱动状态"""
+        return {name: getattr(self, name) for name in self.SESSION_STATE}
+    
+    def restore_session_state(self, state: Dict):
+        """恢复录制时的驱动状态"""
+        for name in self.SESSION_STATE:
+            if name in state:
+                setattr(self, name, state[name])
+        self.sweep_estimate = None
+    
+    def attach_transport(self, transport):
+        """
+        使用替代的读写对象（如回放录制的会话），不经过 VISA / TCP 连接
+        
+        Args:
+            transport: 提供 write(command) -> 字节数 与 query(command, timeout) -> (响应, 字节数) 的对象
+        """
+        self.transport = transport
+        self.idn = getattr(transport, 'idn', None) or self.idn
+        self.restore_session_state(getattr(transport, 'state', None) or {})
+        self.connected = True
+    
+    def _write(self, command: str) -> int:
+        """发送命令，返回发送的字节数"""
+        if self.transport is not None:
+            return self.transport.write(command)
+        if self.tcp_socket:
+            # 使用TCP socket
+            if not command.endswith('\n'):
+                command += '\n'
+            data = command.encode('utf-8')
+            self.tcp_socket.send(data)
+            return len(data)
+        elif self.instrument:
+            # 使用VISA
+            logger.log(TRACE, "发送命令: %s", command)
+            self.instrument.write(command)
+            return len(command) + 1
+        else:
+            raise RuntimeError("设备未连接")
+    
+    def _query(self, command: str, timeout: Optional[float] = None) -> Tuple[str, int]:
+        """发送查询并接收响应，返回 (响应, 接收的字节数)"""
+        if self.transport is not None:
+            return self.transport.query(command, timeout)
         if self.tcp_socket:
             # 使用TCP socket
             if not command.endswith('\n'):
                 command += '\n'
             
-            # 如果指定了timeout，临时调整Socket超时
-            original_timeout = None
+            # 如果指定了timeout，临时调整Socket超时（用于等待第一个数据块，即设备处理时间）
+            original_timeout = self.tcp_socket.gettimeout()
             if timeout is not None:
-                original_timeout = self.tcp_socket.gettimeout()
                 self.tcp_socket.settimeout(timeout)
-                logger.debug(f"临时设置超时: {timeout}秒")
+                logger.log(TRACE, "临时设置超时: %s秒", timeout)
             
             try:
                 self.tcp_socket.send(command.encode('utf-8'))
@@ -303,9 +431,6 @@ class NetworkAnalyzerBase(ABC):
                 max_chunks = 100  # 最多接收100个chunk（防止无限循环）
                 chunk_count = 0
                 
-                # 设置一个较短的超时用于检测数据接收完成
-                self.tcp_socket.settimeout(0.5)
-                
                 while chunk_count < max_chunks:
                     try:
                         # 使用更大的缓冲区（256KB）
@@ -316,6 +441,10 @@ class NetworkAnalyzerBase(ABC):
                         total_bytes += len(chunk_bytes)
                         chunk_count += 1
                         
+                        # 开始接收后使用较短的超时检测数据接收完成
+                        if chunk_count == 1:
+                            self.tcp_socket.settimeout(0.5)
+                        
                         # 尝试多种编码方式解码
                         try:
                             chunk = chunk_bytes.decode('utf-8')
@@ -335,7 +464,7 @@ class NetworkAnalyzerBase(ABC):
                         # 超时，检查是否已经接收到数据
                         if response_parts:
                             # 已接收到数据，认为接收完成
-                            logger.debug(f"Socket超时但已接收到数据: {total_bytes}字节, {chunk_count}个chunk")
+                            logger.log(TRACE, "Socket超时但已接收到数据: %s字节, %s个chunk", total_bytes, chunk_count)
                             break
                         elif chunk_count == 0:
                             # 第一个chunk就超时，真正的超时错误
@@ -355,21 +484,21 @@ class NetworkAnalyzerBase(ABC):
                             )
                         else:
                             # 中间超时，可能数据已接收完毕
-                            logger.debug(f"数据接收中途超时，已接收: {total_bytes}字节, {chunk_count}个chunk")
+                            logger.log(TRACE, "数据接收中途超时，已接收: %s字节, %s个chunk", total_bytes, chunk_count)
                             break
                 
                 response = ''.join(response_parts).strip()
                 
                 # 记录接收的数据量
                 if total_bytes > 10000:
-                    logger.debug(f"接收大数据: {total_bytes} 字节, {chunk_count} 个chunk")
+                    logger.log(TRACE, "接收大数据: %s 字节, %s 个chunk", total_bytes, chunk_count)
                 
-                return response
+                return response, total_bytes
             finally:
                 # 恢复原始超时设置
-                if original_timeout is not None:
-                    self.tcp_socket.settimeout(original_timeout)
-                    logger.debug(f"恢复超时设置: {original_timeout}秒")
+                self.tcp_socket.settimeout(original_timeout)
+                if timeout is not None:
+                    logger.log(TRACE, "恢复超时设置: %s秒", original_timeout)
                     
         elif self.instrument:
             # 使用VISA
@@ -378,10 +507,12 @@ class NetworkAnalyzerBase(ABC):
                 self.instrument.timeout = int(timeout * 1000)  # VISA用毫秒
             
             try:
-                logger.debug(f"发送查询: {command}")
-                response = self.instrument.query(command).strip()
-                logger.debug(f"收到响应: {response}")
-                return response
+                logger.log(TRACE, "发送查询: %s", command)
+                response = self.instrument.query(command)
+                received = len(response) + 1
+                response = response.strip()
+                logger.log(TRACE, "收到响应: %s", response)
+                return response, received
             finally:
                 if timeout is not None:
                     self.instrument.timeout = original_timeout
@@ -409,6 +540,59 @@ class NetworkAnalyzerBase(ABC):
         except Exception as e:
             return -1, f"获取错误状态失败: {str(e)}"
     
+    def set_data_format(self, data_format: str):
+        """
+        设置矢量参数的数据格式
+        
+        Args:
+            data_format: 'FDATA'（dB幅度）或 'SDATA'（复数实部/虚部）
+        """
+        data_format = (data_format or 'FDATA').upper()
+        if data_format not in DATA_FORMATS:
+            raise ValueError(f"不支持的数据格式: {data_format}")
+        self.data_format = data_format
+    
+    def use_complex_data(self, parameter: str) -> bool:
+        """该参数本次是否获取复数数据（SDATA）"""
+        return self.data_format == 'SDATA' and parameter.upper() in VECTOR_PARAMETERS
+    
+    def refresh_sweep_estimate(self) -> Dict:
+        """
+        查询仪器报告的扫描时间（SENS:SWE:TIME?）作为预测的种子，返回当前配置的扫描时间估计
+
+        查询失败时使用型号模型与实测历史。
+        """
+        points = self.points or 201
+        try:
+            if self.if_bandwidth is None:
+                self.if_bandwidth = float(self.query(self.bandwidth_query, timeout=5))
+            reported = float(self.query(self.sweep_time_query, timeout=5))
+            sweep_predictor.seed(self.model, points, self.if_bandwidth, reported, self.sweep_type)
+        except Exception as e:
+            logger.debug(f"扫描时间查询失败，使用模型估计: {e}")
+        self.sweep_estimate = sweep_predictor.estimate(
+            self.model, points, self.if_bandwidth, self.sweep_type, self.sweep_count)
+        return self.sweep_estimate
+    
+    def sweep_timeout(self) -> float:
+        """等待扫描完成的超时（秒，按当前配置的扫描时间估计）"""
+        if self.sweep_estimate is None:
+            self.sweep_estimate = sweep_predictor.estimate(
+                self.model, self.points or 201, self.if_bandwidth, self.sweep_type, self.sweep_count)
+        return self.sweep_estimate['timeout']
+    
+    def _sweep_started(self):
+        """记录扫描触发时刻"""
+        self._sweep_start = time.perf_counter()
+    
+    def _sweep_finished(self):
+        """扫描完成：用实测扫描时间更新预测"""
+        if self._sweep_start is None:
+            return
+        elapsed = (time.perf_counter() - self._sweep_start) / max(self.sweep_count, 1)
+        self._sweep_start = None
+        sweep_predictor.observe(self.model, self.points or 201, self.if_bandwidth, elapsed, self.sweep_type)
+    
     @abstractmethod
     def get_measurement_data(self, parameter: str, frequency_points: int = 201) -> Tuple[Optional[Dict], str]:
         """
@@ -423,6 +607,7 @@ class NetworkAnalyzerBase(ABC):
             - frequencies: 频率点列表
             - magnitude: 幅度列表
             - phase: 相位列表（对于矢量参数）
+            - complex: 复数数组（仅 SDATA 格式）
         """
         pass
     
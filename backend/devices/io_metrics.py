@@ -0,0 +1,175 @@
+"""
+仪器读写计时
+按命令类别（*OPC? 等待、取数、触发、设置……）累计 write/query 的耗时直方图、收发字节数、超时与错误次数，
+用于定位一次测量的时间花在等待扫描、数据传输还是其他环节。
+
+直方图使用固定的对数分桶（只做一次二分查找与计数），关闭后 write/query 只多一次布尔判断。
+"""
+
+import bisect
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from config.settings import AppSettings
+
+# 直方图分桶上界（毫秒），最后一个桶为 +inf
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+COMMAND_CLASSES = ('opc', 'identify', 'error', 'trigger', 'frequency', 'trace_data', 'configure', 'query')
+
+_CLASS_PATTERNS = (
+    ('opc', re.compile(r'^\*(OPC|WAI)')),
+    ('identify', re.compile(r'^\*IDN')),
+    ('error', re.compile(r'^SYST(EM)?:ERR')),
+    ('trigger', re.compile(r'^(INIT|TRIG)')),
+    ('frequency', re.compile(r'(FREQ(UENCY)?:DATA|CALC\w*:X|DATA:STIM)\?')),
+    ('trace_data', re.compile(r'^CALC\w*:DATA')),
+)
+
+
+def command_class(command: str) -> str:
+    """SCPI 命令所属的类别"""
+    text = command.strip().lstrip(':').upper()
+    for name, pattern in _CLASS_PATTERNS:
+        if pattern.search(text):
+            return name
+    header = text.split(None, 1)[0] if text else ''
+    return 'query' if header.endswith('?') else 'configure'
+
+
+def is_timeout(error: BaseException) -> bool:
+    """读写异常是否为超时（socket、PyVISA 与模拟资源的超时异常）"""
+    return isinstance(error, TimeoutError) or 'VI_ERROR_TMO' in str(error)
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds: float):
+        ms = seconds * 1e3
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None or ms < self.min else self.min
+        self.max = ms if self.max is None or ms > self.max else self.max
+
+    def quantile(self, q: float) -> Optional[float]:
+        """分位数估计（所在桶的上界，不超过最大值）"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, n in enumerate(self.counts):
+            cumulative += n
+            if cumulative >= rank and n:
+                bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    @staticmethod
+    def _rounded(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value, 4)
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 4) if self.count else None,
+            'min_ms': None if self.min is None else round(self.min, 4),
+            'max_ms': None if self.max is None else round(self.max, 4),
+            'p50_ms': self._rounded(self.quantile(0.5)),
+            'p95_ms': self._rounded(self.quantile(0.95)),
+            'p99_ms': self._rounded(self.quantile(0.99)),
+            'buckets': {('+inf' if i == len(BUCKET_BOUNDS_MS) else f"{BUCKET_BOUNDS_MS[i]:g}"): n
+                        for i, n in enumerate(self.counts) if n},
+        }
+
+
+class _ClassStats:
+    """单个命令类别的统计"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.writes = 0
+        self.queries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'writes': self.writes,
+            'queries': self.queries,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'latency': self.latency.to_dict(),
+        }
+
+
+class IoMetrics:
+    """仪器读写统计（所有驱动共享，线程安全）"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._classes = {}
+        self._since = datetime.now().isoformat()
+
+    def record(self, command: str, is_query: bool, seconds: float, bytes_sent: int = 0,
+               bytes_received: int = 0, error: Optional[BaseException] = None):
+        """记录一次 write/query"""
+        name = command_class(command)
+        with self._lock:
+            stats = self._classes.get(name)
+            if stats is None:
+                stats = self._classes[name] = _ClassStats()
+            stats.latency.observe(seconds)
+            if is_query:
+                stats.queries += 1
+            else:
+                stats.writes += 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            if error is not None:
+                if is_timeout(error):
+                    stats.timeouts += 1
+                else:
+                    stats.errors += 1
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = bool(enabled)
+
+    def reset(self):
+        with self._lock:
+            self._classes = {}
+            self._since = datetime.now().isoformat()
+
+    def snapshot(self) -> Dict:
+        """按类别汇总的统计"""
+        with self._lock:
+            classes = {name: stats.to_dict() for name, stats in self._classes.items()}
+        totals = {key: sum(item[key] for item in classes.values())
+                  for key in ('writes', 'queries', 'bytes_sent', 'bytes_received', 'timeouts', 'errors')}
+        totals['time_ms'] = round(sum(item['latency']['total_ms'] for item in classes.values()), 3)
+        return {
+            'enabled': self.enabled,
+            'since': self._since,
+            'bucket_bounds_ms': list(BUCKET_BOUNDS_MS),
+            'totals': totals,
+            'classes': classes,
+        }
+
+
+io_metrics = IoMetrics(AppSettings.IO_METRICS_ENABLED)
@@ -3,19 +3,24 @@
 实现设备特定的通信逻辑
 """
 
+import logging
 from typing import Dict, Optional, Tuple
-import math
 from .base import NetworkAnalyzerBase
+from analysis.complex_trace import complex_trace, magnitude_db, parse_complex, phase_deg
+from logger_config import TRACE
+from monitoring.tracing import tracer
 
 # 尝试导入PyVISA，如果失败则使用模拟版本
 try:
     import pyvisa
 except ImportError:
-    from ..mock_visa import MockResourceManager
+    from simulators.mock_visa import MockResourceManager
     import sys
     pyvisa = type(sys)('pyvisa')
     pyvisa.ResourceManager = MockResourceManager
 
+logger = logging.getLogger('multi_channel_system')
+
 class KeysightE5071C(NetworkAnalyzerBase):
     """是德科技 E5071C 网络分析仪"""
     
@@ -41,29 +46,25 @@ class KeysightE5071C(NetworkAnalyzerBase):
     def initialize(self):
         """设备初始化配置"""
         try:
-            print(f"\n{'='*70}")
-            print(f"[Keysight E5071C] 设备初始化")
-            print(f"{'='*70}\n")
+            logger.debug("[Keysight E5071C] 设备初始化")
             
             # 复位到默认状态
-            print(f"[SCPI] 设备复位")
-            print(f"  >> *RST")
+            logger.log(TRACE, "[SCPI] 设备复位")
+            logger.log(TRACE, "  >> *RST")
             self.write("*RST")
             
             # 清除状态
             
-            print(f"  >> SOUR:POW -10 (源功率 -10dBm)")
+            logger.log(TRACE, "  >> SOUR:POW -10 (源功率 -10dBm)")
             self.set_power_level(-10)    # -10dBm功率
             
             # 设置数据格式为ASCII
-            print(f"  >> FORM:DATA ASCII (数据格式)")
+            logger.log(TRACE, "  >> FORM:DATA ASCII (数据格式)")
             self.write("FORM:DATA ASCII")
             
-            print(f"\n[完成] Keysight E5071C 设备初始化完成")
-            print(f"{'='*70}\n")
+            logger.debug("[完成] Keysight E5071C 设备初始化完成")
         except Exception as e:
-            print(f"\n[警告] 设备初始化警告: {e}")
-            print(f"{'='*70}\n")
+            logger.warning(f"[警告] 设备初始化警告: {e}")
             # 即使初始化失败也继续，因为某些命令可能不支持
     
     def get_measurement_data(self, parameter: str, frequency_points: int = 201, measurement_count: int = 1) -> Tuple[Optional[Dict], str]:
@@ -78,100 +79,109 @@ class KeysightE5071C(NetworkAnalyzerBase):
             (data_dict, error_msg): 测量数据字典和错误信息
         """
         if not self.connected:
-            print(f"[错误] 测量失败 - 设备未连接状态: self.connected = {self.connected}")
+            logger.error(f"[错误] 测量失败 - 设备未连接状态: self.connected = {self.connected}")
             return None, "设备未连接"
         
         try:
-            print(f"\n{'='*70}")
-            print(f"[Keysight E5071C] 开始测量")
-            print(f"   参数: {parameter.upper()}")
-            print(f"   频点数: {frequency_points}")
-            print(f"   测量次数: {measurement_count}")
-            print(f"   设备连接状态: {self.connected}")
-            print(f"{'='*70}\n")
+            logger.debug(f"[Keysight E5071C] 开始测量: 参数 {parameter.upper()}, 频点数 {frequency_points}, 测量次数 {measurement_count}")
             
             # 选择测量参数
+            setup_start = tracer.now()
             param = parameter.upper()
             
             # 配置测量参数（E5071C 使用标准 SCPI 命令）
             if param in ['S11', 'S21', 'S12', 'S22']:
-                print(f"[SCPI] 配置S参数测量")
+                logger.log(TRACE, "[SCPI] 配置S参数测量")
                 # E5071C 使用 CALC1:PAR:DEF 命令定义参数
                 cmd1 = f"CALC1:PAR:DEF '{param}'"
-                print(f"  >> {cmd1}")
+                logger.log(TRACE, "  >> %s", cmd1)
                 self.write(cmd1)
                 
                 # 选择参数
                 cmd2 = "CALC1:PAR:SEL"
-                print(f"  >> {cmd2}")
+                logger.log(TRACE, "  >> %s", cmd2)
                 self.write(cmd2)
                 
             else:
-                print(f"[错误] 不支持的参数: {parameter}")
+                logger.error(f"[错误] 不支持的参数: {parameter}")
                 return None, f"不支持的参数: {parameter}"
             
             # 检查配置是否成功
-            print(f"\n[SCPI] 检查设备错误")
+            logger.log(TRACE, "[SCPI] 检查设备错误")
             try:
                 err_code, err_msg = self.get_error()
                 if err_code != 0:
-                    print(f"  [警告] 设备报告错误: [{err_code}] {err_msg}")
+                    logger.warning(f"[警告] 设备报告错误: [{err_code}] {err_msg}")
                 else:
-                    print(f"  [OK] 无错误")
+                    logger.log(TRACE, "  [OK] 无错误")
             except Exception as e:
-                print(f"  [警告] 无法查询错误: {str(e)}")
+                logger.warning(f"[警告] 无法查询错误: {str(e)}")
             
             # 注意：measurement_count参数被忽略，硬件层面始终单次测量
             # 软件层面通过vna_controller循环调用实现多次测量
            
-            print(f"\n[SCPI] 设置单次测量模式")
-            print(f"  >> SENS:AVER OFF")
+            logger.log(TRACE, "[SCPI] 设置单次测量模式")
+            logger.log(TRACE, "  >> SENS:AVER OFF")
             self.write("SENS:AVER OFF")
             
+            tracer.add('setup', setup_start)
+            
             # 触发测量
-            print(f"\n[SCPI] 触发单次测量")
-            print(f"  >> INIT:IMM")
-            self.trigger_sweep()
+            logger.log(TRACE, "[SCPI] 触发单次测量")
+            logger.log(TRACE, "  >> INIT:IMM")
+            with tracer.span('trigger'):
+                self.trigger_sweep()
             
-            print(f"[SCPI] 等待测量完成")
-            print(f"  >> *WAI 和 *OPC?")
-            self.wait_for_sweep()
+            logger.log(TRACE, "[SCPI] 等待测量完成")
+            logger.log(TRACE, "  >> *WAI 和 *OPC?")
+            with tracer.span('wait'):
+                self.wait_for_sweep()
             
             # 获取频率数据
             cmd_freq = "SENS:FREQ:DATA?"
-            print(f"\n[SCPI] 获取频率数据")
-            print(f"  >> {cmd_freq}")
-            print(f"  [超时] 数据查询超时设置: 30秒")
-            freq_str = self.query(cmd_freq, timeout=30)
-            print(f"  << 收到: {len(freq_str)} 字节数据")
-            frequencies = [float(x) for x in freq_str.split(',') if x.strip()]
-            print(f"  [解析] 解析到 {len(frequencies)} 个频率点")
-            
-            # 获取测量数据（FDATA 返回格式化数据）
-            print(f"\n[SCPI] 获取测量数据")
-            cmd_data = "CALC1:DATA:FDAT?"
-            print(f"  >> {cmd_data}")
-            print(f"  [超时] 数据查询超时设置: 30秒")
-            data_str = self.query(cmd_data, timeout=30)
-            print(f"  << 收到: {len(data_str)} 字节数据")
-            data = [float(x) for x in data_str.split(',') if x.strip()]
-            print(f"  [解析] 解析到 {len(data)} 个数值")
-            
-            # S参数：FDATA返回的是实部和虚部
+            logger.log(TRACE, "[SCPI] 获取频率数据")
+            logger.log(TRACE, "  >> %s", cmd_freq)
+            logger.log(TRACE, "  [超时] 数据查询超时设置: 30秒")
+            with tracer.span('fetch_frequency'):
+                freq_str = self.query(cmd_freq, timeout=30)
+            logger.log(TRACE, "  << 收到: %s 字节数据", len(freq_str))
+            with tracer.span('parse'):
+                frequencies = [float(x) for x in freq_str.split(',') if x.strip()]
+            logger.log(TRACE, "  [解析] 解析到 %s 个频率点", len(frequencies))
+            
+            # 获取测量数据：SDATA 为复数原始数据，FDATA 为格式化数据
+            logger.log(TRACE, "[SCPI] 获取测量数据")
+            use_complex = self.use_complex_data(param)
+            cmd_data = "CALC1:DATA:SDAT?" if use_complex else "CALC1:DATA:FDAT?"
+            logger.log(TRACE, "  >> %s", cmd_data)
+            logger.log(TRACE, "  [超时] 数据查询超时设置: 30秒")
+            with tracer.span('fetch_data'):
+                data_str = self.query(cmd_data, timeout=30)
+            logger.log(TRACE, "  << 收到: %s 字节数据", len(data_str))
+            
             # 实部在偶数位，虚部在奇数位
-            real = data[::2]
-            imag = data[1::2]
-            print(f"  [数据] 实部: {len(real)} 个点")
-            print(f"  [数据] 虚部: {len(imag)} 个点")
+            with tracer.span('parse'):
+                values = parse_complex(data_str)
+            logger.log(TRACE, "  [解析] 解析到 %s 个复数点", len(values))
+            
+            if use_complex:
+                if len(values) < 2:
+                    logger.error(f"[错误] 复数数据无效！期望多个点，实际只有 {len(values)} 个")
+                    return None, f"测量数据无效：只返回了 {len(values)} 个点"
+                if len(values) != len(frequencies):
+                    logger.error(f"[错误] 频率点数({len(frequencies)})与复数点数({len(values)})不匹配!")
+                    return None, f"测量数据无效：频率点数({len(frequencies)})与复数点数({len(values)})不匹配"
+                logger.debug(f"[成功] 测量完成 - {param} 复数数据获取成功")
+                return complex_trace(frequencies, values), "数据获取成功"
             
-            # 转换为幅度和相位
-            magnitude = [20 * math.log10(math.sqrt(r**2 + i**2)) if (r**2 + i**2) > 0 else -200 for r, i in zip(real, imag)]
-            phase = [math.degrees(math.atan2(i, r)) for r, i in zip(real, imag)]
-            print(f"  [范围] 幅度范围: {min(magnitude):.2f} ~ {max(magnitude):.2f} dB")
-            print(f"  [范围] 相位范围: {min(phase):.2f} ~ {max(phase):.2f} °")
+            # 转换为幅度和相位（向量化）
+            magnitude = magnitude_db(values).tolist()
+            phase = phase_deg(values).tolist()
+            if logger.isEnabledFor(TRACE):
+                logger.log(TRACE, "  [范围] 幅度范围: %.2f ~ %.2f dB", min(magnitude), max(magnitude))
+                logger.log(TRACE, "  [范围] 相位范围: %.2f ~ %.2f °", min(phase), max(phase))
             
-            print(f"\n[成功] 测量完成 - {param} 数据获取成功")
-            print(f"{'='*70}\n")
+            logger.debug(f"[成功] 测量完成 - {param} 数据获取成功")
             
             return {
                 'frequencies': frequencies,
@@ -180,10 +190,7 @@ class KeysightE5071C(NetworkAnalyzerBase):
             }, "数据获取成功"
             
         except Exception as e:
-            print(f"\n[错误] 测量失败 - 异常: {str(e)}")
-            print(f"{'='*70}\n")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"[错误] 测量失败 - 异常: {str(e)}", exc_info=True)
             return None, f"获取数据失败: {str(e)}"
     
     def set_frequency_range(self, start_freq: float, stop_freq: float, points: int = 201):
@@ -195,32 +202,37 @@ class KeysightE5071C(NetworkAnalyzerBase):
         if not (2 <= points <= self.max_points):
             raise ValueError(f"频点数超出范围: 2 - {self.max_points}")
         
-        print(f"\n[SCPI] 设置频率范围")
-        print(f"  >> SENS:FREQ:STAR {start_freq}")
+        logger.log(TRACE, "[SCPI] 设置频率范围")
+        logger.log(TRACE, "  >> SENS:FREQ:STAR %s", start_freq)
         self.write(f"SENS:FREQ:STAR {start_freq}")
-        print(f"  >> SENS:FREQ:STOP {stop_freq}")
+        logger.log(TRACE, "  >> SENS:FREQ:STOP %s", stop_freq)
         self.write(f"SENS:FREQ:STOP {stop_freq}")
-        print(f"  >> SENS:SWE:POIN {points}")
+        logger.log(TRACE, "  >> SENS:SWE:POIN %s", points)
         self.write(f"SENS:SWE:POIN {points}")
+        self.points = int(points)
+        self.sweep_estimate = None
     
     def set_power_level(self, power: float):
         """设置源功率"""
         if not (self.min_power <= power <= self.max_power):
             raise ValueError(f"功率超出范围: {self.min_power}dBm - {self.max_power}dBm")
-        print(f"[SCPI] 设置源功率")
-        print(f"  >> SOUR:POW {power}")
+        logger.log(TRACE, "[SCPI] 设置源功率")
+        logger.log(TRACE, "  >> SOUR:POW %s", power)
         self.write(f"SOUR:POW {power}")
     
     def set_if_bandwidth(self, bandwidth: float):
         """设置IF带宽"""
         if not (self.min_if_bandwidth <= bandwidth <= self.max_if_bandwidth):
             raise ValueError(f"IF带宽超出范围: {self.min_if_bandwidth}Hz - {self.max_if_bandwidth}Hz")
-        print(f"[SCPI] 设置IF带宽")
-        print(f"  >> SENS:BAND {bandwidth}")
+        logger.log(TRACE, "[SCPI] 设置IF带宽")
+        logger.log(TRACE, "  >> SENS:BAND %s", bandwidth)
         self.write(f"SENS:BAND {bandwidth}")
+        self.if_bandwidth = float(bandwidth)
+        self.sweep_estimate = None
     
     def trigger_sweep(self):
         """触发扫描"""
+        self._sweep_started()
         self.write("INIT:IMM")
     
     def wait_for_sweep(self):
@@ -228,20 +240,21 @@ class KeysightE5071C(NetworkAnalyzerBase):
         self.write("*WAI")
         # 查询操作完成状态
         import time
-        max_wait = 120  # 最多等待120秒
+        max_wait = self.sweep_timeout()  # 最长等待时间按预测的扫描时间
         start_time = time.time()
         
         while True:
             try:
-                opc = int(self.query("*OPC?", timeout=10))  # 每次查询10秒超时
+                opc = int(self.query("*OPC?", timeout=max_wait))
                 if opc == 1:
+                    self._sweep_finished()
                     break
             except Exception as e:
-                print(f"  [警告] 等待测量时出现异常: {e}")
+                logger.warning(f"[警告] 等待测量时出现异常: {e}")
             
             # 检查是否超过最大等待时间
             if time.time() - start_time > max_wait:
-                print(f"  [警告] 等待测量超时（{max_wait}秒），继续尝试获取数据")
+                logger.warning(f"[警告] 等待测量超时（{max_wait}秒），继续尝试获取数据")
                 break
             
             time.sleep(0.5)  # 短暂休息再查询
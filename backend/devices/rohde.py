@@ -4,18 +4,24 @@
 """
 
 from typing import Dict, Optional, Tuple
+import logging
 import math
 from .base import NetworkAnalyzerBase
+from analysis.complex_trace import complex_trace, parse_complex
+from logger_config import TRACE
+from monitoring.tracing import tracer
 
 # 尝试导入PyVISA，如果失败则使用模拟版本
 try:
     import pyvisa
 except ImportError:
-    from ..mock_visa import MockResourceManager
+    from simulators.mock_visa import MockResourceManager
     import sys
     pyvisa = type(sys)('pyvisa')
     pyvisa.ResourceManager = MockResourceManager
 
+logger = logging.getLogger('multi_channel_system')
+
 class RohdeZNA26(NetworkAnalyzerBase):
     """罗德 ZNA26 网络分析仪"""
     
@@ -41,30 +47,26 @@ class RohdeZNA26(NetworkAnalyzerBase):
     def initialize(self):
         """设备初始化配置"""
         try:
-            print(f"\n{'='*70}")
-            print(f"[罗德ZNA26] 设备初始化")
-            print(f"{'='*70}\n")
+            logger.debug("[罗德ZNA26] 设备初始化")
             
             # 复位到默认状态
-            print(f"[SCPI] 设备复位")
-            print(f"  >> *RST")
+            logger.log(TRACE, "[SCPI] 设备复位")
+            logger.log(TRACE, "  >> *RST")
             self.write("*RST")
             
             # 清除状态
-            print(f"  >> *CLS")
+            logger.log(TRACE, "  >> *CLS")
             
-            print(f"  >> SOUR:POW -10 (源功率 -10dBm)")
+            logger.log(TRACE, "  >> SOUR:POW -10 (源功率 -10dBm)")
             self.set_power_level(-10)    # -10dBm功率
             
             # 设置数据格式为ASCII
-            print(f"  >> FORM:DATA ASCII (数据格式)")
+            logger.log(TRACE, "  >> FORM:DATA ASCII (数据格式)")
             self.write("FORM:DATA ASCII")
             
-            print(f"\n[完成] 罗德 ZNA26 设备初始化完成")
-            print(f"{'='*70}\n")
+            logger.debug("[完成] 罗德 ZNA26 设备初始化完成")
         except Exception as e:
-            print(f"\n[警告] 设备初始化警告: {e}")
-            print(f"{'='*70}\n")
+            logger.warning(f"[警告] 设备初始化警告: {e}")
             # 即使初始化失败也继续，因为某些命令可能不支持
     
     def _configure_vmix_mode(self, config=None):
@@ -90,169 +92,165 @@ class RohdeZNA26(NetworkAnalyzerBase):
                     'conversionMode': 'DCUP'
                 }
         
-            print(f"\n{'='*70}")
-            print(f"[罗德ZNA26] 配置VMIX混频器测量模式")
-            print(f"{'='*70}\n")
+            logger.debug("[罗德ZNA26] 配置VMIX混频器测量模式")
             
             # 基本配置
-            print(f"[SCPI] 基本配置")
-            print(f"  >> SOURce1:COMBiner NOC")
+            logger.log(TRACE, "[SCPI] 基本配置")
+            logger.log(TRACE, "  >> SOURce1:COMBiner NOC")
             self.write("SOURce1:COMBiner NOC")
             
-            print(f"  >> SENSe1:SWEep:TYPE LINear")
+            logger.log(TRACE, "  >> SENSe1:SWEep:TYPE LINear")
             self.write("SENSe1:SWEep:TYPE LINear")
             
             # 设置通道类型为VMIX（混频器模式）
-            print(f"\n[SCPI] 设置通道类型为VMIX")
-            print(f"  >> CONFigure:CHANnel1:GUI:TYPE VMIX")
+            logger.log(TRACE, "[SCPI] 设置通道类型为VMIX")
+            logger.log(TRACE, "  >> CONFigure:CHANnel1:GUI:TYPE VMIX")
             self.write("CONFigure:CHANnel1:GUI:TYPE VMIX")
             
             # 相位模式和SLA模式
-            print(f"\n[SCPI] 配置相位和SLA模式")
-            print(f"  >> SENSe1:PHASe:MODE COH (相干模式)")
+            logger.log(TRACE, "[SCPI] 配置相位和SLA模式")
+            logger.log(TRACE, "  >> SENSe1:PHASe:MODE COH (相干模式)")
             self.write("SENSe1:PHASe:MODE COH")
             
-            print(f"  >> SENSe1:SLAMode OPT (优化模式)")
+            logger.log(TRACE, "  >> SENSe1:SLAMode OPT (优化模式)")
             self.write("SENSe1:SLAMode OPT")
             
             # 配置混频器参数
-            print(f"\n[SCPI] 配置混频器参数")
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:STAGes 1 (单级混频)")
+            logger.log(TRACE, "[SCPI] 配置混频器参数")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:STAGes 1 (单级混频)")
             self.write("SENSe1:FREQuency:CONVersion:MIXer:STAGes 1")
             
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:RFPort 1")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:RFPort 1")
             self.write(f"SENSe1:FREQuency:CONVersion:MIXer:RFPort {config['rfPort']}")
             
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:IFPort 2")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:IFPort 2")
             self.write(f"SENSe1:FREQuency:CONVersion:MIXer:IFPort {config['ifPort']}")
             
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:LOPort1 PORT, 3")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:LOPort1 PORT, 3")
             self.write(f"SENSe1:FREQuency:CONVersion:MIXer:LOPort1 PORT, {config['loPort']}")
             
             # 配置倍频器
-            print(f"\n[SCPI] 配置倍频器（基频工作）")
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:RFMultiplier 1, 1")
+            logger.log(TRACE, "[SCPI] 配置倍频器（基频工作）")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:RFMultiplier 1, 1")
             self.write("SENSe1:FREQuency:CONVersion:MIXer:RFMultiplier 1, 1")
             
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:LOMultiplier1 1, 1")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:LOMultiplier1 1, 1")
             self.write("SENSe1:FREQuency:CONVersion:MIXer:LOMultiplier1 1, 1")
             
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:FUNDamental RF")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:FUNDamental RF")
             self.write("SENSe1:FREQuency:CONVersion:MIXer:FUNDamental RF")
             
             # 配置LO固定频率
-            print(f"\n[SCPI] 配置LO固定频率 (300 MHz)")
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:FIXed1 LO1")
+            logger.log(TRACE, "[SCPI] 配置LO固定频率 (300 MHz)")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:FIXed1 LO1")
             self.write("SENSe1:FREQuency:CONVersion:MIXer:FIXed1 LO1")
             
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:MFFixed LO1, 300000000.0")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:MFFixed LO1, 300000000.0")
             lo_freq_hz = config['loFrequency'] * 1e6
             self.write(f"SENSe1:FREQuency:CONVersion:MIXer:MFFixed LO1, {lo_freq_hz}")
             
             # 配置功率模式
-            print(f"\n[SCPI] 配置各端口功率模式")
-            print(f"  >> SOURce1:FREQuency:CONVersion:MIXer:PMODe RF, FUND")
+            logger.log(TRACE, "[SCPI] 配置各端口功率模式")
+            logger.log(TRACE, "  >> SOURce1:FREQuency:CONVersion:MIXer:PMODe RF, FUND")
             self.write("SOURce1:FREQuency:CONVersion:MIXer:PMODe RF, FUND")
             
-            print(f"  >> SOURce1:FREQuency:CONVersion:MIXer:PMODe LO1, FIX")
+            logger.log(TRACE, "  >> SOURce1:FREQuency:CONVersion:MIXer:PMODe LO1, FIX")
             self.write("SOURce1:FREQuency:CONVersion:MIXer:PMODe LO1, FIX")
             
-            print(f"  >> SOURce1:FREQuency:CONVersion:MIXer:PMODe IF, FUND")
+            logger.log(TRACE, "  >> SOURce1:FREQuency:CONVersion:MIXer:PMODe IF, FUND")
             self.write("SOURce1:FREQuency:CONVersion:MIXer:PMODe IF, FUND")
             
-            print(f"  >> SOURce1:FREQuency:CONVersion:MIXer:PMFixed LO1, 10.0 (LO功率10dBm)")
+            logger.log(TRACE, "  >> SOURce1:FREQuency:CONVersion:MIXer:PMFixed LO1, 10.0 (LO功率10dBm)")
             self.write(f"SOURce1:FREQuency:CONVersion:MIXer:PMFixed LO1, {config['loPower']}")
             
             # 配置转换频率模式
-            print(f"\n[SCPI] 配置转换频率 (DC-UP: 下变频上边带)")
-            print(f"  >> SENSe1:FREQuency:CONVersion:MIXer:TFrequency1 DCUP")
+            logger.log(TRACE, "[SCPI] 配置转换频率 (DC-UP: 下变频上边带)")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion:MIXer:TFrequency1 DCUP")
             self.write(f"SENSe1:FREQuency:CONVersion:MIXer:TFrequency1 {config['conversionMode']}")
             
-            print(f"  >> SENSe1:FREQuency:CONVersion MIX")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion MIX")
             self.write("SENSe1:FREQuency:CONVersion MIX")
             
             # 配置任意频率转换
-            print(f"\n[SCPI] 配置任意频率转换")
-            print(f"  >> SOURce1:FREQuency1:CONVersion:ARBitrary:IFRequency 1, 1, 0.0, SWE, 1, 1")
+            logger.log(TRACE, "[SCPI] 配置任意频率转换")
+            logger.log(TRACE, "  >> SOURce1:FREQuency1:CONVersion:ARBitrary:IFRequency 1, 1, 0.0, SWE, 1, 1")
             self.write("SOURce1:FREQuency1:CONVersion:ARBitrary:IFRequency 1, 1, 0.0, SWE, 1, 1")
             
-            print(f"  >> SENSe1:FREQuency1:CONVersion:ARBitrary 1, 1, 0.0, SWE, 1, 1")
+            logger.log(TRACE, "  >> SENSe1:FREQuency1:CONVersion:ARBitrary 1, 1, 0.0, SWE, 1, 1")
             self.write("SENSe1:FREQuency1:CONVersion:ARBitrary 1, 1, 0.0, SWE, 1, 1")
             
-            print(f"  >> SOURce1:FREQuency3:CONVersion:ARBitrary:IFRequency 1, 1, 300000000.0, CW, 1, 1")
+            logger.log(TRACE, "  >> SOURce1:FREQuency3:CONVersion:ARBitrary:IFRequency 1, 1, 300000000.0, CW, 1, 1")
             self.write("SOURce1:FREQuency3:CONVersion:ARBitrary:IFRequency 1, 1, 300000000.0, CW, 1, 1")
             
-            print(f"  >> SENSe1:FREQuency3:CONVersion:ARBitrary 1, 1, 300000000.0, CW, 1, 1")
+            logger.log(TRACE, "  >> SENSe1:FREQuency3:CONVersion:ARBitrary 1, 1, 300000000.0, CW, 1, 1")
             self.write("SENSe1:FREQuency3:CONVersion:ARBitrary 1, 1, 300000000.0, CW, 1, 1")
             
-            print(f"  >> SOURce1:FREQuency2:CONVersion:ARBitrary:IFRequency 1, 1, -300000000.0, SWE, 1, 1")
+            logger.log(TRACE, "  >> SOURce1:FREQuency2:CONVersion:ARBitrary:IFRequency 1, 1, -300000000.0, SWE, 1, 1")
             self.write("SOURce1:FREQuency2:CONVersion:ARBitrary:IFRequency 1, 1, -300000000.0, SWE, 1, 1")
             
-            print(f"  >> SENSe1:FREQuency2:CONVersion:ARBitrary 1, 1, -300000000.0, SWE, 1, 1")
+            logger.log(TRACE, "  >> SENSe1:FREQuency2:CONVersion:ARBitrary 1, 1, -300000000.0, SWE, 1, 1")
             self.write("SENSe1:FREQuency2:CONVersion:ARBitrary 1, 1, -300000000.0, SWE, 1, 1")
             
             # 配置参考LO
-            print(f"\n[SCPI] 配置参考LO")
-            print(f"  >> SOURce1:RLO:FREQuency 1, 1, 0.0, FB, 1, 1")
+            logger.log(TRACE, "[SCPI] 配置参考LO")
+            logger.log(TRACE, "  >> SOURce1:RLO:FREQuency 1, 1, 0.0, FB, 1, 1")
             self.write("SOURce1:RLO:FREQuency 1, 1, 0.0, FB, 1, 1")
             
-            print(f"  >> SOURce1:RLO:PERMenable OFF")
+            logger.log(TRACE, "  >> SOURce1:RLO:PERMenable OFF")
             self.write("SOURce1:RLO:PERMenable OFF")
             
-            print(f"  >> SOURce1:RLO:PABSolut OFF")
+            logger.log(TRACE, "  >> SOURce1:RLO:PABSolut OFF")
             self.write("SOURce1:RLO:PABSolut OFF")
             
             # 配置互调参数
-            print(f"\n[SCPI] 配置互调参数")
-            print(f"  >> SENSe1:FREQuency:IMODulation:LTONe PORT, 1")
+            logger.log(TRACE, "[SCPI] 配置互调参数")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:IMODulation:LTONe PORT, 1")
             self.write("SENSe1:FREQuency:IMODulation:LTONe PORT, 1")
             
-            print(f"  >> SENSe1:FREQuency:IMODulation:RECeiver 2")
+            logger.log(TRACE, "  >> SENSe1:FREQuency:IMODulation:RECeiver 2")
             self.write("SENSe1:FREQuency:IMODulation:RECeiver 2")
             
             # 配置端口衰减
-            print(f"\n[SCPI] 配置端口衰减")
+            logger.log(TRACE, "[SCPI] 配置端口衰减")
             for port in range(1, 5):
-                print(f"  >> SOURce1:POWer{port}:ATTenuation 0.0")
+                logger.log(TRACE, "  >> SOURce1:POWer%s:ATTenuation 0.0", port)
                 self.write(f"SOURce1:POWer{port}:ATTenuation 0.0")
                 
-                print(f"  >> SOURce1:PATH{port}:DIRectAccess NONE")
+                logger.log(TRACE, "  >> SOURce1:PATH%s:DIRectAccess NONE", port)
                 self.write(f"SOURce1:PATH{port}:DIRectAccess NONE")
                 
-                print(f"  >> SENSe1:POWer:ATTenuation {port}, 10.0")
+                logger.log(TRACE, "  >> SENSe1:POWer:ATTenuation %s, 10.0", port)
                 self.write(f"SENSe1:POWer:ATTenuation {port}, 10.0")
             
             # 配置噪声系数（如果需要）
-            print(f"\n[SCPI] 配置噪声系数参数")
-            print(f"  >> SENSe1:NFIGure:DESCription1:EXTPreamp:STATe OFF")
+            logger.log(TRACE, "[SCPI] 配置噪声系数参数")
+            logger.log(TRACE, "  >> SENSe1:NFIGure:DESCription1:EXTPreamp:STATe OFF")
             self.write("SENSe1:NFIGure:DESCription1:EXTPreamp:STATe OFF")
             
-            print(f"  >> SENSe1:NFIGure:DESCription1:EXTPreamp:EGAin 20.0")
+            logger.log(TRACE, "  >> SENSe1:NFIGure:DESCription1:EXTPreamp:EGAin 20.0")
             self.write("SENSe1:NFIGure:DESCription1:EXTPreamp:EGAin 20.0")
             
-            print(f"  >> SENSe1:NFIGure:DESCription1:EXTPreamp:ECOMpression -20.0")
+            logger.log(TRACE, "  >> SENSe1:NFIGure:DESCription1:EXTPreamp:ECOMpression -20.0")
             self.write("SENSe1:NFIGure:DESCription1:EXTPreamp:ECOMpression -20.0")
             
-            print(f"  >> SENSe1:NFIGure:DESCription1:EXTPreamp:CONFig SPOF")
+            logger.log(TRACE, "  >> SENSe1:NFIGure:DESCription1:EXTPreamp:CONFig SPOF")
             self.write("SENSe1:NFIGure:DESCription1:EXTPreamp:CONFig SPOF")
             
             # LO跟踪
-            print(f"\n[SCPI] 配置LO跟踪")
-            print(f"  >> SOURce1:LOTRack:STATe OFF")
+            logger.log(TRACE, "[SCPI] 配置LO跟踪")
+            logger.log(TRACE, "  >> SOURce1:LOTRack:STATe OFF")
             self.write("SOURce1:LOTRack:STATe OFF")
             
-            print(f"\n[完成] VMIX混频器模式配置完成")
-            print(f"  RF端口: Port 1")
-            print(f"  IF端口: Port 2")
-            print(f"  LO端口: Port 3")
-            print(f"  LO频率: 300 MHz (固定)")
-            print(f"  LO功率: 10 dBm")
-            print(f"  转换模式: DC-UP (下变频上边带)")
-            print(f"{'='*70}\n")
+            logger.debug("[完成] VMIX混频器模式配置完成")
+            logger.debug("RF端口: Port 1")
+            logger.debug("IF端口: Port 2")
+            logger.debug("LO端口: Port 3")
+            logger.debug("LO频率: 300 MHz (固定)")
+            logger.debug("LO功率: 10 dBm")
+            logger.debug("转换模式: DC-UP (下变频上边带)")
             
         except Exception as e:
-            print(f"\n[警告] VMIX模式配置警告: {e}")
-            print(f"{'='*70}\n")
+            logger.warning(f"[警告] VMIX模式配置警告: {e}")
             # 继续执行，某些命令可能不支持
     
     def get_measurement_data(self, parameter: str, frequency_points: int = 201, measurement_count: int = 1) -> Tuple[Optional[Dict], str]:
@@ -267,49 +265,44 @@ class RohdeZNA26(NetworkAnalyzerBase):
             (data_dict, error_msg): 测量数据字典和错误信息
         """
         if not self.connected:
-            print(f"[错误] 测量失败 - 设备未连接状态: self.connected = {self.connected}")
+            logger.error(f"[错误] 测量失败 - 设备未连接状态: self.connected = {self.connected}")
             return None, "设备未连接"
         
         try:
-            print(f"\n{'='*70}")
-            print(f"[罗德ZNA26] 开始测量")
-            print(f"   参数: {parameter.upper()}")
-            print(f"   频点数: {frequency_points}")
-            print(f"   测量次数: {measurement_count}")
-            print(f"   设备连接状态: {self.connected}")
-            print(f"{'='*70}\n")
+            logger.debug(f"[罗德ZNA26] 开始测量: 参数 {parameter.upper()}, 频点数 {frequency_points}, 测量次数 {measurement_count}")
             
             # 选择测量参数
+            setup_start = tracer.now()
             param = parameter.upper()
             
             # 根据参数类型配置测量
             # 罗德ZNA26使用正确的指令格式（参考用户提供的权威指令）
             if param in ['S11', 'S21', 'S12', 'S22']:
-                print(f"[SCPI] 配置S参数测量")
+                logger.log(TRACE, "[SCPI] 配置S参数测量")
 
                 # 确保设备处于标准测量模式（如果之前测量了SC参数）
-                print(f"\n[SCPI] 恢复标准测量模式")
-                print(f"  >> SENSe1:FREQuency:CONVersion FUND (基频模式)")
+                logger.log(TRACE, "[SCPI] 恢复标准测量模式")
+                logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion FUND (基频模式)")
                 self.write("SENSe1:FREQuency:CONVersion FUND")
 
                 trc_name = f"Trc_{param}"
                 cmd1 = f':CALC1:PAR:SDEF "{trc_name}", "{param}"'
-                print(f"  >> {cmd1}")
+                logger.log(TRACE, "  >> %s", cmd1)
                 self.write(cmd1)
                 
                 # 显示轨迹到窗口
                 cmd2 = f':DISP:WIND1:TRAC1:FEED "{trc_name}"'
-                print(f"  >> {cmd2}")
+                logger.log(TRACE, "  >> %s", cmd2)
                 self.write(cmd2)
                 
                 # 选择轨迹
                 cmd3 = f':CALC1:PAR:SEL "{trc_name}"'
-                print(f"  >> {cmd3}")
+                logger.log(TRACE, "  >> %s", cmd3)
                 self.write(cmd3)
                 
             elif param in ['SC11', 'SC21', 'SC12', 'SC22']:
-                print(f"[SCPI] 配置VMIX混频器S参数测量")
-                print(f"  [说明] 测量类型: {param}")
+                logger.log(TRACE, "[SCPI] 配置VMIX混频器S参数测量")
+                logger.log(TRACE, "  [说明] 测量类型: %s", param)
                 
                 # 自动配置VMIX模式
                 self._configure_vmix_mode()
@@ -324,26 +317,26 @@ class RohdeZNA26(NetworkAnalyzerBase):
                 
                 trc_name, s_param = trace_mapping[param]
                 
-                print(f"\n[SCPI] 配置轨迹和测量")
-                print(f"  [映射] {param} → 轨迹'{trc_name}' 测量'{s_param}'")
+                logger.log(TRACE, "[SCPI] 配置轨迹和测量")
+                logger.log(TRACE, "  [映射] %s → 轨迹'%s' 测量'%s'", param, trc_name, s_param)
                 
                 # 使用CONFigure命令重命名轨迹
                 cmd1 = f":CONFigure:CHANnel1:TRACe:REName '{trc_name}'"
-                print(f"  >> {cmd1}")
+                logger.log(TRACE, "  >> %s", cmd1)
                 self.write(cmd1)
                 
                 # 使用CALCulate命令配置测量参数
                 cmd2 = f":CALCulate1:PARameter:MEASure '{trc_name}', '{s_param}'"
-                print(f"  >> {cmd2}")
+                logger.log(TRACE, "  >> %s", cmd2)
                 self.write(cmd2)
 
                 
             elif param in ['IPWR', 'OPWR', 'REVIPWR', 'REVOPWR']:
-                print(f"[SCPI] 配置功率测量（绝对波量）")
+                logger.log(TRACE, "[SCPI] 配置功率测量（绝对波量）")
                 
                 # 确保设备处于标准测量模式（退出VMIX模式）
-                print(f"\n[SCPI] 恢复标准测量模式")
-                print(f"  >> SENSe1:FREQuency:CONVersion FUND (基频模式)")
+                logger.log(TRACE, "[SCPI] 恢复标准测量模式")
+                logger.log(TRACE, "  >> SENSe1:FREQuency:CONVersion FUND (基频模式)")
                 self.write("SENSe1:FREQuency:CONVersion FUND")
                 
                 # 功率参数用波名称：a1, b2, a2, b1
@@ -357,92 +350,122 @@ class RohdeZNA26(NetworkAnalyzerBase):
                 
                 trc_name = f"Trc_{param}"
                 cmd1 = f':CALC1:PAR:SDEF "{trc_name}", "{wave}"'
-                print(f"  >> {cmd1} (波: {wave})")
+                logger.log(TRACE, "  >> %s (波: %s)", cmd1, wave)
                 self.write(cmd1)
                 
                 # 显示轨迹到窗口
                 cmd2 = f':DISP:WIND1:TRAC1:FEED "{trc_name}"'
-                print(f"  >> {cmd2}")
+                logger.log(TRACE, "  >> %s", cmd2)
                 self.write(cmd2)
                 
                 # 选择轨迹
                 cmd3 = f':CALC1:PAR:SEL "{trc_name}"'
-                print(f"  >> {cmd3}")
+                logger.log(TRACE, "  >> %s", cmd3)
                 self.write(cmd3)
             else:
-                print(f"[错误] 不支持的参数: {parameter}")
+                logger.error(f"[错误] 不支持的参数: {parameter}")
                 return None, f"不支持的参数: {parameter}"
             
             # 检查配置是否成功
-            print(f"\n[SCPI] 检查设备错误")
+            logger.log(TRACE, "[SCPI] 检查设备错误")
             try:
                 err_code, err_msg = self.get_error()
                 if err_code != 0:
-                    print(f"  [警告] 设备报告错误: [{err_code}] {err_msg}")
+                    logger.warning(f"[警告] 设备报告错误: [{err_code}] {err_msg}")
                 else:
-                    print(f"  [OK] 无错误")
+                    logger.log(TRACE, "  [OK] 无错误")
             except Exception as e:
-                print(f"  [警告] 无法查询错误: {str(e)}")
+                logger.warning(f"[警告] 无法查询错误: {str(e)}")
             
             # 注意：频率点数已在 set_frequency_range() 中设置，无需重复
             
             # ⭐ 设置测量次数
             cmd_count = f"SENS:SWE:COUNt {measurement_count}"
-            print(f"\n[SCPI] 设置测量次数")
-            print(f"  >> {cmd_count}")
+            logger.log(TRACE, "[SCPI] 设置测量次数")
+            logger.log(TRACE, "  >> %s", cmd_count)
             if measurement_count == 1:
-                print(f"  [说明] 单次测量（软件循环模式）")
+                logger.log(TRACE, "  [说明] 单次测量（软件循环模式）")
             else:
-                print(f"  [说明] VNA将自动进行{measurement_count}次测量")
+                logger.log(TRACE, "  [说明] VNA将自动进行%s次测量", measurement_count)
             self.write(cmd_count)
+            if self.sweep_count != measurement_count:
+                self.sweep_count = measurement_count
+                self.sweep_estimate = None
+            
+            tracer.add('setup', setup_start)
             
             # 触发测量
-            print(f"\n[SCPI] 触发测量")
-            print(f"  >> INIT:IMM")
-            print(f"  [说明] VNA开始连续测量{measurement_count}次...")
-            self.trigger_sweep()
+            logger.log(TRACE, "[SCPI] 触发测量")
+            logger.log(TRACE, "  >> INIT:IMM")
+            logger.log(TRACE, "  [说明] VNA开始连续测量%s次...", measurement_count)
+            with tracer.span('trigger'):
+                self.trigger_sweep()
             
-            print(f"[SCPI] 等待测量完成")
-            print(f"  >> *WAI 和 *OPC?")
-            self.wait_for_sweep()
+            logger.log(TRACE, "[SCPI] 等待测量完成")
+            logger.log(TRACE, "  >> *WAI 和 *OPC?")
+            with tracer.span('wait'):
+                self.wait_for_sweep()
             
             # 获取频率数据
             # 使用 CALC1 而不是 CALC
             cmd_freq = "CALC1:DATA:STIM?"
-            print(f"\n[SCPI] 获取频率数据")
-            print(f"  >> {cmd_freq}")
-            print(f"  [超时] 数据查询超时设置: 30秒")
-            freq_str = self.query(cmd_freq, timeout=30)
-            print(f"  << 收到: {len(freq_str)} 字节数据")
-            frequencies = [float(x) for x in freq_str.split(',') if x.strip()]
-            print(f"  [解析] 解析到 {len(frequencies)} 个频率点")
+            logger.log(TRACE, "[SCPI] 获取频率数据")
+            logger.log(TRACE, "  >> %s", cmd_freq)
+            logger.log(TRACE, "  [超时] 数据查询超时设置: 30秒")
+            with tracer.span('fetch_frequency'):
+                freq_str = self.query(cmd_freq, timeout=30)
+            logger.log(TRACE, "  << 收到: %s 字节数据", len(freq_str))
+            with tracer.span('parse'):
+                frequencies = [float(x) for x in freq_str.split(',') if x.strip()]
+            logger.log(TRACE, "  [解析] 解析到 %s 个频率点", len(frequencies))
             
             # 获取测量数据
-            # 统一使用 CALC1:DATA? FDATA 格式（参考用户提供的权威指令）
-            print(f"\n[SCPI] 获取测量数据")
+            logger.log(TRACE, "[SCPI] 获取测量数据")
+            if self.use_complex_data(param):
+                # SDATA 返回复数（实部/虚部交替），幅度与相位由复数导出
+                cmd_data = "CALC1:DATA? SDATA"
+                logger.log(TRACE, "  >> %s", cmd_data)
+                logger.log(TRACE, "  [超时] 数据查询超时设置: 30秒")
+                with tracer.span('fetch_data'):
+                    data_str = self.query(cmd_data, timeout=30)
+                logger.log(TRACE, "  << 收到: %s 字节数据", len(data_str))
+                with tracer.span('parse'):
+                    values = parse_complex(data_str)
+                logger.log(TRACE, "  [解析] 解析到 %s 个复数点", len(values))
+                if len(values) < 2:
+                    logger.error(f"[错误] 复数数据无效！期望多个点，实际只有 {len(values)} 个")
+                    return None, f"测量数据无效：只返回了 {len(values)} 个点"
+                if len(values) != len(frequencies):
+                    logger.error(f"[错误] 频率点数({len(frequencies)})与复数点数({len(values)})不匹配!")
+                    return None, f"测量数据无效：频率点数({len(frequencies)})与复数点数({len(values)})不匹配"
+                logger.debug(f"[成功] 测量完成 - {param} 复数数据获取成功")
+                return complex_trace(frequencies, values), "数据获取成功"
+            
+            # 标量数据使用 CALC1:DATA? FDATA 格式（参考用户提供的权威指令）
             cmd_data = "CALC1:DATA? FDATA"
-            print(f"  >> {cmd_data}")
-            print(f"  [超时] 数据查询超时设置: 30秒")
-            data_str = self.query(cmd_data, timeout=30)
-            print(f"  << 收到: {len(data_str)} 字节数据")
-            data = [float(x) for x in data_str.split(',') if x.strip()]
-            print(f"  [解析] 解析到 {len(data)} 个数值")
+            logger.log(TRACE, "  >> %s", cmd_data)
+            logger.log(TRACE, "  [超时] 数据查询超时设置: 30秒")
+            with tracer.span('fetch_data'):
+                data_str = self.query(cmd_data, timeout=30)
+            logger.log(TRACE, "  << 收到: %s 字节数据", len(data_str))
+            with tracer.span('parse'):
+                data = [float(x) for x in data_str.split(',') if x.strip()]
+            logger.log(TRACE, "  [解析] 解析到 %s 个数值", len(data))
             
             # 数据完整性检查
             if len(data) != len(frequencies):
-                print(f"  [警告] 数据点数({len(data)})与频率点数({len(frequencies)})不一致!")
+                logger.warning(f"[警告] 数据点数({len(data)})与频率点数({len(frequencies)})不一致!")
             
             # 解析数据
             # ⚠️ 重要：FDATA 返回的是格式化后的数据（dB 幅度），不是实部虚部！
             magnitude = data
             phase = None  # FDATA 不包含相位信息，如需相位请使用 SDATA
             
-            print(f"  [数据] 幅度点数: {len(magnitude)}")
-            if len(magnitude) > 0:
-                print(f"  [范围] 幅度范围: {min(magnitude):.2f} ~ {max(magnitude):.2f} dB")
+            logger.log(TRACE, "  [数据] 幅度点数: %s", len(magnitude))
+            if len(magnitude) > 0 and logger.isEnabledFor(TRACE):
+                logger.log(TRACE, "  [范围] 幅度范围: %.2f ~ %.2f dB", min(magnitude), max(magnitude))
             
-            print(f"\n[成功] 测量完成 - {param} 数据获取成功")
-            print(f"{'='*70}\n")
+            logger.debug(f"[成功] 测量完成 - {param} 数据获取成功")
             
             return {
                 'frequencies': frequencies,
@@ -451,10 +474,7 @@ class RohdeZNA26(NetworkAnalyzerBase):
             }, "数据获取成功"
             
         except Exception as e:
-            print(f"\n[错误] 测量失败 - 异常: {str(e)}")
-            print(f"{'='*70}\n")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"[错误] 测量失败 - 异常: {str(e)}", exc_info=True)
             return None, f"获取数据失败: {str(e)}"
     
     def set_frequency_range(self, start_freq: float, stop_freq: float, points: int = 201):
@@ -466,32 +486,37 @@ class RohdeZNA26(NetworkAnalyzerBase):
         if not (2 <= points <= self.max_points):
             raise ValueError(f"频点数超出范围: 2 - {self.max_points}")
         
-        print(f"\n[SCPI] 设置频率范围")
-        print(f"  >> SENS:FREQ:STAR {start_freq}")
+        logger.log(TRACE, "[SCPI] 设置频率范围")
+        logger.log(TRACE, "  >> SENS:FREQ:STAR %s", start_freq)
         self.write(f"SENS:FREQ:STAR {start_freq}")
-        print(f"  >> SENS:FREQ:STOP {stop_freq}")
+        logger.log(TRACE, "  >> SENS:FREQ:STOP %s", stop_freq)
         self.write(f"SENS:FREQ:STOP {stop_freq}")
-        print(f"  >> SENS:SWE:POIN {points}")
+        logger.log(TRACE, "  >> SENS:SWE:POIN %s", points)
         self.write(f"SENS:SWE:POIN {points}")
+        self.points = int(points)
+        self.sweep_estimate = None
     
     def set_power_level(self, power: float):
         """设置源功率"""
         if not (self.min_power <= power <= self.max_power):
             raise ValueError(f"功率超出范围: {self.min_power}dBm - {self.max_power}dBm")
-        print(f"[SCPI] 设置源功率")
-        print(f"  >> SOUR:POW {power}")
+        logger.log(TRACE, "[SCPI] 设置源功率")
+        logger.log(TRACE, "  >> SOUR:POW %s", power)
         self.write(f"SOUR:POW {power}")
     
     def set_if_bandwidth(self, bandwidth: float):
         """设置IF带宽"""
         if not (self.min_if_bandwidth <= bandwidth <= self.max_if_bandwidth):
             raise ValueError(f"IF带宽超出范围: {self.min_if_bandwidth}Hz - {self.max_if_bandwidth}Hz")
-        print(f"[SCPI] 设置IF带宽")
-        print(f"  >> SENS:BAND {bandwidth}")
+        logger.log(TRACE, "[SCPI] 设置IF带宽")
+        logger.log(TRACE, "  >> SENS:BAND %s", bandwidth)
         self.write(f"SENS:BAND {bandwidth}")
+        self.if_bandwidth = float(bandwidth)
+        self.sweep_estimate = None
     
     def trigger_sweep(self):
         """触发扫描"""
+        self._sweep_started()
         self.write("INIT:IMM")
     
     def wait_for_sweep(self):
@@ -505,14 +530,15 @@ class RohdeZNA26(NetworkAnalyzerBase):
         import time
         
         max_retries = 3  # 最多重试3次
-        query_timeout = 30  # 每次查询30秒超时（罗德设备需要更长时间）
+        query_timeout = self.sweep_timeout()  # 每次查询的超时按预测的扫描时间
         retry_count = 0
         
         while retry_count < max_retries:
             try:
                 opc = int(self.query("*OPC?", timeout=query_timeout))
                 if opc == 1:
-                    print(f"  [完成] 扫描完成")
+                    self._sweep_finished()
+                    logger.log(TRACE, "  [完成] 扫描完成")
                     return  # 成功
             except Exception as e:
                 error_str = str(e)
@@ -520,12 +546,12 @@ class RohdeZNA26(NetworkAnalyzerBase):
                 
                 # 区分不同类型的错误
                 if "IO" in error_str or "I/O" in error_str:
-                    print(f"  [连接中断] 设备网络连接已断开")
+                    logger.log(TRACE, "  [连接中断] 设备网络连接已断开")
                     raise Exception("设备连接已断开，请检查网线或设备电源")
                 elif "TMO" in error_str or "Timeout" in error_str:
-                    print(f"  [超时] 等待设备响应... ({retry_count}/{max_retries})")
+                    logger.log(TRACE, "  [超时] 等待设备响应... (%s/%s)", retry_count, max_retries)
                 else:
-                    print(f"  [异常] {error_str}")
+                    logger.warning(f"[异常] {error_str}")
                     raise Exception(f"测量异常: {error_str}")
             
             time.sleep(1.0)
@@ -0,0 +1,263 @@
+"""
+SCPI 会话录制与回放
+录制：记录驱动发出的每条写入、查询及其响应、耗时与发生时间，写入 gzip 压缩的 JSON Lines 文件（.scpi.gz）；
+回放：把录制的响应按顺序交还给驱动（替代 VISA / TCP 连接），在本地重现真实台架上的会话，
+用于对线缆以上的全部代码（驱动解析、控制器、统计、存储）做可重复的性能回归测试。
+
+文件格式（每行一个 JSON）：
+    第一行   {"format": "scpi-session", "version": 1, "device_type", "idn", "resource_name", "started", "state"}
+    之后     [t, op, command, duration, response(, error_kind, error_message)]
+             t 为相对录制开始的秒数，duration 为本次读写耗时（秒）；
+             op 为 'w'（写入，response 为 null）、'q'（查询）或 'm'（标记，command 为标记类型，
+             response 为附带数据，如测量请求参数；标记之后可再附当时的驱动状态）。
+    读写失败时追加 error_kind（'timeout' / 'error'）与错误信息，回放时按原样抛出。
+    state 为驱动在连接初始化时得到的扫描配置（频点数、IF 带宽等），回放时不经过初始化，直接恢复。
+
+回放只模拟仪器读写本身的耗时（duration × time_scale），两次读写之间的间隔由被测代码自己产生。
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .io_metrics import is_timeout
+
+logger = logging.getLogger('multi_channel_system')
+
+SESSION_FORMAT = 'scpi-session'
+SESSION_VERSION = 1
+SESSION_EXTENSION = '.scpi.gz'
+
+_LOOKAHEAD = 64  # 非严格回放时向后查找匹配命令的最大记录数
+
+
+class ReplayError(RuntimeError):
+    """回放的命令与录制不一致"""
+
+
+class SessionRecorder:
+    """SCPI 会话录制（驱动在读写线程中调用，线程安全）"""
+
+    def __init__(self, path: str, device_type: str, idn: Optional[str] = None,
+                 resource_name: Optional[str] = None, state: Optional[Dict] = None):
+        """
+        Args:
+            path: 录制文件路径（.scpi.gz）
+            device_type: 设备类型（回放时据此选择驱动）
+            idn: 设备标识字符串
+            resource_name: 录制时的资源名称
+            state: 开始录制时的驱动状态
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.device_type = device_type
+        self.started = datetime.now().isoformat()
+        self.records = 0
+        self.markers = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._write_line({
+            'format': SESSION_FORMAT, 'version': SESSION_VERSION, 'device_type': device_type,
+            'idn': idn, 'resource_name': resource_name, 'started': self.started, 'state': state or {},
+        })
+
+    def _write_line(self, item):
+        self._file.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+        self._file.write('\n')
+
+    def _append(self, record: List):
+        with self._lock:
+            if self._file is None:
+                return
+            self._write_line(record)
+            self.records += 1
+
+    def record(self, command: str, is_query: bool, start: float, seconds: float,
+               response: Optional[str] = None, error: Optional[BaseException] = None):
+        """
+        记录一次读写
+
+        Args:
+            command: SCPI 命令
+            is_query: 是否为查询
+            start: 开始时间（time.perf_counter()）
+            seconds: 耗时（秒）
+            response: 查询响应
+            error: 读写异常
+        """
+        record = [round(start - self._origin, 6), 'q' if is_query else 'w', command.strip(),
+                  round(seconds, 6), response]
+        if error is not None:
+            record += ['timeout' if is_timeout(error) else 'error', str(error)]
+        self._append(record)
+
+    def mark(self, kind: str, data=None, state: Optional[Dict] = None):
+        """记录标记（如测量请求及当时的驱动状态），回放时用于重新发起相同的操作"""
+        record = [round(time.perf_counter() - self._origin, 6), 'm', kind, 0, data]
+        if state:
+            record.append(state)
+        self._append(record)
+        with self._lock:
+            self.markers += 1
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> Dict:
+        """结束录制并返回概况"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        return self.summary()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def summary(self) -> Dict:
+        return {
+            'path': self.path,
+            'device_type': self.device_type,
+            'started': self.started,
+            'records': self.records,
+            'markers': self.markers,
+            'duration_s': round(time.perf_counter() - self._origin, 3),
+            'recording': not self.closed,
+        }
+
+
+def load_session(path: str) -> Tuple[Dict, List[List]]:
+    """
+    读取录制文件
+
+    Returns:
+        (文件头, 记录列表)
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != SESSION_FORMAT:
+            raise ValueError(f"不是 SCPI 会话录制文件: {path}")
+        if header.get('version') != SESSION_VERSION:
+            raise ValueError(f"不支持的录制文件版本: {header.get('version')}")
+        records = []
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # 录制中断时最后一行可能不完整
+                logger.warning(f"录制文件末尾不完整，已忽略: {path}")
+                break
+    return header, records
+
+
+class ReplayTransport:
+    """
+    回放录制的会话（设置为驱动的 transport 后，驱动的读写不再经过 VISA / TCP）
+
+    命令按录制顺序匹配；非严格模式下允许跳过录制中多出的记录（向后最多查找 _LOOKAHEAD 条），
+    回放时多出的写入直接忽略，多出的查询无法给出响应，抛出 ReplayError。
+    """
+
+    def __init__(self, path: str, time_scale: float = 0.0, strict: bool = False):
+        """
+        Args:
+            path: 录制文件路径
+            time_scale: 读写耗时缩放系数（0 为不等待，1 为按录制时的耗时）
+            strict: 命令不一致时是否立即报错
+        """
+        self.path = path
+        self.header, self.records = load_session(path)
+        self.time_scale = float(time_scale)
+        self.strict = strict
+        self.device_type = self.header.get('device_type')
+        self.idn = self.header.get('idn')
+        self.state = self.header.get('state') or {}
+        self._lock = threading.Lock()
+        self.rewind()
+
+    def rewind(self, position: int = 0):
+        """回到指定记录位置，清零计数"""
+        with self._lock:
+            self.position = position
+            self.replayed = 0
+            self.skipped = 0
+            self.unmatched = 0
+
+    def markers(self, kind: Optional[str] = None) -> List[Tuple[int, str, object, Dict]]:
+        """录制中的标记 [(记录位置, 类型, 数据, 驱动状态)]"""
+        return [(index, record[2], record[4], record[5] if len(record) > 5 else {})
+                for index, record in enumerate(self.records)
+                if record[1] == 'm' and (kind is None or record[2] == kind)]
+
+    def _next(self, op: str, command: str) -> Optional[List]:
+        command = command.strip()
+        end = len(self.records) if self.strict else min(len(self.records), self.position + _LOOKAHEAD)
+        index, skipped = self.position, 0
+        while index < end:
+            record = self.records[index]
+            if record[1] == 'm':
+                index += 1
+                continue
+            if record[1] == op and record[2] == command:
+                self.skipped += skipped
+                self.position = index + 1
+                self.replayed += 1
+                return record
+            if self.strict:
+                break
+            index += 1
+            skipped += 1
+        self.unmatched += 1
+        if self.strict or op == 'q':
+            expected = next((r for r in self.records[self.position:] if r[1] != 'm'), None)
+            raise ReplayError(
+                f"回放不一致（记录 {self.position}）: 收到 {op} {command!r}，"
+                f"录制为 {expected[1] + ' ' + repr(expected[2]) if expected else '会话结束'}"
+            )
+        return None
+
+    def _play(self, record: List):
+        if self.time_scale > 0 and record[3] > 0:
+            time.sleep(record[3] * self.time_scale)
+        if len(record) > 5:
+            if record[5] == 'timeout':
+                raise TimeoutError(record[6])
+            raise RuntimeError(record[6])
+
+    def write(self, command: str) -> int:
+        """回放写入，返回发送的字节数"""
+        with self._lock:
+            record = self._next('w', command)
+        if record is not None:
+            self._play(record)
+        return len(command.strip()) + 1
+
+    def query(self, command: str, timeout: Optional[float] = None) -> Tuple[str, int]:
+        """回放查询，返回 (响应, 接收的字节数)"""
+        with self._lock:
+            record = self._next('q', command)
+        self._play(record)
+        response = record[4] or ''
+        return response, len(response) + 1
+
+    def summary(self) -> Dict:
+        return {
+            'path': self.path,
+            'device_type': self.device_type,
+            'records': len(self.records),
+            'position': self.position,
+            'replayed': self.replayed,
+            'skipped': self.skipped,
+            'unmatched': self.unmatched,
+        }
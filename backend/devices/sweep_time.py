@@ -0,0 +1,250 @@
+"""
+扫描时间预测
+按 (型号, 扫描类型) 估计一次扫描所需的时间，用于等待扫描完成的超时、测量任务的剩余时间与单次扫描超时。
+
+估计值的来源（优先级从高到低）：
+    history     相同配置（频点数、IF 带宽）的实测扫描时间（指数滑动平均）
+    instrument  仪器报告的扫描时间（SENS:SWE:TIME?）× 该型号实测/报告的比例
+    model       型号先验模型（固定开销 + 每点切换时间 + 每点测量时间 ∝ 1/IFBW）× 该型号实测/先验的比例
+
+实测历史保存在 storage/ 下，重启后继续使用。
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config.settings import AppSettings
+
+logger = logging.getLogger('multi_channel_system')
+
+# 型号先验：(固定开销 秒, 每点切换与稳定时间 秒, 每点测量时间与 1/IFBW 的比例)
+MODEL_PRIORS = {
+    'siyi': (0.02, 30e-6, 1.2),
+    'rohde': (0.01, 15e-6, 1.1),
+    'keysight': (0.015, 25e-6, 1.3),
+}
+DEFAULT_PRIOR = (0.02, 30e-6, 1.3)
+
+# 未设置 IF 带宽时假定的值（Hz，各型号出厂默认值量级）
+DEFAULT_IF_BANDWIDTH = 1e3
+
+_SMOOTHING = 0.3  # 指数滑动平均的新样本权重
+_MAX_CONFIGS = 200  # 每个 (型号, 扫描类型) 保留的配置数
+
+
+def _config_key(points: int, if_bandwidth: float) -> str:
+    return f"{int(points)}@{float(if_bandwidth):g}"
+
+
+class _ModelHistory:
+    """单个 (型号, 扫描类型) 的实测历史"""
+
+    def __init__(self):
+        self.configs = OrderedDict()  # 配置 -> {'seconds', 'samples'}（最近使用的在后）
+        self.seeds = {}  # 配置 -> 仪器报告的扫描时间
+        self.instrument_ratio = None  # 实测 / 仪器报告
+        self.model_ratio = None  # 实测 / 先验模型
+
+    def to_dict(self) -> Dict:
+        return {
+            'configs': dict(self.configs),
+            'seeds': dict(self.seeds),
+            'instrument_ratio': self.instrument_ratio,
+            'model_ratio': self.model_ratio,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> '_ModelHistory':
+        history = cls()
+        for key, item in (data.get('configs') or {}).items():
+            history.configs[key] = {'seconds': float(item['seconds']), 'samples': int(item['samples'])}
+        history.seeds = {key: float(value) for key, value in (data.get('seeds') or {}).items()}
+        history.instrument_ratio = data.get('instrument_ratio')
+        history.model_ratio = data.get('model_ratio')
+        return history
+
+
+def _smooth(previous: Optional[float], value: float) -> float:
+    return value if previous is None else previous + _SMOOTHING * (value - previous)
+
+
+class SweepTimePredictor:
+    """扫描时间预测（所有驱动共享，线程安全）"""
+
+    def __init__(self, history_file: Optional[str] = None, timeout_factor: float = 3.0,
+                 timeout_margin: float = 2.0, min_timeout: float = 5.0, max_timeout: float = 600.0):
+        """
+        Args:
+            history_file: 实测历史文件（None 为不保存）
+            timeout_factor: 超时 = 估计值 × timeout_factor + timeout_margin
+            timeout_margin: 超时的固定余量（秒，含网络往返与仪器处理命令的时间）
+            min_timeout: 超时下限（秒）
+            max_timeout: 超时上限（秒）
+        """
+        self.history_file = history_file
+        self.timeout_factor = float(timeout_factor)
+        self.timeout_margin = float(timeout_margin)
+        self.min_timeout = float(min_timeout)
+        self.max_timeout = float(max_timeout)
+        self._lock = threading.Lock()
+        self._models = {}
+        self._loaded = False
+        self._dirty = False
+
+    # ------------------------------------------------------------------ 持久化
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.history_file or not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._models = {key: _ModelHistory.from_dict(item) for key, item in data.get('models', {}).items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"扫描时间历史读取失败，重新开始记录: {e}")
+            self._models = {}
+
+    def save(self):
+        """保存实测历史（无更新时不写文件）"""
+        if not self.history_file:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'models': {key: history.to_dict() for key, history in self._models.items()}}
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.history_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.history_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.history_file)
+        except OSError as e:
+            logger.warning(f"扫描时间历史保存失败: {e}")
+
+    # ------------------------------------------------------------------ 预测
+
+    def _history(self, model: str, sweep_type: str) -> _ModelHistory:
+        self._ensure_loaded()
+        key = f"{model}:{sweep_type.upper()}"
+        history = self._models.get(key)
+        if history is None:
+            history = self._models[key] = _ModelHistory()
+        return history
+
+    @staticmethod
+    def prior(model: str, points: int, if_bandwidth: Optional[float]) -> float:
+        """型号先验模型的扫描时间（秒）"""
+        overhead, per_point, if_factor = MODEL_PRIORS.get(model, DEFAULT_PRIOR)
+        bandwidth = if_bandwidth or DEFAULT_IF_BANDWIDTH
+        return overhead + points * (per_point + if_factor / max(bandwidth, 1e-3))
+
+    def _estimate(self, history: _ModelHistory, model: str, points: int,
+                  if_bandwidth: Optional[float]) -> Tuple[float, str, int]:
+        key = _config_key(points, if_bandwidth or DEFAULT_IF_BANDWIDTH)
+        observed = history.configs.get(key)
+        if observed is not None:
+            return observed['seconds'], 'history', observed['samples']
+        seed = history.seeds.get(key)
+        if seed is not None:
+            return seed * (history.instrument_ratio or 1.0), 'instrument', 0
+        return self.prior(model, points, if_bandwidth) * (history.model_ratio or 1.0), 'model', 0
+
+    def estimate(self, model: str, points: int, if_bandwidth: Optional[float] = None,
+                 sweep_type: str = 'LIN', sweeps: int = 1) -> Dict:
+        """
+        估计扫描时间
+
+        Args:
+            model: 型号（'siyi' / 'rohde' / 'keysight'）
+            points: 频点数
+            if_bandwidth: IF 带宽（Hz，None 为未知）
+            sweep_type: 扫描类型（LIN / LOG / SEGM ...）
+            sweeps: 一次触发的扫描次数
+
+        Returns:
+            {'seconds': 估计值, 'timeout': 建议超时, 'source': 来源, 'samples': 实测样本数}
+        """
+        with self._lock:
+            seconds, source, samples = self._estimate(
+                self._history(model, sweep_type), model, points, if_bandwidth)
+        seconds *= max(int(sweeps), 1)
+        return {
+            'seconds': round(seconds, 6),
+            'timeout': round(self.timeout(seconds), 3),
+            'source': source,
+            'samples': samples,
+        }
+
+    def timeout(self, seconds: float) -> float:
+        """由估计的扫描时间得到等待超时（秒）"""
+        return min(max(seconds * self.timeout_factor + self.timeout_margin, self.min_timeout), self.max_timeout)
+
+    # ------------------------------------------------------------------ 学习
+
+    def seed(self, model: str, points: int, if_bandwidth: Optional[float], seconds: float,
+             sweep_type: str = 'LIN'):
+        """记录仪器报告的扫描时间（SENS:SWE:TIME?）"""
+        if not seconds or seconds <= 0:
+            return
+        key = _config_key(points, if_bandwidth or DEFAULT_IF_BANDWIDTH)
+        with self._lock:
+            history = self._history(model, sweep_type)
+            if history.seeds.get(key) != seconds:
+                history.seeds[key] = float(seconds)
+                self._dirty = True
+
+    def observe(self, model: str, points: int, if_bandwidth: Optional[float], seconds: float,
+                sweep_type: str = 'LIN'):
+        """记录一次实测扫描时间（触发到 *OPC? 返回）"""
+        if seconds <= 0:
+            return
+        key = _config_key(points, if_bandwidth or DEFAULT_IF_BANDWIDTH)
+        with self._lock:
+            history = self._history(model, sweep_type)
+            seed = history.seeds.get(key)
+            if seed:
+                history.instrument_ratio = _smooth(history.instrument_ratio, seconds / seed)
+            history.model_ratio = _smooth(history.model_ratio, seconds / self.prior(model, points, if_bandwidth))
+            item = history.configs.pop(key, None)
+            if item is None:
+                item = {'seconds': float(seconds), 'samples': 0}
+            else:
+                item['seconds'] = _smooth(item['seconds'], seconds)
+            item['samples'] += 1
+            history.configs[key] = item
+            while len(history.configs) > _MAX_CONFIGS:
+                history.configs.popitem(last=False)
+            self._dirty = True
+
+    def reset(self):
+        with self._lock:
+            self._models = {}
+            self._loaded = True
+            self._dirty = True
+
+    def snapshot(self) -> Dict:
+        """各 (型号, 扫描类型) 的学习状态"""
+        with self._lock:
+            self._ensure_loaded()
+            return {key: {
+                'configs': len(history.configs),
+                'samples': sum(item['samples'] for item in history.configs.values()),
+                'instrument_ratio': history.instrument_ratio,
+                'model_ratio': history.model_ratio,
+            } for key, history in self._models.items()}
+
+
+sweep_predictor = SweepTimePredictor(
+    AppSettings.SWEEP_TIME_HISTORY_FILE, AppSettings.SWEEP_TIMEOUT_FACTOR,
+    AppSettings.SWEEP_TIMEOUT_MARGIN, AppSettings.SWEEP_TIMEOUT_MIN, AppSettings.SWEEP_TIMEOUT_MAX
+)
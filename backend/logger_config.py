@@ -1,14 +1,28 @@
 """
 日志配置模块
 提供改进的日志系统，支持日志轮转和会话跟踪
+
+日志记录经队列交给后台线程（QueueListener）格式化并写入文件与控制台，测量线程只做一次入队；
+逐条 SCPI 命令的跟踪日志使用低于 DEBUG 的 TRACE 级别，默认不记录。
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
 import tempfile
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config.settings import AppSettings
+
+# 逐条命令跟踪级别（低于 DEBUG）
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+# 当前的后台日志线程
+_listener = None
 
 
 def get_log_directory(log_dir='logs'):
@@ -49,7 +63,19 @@ def get_log_directory(log_dir='logs'):
         return log_path
 
 
-def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_count=10):
+def _stop_listener():
+    """停止后台日志线程（写完队列中剩余的日志）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_count=10,
+                 level=None, use_queue=None):
     """
     配置日志系统
     
@@ -58,10 +84,24 @@ def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_c
         log_dir: 日志文件目录名
         max_bytes: 单个日志文件最大大小（默认10MB）
         backup_count: 保留的日志文件数量（默认10个）
+        level: 日志级别（名称或数值，默认 AppSettings.LOG_LEVEL；'TRACE' 记录每条命令）
+        use_queue: 是否由后台线程写日志（默认 AppSettings.LOG_QUEUE）
     
     Returns:
         配置好的logger实例
     """
+    global _listener
+    if level is None:
+        level = AppSettings.LOG_LEVEL
+    if isinstance(level, str):
+        level_name, level = level, logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            raise ValueError(f"未知的日志级别: {level_name}")
+    if use_queue is None:
+        use_queue = AppSettings.LOG_QUEUE
+    # 文件日志记录所有已启用的级别（TRACE 开启时也写入文件）
+    file_level = min(logging.DEBUG, level)
+    
     # 获取适配环境的日志目录
     log_path = get_log_directory(log_dir)
     
@@ -74,7 +114,7 @@ def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_c
     
     # 创建logger
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(level)
     
     # 禁止传播到root logger，避免重复输出
     logger.propagate = False
@@ -82,6 +122,7 @@ def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_c
     # 清除已有的handlers（避免重复）
     if logger.hasHandlers():
         logger.handlers.clear()
+    _stop_listener()
     
     # 文件日志格式（详细）
     file_formatter = logging.Formatter(
@@ -101,9 +142,8 @@ def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_c
         encoding='utf-8',
         mode='w'  # 每次启动创建新文件
     )
-    session_handler.setLevel(logging.DEBUG)
+    session_handler.setLevel(file_level)
     session_handler.setFormatter(file_formatter)
-    logger.addHandler(session_handler)
     
     # 2. 轮转日志文件（用于长期保存）
     rotating_handler = RotatingFileHandler(
@@ -112,15 +152,13 @@ def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_c
         backupCount=backup_count,
         encoding='utf-8'
     )
-    rotating_handler.setLevel(logging.DEBUG)
+    rotating_handler.setLevel(file_level)
     rotating_handler.setFormatter(file_formatter)
-    logger.addHandler(rotating_handler)
     
     # 3. 控制台输出
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
     
     # 4. 错误日志单独文件
     error_log_file = os.path.join(log_path, 'errors.log')
@@ -132,7 +170,17 @@ def setup_logger(name='system', log_dir='logs', max_bytes=10*1024*1024, backup_c
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(file_formatter)
-    logger.addHandler(error_handler)
+    
+    handlers = [session_handler, rotating_handler, console_handler, error_handler]
+    if use_queue:
+        # 调用线程只入队，由后台线程按各handler的级别格式化并写出
+        log_queue = queue.SimpleQueue()
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(QueueHandler(log_queue))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     # 记录会话开始（精简版）
     logger.info(f"会话启动 [{session_time}]")
@@ -6,6 +6,7 @@
 import serial
 import serial.tools.list_ports
 import socket
+import threading
 import time
 import logging
 import re
@@ -13,6 +14,10 @@ from datetime import datetime
 from flask import jsonify
 from typing import Tuple, Union
 
+from monitoring.metrics import (CONNECTIONS_TOTAL, INSTRUMENT_CONNECTED, MATRIX_COMMAND_ERRORS,
+                                MATRIX_COMMAND_SECONDS, RECONNECTS_TOTAL)
+from monitoring.tracing import tracer
+
 # 使用主logger（将在app.py中配置）
 logger = logging.getLogger('multi_channel_system')
 
@@ -20,6 +25,10 @@ logger = logging.getLogger('multi_channel_system')
 COM1_CHANNELS = set(range(0, 73))
 COM2_CHANNELS = set(range(73, 77))
 
+# 命令往返耗时（预先绑定标签）：command 为手动命令，route 为路由/开关切换的每条指令
+_COMMAND_SECONDS = MATRIX_COMMAND_SECONDS.labels('command')
+_ROUTE_SECONDS = MATRIX_COMMAND_SECONDS.labels('route')
+
 class MatrixController:
     """矩阵开关控制器类"""
     
@@ -32,6 +41,20 @@ class MatrixController:
         self.current_ip = self.device_ip
         self.current_port = self.device_port
         self.last_handshake = None
+        self.current_route = None  # 最近一次成功设置的路由 {'from_port', 'to_port'}
+        self._connected_once = False  # 本进程内是否连接过设备（用于统计重连次数）
+        self._io_lock = threading.Lock()  # 同一时间只有一个请求与设备收发（HTTP 请求由多个服务线程并发处理）
+        INSTRUMENT_CONNECTED.labels('matrix').set_function(self.is_connected)
+    
+    @property
+    def current_channel(self):
+        """当前路由的输出通道（如 'CH12'），未设置路由时为 None"""
+        if not self.current_route:
+            return None
+        for port in (self.current_route['to_port'], self.current_route['from_port']):
+            if port.startswith('CH'):
+                return port
+        return None
     
     def is_connected(self):
         """内部方法：检查连接对象是否有效且可用"""
@@ -133,24 +156,28 @@ class MatrixController:
                 
         except socket.timeout:
             logger.error("网络连接超时")
+            CONNECTIONS_TOTAL.labels('matrix', 'failure').inc()
             return jsonify({
                 'success': False,
                 'message': '连接超时，请检查设备IP和端口是否正确'
             }), 400
         except socket.error as e:
             logger.error(f"网络连接失败: {str(e)}")
+            CONNECTIONS_TOTAL.labels('matrix', 'failure').inc()
             return jsonify({
                 'success': False,
                 'message': f'网络连接失败'
             }), 400
         except serial.SerialException as e:
             logger.error(f"串口连接失败: {str(e)}")
+            CONNECTIONS_TOTAL.labels('matrix', 'failure').inc()
             return jsonify({
                 'success': False,
                 'message': f'串口连接失败'
             }), 400
         except Exception as e:
             logger.error(f"连接错误: {str(e)}")
+            CONNECTIONS_TOTAL.labels('matrix', 'failure').inc()
             self._cleanup_connection()
             return jsonify({
                 'success': False,
@@ -191,7 +218,8 @@ class MatrixController:
             'connected': is_connected,
             'connection_type': self.connection_type,
             'timestamp': datetime.now().isoformat(),
-            'last_handshake': self.last_handshake.isoformat() if self.last_handshake else None
+            'last_handshake': self.last_handshake.isoformat() if self.last_handshake else None,
+            'current_route': self.current_route
         }
         
         if is_connected:
@@ -236,38 +264,44 @@ class MatrixController:
             
             command_bytes = (command + '\n').encode('utf-8')
             response = ""
+            started = time.perf_counter()
             
-            if self.connection_type == 'network':
-                try:
-                    self.connection.sendall(command_bytes)
-                    time.sleep(0.1)
-                    response = self.connection.recv(1024).decode('utf-8').strip()
-                except socket.timeout:
-                    logger.warning("等待设备响应超时")
-                    response = "超时：设备未响应"
-                except socket.error as e:
-                    logger.error(f"网络通信错误: {str(e)}")
-                    self._cleanup_connection()
-                    return jsonify({
-                        'success': False,
-                        'message': f'网络通信错误'
-                    }), 400
-            else:
-                try:
-                    self.connection.reset_input_buffer()
-                    self.connection.write(command_bytes)
-                    time.sleep(0.2)
+            with self._io_lock:
+                if self.connection_type == 'network':
+                    try:
+                        self.connection.sendall(command_bytes)
+                        time.sleep(0.1)
+                        response = self.connection.recv(1024).decode('utf-8').strip()
+                    except socket.timeout:
+                        logger.warning("等待设备响应超时")
+                        MATRIX_COMMAND_ERRORS.labels('command').inc()
+                        response = "超时：设备未响应"
+                    except socket.error as e:
+                        logger.error(f"网络通信错误: {str(e)}")
+                        MATRIX_COMMAND_ERRORS.labels('command').inc()
+                        self._cleanup_connection()
+                        return jsonify({
+                            'success': False,
+                            'message': f'网络通信错误'
+                        }), 400
+                else:
+                    try:
+                        self.connection.reset_input_buffer()
+                        self.connection.write(command_bytes)
+                        time.sleep(0.2)
                     
-                    if self.connection.in_waiting > 0:
-                        response = self.connection.readline().decode('utf-8').strip()
-                except serial.SerialException as e:
-                    logger.error(f"串口通信错误: {str(e)}")
-                    self._cleanup_connection()
-                    return jsonify({
-                        'success': False,
-                        'message': f'串口通信错误'
-                    }), 400
+                        if self.connection.in_waiting > 0:
+                            response = self.connection.readline().decode('utf-8').strip()
+                    except serial.SerialException as e:
+                        logger.error(f"串口通信错误: {str(e)}")
+                        MATRIX_COMMAND_ERRORS.labels('command').inc()
+                        self._cleanup_connection()
+                        return jsonify({
+                            'success': False,
+                            'message': f'串口通信错误'
+                        }), 400
             
+            _COMMAND_SECONDS.observe(time.perf_counter() - started)
             logger.info(f"命令响应: {response}")
             
             # 解析设备响应，提供更清晰的状态信息
@@ -305,8 +339,10 @@ class MatrixController:
         
         try:
             cmd_str = self._path_to_cmd(from_port, to_port)
-            ok, resp = self._execute_route_commands(cmd_str)
+            with tracer.span('route', 'matrix', from_port=from_port, to_port=to_port):
+                ok, resp = self._execute_route_commands(cmd_str)
             if ok:
+                self.current_route = {'from_port': from_port, 'to_port': to_port}
                 return jsonify({'success': True, 'sent': cmd_str.splitlines(), 'response': resp})
             return jsonify({'success': False, 'message': resp}), 400
         except ValueError as ve:
@@ -329,8 +365,10 @@ class MatrixController:
         
         try:
             cmd_str = self._sw_cmd(int(sw_id), int(target))
-            ok, resp = self._execute_route_commands(cmd_str)
+            with tracer.span('switch', 'matrix', sw_id=int(sw_id), target=int(target)):
+                ok, resp = self._execute_route_commands(cmd_str)
             if ok:
+                self.current_route = None  # 单独切换开关后路由不再确定
                 return jsonify({'success': True, 'sent': cmd_str, 'response': resp})
             return jsonify({'success': False, 'message': resp}), 400
         except ValueError as ve:
@@ -414,23 +452,26 @@ class MatrixController:
         lines = [ln.strip() for ln in commands.splitlines() if ln.strip()]
         full_resp = []
         try:
-            for line in lines:
-                logger.info(f"发送矩阵指令 ({self.connection_type}): {line}")
-                cmd_bytes = (line + '\n').encode('utf-8')
-                if self.connection_type == 'network':
-                    self.connection.sendall(cmd_bytes)
-                    resp = self.connection.recv(1024).decode('utf-8').strip()
-                    full_resp.append(resp)
-                else:  # serial
-                    if hasattr(self.connection, 'reset_input_buffer'):
-                        self.connection.reset_input_buffer()
-                    self.connection.write(cmd_bytes)
-                    if hasattr(self.connection, 'in_waiting') and self.connection.in_waiting:
-                        resp = self.connection.readline().decode('utf-8').strip()
-                        full_resp.append(resp)
+            with self._io_lock:
+                for line in lines:
+                    logger.info(f"发送矩阵指令 ({self.connection_type}): {line}")
+                    cmd_bytes = (line + '\n').encode('utf-8')
+                    with _ROUTE_SECONDS.time(), tracer.span('route_command', 'matrix', command=line):
+                        if self.connection_type == 'network':
+                            self.connection.sendall(cmd_bytes)
+                            resp = self.connection.recv(1024).decode('utf-8').strip()
+                            full_resp.append(resp)
+                        else:  # serial
+                            if hasattr(self.connection, 'reset_input_buffer'):
+                                self.connection.reset_input_buffer()
+                            self.connection.write(cmd_bytes)
+                            if hasattr(self.connection, 'in_waiting') and self.connection.in_waiting:
+                                resp = self.connection.readline().decode('utf-8').strip()
+                                full_resp.append(resp)
             return True, '\n'.join(full_resp) if full_resp else 'OK'
         except Exception as e:
             logger.exception("_execute_route_commands 失败")
+            MATRIX_COMMAND_ERRORS.labels('route').inc()
             self._cleanup_connection()
             return False, str(e)
 
@@ -509,6 +550,10 @@ class MatrixController:
         
         self.last_handshake = datetime.now()
         logger.info(f"握手成功: {response}")
+        CONNECTIONS_TOTAL.labels('matrix', 'success').inc()
+        if self._connected_once:
+            RECONNECTS_TOTAL.labels('matrix').inc()
+        self._connected_once = True
         return response
     
     def _validate_command(self, command: str) -> bool:
@@ -0,0 +1,9 @@
+"""
+运行监控
+指标注册表（/api/metrics）与测量时间线（Chrome trace 导出）
+"""
+
+from .metrics import CONTENT_TYPE, MetricsRegistry, instrument_app, registry
+from .tracing import Tracer, tracer
+
+__all__ = ['CONTENT_TYPE', 'MetricsRegistry', 'Tracer', 'instrument_app', 'registry', 'tracer']
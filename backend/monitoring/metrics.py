@@ -0,0 +1,347 @@
+"""
+指标注册表（Prometheus 文本格式）
+计数器、仪表与直方图，供 /api/metrics 输出。
+
+测量热路径上的更新只涉及单个时间序列：每个序列有自己的锁（无全局锁、无竞争时开销约数十纳秒），
+带标签的序列在模块加载时预先绑定，更新时不再查表。仪表也可以绑定回调函数，在采集时才计算取值（如队列深度）。
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# 默认耗时直方图分桶（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """采集时调用 function 取值"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return float('nan')
+        return self._value
+
+
+class _HistogramChild:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> '_Timer':
+        """计时上下文：with histogram.time(): ..."""
+        return _Timer(self)
+
+    def get(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _Metric:
+    """带标签的指标：labels(...) 返回单个时间序列"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _series(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self._series():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._children[()].inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def inc(self, amount: float = 1):
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._children[()].dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._children[()].set_function(function)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self._series():
+            counts, total = child.get()
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已存在: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """注册采集函数（返回 Prometheus 文本行，用于导出其他模块已有的统计）"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                lines.extend(collector())
+            except Exception:
+                continue
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# ==================== 应用指标 ====================
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'HTTP 请求处理耗时', ('route', 'method', 'status'))
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge('http_requests_in_flight', '正在处理的 HTTP 请求数')
+
+SWEEPS_TOTAL = registry.counter('vna_sweeps_total', '完成的单次测量（扫描）数', ('result',))
+SWEEP_STAGE_SECONDS = registry.histogram(
+    'vna_sweep_stage_seconds', '单次测量各阶段耗时（commit 为每个参数提交一次）', ('stage',))
+MEASUREMENT_RUNNING = registry.gauge('vna_measurement_running', '是否有测量任务在运行')
+
+QUEUE_DEPTH = registry.gauge('job_queue_depth', '后台任务数', ('queue', 'state'))
+
+MATRIX_COMMAND_SECONDS = registry.histogram(
+    'matrix_command_duration_seconds', '矩阵开关命令往返耗时', ('kind',))
+MATRIX_COMMAND_ERRORS = registry.counter('matrix_command_errors_total', '矩阵开关命令通信错误数', ('kind',))
+
+CONNECTIONS_TOTAL = registry.counter('instrument_connections_total', '仪器连接次数', ('instrument', 'result'))
+RECONNECTS_TOTAL = registry.counter('instrument_reconnects_total', '同一进程内再次连接仪器的次数', ('instrument',))
+INSTRUMENT_CONNECTED = registry.gauge('instrument_connected', '仪器是否已连接', ('instrument',))
+
+RESULT_BYTES_WRITTEN = registry.counter(
+    'results_bytes_written_total', '写入 results/ 的字节数', ('kind',))
+
+
+def _io_collector() -> List[str]:
+    """仪器读写统计（devices.io_metrics）按命令类别导出为直方图与计数器"""
+    from devices.io_metrics import BUCKET_BOUNDS_MS, io_metrics
+
+    snapshot = io_metrics.snapshot()
+    name = 'instrument_io_duration_seconds'
+    lines = [f"# HELP {name} 仪器 write/query 耗时（按命令类别）", f"# TYPE {name} histogram"]
+    counters = {'bytes_sent': [], 'bytes_received': [], 'timeouts': [], 'errors': []}
+    for command_class, stats in sorted(snapshot['classes'].items()):
+        latency = stats['latency']
+        cumulative = 0
+        for index, bound in enumerate(BUCKET_BOUNDS_MS + (math.inf,)):
+            key = '+inf' if index == len(BUCKET_BOUNDS_MS) else f"{bound:g}"
+            cumulative += latency['buckets'].get(key, 0)
+            le = _format_value(bound / 1e3) if index < len(BUCKET_BOUNDS_MS) else '+Inf'
+            lines.append(f'{name}_bucket{{class="{command_class}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{class="{command_class}"}} {_format_value(latency["total_ms"] / 1e3)}')
+        lines.append(f'{name}_count{{class="{command_class}"}} {latency["count"]}')
+        for key in counters:
+            counters[key].append(f'instrument_io_{key}_total{{class="{command_class}"}} {stats[key]}')
+    for key, series in counters.items():
+        lines.append(f"# HELP instrument_io_{key}_total 仪器读写 {key}（按命令类别）")
+        lines.append(f"# TYPE instrument_io_{key}_total counter")
+        lines.extend(series)
+    return lines
+
+
+registry.add_collector(_io_collector)
+
+
+def instrument_app(app):
+    """为 Flask 应用记录每个路由的请求耗时"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+    @app.teardown_request
+    def _observe(exc):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.pop('metrics_status', 500 if exc is not None else 200)
+        HTTP_REQUEST_SECONDS.labels(rule, request.method, status).observe(time.perf_counter() - start)
+
+    @app.after_request
+    def _status(response):
+        g.metrics_status = response.status_code
+        return response
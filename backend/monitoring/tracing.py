@@ -0,0 +1,165 @@
+"""
+测量时间线（span 跟踪）
+记录每次扫描各阶段（配置、激励设置、触发、等待、取频率、取数据、解析、保存）与矩阵路由的起止时间，
+按运行导出为 Chrome / Perfetto trace-event JSON（chrome://tracing、ui.perfetto.dev 可直接打开）。
+
+span 存放在固定容量的环形缓冲区中（超出后丢弃最旧的记录），记录一次只需两次读时钟和一次追加；
+关闭后 span() 返回共享的空上下文。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.settings import AppSettings
+
+
+class _NullSpan:
+    """跟踪关闭时的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('_tracer', '_name', '_cat', '_args', '_start')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: Optional[Dict]):
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        args = self._args
+        if exc_type is not None:
+            args = {**(args or {}), 'error': exc_type.__name__}
+        self._tracer.add(self._name, self._start, self._cat, args)
+        return False
+
+
+class Tracer:
+    """span 环形缓冲区（所有线程共享）"""
+
+    def __init__(self, capacity: int = 50000, enabled: bool = True, max_runs: int = 50):
+        self.enabled = enabled
+        self._spans = deque(maxlen=capacity)
+        self._runs = OrderedDict()  # 运行编号 -> 运行信息（只保留最近 max_runs 次）
+        self._max_runs = max_runs
+        self._threads = {}  # 线程 id -> 线程名
+        self._lock = threading.Lock()
+        self.active_run = None  # 当前运行编号（运行期间记录的 span 都归入该运行）
+
+    @staticmethod
+    def now() -> int:
+        """span 时钟（纳秒）"""
+        return time.perf_counter_ns()
+
+    def span(self, name: str, cat: str = 'sweep', **args):
+        """计时上下文：with tracer.span('trigger'): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args or None)
+
+    def add(self, name: str, start: int, cat: str = 'sweep', args: Optional[Dict] = None):
+        """记录从 start（tracer.now() 的返回值）到现在的 span"""
+        if not self.enabled:
+            return
+        end = time.perf_counter_ns()
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self._spans.append((self.active_run, name, cat, start, end - start, tid, args))
+
+    def begin_run(self, run_id: str, **info):
+        """开始一次运行"""
+        with self._lock:
+            self._runs[run_id] = {
+                'run_id': run_id, 'started': datetime.now().isoformat(),
+                'start_ns': time.perf_counter_ns(), 'end_ns': None, **info,
+            }
+            while len(self._runs) > self._max_runs:
+                self._runs.popitem(last=False)
+        self.active_run = run_id
+
+    def end_run(self, run_id: str):
+        """结束一次运行"""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                run['end_ns'] = time.perf_counter_ns()
+        if self.active_run == run_id:
+            self.active_run = None
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = bool(enabled)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._runs.clear()
+
+    def runs(self) -> List[Dict]:
+        """缓冲区中各运行的概况（最新的在前）"""
+        counts = {}
+        for span in list(self._spans):
+            counts[span[0]] = counts.get(span[0], 0) + 1
+        with self._lock:
+            runs = [dict(run) for run in self._runs.values()]
+        result = []
+        for run in reversed(runs):
+            start, end = run.pop('start_ns'), run.pop('end_ns')
+            run['running'] = end is None
+            run['duration_ms'] = round((end - start) / 1e6, 3) if end is not None else None
+            run['spans'] = counts.get(run['run_id'], 0)
+            result.append(run)
+        return result
+
+    def chrome_trace(self, run_id: str) -> Optional[Dict]:
+        """
+        运行的 trace-event JSON（ph='X' 完整事件，时间单位微秒，以运行开始为零点）
+
+        Returns:
+            运行不在缓冲区中时返回 None
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            run = dict(run) if run is not None else None
+        spans = [span for span in list(self._spans) if span[0] == run_id]
+        if run is None and not spans:
+            return None
+        origin = run['start_ns'] if run is not None else min(span[3] for span in spans)
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                   'args': {'name': f"{AppSettings.APP_NAME} {run_id}"}}]
+        for tid in sorted({span[5] for span in spans}):
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': self._threads.get(tid, str(tid))}})
+        for _, name, cat, start, duration, tid, args in spans:
+            event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': round((start - origin) / 1e3, 3), 'dur': round(duration / 1e3, 3)}
+            if args:
+                event['args'] = args
+            events.append(event)
+        metadata = {'run_id': run_id}
+        if run is not None:
+            metadata.update({key: value for key, value in run.items() if key not in ('start_ns', 'end_ns')})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'metadata': metadata}
+
+
+tracer = Tracer(AppSettings.TRACING_BUFFER_SPANS, AppSettings.TRACING_ENABLED)
@@ -0,0 +1,436 @@
+"""
+测量结果控制器
+提供已保存测量数据的浏览与回放接口
+"""
+
+import logging
+import numpy as np
+from flask import jsonify
+
+from analysis.complex_trace import magnitude_db, phase_deg, polar_complex
+from analysis.group_delay import derived_header
+from analysis.time_domain import TimeDomainTransform, response_values
+from analysis.uncertainty import build_budget
+from config.settings import AppSettings
+from monitoring.metrics import QUEUE_DEPTH
+from storage.analysis_jobs import AnalysisJobManager
+from storage.result_index import ResultIndex, load_channel_traces, load_consistency
+from storage.result_reader import ResultReader
+from storage.run_verdict import load_verdict
+
+# 使用主logger（将在app.py中配置）
+logger = logging.getLogger('multi_channel_system')
+
+
+def _optional_int(args, key):
+    """读取可选的整数查询参数"""
+    value = args.get(key)
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def _optional_float(args, key):
+    """读取可选的浮点查询参数"""
+    value = args.get(key)
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+def _time_domain_options(data):
+    """解析时域变换请求参数（时间单位 ns）"""
+    def seconds(value):
+        return None if value is None or value == '' else float(value) * 1e-9
+
+    options = {
+        'transform': {
+            'mode': data.get('mode', 'bandpass'),
+            'response': data.get('response', 'impulse'),
+            'window': data.get('window', AppSettings.TIME_DOMAIN_WINDOW),
+            'beta': float(data.get('beta', AppSettings.TIME_DOMAIN_BETA)),
+            'pad': int(data.get('pad', AppSettings.TIME_DOMAIN_PAD)),
+        },
+        'time_start': seconds(data.get('time_start')),
+        'time_stop': seconds(data.get('time_stop')),
+        'max_points': int(data.get('max_points', AppSettings.TIME_DOMAIN_MAX_POINTS)),
+        'gate': None,
+    }
+    gate = data.get('gate')
+    if gate:
+        if gate.get('start') is None or gate.get('stop') is None:
+            raise ValueError("门控需要 start 与 stop（ns）")
+        options['gate'] = {
+            'start': seconds(gate['start']),
+            'stop': seconds(gate['stop']),
+            'shape': gate.get('shape', 'tukey'),
+            'taper': float(gate.get('taper', 0.2)),
+            'notch': bool(gate.get('notch', False)),
+        }
+    return options
+
+
+def _time_domain_result(frequencies, values, labels, options):
+    """
+    批量时域变换（所有曲线一次FFT）并组装返回数据
+
+    Args:
+        frequencies: 频率轴（Hz）
+        values: 复数数据 [曲线, 频点]
+        labels: 每条曲线的标识字典
+        options: _time_domain_options 的结果
+    """
+    transform = TimeDomainTransform(frequencies, **options['transform'])
+    index = transform.select(options['time_start'], options['time_stop'], options['max_points'])
+    unit, display = response_values(transform, transform.transform(values)[:, index])
+    result = {
+        **transform.to_dict(),
+        'unit': unit,
+        'time': (transform.time[index] * 1e9).tolist(),
+        'traces': [{**label, 'values': row.tolist()} for label, row in zip(labels, display)],
+    }
+
+    gate = options['gate']
+    if gate:
+        gated = transform.gate(values, **gate)
+        points = np.arange(len(frequencies))
+        if len(points) > options['max_points'] > 1:
+            points = np.unique(np.linspace(0, len(points) - 1, options['max_points']).round().astype(np.int64))
+        result['gate'] = {key: (value * 1e9 if key in ('start', 'stop') else value) for key, value in gate.items()}
+        result['gated'] = {
+            'frequencies': np.asarray(frequencies)[points].tolist(),
+            'traces': [
+                {**label, 'magnitude': magnitude_db(row[points]).tolist(), 'phase': phase_deg(row[points]).tolist()}
+                for label, row in zip(labels, gated)
+            ]
+        }
+    return result
+
+
+class ResultsController:
+    """测量结果控制器类"""
+
+    def __init__(self, results_dir=None):
+        """初始化控制器"""
+        self.reader = ResultReader(results_dir)
+        self.index = ResultIndex(self.reader.results_dir)
+        self.analysis_jobs = AnalysisJobManager()
+        for state in ('pending', 'running'):
+            QUEUE_DEPTH.labels('analysis', state).set_function(lambda state=state: self.analysis_jobs.count(state))
+
+    def list_runs(self):
+        """列出所有测量运行"""
+        try:
+            runs = self.reader.list_runs()
+            return jsonify({'success': True, 'runs': runs, 'count': len(runs)})
+        except Exception as e:
+            logger.error(f"获取测量运行列表失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e), 'runs': []}), 500
+
+    def get_run(self, run_id):
+        """获取单个运行的概要信息"""
+        try:
+            return jsonify({'success': True, **self.reader.get_run_info(run_id)})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        except Exception as e:
+            logger.error(f"获取运行信息失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def get_trace(self, run_id, args, sweep=None):
+        """
+        回放已保存的测量数据
+
+        查询参数：
+            parameter: 测量参数（必填）
+            start/stop: 测量序号范围（从1开始，包含两端）
+            fmin/fmax: 频率窗口（MHz，与测量设置一致）
+            max_points: 最大返回频点数（超出时抽取）
+        """
+        try:
+            parameter = args.get('parameter', '').strip()
+            if not parameter:
+                return jsonify({'success': False, 'message': '参数不能为空'}), 400
+
+            start = sweep if sweep is not None else _optional_int(args, 'start')
+            stop = sweep if sweep is not None else _optional_int(args, 'stop')
+            fmin = _optional_float(args, 'fmin')
+            fmax = _optional_float(args, 'fmax')
+
+            trace = self.reader.read_trace(
+                run_id, parameter,
+                start=start, stop=stop,
+                freq_min=fmin * 1e6 if fmin is not None else None,
+                freq_max=fmax * 1e6 if fmax is not None else None,
+                max_points=_optional_int(args, 'max_points')
+            )
+            return jsonify({'success': True, **trace})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        except Exception as e:
+            logger.error(f"回放测量数据失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def get_statistics(self, run_id, args):
+        """获取测量时保存的按频点统计结果（均值、标准差、最值、分位数）"""
+        try:
+            parameter = args.get('parameter', '').strip()
+            if not parameter:
+                return jsonify({'success': False, 'message': '参数不能为空'}), 400
+            return jsonify({'success': True, **self.reader.get_statistics(run_id, parameter)})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        except Exception as e:
+            logger.error(f"获取统计结果失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def evaluate_uncertainty(self, run_id, data):
+        """
+        按频点评定测量不确定度（GUM），可选蒙特卡洛传播
+
+        请求格式：
+            parameter: 测量参数（必填）
+            quantity: 'magnitude'（默认）或 'phase'
+            calibration_residual: 校准残差（标量或按频点列表）
+            residual_distribution: 校准残差分布（默认 rectangular）
+            type_b: B类分量列表 [{name, value, distribution, coverage_factor, sensitivity, dof}]
+            coverage_factor: 包含因子 k
+            monte_carlo: {trials, probability, seed}，省略则不进行蒙特卡洛
+            max_points: 最大返回频点数（超出时抽取）
+        """
+        try:
+            data = data or {}
+            parameter = str(data.get('parameter', '')).strip()
+            if not parameter:
+                return jsonify({'success': False, 'message': '参数不能为空'}), 400
+
+            statistics = self.reader.get_statistics(run_id, parameter)
+            budget = build_budget(
+                statistics,
+                quantity=data.get('quantity', 'magnitude'),
+                calibration_residual=data.get('calibration_residual'),
+                residual_distribution=data.get('residual_distribution', 'rectangular'),
+                type_b=data.get('type_b'),
+                coverage_factor=float(data.get('coverage_factor', AppSettings.UNCERTAINTY_COVERAGE_FACTOR))
+            )
+
+            frequencies = np.asarray(statistics['frequencies'])
+            index = None
+            max_points = data.get('max_points')
+            if max_points and 0 < int(max_points) < len(frequencies):
+                index = np.unique(np.linspace(0, len(frequencies) - 1, int(max_points)).round().astype(np.int64))
+
+            result = {
+                'run_id': run_id,
+                'parameter': parameter.upper(),
+                'quantity': data.get('quantity', 'magnitude'),
+                'count': statistics.get('count'),
+                'frequencies': (frequencies if index is None else frequencies[index]).tolist(),
+                **budget.to_dict(index)
+            }
+
+            monte_carlo = data.get('monte_carlo')
+            if monte_carlo:
+                trials = int(monte_carlo.get('trials', AppSettings.UNCERTAINTY_MC_TRIALS))
+                if trials > AppSettings.UNCERTAINTY_MC_MAX_TRIALS:
+                    return jsonify({
+                        'success': False,
+                        'message': f'蒙特卡洛试验次数不能超过 {AppSettings.UNCERTAINTY_MC_MAX_TRIALS}'
+                    }), 400
+                mc = budget.monte_carlo(
+                    trials=trials,
+                    probability=float(monte_carlo.get('probability', 0.95)),
+                    seed=monte_carlo.get('seed')
+                )
+                result['monte_carlo'] = {
+                    'trials': trials,
+                    **{key: (values if index is None else values[index]).tolist() for key, values in mc.items()}
+                }
+            return jsonify({'success': True, **result})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        except Exception as e:
+            logger.error(f"不确定度评定失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def get_verdict(self, run_id):
+        """获取运行时保存的极限判定结论"""
+        try:
+            return jsonify({'success': True, 'run_id': run_id, **load_verdict(self.reader.run_path(run_id))})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        except Exception as e:
+            logger.error(f"获取极限判定结论失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def transform_run(self, run_id, data):
+        """
+        对一个运行的复数数据进行时域变换（所有参数、所有测量次数一次批量变换）
+
+        请求格式：
+            parameters: 参数列表，省略时为运行中所有带相位的参数
+            start/stop: 测量序号范围
+            average: 是否先在复数域平均各次测量（默认 False）
+            mode: 'bandpass' / 'lowpass'；response: 'impulse' / 'step'
+            window/beta/pad: 窗函数、Kaiser 参数、补零倍数
+            gate: {start, stop（ns）, shape, taper, notch}，返回门控后的频率响应
+            time_start/time_stop: 返回的时间范围（ns）
+            max_points: 每条曲线的最大返回点数
+        """
+        try:
+            data = data or {}
+            options = _time_domain_options(data)
+            parameters = data.get('parameters')
+            if not parameters:
+                info = self.reader.get_run_info(run_id)
+                parameters = [
+                    p['parameter'] for p in info['parameters']
+                    if not p['is_power'] and not derived_header(p['parameter'])
+                ]
+            if not parameters:
+                return jsonify({'success': False, 'message': '运行中没有可变换的矢量参数'}), 400
+
+            frequencies, rows, labels = None, [], []
+            for parameter in parameters:
+                trace = self.reader.read_complex(
+                    run_id, parameter, _optional_int(data, 'start'), _optional_int(data, 'stop')
+                )
+                if frequencies is None:
+                    frequencies = trace['frequencies']
+                elif not np.array_equal(frequencies, trace['frequencies']):
+                    raise ValueError(f"参数 {parameter.upper()} 的频率轴与其他参数不一致")
+                if data.get('average'):
+                    rows.append(trace['values'].mean(axis=0, keepdims=True))
+                    labels.append({'parameter': parameter.upper(), 'sweep': None})
+                else:
+                    rows.append(trace['values'])
+                    labels += [{'parameter': parameter.upper(), 'sweep': s} for s in trace['sweep_ids']]
+
+            result = _time_domain_result(frequencies, np.concatenate(rows), labels, options)
+            return jsonify({'success': True, 'run_id': run_id, **result})
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        except Exception as e:
+            logger.error(f"时域变换失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def transform_channels(self, data):
+        """
+        对各通道同一参数的均值曲线进行时域变换（按结果索引取每个通道最新的运行，一次批量变换）
+
+        请求格式：
+            parameter: 测量参数（必填）
+            runs/channels: 限定的运行ID/通道
+            其余参数同 transform_run
+        """
+        try:
+            data = data or {}
+            parameter = str(data.get('parameter', '')).strip().upper()
+            if not parameter:
+                return jsonify({'success': False, 'message': '参数不能为空'}), 400
+            options = _time_domain_options(data)
+
+            traces = load_channel_traces(self.index, parameter, data.get('runs') or None, data.get('channels') or None)
+            values = traces['complex']
+            if values is None:
+                if traces['phase'] is None:
+                    return jsonify({'success': False, 'message': f'参数 {parameter} 没有相位数据，无法进行时域变换'}), 400
+                values = polar_complex(traces['magnitude'], traces['phase'])
+            labels = [{'channel': channel, 'run_id': run} for channel, run in zip(traces['channels'], traces['runs'])]
+
+            result = _time_domain_result(traces['frequencies'], values, labels, options)
+            return jsonify({'success': True, 'parameter': parameter, **result})
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        except Exception as e:
+            logger.error(f"多通道时域变换失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def query_index(self, args):
+        """
+        查询结果索引
+
+        查询参数：
+            parameter: 测量参数
+            channel: 通道（如 CH12）
+        """
+        try:
+            entries = self.index.query(args.get('parameter') or None, args.get('channel') or None)
+            return jsonify({'success': True, 'entries': entries, 'count': len(entries)})
+        except Exception as e:
+            logger.error(f"查询结果索引失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def rebuild_index(self):
+        """由各运行的统计结果重建结果索引"""
+        try:
+            count = self.index.rebuild()
+            return jsonify({'success': True, 'count': count})
+        except Exception as e:
+            logger.error(f"重建结果索引失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def start_consistency(self, data):
+        """
+        提交通道一致性分析任务（后台执行）
+
+        请求格式：
+            parameter: 测量参数（必填）
+            runs: 参与分析的运行ID列表，省略时每个已记录通道取最新一次运行
+            channels: 参与分析的通道列表
+            magnitude_tolerance: 幅度容差（dB，相对通道均值），null 表示不判定
+            phase_tolerance: 相位容差（度，相对通道均值），null 表示不判定
+            max_points: 按频点曲线的最大点数
+        """
+        try:
+            data = data or {}
+            parameter = str(data.get('parameter', '')).strip().upper()
+            if not parameter:
+                return jsonify({'success': False, 'message': '参数不能为空'}), 400
+
+            runs = data.get('runs') or None
+            channels = data.get('channels') or None
+            tolerances = {}
+            for quantity, default in (('magnitude', AppSettings.CONSISTENCY_MAGNITUDE_TOLERANCE),
+                                      ('phase', AppSettings.CONSISTENCY_PHASE_TOLERANCE)):
+                value = data.get(f'{quantity}_tolerance', default)
+                tolerances[quantity] = float(value) if value is not None else None
+            max_points = int(data.get('max_points', AppSettings.CONSISTENCY_MAX_POINTS))
+
+            def analyse(job):
+                def progress(value):
+                    job.progress = value * 0.9
+                consistency = load_consistency(self.index, parameter, runs, channels, progress)
+                return consistency.to_dict(tolerances, max_points)
+
+            params = {'parameter': parameter, 'runs': runs, 'channels': channels, **{
+                f'{quantity}_tolerance': value for quantity, value in tolerances.items()
+            }}
+            job = self.analysis_jobs.submit('consistency', params, analyse)
+            return jsonify({'success': True, **job.to_dict(include_result=False)})
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            logger.error(f"提交一致性分析失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+
+    def get_analysis_job(self, job_id):
+        """查询分析任务状态，完成时包含结果"""
+        job = self.analysis_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'message': '分析任务不存在'}), 404
+        return jsonify({'success': True, **job.to_dict()})
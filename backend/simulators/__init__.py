@@ -0,0 +1,15 @@
+"""
+仪器模拟器包
+在没有硬件的环境中运行、调试与性能测试完整的测量流程
+"""
+
+from .matrix import MatrixSimulator
+from .mock_visa import MockResourceManager
+from .scpi_server import LatencyModel, PtyEndpoint, SimulatedInstrument, SimulatorServer
+from .vna import VNA_MODELS, SweepTimeModel, SyntheticDut, VnaSimulator
+
+__all__ = [
+    'MatrixSimulator', 'MockResourceManager',
+    'LatencyModel', 'PtyEndpoint', 'SimulatedInstrument', 'SimulatorServer',
+    'VNA_MODELS', 'SweepTimeModel', 'SyntheticDut', 'VnaSimulator',
+]
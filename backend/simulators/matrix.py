@@ -0,0 +1,275 @@
+"""
+矩阵开关模拟器（83个开关单元，三级级联）
+    SW1  ~ SW72  SPDT   状态 1=CHn / 2=CPn（控制器建立路由前发送 CHANGETO:n:0 复位，0 为断开）
+    SW73 ~ SW81  SP8T   状态 0~8，选择组内第 1~8 个末端开关
+    SW82         SP10T  状态 0~9，选择 SW73~SW81（连接 COM1）
+    SW83         SP4T   状态 0~4，选择 CH73~CH76（连接 COM2）
+
+命令（不区分大小写，LF 结尾）：
+    *IDN? / ifconfig
+    ROUTE:PATHSWITCH:<A1>:<A2>   A1=0~72（0 为透传，全部末端开关切到 CP），A2=0 或 73~76
+    ROUTE:PATHSWITCH?            由继电器状态回读当前路径 "<A1>:<A2>"
+    ROUTE:CHANGETO:<SW>:<状态>   ROUTE:CHANGETO:<SW>? 回读开关状态
+    ROUTE:COUNT?                 累计切换次数 "COUNT:<n>"
+    SetIP / SetNetMask / SetGateway / TcpPort / SetMac
+
+设置命令在所有开关动作完成后返回 OK；开关只在状态改变时动作，动作时间按开关类型
+（可按开关编号覆盖）计算，多个开关依次动作。参数超出范围返回 NUM_RANG，无法识别的命令
+返回 NAK；另可按队列、指定故障开关或固定概率（固定随机种子，结果可复现）注入 NAK/NUM_RANG。
+
+运行（在 backend 目录下）：
+    python -m simulators.matrix --port 5025 --pty
+"""
+
+import argparse
+import ipaddress
+import logging
+import random
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .scpi_server import LatencyModel, PtyEndpoint, SimulatedInstrument, SimulatorServer
+
+logger = logging.getLogger('multi_channel_system')
+
+SWITCH_COUNT = 83
+TERMINAL_SWITCHES = range(1, 73)  # SPDT
+GROUP_SWITCHES = range(73, 82)  # SP8T
+COM1_SWITCH = 82  # SP10T
+COM2_SWITCH = 83  # SP4T
+GROUP_SIZE = 8
+INJECTED_ERRORS = ('NAK', 'NUM_RANG')
+
+# 开关类型 -> 默认动作时间（秒，含触点稳定）
+ACTUATION_TIMES = {'SPDT': 0.008, 'SP8T': 0.012, 'SP10T': 0.015, 'SP4T': 0.010}
+
+
+def switch_type(switch: int) -> str:
+    if switch in TERMINAL_SWITCHES:
+        return 'SPDT'
+    if switch in GROUP_SWITCHES:
+        return 'SP8T'
+    return 'SP10T' if switch == COM1_SWITCH else 'SP4T'
+
+
+def switch_range(switch: int) -> Tuple[int, int]:
+    """开关的状态范围"""
+    kind = switch_type(switch)
+    if kind == 'SPDT':
+        return 0, 2
+    if kind == 'SP8T':
+        return 0, GROUP_SIZE
+    return (0, 9) if kind == 'SP10T' else (0, 4)
+
+
+def path_states(a1: int, a2: int) -> List[Tuple[int, int]]:
+    """
+    PATHSWITCH 对应的开关动作序列 [(开关, 状态)]
+
+    Raises:
+        ValueError: 参数超出范围
+    """
+    if not 0 <= a1 <= 72 or not (a2 == 0 or 73 <= a2 <= 76):
+        raise ValueError(f"PATHSWITCH 参数超出范围: {a1}:{a2}")
+    if a1 == 0:
+        # 透传：断开 COM1，全部末端开关切到 CP
+        steps = [(COM1_SWITCH, 0)] + [(switch, 2) for switch in TERMINAL_SWITCHES]
+    else:
+        group, index = divmod(a1 - 1, GROUP_SIZE)
+        steps = [(COM1_SWITCH, group + 1), (GROUP_SWITCHES[group], index + 1), (a1, 1)]
+    steps.append((COM2_SWITCH, a2 - 72 if a2 else 0))
+    return steps
+
+
+class MatrixSimulator(SimulatedInstrument):
+    """矩阵开关模拟器"""
+
+    def __init__(self, actuation: Optional[Dict] = None, nak_rate: float = 0.0,
+                 faulty_switches: Iterable[int] = (), seed: Optional[int] = 0,
+                 idn: str = 'SIM,SWITCH-MATRIX-83SW,SIM000001,1.0'):
+        """
+        Args:
+            actuation: 动作时间覆盖 {开关类型或开关编号: 秒}
+            nak_rate: 设置命令随机返回 NAK 的概率
+            faulty_switches: 故障开关（涉及这些开关的设置命令返回 NAK）
+            seed: 随机种子（None 为不固定）
+            idn: *IDN? 响应
+        """
+        super().__init__()
+        self.actuation = dict(ACTUATION_TIMES)
+        self.actuation.update(actuation or {})
+        self.nak_rate = float(nak_rate)
+        self.faulty_switches = set(int(s) for s in faulty_switches)
+        self.idn = idn
+        self._random = random.Random(seed)
+        self._injected = deque()  # 待注入的错误（按顺序作用于后续设置命令）
+        self.states = {switch: 0 for switch in range(1, SWITCH_COUNT + 1)}
+        self.counts = {switch: 0 for switch in range(1, SWITCH_COUNT + 1)}
+        self.network = {
+            'ip': '192.168.2.11', 'netmask': '255.255.255.0', 'gateway': '192.168.2.1',
+            'port': 5025, 'mac': '00:11:22:33:44:55',
+        }
+        self.commands = 0  # 已处理的命令数
+
+    # ------------------------------------------------------------------ 状态
+
+    def actuation_time(self, switch: int) -> float:
+        """单个开关的动作时间（秒）"""
+        return float(self.actuation.get(switch, self.actuation[switch_type(switch)]))
+
+    def inject(self, error: str, count: int = 1):
+        """后续 count 条设置命令返回指定错误（'NAK' / 'NUM_RANG'）"""
+        if error not in INJECTED_ERRORS:
+            raise ValueError(f"不支持的注入错误: {error}")
+        self._injected.extend([error] * int(count))
+
+    def connected(self) -> Dict[str, Optional[str]]:
+        """由继电器状态得到 COM1/COM2 实际连接的端口"""
+        com1 = None
+        group = self.states[COM1_SWITCH]
+        if group:
+            index = self.states[GROUP_SWITCHES[group - 1]]
+            if index:
+                terminal = (group - 1) * GROUP_SIZE + index
+                state = self.states[terminal]
+                com1 = {1: f"CH{terminal}", 2: f"CP{terminal}"}.get(state)
+        com2 = self.states[COM2_SWITCH]
+        return {'COM1': com1, 'COM2': f"CH{72 + com2}" if com2 else None}
+
+    def _apply(self, steps: List[Tuple[int, int]]) -> float:
+        """依次执行开关动作，返回总动作时间（状态未改变的开关不动作）"""
+        elapsed = 0.0
+        for switch, state in steps:
+            if self.states[switch] != state:
+                self.states[switch] = state
+                self.counts[switch] += 1
+                elapsed += self.actuation_time(switch)
+        return elapsed
+
+    def _fault(self, switches: Iterable[int]) -> Optional[str]:
+        """本次设置命令需要注入的错误"""
+        if self._injected:
+            return self._injected.popleft()
+        if self.faulty_switches.intersection(switches):
+            return 'NAK'
+        if self.nak_rate > 0 and self._random.random() < self.nak_rate:
+            return 'NAK'
+        return None
+
+    # ------------------------------------------------------------------ 命令
+
+    def split(self, line: str):
+        return [line.strip()] if line.strip() else []
+
+    def handle(self, command: str) -> Tuple[Optional[bytes], float]:
+        with self.lock:
+            self.commands += 1
+            response, wait = self._dispatch(command.strip().replace('？', '?'))
+            return response.encode('utf-8'), wait
+
+    def _dispatch(self, command: str) -> Tuple[str, float]:
+        upper = command.upper()
+        if upper == '*IDN?':
+            return self.idn, 0.0
+        if upper == 'IFCONFIG':
+            net = self.network
+            return (f"IP:{net['ip']},MASK:{net['netmask']},GW:{net['gateway']},"
+                    f"PORT:{net['port']},MAC:{net['mac']}"), 0.0
+        if upper == 'ROUTE:COUNT?':
+            return f"COUNT:{sum(self.counts.values())}", 0.0
+        if upper == 'ROUTE:PATHSWITCH?':
+            connected = self.connected()
+            a1 = connected['COM1'] or ''
+            a1 = a1[2:] if a1.startswith('CH') else '0'
+            a2 = connected['COM2'][2:] if connected['COM2'] else '0'
+            return f"{a1}:{a2}", 0.0
+
+        match = re.match(r'^ROUTE:CHANGETO:(\d+)\?$', upper)
+        if match:
+            switch = int(match.group(1))
+            if switch not in self.states:
+                return 'NUM_RANG', 0.0
+            return str(self.states[switch]), 0.0
+
+        match = re.match(r'^ROUTE:CHANGETO:(\d+):(\d+)$', upper)
+        if match:
+            switch, state = int(match.group(1)), int(match.group(2))
+            if switch not in self.states:
+                return 'NUM_RANG', 0.0
+            low, high = switch_range(switch)
+            if not low <= state <= high:
+                return 'NUM_RANG', 0.0
+            fault = self._fault([switch])
+            if fault:
+                return fault, 0.0
+            return 'OK', self._apply([(switch, state)])
+
+        match = re.match(r'^ROUTE:PATHSWITCH:(\d+):(\d+)$', upper)
+        if match:
+            try:
+                steps = path_states(int(match.group(1)), int(match.group(2)))
+            except ValueError:
+                return 'NUM_RANG', 0.0
+            fault = self._fault([switch for switch, _ in steps])
+            if fault:
+                return fault, 0.0
+            return 'OK', self._apply(steps)
+
+        return self._network_command(command)
+
+    def _network_command(self, command: str) -> Tuple[str, float]:
+        """网络配置命令（只记录，不改变模拟器监听地址）"""
+        name, _, value = command.partition(':')
+        key = {'SETIP': 'ip', 'SETNETMASK': 'netmask', 'SETGATEWAY': 'gateway', 'SETGETWAY': 'gateway',
+               'TCPPORT': 'port', 'SETMAC': 'mac'}.get(name.upper())
+        if key is None or not value:
+            return 'NAK', 0.0
+        try:
+            if key in ('ip', 'netmask', 'gateway'):
+                value = str(ipaddress.IPv4Address(value.strip()))
+            elif key == 'port':
+                value = int(value)
+                if not 1 <= value <= 65535:
+                    return 'NUM_RANG', 0.0
+            elif not re.match(r'^([0-9A-Fa-f]{2}(?:[:-][0-9A-Fa-f]{2}){5}|[0-9A-Fa-f]{12})$', value):
+                return 'NAK', 0.0
+        except ValueError:
+            return 'NAK', 0.0
+        self.network[key] = value
+        return 'OK', 0.0
+
+    def status(self) -> Dict:
+        """模拟器状态（调试用）"""
+        return {
+            'connected': self.connected(),
+            'states': {f"SW{s}": v for s, v in self.states.items() if v},
+            'switch_count': sum(self.counts.values()),
+            'commands': self.commands,
+            'network': dict(self.network),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='矩阵开关模拟器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5025)
+    parser.add_argument('--pty', action='store_true', help='同时提供伪终端串口')
+    parser.add_argument('--baudrate', type=int, default=115200, help='伪终端串口的模拟波特率')
+    parser.add_argument('--time-scale', type=float, default=1.0, help='时间缩放系数（0 为不等待）')
+    parser.add_argument('--nak-rate', type=float, default=0.0, help='设置命令随机返回 NAK 的概率')
+    parser.add_argument('--faulty', type=int, nargs='*', default=[], help='故障开关编号')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    instrument = MatrixSimulator(nak_rate=args.nak_rate, faulty_switches=args.faulty, seed=args.seed)
+    server = SimulatorServer(instrument, args.host, args.port, LatencyModel(query=0.0002), args.time_scale)
+    if args.pty:
+        endpoint = PtyEndpoint(server, args.baudrate).start()
+        logger.info(f"[模拟器] 串口: {endpoint.port_name}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+未安装 PyVISA 时的资源管理器
+只支持原始套接字资源 TCPIP[n]::<地址>::<端口>::SOCKET（可连接本地模拟器或真实设备），
+其他资源格式（VXI-11 的 ::INSTR、HiSLIP 等）打开失败，驱动随后改用直接TCP连接。
+接口与 PyVISA 的 MessageBasedResource 子集一致：write / read / query / read_raw / timeout / close。
+"""
+
+import re
+import socket
+from typing import Optional
+
+SOCKET_RESOURCE = re.compile(r'^TCPIP\d*::([^:]+)::(\d+)::SOCKET$', re.IGNORECASE)
+
+
+class SocketResource:
+    """原始套接字上的消息资源（LF 结束符，支持 IEEE 488.2 定长二进制块）"""
+
+    def __init__(self, resource_name: str, host: str, port: int, open_timeout: float = 3.0):
+        self.resource_name = resource_name
+        self.read_termination = '\n'
+        self.write_termination = '\n'
+        self._timeout = 10000
+        self._buffer = b''
+        self._socket = socket.create_connection((host, port), timeout=open_timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket.settimeout(self._timeout / 1000)
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """超时（毫秒，None 为不超时）"""
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value: Optional[float]):
+        self._timeout = value
+        self._socket.settimeout(None if value is None else value / 1000)
+
+    def write(self, command: str) -> int:
+        data = (command + self.write_termination).encode('utf-8')
+        self._socket.sendall(data)
+        return len(data)
+
+    def _fill(self):
+        try:
+            chunk = self._socket.recv(262144)
+        except socket.timeout:
+            raise TimeoutError("Timeout expired before operation completed (VI_ERROR_TMO)")
+        if not chunk:
+            raise ConnectionError("Connection closed by peer (VI_ERROR_IO)")
+        self._buffer += chunk
+
+    def read_raw(self) -> bytes:
+        """读取一条完整响应（含结束符）；定长二进制块按块头给出的长度读取"""
+        while not self._buffer:
+            self._fill()
+        if self._buffer[:1] == b'#':
+            while len(self._buffer) < 2:
+                self._fill()
+            n_digits = int(self._buffer[1:2])
+            while len(self._buffer) < 2 + n_digits:
+                self._fill()
+            end = 2 + n_digits + int(self._buffer[2:2 + n_digits] or 0)
+            while len(self._buffer) <= end:
+                self._fill()
+            end = self._buffer.index(b'\n', end) + 1
+        else:
+            while b'\n' not in self._buffer:
+                self._fill()
+            end = self._buffer.index(b'\n') + 1
+        message, self._buffer = self._buffer[:end], self._buffer[end:]
+        return message
+
+    def read(self) -> str:
+        message = self.read_raw().decode('utf-8', errors='replace')
+        return message[:-len(self.read_termination)] if message.endswith(self.read_termination) else message
+
+    def query(self, command: str) -> str:
+        self.write(command)
+        return self.read()
+
+    def close(self):
+        try:
+            self._socket.close()
+        finally:
+            self._buffer = b''
+
+
+class MockResourceManager:
+    """PyVISA ResourceManager 的替代（仅套接字资源）"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def open_resource(self, resource_name: str, **kwargs) -> SocketResource:
+        match = SOCKET_RESOURCE.match(resource_name.strip())
+        if not match:
+            raise ValueError(f"未安装PyVISA，不支持的资源格式: {resource_name}")
+        resource = SocketResource(resource_name, match.group(1), int(match.group(2)))
+        for key, value in kwargs.items():
+            setattr(resource, key, value)
+        return resource
+
+    def list_resources(self, query: str = '?*::INSTR'):
+        return ()
+
+    def close(self):
+        pass
@@ -0,0 +1,232 @@
+"""
+模拟仪器 TCP 服务
+每个连接一个线程，按行（LF 结尾，可用 ';' 分隔多条命令）接收命令并交给仪器对象处理；
+仪器状态在所有连接之间共享（与真实仪器一致）。
+命令处理延迟由延迟模型给出，仪器自身的等待（如 *OPC? 等待扫描结束）由仪器对象返回，
+两者都乘以时间缩放系数（0 表示不等待，用于快速回放流程）。
+串口设备可通过伪终端（PtyEndpoint，仅 Linux/macOS）提供同一仪器对象的串口端点。
+"""
+
+import logging
+import os
+import random
+import socket
+import socketserver
+import threading
+import time
+from typing import Optional, Tuple
+
+logger = logging.getLogger('multi_channel_system')
+
+
+class LatencyModel:
+    """命令处理延迟：固定延迟 + 响应传输时间 + 随机抖动"""
+
+    def __init__(self, command: float = 0.0002, query: float = 0.0005, bytes_per_second: float = 50e6,
+                 jitter: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            command: 设置命令的处理时间（秒）
+            query: 查询命令的处理时间（秒）
+            bytes_per_second: 响应传输速率（字节/秒，0 表示不计传输时间）
+            jitter: 随机抖动上限（秒，均匀分布）
+            seed: 随机种子
+        """
+        self.command = float(command)
+        self.query = float(query)
+        self.bytes_per_second = float(bytes_per_second)
+        self.jitter = float(jitter)
+        self._random = random.Random(seed)
+
+    def delay(self, is_query: bool, n_bytes: int = 0) -> float:
+        """一条命令的处理延迟（秒）"""
+        delay = self.query if is_query else self.command
+        if self.bytes_per_second > 0:
+            delay += n_bytes / self.bytes_per_second
+        if self.jitter > 0:
+            delay += self._random.uniform(0, self.jitter)
+        return delay
+
+
+class SimulatedInstrument:
+    """模拟仪器基类：子类实现 handle()"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def handle(self, command: str) -> Tuple[Optional[bytes], float]:
+        """
+        处理一条命令
+
+        Args:
+            command: 命令字符串（已去除结束符）
+
+        Returns:
+            (响应（不含结束符，无响应时为 None）, 仪器等待时间（秒，未缩放）)
+        """
+        raise NotImplementedError
+
+    def split(self, line: str):
+        """一行中的多条命令"""
+        return [part.strip() for part in line.split(';') if part.strip()]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """单个连接的命令循环"""
+
+    def handle(self):
+        server = self.server.owner
+        peer = '%s:%s' % self.client_address[:2]
+        logger.info(f"[模拟器] 客户端已连接: {peer}")
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            for raw in self.rfile:
+                output = server.process(raw)
+                if output:
+                    self.wfile.write(output)
+                    self.wfile.flush()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            logger.info(f"[模拟器] 客户端已断开: {peer}")
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SimulatorServer:
+    """模拟仪器的 TCP 服务"""
+
+    def __init__(self, instrument: SimulatedInstrument, host: str = '127.0.0.1', port: int = 5025,
+                 latency: Optional[LatencyModel] = None, time_scale: float = 1.0, terminator: bytes = b'\n'):
+        """
+        Args:
+            instrument: 模拟仪器
+            host: 监听地址
+            port: 监听端口（0 为自动分配）
+            latency: 命令处理延迟模型
+            time_scale: 时间缩放系数（扫描时间、延迟均乘以该系数）
+            terminator: 响应结束符
+        """
+        self.instrument = instrument
+        self.latency = latency or LatencyModel()
+        self.time_scale = float(time_scale)
+        self.terminator = terminator
+        self._server = _ThreadingServer((host, int(port)), _Handler)
+        self._server.owner = self
+        self._thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """实际监听的 (地址, 端口)"""
+        return self._server.server_address[:2]
+
+    def process(self, raw: bytes) -> bytes:
+        """
+        处理收到的一行（按模型等待后返回）
+
+        Returns:
+            需要发送的响应（含结束符，没有查询时为空）
+        """
+        line = raw.decode('utf-8', errors='replace').strip()
+        output = b''
+        for command in (self.instrument.split(line) if line else []):
+            response, wait = self.instrument.handle(command)
+            is_query = response is not None
+            delay = wait + self.latency.delay(is_query, len(response) if is_query else 0)
+            if self.time_scale > 0 and delay > 0:
+                time.sleep(delay * self.time_scale)
+            if is_query:
+                output += response + self.terminator
+        return output
+
+    def start(self) -> 'SimulatorServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name='simulator')
+        self._thread.start()
+        logger.info(f"[模拟器] 服务已启动: {self.address[0]}:{self.address[1]}")
+        return self
+
+    def serve_forever(self):
+        """在当前线程中运行服务（Ctrl+C 结束）"""
+        logger.info(f"[模拟器] 服务已启动: {self.address[0]}:{self.address[1]}")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("[模拟器] 服务已停止")
+
+
+class PtyEndpoint:
+    """伪终端串口端点：客户端（如 pyserial）打开 port_name 即可按串口方式访问模拟仪器"""
+
+    def __init__(self, server: SimulatorServer, baudrate: int = 115200):
+        """
+        Args:
+            server: 处理命令的模拟服务（共享其仪器对象、延迟模型与时间缩放）
+            baudrate: 模拟波特率（按每字节 10 位计算收发时间，0 为不计）
+        """
+        try:
+            import tty
+        except ImportError:
+            raise RuntimeError("当前平台不支持伪终端串口")
+        self.server = server
+        self.baudrate = int(baudrate)
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port_name = os.ttyname(self._slave)
+        self._thread = None
+        self._running = False
+
+    def _transfer_time(self, n_bytes: int) -> float:
+        if self.baudrate <= 0 or self.server.time_scale <= 0:
+            return 0.0
+        return n_bytes * 10 / self.baudrate * self.server.time_scale
+
+    def _loop(self):
+        buffer = b''
+        while self._running:
+            try:
+                chunk = os.read(self._master, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            buffer += chunk
+            while b'\n' in buffer:
+                raw, buffer = buffer.split(b'\n', 1)
+                time.sleep(self._transfer_time(len(raw) + 1))
+                output = self.server.process(raw)
+                if output:
+                    time.sleep(self._transfer_time(len(output)))
+                    os.write(self._master, output)
+
+    def start(self) -> 'PtyEndpoint':
+        """在后台线程中启动串口端点"""
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='simulator-pty')
+        self._thread.start()
+        logger.info(f"[模拟器] 串口端点已启动: {self.port_name}")
+        return self
+
+    def stop(self):
+        """关闭伪终端"""
+        self._running = False
+        for fd in (self._slave, self._master):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=5)
@@ -0,0 +1,462 @@
+"""
+网络分析仪 SCPI 模拟器
+模拟思仪 3674L、罗德 ZNA26、是德 E5071C 驱动使用的命令子集：
+    轨迹定义    :CALC:PAR:DEL:ALL / :CALC:PAR:DEF:EXT / :CALC:CUST:DEF / :CALC:PAR:SDEF / CALC:PAR:DEF /
+                :CALC:PAR:SEL / :CONF:CHAN:TRAC:REN / :CALC:PAR:MEAS / :DISP:WIND:TRAC:FEED
+    激励        SENS:FREQ:STAR|STOP / SENS:SWE:POIN / SENS:BAND / SOUR:POW / SENS:SWE:TIME? / SENS:SWE:COUN
+    触发与同步  INIT:IMM / INIT:CONT / *WAI / *OPC?（等待扫描结束）
+    频率轴      :CALC:X?（思仪） / CALC:DATA:STIM?（罗德） / SENS:FREQ:DATA?（是德）
+    数据        CALC:DATA? FDATA|SDATA / CALC:DATA:FDAT? / CALC:DATA:SDAT?
+    数据格式    FORM:DATA ASCII|REAL,32|REAL,64 / FORM:BORD NORM|SWAP（二进制为 IEEE 488.2 定长块）
+    错误队列    SYST:ERR?
+
+扫描时间由扫描时间模型按频点数与中频带宽计算，*OPC? 与数据查询等待扫描结束后才返回；
+测量数据由合成被测件（延迟线传输、小反射、功率波）加上与中频带宽相关的噪声生成。
+混频器配置等不影响数据的设置命令只接受不处理。
+
+运行（在 backend 目录下）：
+    python -m simulators.vna --model siyi --port 5025
+"""
+
+import argparse
+import logging
+import re
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .scpi_server import LatencyModel, SimulatedInstrument, SimulatorServer
+
+logger = logging.getLogger('multi_channel_system')
+
+
+class SweepTimeModel:
+    """扫描时间：固定开销 + 每点（测量时间约 1/IFBW + 切换/稳定时间）"""
+
+    def __init__(self, overhead: float = 0.01, per_point: float = 20e-6, if_factor: float = 1.2):
+        """
+        Args:
+            overhead: 每次扫描的固定开销（秒，含回扫、波段切换）
+            per_point: 每个频点的合成器切换与稳定时间（秒）
+            if_factor: 每点测量时间与 1/IFBW 的比例
+        """
+        self.overhead = float(overhead)
+        self.per_point = float(per_point)
+        self.if_factor = float(if_factor)
+
+    def sweep_time(self, points: int, if_bandwidth: float) -> float:
+        """一次扫描的时间（秒）"""
+        return self.overhead + points * (self.per_point + self.if_factor / max(if_bandwidth, 1e-3))
+
+
+# 型号 -> 模拟参数
+VNA_MODELS = {
+    'siyi': {
+        'idn': 'Ceyear Technologies,3674L,SIM000001,1.0.0',
+        'freq_range': (10e6, 67e9),
+        'max_points': 16001,
+        'byte_order': 'NORM',
+        'fdata_values': 1,  # FDATA 每个频点的数值个数
+        'default_trace': ('CH1_S11_1', 'S11'),
+        'sweep': SweepTimeModel(overhead=0.02, per_point=25e-6, if_factor=1.3),
+    },
+    'rohde': {
+        'idn': 'Rohde&Schwarz,ZNA26-4Port,1332450064SIM000002,2.70',
+        'freq_range': (10e6, 26.5e9),
+        'max_points': 100001,
+        'byte_order': 'SWAP',
+        'fdata_values': 1,
+        'default_trace': ('Trc1', 'S21'),
+        'sweep': SweepTimeModel(overhead=0.008, per_point=8e-6, if_factor=1.05),
+    },
+    'keysight': {
+        'idn': 'Keysight Technologies,E5071C,MY46SIM0003,B.13.10',
+        'freq_range': (100e3, 8.5e9),
+        'max_points': 20001,
+        'byte_order': 'NORM',
+        'fdata_values': 2,  # FDATA 为 (主值, 副值) 对，对数幅度格式副值为 0
+        'default_trace': ('Tr1', 'S11'),
+        'sweep': SweepTimeModel(overhead=0.015, per_point=15e-6, if_factor=1.2),
+    },
+}
+
+# 不影响测量数据的设置命令（接受但不处理），按规范化后的命令头前缀匹配
+ACCEPTED_PREFIXES = (
+    '*CLS', '*OPC', 'DISP:', 'INIT:CONT', 'SENS:SWE:MODE', 'SENS:SWE:TYPE', 'SENS:SWE:TIME:AUTO',
+    'SENS:AVER', 'SENS:MIX', 'SENS:FREQ:CONV', 'SENS:FREQ:IMOD', 'SENS:PHAS', 'SENS:SLAM',
+    'SENS:POW:ATT', 'SENS:NFIG', 'SOUR:FREQ', 'SOUR:RLO', 'SOUR:LOTR', 'SOUR:PATH', 'SOUR:COMB',
+    'SOUR:POW:ATT', 'CONF:CHAN:GUI',
+)
+
+VOWELS = set('AEIOU')
+
+
+def short_form(node: str) -> str:
+    """SCPI 助记符的短格式（长格式超过4个字符时取前4个，第4个为元音时取前3个）"""
+    node = node.upper()
+    if len(node) <= 4 or node.startswith('*'):
+        return node
+    return node[:3] if node[3] in VOWELS else node[:4]
+
+
+def parse_header(header: str) -> Tuple[str, List[int]]:
+    """
+    规范化命令头：去掉前导冒号与数字后缀，转换为短格式
+
+    Returns:
+        (规范化命令头（如 'CALC:PAR:DEF'）, 各节点的数字后缀（无后缀为 1）)
+    """
+    nodes, suffixes = [], []
+    for node in header.strip(':').split(':'):
+        match = re.match(r'^(\*?[A-Za-z]+)(\d*)$', node)
+        if not match:
+            nodes.append(node.upper())
+            suffixes.append(1)
+            continue
+        nodes.append(short_form(match.group(1)))
+        suffixes.append(int(match.group(2)) if match.group(2) else 1)
+    return ':'.join(nodes), suffixes
+
+
+def parse_args(text: str) -> List[str]:
+    """命令参数（逗号分隔，去掉单/双引号）"""
+    return [a.strip().strip('\'"') for a in re.findall(r"'[^']*'|\"[^\"]*\"|[^,]+", text or '') if a.strip()]
+
+
+class SyntheticDut:
+    """合成被测件：按测量名称给出复数响应（线性）或功率（dBm）"""
+
+    def __init__(self, delay: float = 2e-9, loss: float = 1.0, echo: float = 0.01,
+                 echo_delay: float = 12e-9, reflection: float = 0.05, conversion_loss: float = 6.0):
+        """
+        Args:
+            delay: 传输延迟（秒）
+            loss: 10 GHz 处的插入损耗（dB，按 sqrt(f) 变化）
+            echo: 两端失配造成的回波幅度（线性，产生幅度/群时延纹波）
+            echo_delay: 回波的往返延迟（秒）
+            reflection: 端口反射系数幅度（线性）
+            conversion_loss: 变频参数（SC21/SC12）的变频损耗（dB）
+        """
+        self.delay = float(delay)
+        self.loss = float(loss)
+        self.echo = float(echo)
+        self.echo_delay = float(echo_delay)
+        self.reflection = float(reflection)
+        self.conversion_loss = float(conversion_loss)
+
+    def transmission(self, frequencies: np.ndarray) -> np.ndarray:
+        loss_db = self.loss * np.sqrt(frequencies / 10e9)
+        phase = -2j * np.pi * frequencies
+        return (10 ** (-loss_db / 20) * np.exp(phase * self.delay)
+                * (1 + self.echo * np.exp(phase * self.echo_delay)))
+
+    def reflection_coefficient(self, frequencies: np.ndarray) -> np.ndarray:
+        phase = -2j * np.pi * frequencies
+        return (self.reflection * np.exp(phase * 0.2e-9)
+                + 0.5 * self.reflection * np.exp(phase * 2 * self.delay))
+
+    def response(self, measure: str, frequencies: np.ndarray, power: float) -> Tuple[np.ndarray, bool]:
+        """
+        Args:
+            measure: 测量名称（S21、SC21、a1、b2、Ipwr、Opwr 等）
+            frequencies: 频率轴（Hz）
+            power: 源功率（dBm）
+
+        Returns:
+            (复数响应, 是否为功率量)；功率量的复数幅度为 sqrt(mW)
+        """
+        name = measure.upper()
+        if name in ('S21', 'S12', 'SC21', 'SC12'):
+            values = self.transmission(frequencies)
+            if name.startswith('SC'):
+                values = values * 10 ** (-self.conversion_loss / 20)
+            return values, False
+        if name in ('S11', 'S22', 'SC11', 'SC22'):
+            return self.reflection_coefficient(frequencies), False
+        amplitude = 10 ** (power / 20)  # sqrt(mW)
+        if name in ('A1', 'A2', 'IPWR', 'REVIPWR'):
+            return np.full(len(frequencies), amplitude, dtype=np.complex128), True
+        if name in ('B2', 'B1', 'OPWR', 'REVOPWR'):
+            return amplitude * self.transmission(frequencies), True
+        raise ValueError(f"不支持的测量: {measure}")
+
+
+class VnaSimulator(SimulatedInstrument):
+    """网络分析仪模拟器（单通道）"""
+
+    def __init__(self, model: str = 'siyi', dut: Optional[SyntheticDut] = None,
+                 sweep_model: Optional[SweepTimeModel] = None, noise: float = 1e-3,
+                 noise_floor: float = -100.0, seed: Optional[int] = None):
+        """
+        Args:
+            model: 型号（'siyi' / 'rohde' / 'keysight'）
+            dut: 合成被测件
+            sweep_model: 扫描时间模型（默认使用型号的模型）
+            noise: 1 kHz 中频带宽下的相对迹线噪声（线性）
+            noise_floor: 1 kHz 中频带宽下的噪声底（dB，相对满量程）
+            seed: 噪声随机种子
+        """
+        super().__init__()
+        if model not in VNA_MODELS:
+            raise ValueError(f"不支持的模拟型号: {model}")
+        self.model = model
+        self.profile = VNA_MODELS[model]
+        self.dut = dut or SyntheticDut()
+        self.sweep_model = sweep_model or self.profile['sweep']
+        self.noise = float(noise)
+        self.noise_floor = 10 ** (noise_floor / 20)
+        self._rng = np.random.default_rng(seed)
+        self.sweep_count = 0  # 已完成的扫描次数
+        self.reset()
+
+    def reset(self):
+        """*RST"""
+        self.start = 1e9
+        self.stop = 3e9
+        self.points = 201
+        self.if_bandwidth = 1000.0
+        self.power = -10.0
+        self.sweeps = 1
+        self.data_format = 'ASCII'
+        self.byte_order = self.profile['byte_order']
+        name, measure = self.profile['default_trace']
+        self.traces = {name: measure}
+        self.selected = name
+        self.errors = deque(maxlen=100)
+        self.sweep_end = 0.0
+        self._data = {}  # 轨迹 -> 本次扫描的复数数据（查询时生成）
+
+    # ------------------------------------------------------------------ 工具
+
+    def _error(self, code: int, message: str):
+        self.errors.append(f'{code},"{message}"')
+
+    def _remaining(self) -> float:
+        """距扫描结束的时间（秒）"""
+        return max(0.0, self.sweep_end - time.monotonic())
+
+    def frequencies(self) -> np.ndarray:
+        return np.linspace(self.start, self.stop, self.points)
+
+    def _trace_data(self, name: str) -> Tuple[np.ndarray, bool]:
+        """轨迹的本次扫描数据（同一次扫描的 FDATA/SDATA 一致）"""
+        if name not in self._data:
+            values, is_power = self.dut.response(self.traces[name], self.frequencies(), self.power)
+            scale = np.sqrt(self.if_bandwidth / 1000.0)
+            sigma = scale * (self.noise * np.abs(values) + self.noise_floor) / np.sqrt(2)
+            noise = self._rng.standard_normal((2, self.points))
+            self._data[name] = (values + sigma * (noise[0] + 1j * noise[1]), is_power)
+        return self._data[name]
+
+    def _encode(self, values: np.ndarray) -> bytes:
+        """按当前数据格式编码数值序列"""
+        if self.data_format == 'ASCII':
+            return ','.join(map('{:.10g}'.format, values.tolist())).encode('ascii')
+        endian = '>' if self.byte_order == 'NORM' else '<'
+        dtype = f"{endian}f4" if self.data_format == 'REAL32' else f"{endian}f8"
+        payload = np.asarray(values, dtype=dtype).tobytes()
+        length = str(len(payload))
+        return f"#{len(length)}{length}".encode('ascii') + payload
+
+    def _formatted(self, name: str) -> np.ndarray:
+        """FDATA：dB 幅度（功率量为 dBm）"""
+        values, _ = self._trace_data(name)
+        magnitude = 20 * np.log10(np.maximum(np.abs(values), 1e-15))
+        if self.profile['fdata_values'] == 2:
+            return np.column_stack([magnitude, np.zeros(self.points)]).ravel()
+        return magnitude
+
+    def _complex(self, name: str) -> np.ndarray:
+        """SDATA：实部/虚部交替"""
+        values, _ = self._trace_data(name)
+        return np.column_stack([values.real, values.imag]).ravel()
+
+    def _data_query(self, kind: str) -> Tuple[Optional[bytes], float]:
+        wait = self._remaining()
+        if self.selected not in self.traces:
+            self._error(-221, 'Settings conflict; no trace selected')
+            return b'', wait
+        if kind == 'FDATA':
+            return self._encode(self._formatted(self.selected)), wait
+        if kind == 'SDATA':
+            return self._encode(self._complex(self.selected)), wait
+        self._error(-224, 'Illegal parameter value')
+        return b'', wait
+
+    # ------------------------------------------------------------------ 命令
+
+    def handle(self, command: str) -> Tuple[Optional[bytes], float]:
+        with self.lock:
+            header, _, text = command.partition(' ')
+            is_query = header.endswith('?')
+            key, suffixes = parse_header(header.rstrip('?'))
+            args = parse_args(text)
+            try:
+                result = self._dispatch(key, suffixes, args, is_query)
+            except (ValueError, IndexError):
+                self._error(-224, 'Illegal parameter value')
+                result = (b'' if is_query else None), 0.0
+            if result is None:
+                if key.startswith(ACCEPTED_PREFIXES) and not is_query:
+                    return None, 0.0
+                self._error(-113, 'Undefined header')
+                return (b'' if is_query else None), 0.0
+            return result
+
+    def _set_or_query(self, attr: str, args: List[str], is_query: bool, low: float, high: float,
+                      cast=float) -> Tuple[Optional[bytes], float]:
+        """数值设置/查询"""
+        if is_query:
+            return f"{getattr(self, attr):.12g}".encode('ascii'), 0.0
+        value = cast(float(args[0]))
+        if not low <= value <= high:
+            self._error(-222, 'Data out of range')
+            return None, 0.0
+        setattr(self, attr, value)
+        self._data = {}
+        return None, 0.0
+
+    def _dispatch(self, key: str, suffixes: List[int], args: List[str], is_query: bool):
+        """返回 (响应, 等待时间)；未知命令返回 None"""
+        low, high = self.profile['freq_range']
+
+        if key == '*IDN' and is_query:
+            return self.profile['idn'].encode('ascii'), 0.0
+        if key == '*RST':
+            self.reset()
+            return None, 0.0
+        if key == '*OPC' and is_query:
+            return b'1', self._remaining()
+        if key == '*WAI':
+            return None, self._remaining()
+        if key == 'SYST:ERR' and is_query:
+            return (self.errors.popleft() if self.errors else '0,"No error"').encode('utf-8'), 0.0
+
+        # 激励
+        if key in ('SENS:FREQ:STAR', 'FREQ:STAR'):
+            return self._set_or_query('start', args, is_query, low, high)
+        if key in ('SENS:FREQ:STOP', 'FREQ:STOP'):
+            return self._set_or_query('stop', args, is_query, low, high)
+        if key in ('SENS:SWE:POIN', 'SWE:POIN'):
+            return self._set_or_query('points', args, is_query, 2, self.profile['max_points'], int)
+        if key in ('SENS:BAND', 'SENS:BWID', 'SENS:BAND:RES', 'SENS:BWID:RES'):
+            return self._set_or_query('if_bandwidth', args, is_query, 1, 30e6)
+        if key in ('SOUR:POW', 'SOUR:POW:LEV', 'SOUR:POW:LEV:IMM:AMPL'):
+            return self._set_or_query('power', args, is_query, -90, 20)
+        if key in ('SENS:SWE:COUN', 'SENS:SWE:GRO:COUN'):
+            return self._set_or_query('sweeps', args, is_query, 1, 1000000, int)
+        if key == 'SENS:SWE:TIME' and is_query:
+            sweep_time = self.sweep_model.sweep_time(self.points, self.if_bandwidth)
+            return f"{sweep_time:.6g}".encode('ascii'), 0.0
+
+        # 触发
+        if key in ('INIT', 'INIT:IMM') and not is_query:
+            sweep_time = self.sweep_model.sweep_time(self.points, self.if_bandwidth) * self.sweeps
+            self.sweep_end = max(time.monotonic(), self.sweep_end) + sweep_time
+            self.sweep_count += 1
+            self._data = {}
+            return None, 0.0
+
+        # 数据格式
+        if key in ('FORM:DATA', 'FORM') and not is_query:
+            kind = args[0].upper()
+            bits = args[1] if len(args) > 1 else ('32' if kind == 'REAL32' else '64')
+            if kind.startswith('ASC'):
+                self.data_format = 'ASCII'
+            elif kind.startswith('REAL'):
+                self.data_format = 'REAL32' if bits == '32' else 'REAL64'
+            else:
+                raise ValueError(kind)
+            return None, 0.0
+        if key in ('FORM:DATA', 'FORM') and is_query:
+            return {'ASCII': b'ASC,0', 'REAL32': b'REAL,32', 'REAL64': b'REAL,64'}[self.data_format], 0.0
+        if key == 'FORM:BORD' and not is_query:
+            order = args[0].upper()[:4]
+            if order not in ('NORM', 'SWAP'):
+                raise ValueError(order)
+            self.byte_order = order
+            return None, 0.0
+
+        # 轨迹定义
+        if key == 'CALC:PAR:DEL:ALL':
+            self.traces, self.selected, self._data = {}, None, {}
+            return None, 0.0
+        if key in ('CALC:PAR:DEF:EXT', 'CALC:CUST:DEF'):
+            # 新建轨迹（思仪），同名轨迹已存在时报错
+            name, measure = args[0], args[-1]
+            self.dut.response(measure, np.zeros(1), self.power)  # 校验测量名称
+            if name in self.traces:
+                self._error(-114, 'Trace already exists')
+                return None, 0.0
+            self.traces[name] = measure
+            return None, 0.0
+        if key in ('CALC:PAR:SDEF', 'CALC:PAR:DEF', 'CALC:PAR:MEAS'):
+            # 新建或重新定义轨迹（罗德/是德）；是德 CALC1:PAR<n>:DEF S21 按序号指定轨迹并选中
+            if len(args) == 1:
+                name, measure = f"Tr{suffixes[1] if len(suffixes) > 1 else 1}", args[0]
+                self.selected = name
+            else:
+                name, measure = args[0], args[-1]
+            self.dut.response(measure, np.zeros(1), self.power)
+            self.traces[name] = measure
+            self._data.pop(name, None)
+            return None, 0.0
+        if key == 'CALC:PAR:SEL' and not is_query:
+            if args:
+                if args[0] not in self.traces:
+                    self._error(-114, 'Trace not found')
+                    return None, 0.0
+                self.selected = args[0]
+            return None, 0.0
+        if key == 'CONF:CHAN:TRAC:REN':
+            measure = self.traces.pop(self.selected, 'S21') if self.selected else 'S21'
+            self.traces[args[0]] = measure
+            self.selected = args[0]
+            self._data = {}
+            return None, 0.0
+
+        # 频率轴与数据
+        if is_query and key in ('CALC:X', 'CALC:X:VAL', 'CALC:DATA:STIM', 'SENS:FREQ:DATA'):
+            return self._encode(self.frequencies()), self._remaining()
+        if is_query and key == 'CALC:DATA':
+            return self._data_query(args[0].upper() if args else '')
+        if is_query and key in ('CALC:DATA:FDAT', 'CALC:DATA:SDAT'):
+            return self._data_query(key[-4:] + 'A')
+        return None
+
+    def status(self) -> Dict:
+        """模拟器状态（调试用）"""
+        return {
+            'model': self.model,
+            'start': self.start,
+            'stop': self.stop,
+            'points': self.points,
+            'if_bandwidth': self.if_bandwidth,
+            'traces': dict(self.traces),
+            'selected': self.selected,
+            'data_format': self.data_format,
+            'sweeps_completed': self.sweep_count,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='网络分析仪 SCPI 模拟器')
+    parser.add_argument('--model', choices=sorted(VNA_MODELS), default='siyi')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5025)
+    parser.add_argument('--time-scale', type=float, default=1.0, help='时间缩放系数（0 为不等待）')
+    parser.add_argument('--latency', type=float, default=0.0005, help='查询命令处理时间（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='随机延迟抖动上限（秒）')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    instrument = VnaSimulator(args.model, seed=args.seed)
+    latency = LatencyModel(query=args.latency, jitter=args.jitter, seed=args.seed)
+    SimulatorServer(instrument, args.host, args.port, latency, args.time_scale).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+后台分析任务
+多通道批量分析（如通道一致性）在后台线程中执行，接口只提交任务并轮询结果
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger('multi_channel_system')
+
+
+class AnalysisJob:
+    """单个分析任务的状态"""
+
+    def __init__(self, job_id: str, kind: str, params: Dict):
+        self.job_id = job_id
+        self.kind = kind
+        self.params = dict(params)
+        self.state = 'pending'  # pending / running / done / failed
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.created = datetime.now()
+        self.elapsed = None
+        self.done_event = threading.Event()
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        data = {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'params': self.params,
+            'state': self.state,
+            'progress': round(self.progress, 1),
+            'message': self.message,
+            'elapsed': self.elapsed,
+            'created': self.created.isoformat()
+        }
+        if include_result and self.state == 'done':
+            data['result'] = self.result
+        return data
+
+
+class AnalysisJobManager:
+    """分析任务管理器"""
+
+    def __init__(self, max_workers: int = 1, max_jobs: int = 20):
+        """
+        Args:
+            max_workers: 后台分析线程数
+            max_jobs: 最多保留的任务记录数量（含结果；超出时只清理已结束的任务，
+                      排队或执行中的任务始终保留）
+        """
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, params: Dict, func: Callable[[AnalysisJob], Dict]) -> AnalysisJob:
+        """
+        提交分析任务
+
+        Args:
+            kind: 任务类型（如 'consistency'）
+            params: 任务参数（随状态返回）
+            func: 执行函数，参数为任务对象（可更新 progress），返回结果字典
+
+        Returns:
+            分析任务
+        """
+        job = AnalysisJob(uuid.uuid4().hex[:12], kind, params)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune_jobs()
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def count(self, state: str) -> int:
+        """处于指定状态的任务数（pending / running / done / failed）"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state == state)
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        """查询任务"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune_jobs(self):
+        """按提交顺序清理最早的已结束任务（调用方持有锁）"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in ('done', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: AnalysisJob, func: Callable[[AnalysisJob], Dict]):
+        job.state = 'running'
+        started = time.perf_counter()
+        try:
+            job.result = func(job)
+            job.state = 'done'
+            job.progress = 100.0
+            job.message = '分析完成'
+        except Exception as e:
+            job.state = 'failed'
+            job.message = str(e)
+            logger.error(f"分析任务 {job.job_id} ({job.kind}) 失败: {str(e)}")
+        finally:
+            job.elapsed = round(time.perf_counter() - started, 3)
+            logger.info(f"分析任务 {job.job_id} ({job.kind}) 结束: {job.state}, {job.elapsed}s")
+            job.done_event.set()
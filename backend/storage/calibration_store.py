@@ -0,0 +1,184 @@
+"""
+校准系数存储
+误差项按校准集保存为 storage/calibration/<id>.npz，并提供到任意测量频率轴的复数插值。
+插值结果按 (校准集ID, 频率轴哈希) 缓存，同一测试计划重复运行时不再重复插值。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from analysis.correction import ErrorCorrection
+from config.settings import AppSettings
+from storage.result_reader import LRUCache
+
+logger = logging.getLogger('multi_channel_system')
+
+CALIBRATION_EXTENSION = '.npz'
+CALIBRATION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+TERM_PREFIX = 'term_'
+
+
+def grid_hash(frequencies: Sequence[float]) -> str:
+    """频率轴哈希（按 float64 字节计算）"""
+    return hashlib.sha1(np.ascontiguousarray(frequencies, dtype=np.float64).tobytes()).hexdigest()
+
+
+def interpolation_weights(source: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    线性插值的下标与权重，所有误差项与通道共用
+
+    Returns:
+        (idx, weight)：target[k] 位于 source[idx[k]] 与 source[idx[k] + 1] 之间
+    """
+    if np.any(np.diff(source) <= 0):
+        raise ValueError("校准频率轴必须严格递增")
+    tolerance = 1e-9 * max(abs(source[0]), abs(source[-1]), 1.0)
+    if target.min() < source[0] - tolerance or target.max() > source[-1] + tolerance:
+        raise ValueError(
+            f"测量频率范围 {target.min() / 1e6:.3f}-{target.max() / 1e6:.3f} MHz 超出校准频率范围 "
+            f"{source[0] / 1e6:.3f}-{source[-1] / 1e6:.3f} MHz"
+        )
+    idx = np.clip(np.searchsorted(source, target, side='right') - 1, 0, len(source) - 2)
+    weight = np.clip((target - source[idx]) / (source[idx + 1] - source[idx]), 0.0, 1.0)
+    return idx, weight
+
+
+def interpolate_complex(values: np.ndarray, idx: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    """
+    复数误差项插值（幅度与展开相位分别线性插值，避免相位旋转时实部/虚部插值的幅度凹陷）
+
+    Args:
+        values: 误差项，形状 [..., 源频点]
+        idx/weight: interpolation_weights 的结果
+    """
+    magnitude = np.abs(values)
+    phase = np.unwrap(np.angle(values), axis=-1)
+    magnitude = magnitude[..., idx] * (1 - weight) + magnitude[..., idx + 1] * weight
+    phase = phase[..., idx] * (1 - weight) + phase[..., idx + 1] * weight
+    return magnitude * np.exp(1j * phase)
+
+
+class CalibrationStore:
+    """校准集存储 + 插值缓存"""
+
+    def __init__(self, directory: str = None, cache_size: int = None):
+        """
+        Args:
+            directory: 校准集目录（默认 AppSettings.CALIBRATION_DIR）
+            cache_size: 插值结果缓存数量
+        """
+        self.directory = directory or AppSettings.CALIBRATION_DIR
+        self.cache = LRUCache(cache_size or AppSettings.CALIBRATION_CACHE_SIZE)
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, set_id: str) -> str:
+        """校准集文件路径（校验ID）"""
+        if not set_id or not CALIBRATION_ID_PATTERN.match(set_id):
+            raise ValueError(f"无效的校准集ID: {set_id}")
+        return os.path.join(self.directory, f"{set_id}{CALIBRATION_EXTENSION}")
+
+    def save(self, correction: ErrorCorrection, set_id: str = None) -> str:
+        """
+        保存校准集（写入临时文件后原子替换）
+
+        Args:
+            correction: 误差项
+            set_id: 校准集ID，省略时自动生成
+
+        Returns:
+            校准集ID
+        """
+        set_id = set_id or uuid.uuid4().hex[:12]
+        path = self.path(set_id)
+        meta = {
+            'name': correction.name,
+            'kind': correction.kind,
+            'port': correction.port,
+            'created': datetime.now().isoformat()
+        }
+        arrays = {f"{TERM_PREFIX}{key}": value for key, value in correction.terms.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, frequencies=correction.frequencies, meta=np.array(json.dumps(meta, ensure_ascii=False)),
+                     **arrays)
+        with self._lock:
+            os.replace(tmp_path, path)
+        correction.set_id = set_id
+        logger.info(f"校准集已保存: {set_id} ({correction.kind}, {len(correction.frequencies)} 点)")
+        return set_id
+
+    def load(self, set_id: str) -> ErrorCorrection:
+        """读取校准集（原始频率轴）"""
+        path = self.path(set_id)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"校准集不存在: {set_id}")
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            terms = {name[len(TERM_PREFIX):]: data[name] for name in data.files if name.startswith(TERM_PREFIX)}
+            return ErrorCorrection(
+                meta['kind'], data['frequencies'], terms,
+                port=meta.get('port'), name=meta.get('name', ''), set_id=set_id
+            )
+
+    def delete(self, set_id: str):
+        """删除校准集"""
+        path = self.path(set_id)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"校准集不存在: {set_id}")
+        os.remove(path)
+
+    def list(self) -> List[Dict]:
+        """列出所有校准集"""
+        sets = []
+        for name in sorted(os.listdir(self.directory)):
+            set_id, ext = os.path.splitext(name)
+            if ext != CALIBRATION_EXTENSION or not CALIBRATION_ID_PATTERN.match(set_id):
+                continue
+            try:
+                sets.append({'id': set_id, **self.load(set_id).to_dict()})
+            except Exception as e:
+                logger.warning(f"读取校准集失败 {name}: {e}")
+        return sets
+
+    def resample(self, set_id: str, frequencies: Sequence[float]) -> ErrorCorrection:
+        """
+        获取插值到指定频率轴的校准集（按 校准集ID+文件修改时间+频率轴哈希 缓存）
+
+        Args:
+            set_id: 校准集ID
+            frequencies: 测量频率轴（Hz）
+
+        Returns:
+            频率轴与测量一致的误差修正
+        """
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        path = self.path(set_id)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"校准集不存在: {set_id}")
+        key = (set_id, os.stat(path).st_mtime_ns, grid_hash(frequencies))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        source = self.load(set_id)
+        if source.matches_grid(frequencies):
+            resampled = source
+        else:
+            idx, weight = interpolation_weights(source.frequencies, frequencies)
+            terms = {name: interpolate_complex(value, idx, weight) for name, value in source.terms.items()}
+            resampled = ErrorCorrection(
+                source.kind, frequencies, terms, port=source.port, name=source.name, set_id=set_id
+            )
+            logger.info(f"校准集 {set_id} 已插值: {len(source.frequencies)} → {len(frequencies)} 点")
+        self.cache.put(key, resampled)
+        return resampled
@@ -0,0 +1,175 @@
+"""
+后台导出任务
+在后台线程中压缩测量结果，并按文件列表+修改时间缓存生成的ZIP
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.settings import AppSettings
+
+logger = logging.getLogger('multi_channel_system')
+
+
+def export_cache_key(file_paths: List[str]) -> str:
+    """由文件列表、大小和修改时间计算缓存键，数据不变则键不变"""
+    digest = hashlib.sha1()
+    for path in sorted(file_paths):
+        stat = os.stat(path)
+        digest.update(f"{os.path.normpath(path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ExportJob:
+    """单个导出任务的状态"""
+
+    def __init__(self, job_id: str, cache_key: str, file_paths: List[str], archive_path: str):
+        self.job_id = job_id
+        self.cache_key = cache_key
+        self.file_paths = list(file_paths)
+        self.archive_path = archive_path
+        self.state = 'pending'  # pending / running / done / failed
+        self.progress = 0.0
+        self.message = ''
+        self.cached = False
+        self.created = datetime.now()
+        self.download_name = f"measurement_export_{self.created.strftime('%Y%m%d_%H%M%S')}.zip"
+        self.done_event = threading.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.job_id,
+            'state': self.state,
+            'progress': round(self.progress, 1),
+            'message': self.message,
+            'cached': self.cached,
+            'files': len(self.file_paths),
+            'download_name': self.download_name,
+            'created': self.created.isoformat()
+        }
+
+
+class ExportJobManager:
+    """导出任务管理器 - 后台压缩 + 产物缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None, results_dir: Optional[str] = None,
+                 max_workers: int = 1, max_cached: Optional[int] = None, max_jobs: int = 50):
+        """
+        初始化导出任务管理器
+
+        Args:
+            cache_dir: 缓存ZIP的目录（默认 AppSettings.EXPORT_CACHE_DIR）
+            results_dir: 结果目录，ZIP内路径相对于此目录
+            max_workers: 后台压缩线程数
+            max_cached: 最多保留的缓存ZIP数量
+            max_jobs: 最多保留的任务记录数量
+        """
+        self.cache_dir = cache_dir or AppSettings.EXPORT_CACHE_DIR
+        self.results_dir = results_dir or AppSettings.RESULTS_DIR
+        self.max_cached = max_cached or AppSettings.EXPORT_CACHE_MAX_FILES
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+        self._jobs = {}
+        self._active = {}  # 缓存键 -> 正在进行的任务
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def submit(self, file_paths: List[str]) -> ExportJob:
+        """
+        提交导出任务；相同数据已有缓存或正在压缩时直接复用
+
+        Args:
+            file_paths: 要导出的文件路径列表
+
+        Returns:
+            导出任务
+        """
+        key = export_cache_key(file_paths)
+        archive_path = os.path.join(self.cache_dir, f"{key}.zip")
+        with self._lock:
+            active = self._active.get(key)
+            if active is not None:
+                return active
+
+            job = ExportJob(uuid.uuid4().hex[:12], key, file_paths, archive_path)
+            self._jobs[job.job_id] = job
+            self._prune_jobs()
+
+            if os.path.isfile(archive_path):
+                os.utime(archive_path)  # 刷新访问时间，供缓存淘汰使用
+                job.state = 'done'
+                job.progress = 100.0
+                job.cached = True
+                job.message = '使用缓存的导出文件'
+                job.done_event.set()
+                return job
+
+            self._active[key] = job
+
+        self._executor.submit(self._run, job)
+        return job
+
+    def count(self, state: str) -> int:
+        """处于指定状态的任务数（pending / running / done / failed）"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state == state)
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """查询任务"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ExportJob):
+        """后台压缩（先写临时文件，完成后原子重命名）"""
+        job.state = 'running'
+        tmp_path = f"{job.archive_path}.{job.job_id}.tmp"
+        try:
+            total = sum(os.path.getsize(p) for p in job.file_paths) or 1
+            done = 0
+            started = time.perf_counter()
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for path in job.file_paths:
+                    zf.write(path, os.path.relpath(path, start=self.results_dir))
+                    done += os.path.getsize(path)
+                    job.progress = done / total * 100
+            os.replace(tmp_path, job.archive_path)
+            job.state = 'done'
+            job.progress = 100.0
+            job.message = '导出完成'
+            logger.info(f"导出任务 {job.job_id} 完成: {len(job.file_paths)} 个文件, "
+                        f"{time.perf_counter() - started:.2f}s")
+            self._evict_cache()
+        except Exception as e:
+            job.state = 'failed'
+            job.message = f'导出失败: {str(e)}'
+            logger.error(f"导出任务 {job.job_id} 失败: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            with self._lock:
+                self._active.pop(job.cache_key, None)
+            job.done_event.set()
+
+    def _prune_jobs(self):
+        """只保留最近的任务记录（调用方持有锁）"""
+        while len(self._jobs) > self.max_jobs:
+            oldest = next(iter(self._jobs))
+            self._jobs.pop(oldest)
+
+    def _evict_cache(self):
+        """缓存ZIP超过上限时删除最久未使用的文件"""
+        try:
+            archives = [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir) if n.endswith('.zip')]
+            archives.sort(key=os.path.getmtime)
+            for path in archives[:max(0, len(archives) - self.max_cached)]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"清理导出缓存失败: {e}")
@@ -0,0 +1,110 @@
+"""
+测量结果CSV写出
+从测量数组（内存数组或日志的内存映射）按频点分批流式写出CSV文件，
+复数数据的幅度与相位也按批导出，不生成整个运行大小的中间数组
+
+支持两种布局：
+    compact  紧凑布局：只有一列频率，每次测量 1 列（功率/仅幅度）或 2 列（幅度+相位）
+    legacy   原有布局：每次测量重复一列频率（2 列或 3 列）
+
+两种布局的第1行均为测量序号，第2行为列名，之后每行一个频点。
+派生曲线（群时延等）与功率参数一样，每次测量只有一个数值列，不输出相位列。
+复数数据（real/imag 列）写出时导出为 dB 幅度与相位。
+数值格式化使用 printf 风格模板，不受系统区域设置（小数点符号）影响；默认 '%r' 与原有
+csv.writer 的输出一致（最短无损表示），行尾同为 \r\n。
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from analysis.complex_trace import magnitude_phase_columns
+from config.settings import AppSettings
+
+CSV_LAYOUTS = ('compact', 'legacy')
+STREAM_ROWS = 1024  # 每批格式化的行数
+LINE_TERMINATOR = '\r\n'  # 与 csv.writer 默认行尾一致
+
+
+def _layout_header(sweep_ids: Sequence[int], has_phase: bool, is_power: bool, layout: str,
+                   value_label: Optional[str] = None) -> Tuple[List[str], List[str], List[str]]:
+    """生成表头两行与各列格式"""
+    freq_fmt = AppSettings.CSV_FREQ_FORMAT
+    value_fmt = AppSettings.CSV_VALUE_FORMAT
+    ids_row, names_row, formats = [], [], []
+    if layout == 'compact':
+        ids_row.append('')
+        names_row.append('Freq(Hz)')
+        formats.append(freq_fmt)
+
+    for sweep_id in sweep_ids:
+        if layout == 'legacy':
+            ids_row.append(str(sweep_id))
+            names_row.append('Freq(Hz)')
+            formats.append(freq_fmt)
+        ids_row.append(str(sweep_id))
+        names_row.append(value_label or ('Power(dBm)' if is_power else 'Mag(dB)'))
+        formats.append(value_fmt)
+        # 紧凑布局中未测得相位（FDATA）时不输出相位列；原有布局保持补零
+        if not is_power and (has_phase or layout == 'legacy'):
+            ids_row.append(str(sweep_id))
+            names_row.append('Phase(deg)')
+            formats.append(value_fmt)
+    return ids_row, names_row, formats
+
+
+def _layout_block(frequencies: np.ndarray, values: np.ndarray, columns: Sequence[str],
+                  is_power: bool, layout: str) -> np.ndarray:
+    """
+    一批频点的表格数据（列顺序与 _layout_header 一致）
+
+    Args:
+        frequencies: 本批频点的频率
+        values: 本批频点的测量数据，形状 [sweep, column, point]
+    """
+    magnitude, phase = magnitude_phase_columns(values, columns)
+    data = []
+    if layout == 'compact':
+        data.append(frequencies)
+    for k in range(values.shape[0]):
+        if layout == 'legacy':
+            data.append(frequencies)
+        data.append(magnitude[k])
+        if not is_power and (phase is not None or layout == 'legacy'):
+            data.append(phase[k] if phase is not None else np.zeros(len(frequencies)))
+    return np.column_stack(data)
+
+
+def write_measurement_csv(f, frequencies: np.ndarray, sweep_ids: Sequence[int],
+                          values: np.ndarray, columns: Sequence[str], is_power: bool,
+                          layout: str = None, value_label: Optional[str] = None):
+    """
+    单次流式写出测量CSV
+
+    Args:
+        f: 已打开的文本文件对象
+        frequencies: 频率轴（Hz）
+        sweep_ids: 各次测量的序号
+        values: 测量数据，形状 [sweep, column, point]（可为内存映射，按批读取）
+        columns: 数据列名（'magnitude' / 'phase'，或复数的 'real' / 'imag'）
+        is_power: 是否为功率参数
+        layout: 'compact' 或 'legacy'（默认 AppSettings.CSV_LAYOUT）
+        value_label: 数值列名（派生曲线如 'GroupDelay(ns)'），默认 Mag(dB)/Power(dBm)
+    """
+    layout = layout or AppSettings.CSV_LAYOUT
+    if layout not in CSV_LAYOUTS:
+        raise ValueError(f"不支持的CSV布局: {layout}")
+
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    # 派生曲线按功率参数的列布局写出（无相位列）
+    is_power = is_power or value_label is not None
+    has_phase = 'phase' in columns or 'real' in columns
+    ids_row, names_row, formats = _layout_header(sweep_ids, has_phase, is_power, layout, value_label)
+    f.write(','.join(ids_row) + LINE_TERMINATOR)
+    f.write(','.join(names_row) + LINE_TERMINATOR)
+
+    row_template = ','.join(formats) + LINE_TERMINATOR
+    for start in range(0, len(frequencies), STREAM_ROWS):
+        stop = start + STREAM_ROWS
+        block = _layout_block(frequencies[start:stop], values[..., start:stop], columns, is_power, layout)
+        f.write(''.join(row_template % tuple(row) for row in block.tolist()))
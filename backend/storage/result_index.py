@@ -0,0 +1,261 @@
+"""
+测量结果索引
+为每个运行的每个参数记录通道、测量次数、频率范围等信息（results/index.json），
+多通道分析按索引直接读取各通道的二进制均值曲线，无需遍历目录或重新解析CSV。
+索引在参数统计结果保存时更新；索引文件缺失时由各运行的 .stats.json 重建（只读取标量信息）。
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from analysis.consistency import ChannelConsistency
+from config.settings import AppSettings
+from storage.result_reader import RUN_ID_PATTERN
+from storage.run_journal import _atomic_replace
+from storage.run_statistics import STATISTICS_SUFFIX, load_mean_trace, load_statistics
+
+logger = logging.getLogger('multi_channel_system')
+
+INDEX_FILENAME = 'index.json'
+
+
+def channel_label(channel) -> Optional[str]:
+    """规范化通道名称：整数 12 与 'ch12' 均记为 'CH12'，空值为 None"""
+    if channel is None or channel == '':
+        return None
+    if isinstance(channel, int):
+        return f"CH{channel}"
+    label = str(channel).strip().upper()
+    return f"CH{label}" if label.isdigit() else label
+
+
+def channel_sort_key(label: str):
+    """通道自然排序（CH2 在 CH10 之前）"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', label)]
+
+
+class ResultIndex:
+    """测量结果索引（运行 → 参数 → 概要信息）"""
+
+    def __init__(self, results_dir: Optional[str] = None):
+        """
+        Args:
+            results_dir: 结果目录（默认 AppSettings.RESULTS_DIR）
+        """
+        self.results_dir = results_dir or AppSettings.RESULTS_DIR
+        self.path = os.path.join(self.results_dir, INDEX_FILENAME)
+        self._runs = {}  # 运行ID -> {参数: 概要}
+        self._mtime = None
+        self._lock = threading.Lock()
+        os.makedirs(self.results_dir, exist_ok=True)
+        if not os.path.isfile(self.path):
+            self.rebuild()
+
+    def _reload(self):
+        """索引文件被其他实例更新时重新读取（调用方持有锁）"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._runs = json.load(f).get('runs', {})
+            self._mtime = mtime
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取结果索引失败: {e}")
+
+    def _save(self):
+        """写入索引文件（调用方持有锁）"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'runs': self._runs}, f, ensure_ascii=False)
+        _atomic_replace(tmp_path, self.path, 'index')
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    @staticmethod
+    def _entry(statistics: Dict, channel: Optional[str]) -> Dict:
+        """由统计结果生成索引项"""
+        # 旧版本的统计结果没有频率范围字段，由频率轴得到
+        frequencies = statistics.get('frequencies') or []
+        start = statistics.get('start_frequency', frequencies[0] if frequencies else None)
+        stop = statistics.get('stop_frequency', frequencies[-1] if frequencies else None)
+        return {
+            'channel': channel,
+            'sweeps': int(statistics.get('count', 0)),
+            'points': int(statistics.get('total_points', len(frequencies))),
+            'start_frequency': float(start) if start is not None else None,
+            'stop_frequency': float(stop) if stop is not None else None,
+            'has_phase': 'phase' in statistics,
+            'has_complex': 'complex' in statistics,
+            'updated': datetime.now().isoformat()
+        }
+
+    def record(self, run_id: str, parameter: str, statistics: Dict, channel=None):
+        """
+        记录一个运行参数
+
+        Args:
+            run_id: 运行ID
+            parameter: 测量参数
+            statistics: 该参数保存的统计结果
+            channel: 测量通道（矩阵输出通道）
+        """
+        with self._lock:
+            self._reload()
+            self._runs.setdefault(run_id, {})[parameter.upper()] = self._entry(statistics, channel_label(channel))
+            self._save()
+
+    def rebuild(self) -> int:
+        """
+        由各运行目录中的统计结果重建索引
+
+        Returns:
+            索引的参数数量
+        """
+        runs = {}
+        if os.path.isdir(self.results_dir):
+            for run_id in sorted(os.listdir(self.results_dir)):
+                run_dir = os.path.join(self.results_dir, run_id)
+                if not RUN_ID_PATTERN.match(run_id) or not os.path.isdir(run_dir):
+                    continue
+                for name in os.listdir(run_dir):
+                    if not name.endswith(STATISTICS_SUFFIX):
+                        continue
+                    parameter = name[:-len(STATISTICS_SUFFIX)]
+                    try:
+                        statistics = load_statistics(run_dir, parameter, arrays=False)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"重建索引时读取统计结果失败 {run_id}/{name}: {e}")
+                        continue
+                    runs.setdefault(run_id, {})[parameter.upper()] = self._entry(
+                        statistics, channel_label(statistics.get('channel'))
+                    )
+        with self._lock:
+            self._runs = runs
+            self._save()
+        count = sum(len(params) for params in runs.values())
+        logger.info(f"结果索引已重建: {len(runs)} 个运行, {count} 个参数")
+        return count
+
+    def query(self, parameter: Optional[str] = None, channel=None,
+              run_ids: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        查询索引（按运行时间倒序，已删除的运行自动忽略）
+
+        Args:
+            parameter: 测量参数
+            channel: 通道
+            run_ids: 限定的运行ID
+        """
+        parameter = parameter.upper() if parameter else None
+        channel = channel_label(channel)
+        with self._lock:
+            self._reload()
+            runs = dict(self._runs)
+        entries = []
+        for run_id in sorted(runs, reverse=True):
+            if run_ids is not None and run_id not in run_ids:
+                continue
+            if not os.path.isdir(os.path.join(self.results_dir, run_id)):
+                continue
+            for name, entry in runs[run_id].items():
+                if parameter and name != parameter:
+                    continue
+                if channel and entry.get('channel') != channel:
+                    continue
+                entries.append({'run_id': run_id, 'parameter': name, **entry})
+        return entries
+
+    def channel_runs(self, parameter: str, run_ids: Optional[Sequence[str]] = None,
+                     channels: Optional[Sequence] = None) -> List[Dict]:
+        """
+        每个通道选取一个运行（最新的），按通道自然顺序返回
+
+        指定 run_ids 时未记录通道的运行以运行ID作为通道名称。
+        """
+        wanted = {channel_label(c) for c in channels} if channels else None
+        selected = {}
+        for entry in self.query(parameter, run_ids=run_ids):
+            label = entry['channel'] or (entry['run_id'] if run_ids is not None else None)
+            if label is None or label in selected or (wanted and label not in wanted):
+                continue
+            selected[label] = {**entry, 'channel': label}
+        return [selected[label] for label in sorted(selected, key=channel_sort_key)]
+
+
+def load_channel_traces(index: ResultIndex, parameter: str, run_ids: Optional[Sequence[str]] = None,
+                        channels: Optional[Sequence] = None,
+                        progress: Optional[Callable[[float], None]] = None) -> Dict:
+    """
+    按索引读取各通道同一参数的均值曲线（二进制 .mean.npz），组成 [通道, 频点] 数组
+
+    Args:
+        index: 结果索引
+        parameter: 测量参数
+        run_ids: 限定的运行ID
+        channels: 限定的通道
+        progress: 进度回调（0-100）
+
+    Returns:
+        {'channels', 'runs', 'frequencies', 'magnitude', 'phase', 'complex'}，
+        任一通道缺少相位/复数均值时对应项为 None
+    """
+    entries = index.channel_runs(parameter, run_ids, channels)
+    if not entries:
+        raise FileNotFoundError(f"没有参数 {parameter.upper()} 的已索引通道")
+
+    frequencies = None
+    magnitude, phase, vector = [], [], []
+    for idx, entry in enumerate(entries):
+        trace = load_mean_trace(os.path.join(index.results_dir, entry['run_id']), parameter)
+        freqs = trace['frequencies']
+        if frequencies is None:
+            frequencies = freqs
+        elif freqs.shape != frequencies.shape or not np.allclose(freqs, frequencies, rtol=1e-9, atol=1e-3):
+            raise ValueError(f"通道 {entry['channel']}（运行 {entry['run_id']}）的频率轴与其他通道不一致")
+        magnitude.append(trace['magnitude'])
+        phase.append(trace.get('phase'))
+        vector.append(trace.get('complex'))
+        if progress:
+            progress((idx + 1) / len(entries) * 100)
+
+    return {
+        'channels': [entry['channel'] for entry in entries],
+        'runs': [entry['run_id'] for entry in entries],
+        'frequencies': frequencies,
+        'magnitude': np.asarray(magnitude, dtype=np.float64),
+        'phase': np.asarray(phase, dtype=np.float64) if all(p is not None for p in phase) else None,
+        'complex': np.stack(vector) if all(v is not None for v in vector) else None,
+    }
+
+
+def load_consistency(index: ResultIndex, parameter: str, run_ids: Optional[Sequence[str]] = None,
+                     channels: Optional[Sequence] = None,
+                     progress: Optional[Callable[[float], None]] = None) -> ChannelConsistency:
+    """
+    按索引读取各通道的均值曲线并进行一致性分析
+
+    优先使用复数域均值（SDATA），否则使用幅度/相位均值。
+
+    Returns:
+        通道一致性分析结果
+    """
+    traces = load_channel_traces(index, parameter, run_ids, channels, progress)
+    if len(traces['channels']) < 2:
+        raise FileNotFoundError(f"参数 {parameter.upper()} 的已索引通道不足2个")
+    if traces['complex'] is not None:
+        return ChannelConsistency.from_complex(
+            parameter, traces['channels'], traces['frequencies'], traces['complex'], traces['runs']
+        )
+    return ChannelConsistency(
+        parameter, traces['channels'], traces['frequencies'], traces['magnitude'], traces['phase'], traces['runs']
+    )
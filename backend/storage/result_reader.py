@@ -0,0 +1,451 @@
+"""
+测量结果读取器
+按需从 results/ 目录加载已保存的测量数据，支持随机访问回放
+"""
+
+import bisect
+import csv
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analysis.complex_trace import combine_columns, magnitude_phase_columns, polar_complex
+from analysis.group_delay import DERIVED_HEADERS
+from config.settings import AppSettings
+from storage.run_journal import JOURNAL_DIR, JOURNAL_EXTENSION, read_journal
+from storage.run_statistics import load_statistics
+from storage.trace_codec import TRACE_EXTENSION, TraceFile
+
+# 运行ID即 results/ 下的时间戳目录名，只允许安全字符，防止路径穿越
+RUN_ID_PATTERN = re.compile(r'^[\w\-]+$')
+PARAMETER_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+VALUE_HEADERS = ('Mag(dB)', 'Power(dBm)') + DERIVED_HEADERS  # CSV中每次测量的数值列名
+
+
+class LRUCache:
+    """线程安全的LRU缓存"""
+
+    def __init__(self, max_items: int = 64):
+        """
+        初始化缓存
+
+        Args:
+            max_items: 最多缓存的条目数
+        """
+        self.max_items = max(1, int(max_items))
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Any:
+        """读取缓存条目，未命中时返回 None"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """写入缓存条目，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict:
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                'size': len(self._items),
+                'max_items': self.max_items,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class TraceBlock:
+    """一组连续测量（sweep）的数据块"""
+
+    def __init__(self, sweep_ids: List[int], magnitude: np.ndarray, phase: Optional[np.ndarray] = None,
+                 frequencies: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None):
+        """
+        Args:
+            sweep_ids: 块内每次测量的编号（与CSV首行的测量序号一致）
+            magnitude: 幅度/功率数组，形状 [sweep, point]
+            phase: 相位数组，形状 [sweep, point]；功率参数为 None
+            frequencies: 频率轴（数据源表头中没有频率轴时随块携带）
+            values: 以复数存储（SDATA）时的原始复数数组，形状 [sweep, point]
+        """
+        self.sweep_ids = list(sweep_ids)
+        self.magnitude = magnitude
+        self.phase = phase
+        self.frequencies = frequencies
+        self.values = values
+
+    def complex(self) -> np.ndarray:
+        """复数数据；以幅度/相位存储时由幅度与相位还原（结果随块缓存）"""
+        if self.values is None:
+            if self.phase is None:
+                raise ValueError("功率/标量数据没有相位，无法得到复数数据")
+            self.values = polar_complex(self.magnitude, self.phase)
+        return self.values
+
+
+class CsvTraceSource:
+    """
+    CSV结果文件数据源
+
+    CSV格式：第1行为测量序号，第2行为列名，之后每行一个频点。
+    兼容两种布局：紧凑布局只有一列频率；原有布局每次测量重复一列频率
+    （功率：频率+功率，S参数：频率+幅度+相位）。
+    CSV无法按列随机读取，因此整个文件作为一个数据块加载。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        self.frequencies = None  # CSV的频率轴需要读取数据块才能得到
+        self._load_header()
+
+    def _load_header(self):
+        """只读取表头，确定测量次数与列布局"""
+        with open(self.path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            ids_row = next(reader, [])
+            names_row = next(reader, [])
+
+        groups = []  # [频率列, 幅度/功率列, 相位列, 测量序号]
+        freq_col = None
+        for col, name in enumerate(names_row):
+            if name == 'Freq(Hz)':
+                freq_col = col
+            elif name in VALUE_HEADERS and freq_col is not None:
+                try:
+                    sweep_id = int(ids_row[col])
+                except (IndexError, ValueError):
+                    sweep_id = len(groups) + 1
+                groups.append([freq_col, col, None, sweep_id])
+            elif name == 'Phase(deg)' and groups:
+                groups[-1][2] = col
+
+        self.groups = groups
+        self.is_power = bool(groups) and names_row[groups[0][1]] == 'Power(dBm)'
+        self.sweep_ids = [g[3] for g in groups]
+        self.n_sweeps = len(groups)
+
+    def locate(self, position: int) -> Tuple[int, int]:
+        """测量位置 → (数据块编号, 块内偏移)"""
+        return 0, position
+
+    def _read_table(self) -> np.ndarray:
+        """读取全部数值，缺失单元格填充 NaN"""
+        try:
+            table = np.loadtxt(self.path, delimiter=',', skiprows=2, ndmin=2, encoding='utf-8')
+        except ValueError:
+            # 行长度不一致（追加写入时补齐的空列），逐行解析
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))[2:]
+            width = max((len(r) for r in rows), default=0)
+            table = np.full((len(rows), width), np.nan)
+            for i, row in enumerate(rows):
+                for j, cell in enumerate(row):
+                    if cell.strip():
+                        table[i, j] = float(cell)
+        return table
+
+    def load_block(self, block_idx: int) -> TraceBlock:
+        """加载数据块（CSV只有一个块）"""
+        table = self._read_table()
+        magnitude = np.stack([table[:, g[1]] for g in self.groups]) if self.groups else np.empty((0, 0))
+        phase = None
+        if self.groups and all(g[2] is not None for g in self.groups):
+            phase = np.stack([table[:, g[2]] for g in self.groups])
+        frequencies = table[:, self.groups[0][0]] if self.groups else np.empty(0)
+        return TraceBlock(self.sweep_ids, magnitude, phase, frequencies)
+
+
+class VtrTraceSource:
+    """压缩轨迹文件数据源，每个压缩数据块独立加载"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        self.trace = TraceFile(path)
+        self.frequencies = self.trace.frequencies
+        self.sweep_ids = self.trace.sweep_ids
+        self.n_sweeps = self.trace.n_sweeps
+        self.is_power = bool(self.trace.meta.get('is_power', False))
+        self._starts = [chunk[2] for chunk in self.trace.chunks]
+
+    def locate(self, position: int) -> Tuple[int, int]:
+        """测量位置 → (数据块编号, 块内偏移)"""
+        block_idx = bisect.bisect_right(self._starts, position) - 1
+        return block_idx, position - self._starts[block_idx]
+
+    def load_block(self, block_idx: int) -> TraceBlock:
+        """解码一个压缩数据块"""
+        ids, values = self.trace.read_chunk(block_idx)
+        magnitude, phase = magnitude_phase_columns(values, self.trace.columns)
+        data = combine_columns(values, self.trace.columns) if 'real' in self.trace.columns else None
+        return TraceBlock(ids, magnitude, phase, values=data)
+
+
+class JournalTraceSource:
+    """未提交的测量日志数据源（正在进行或异常中断的运行）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        # 复制后立即释放映射：运行仍在进行时日志会被提交并删除
+        with read_journal(path) as contents:
+            self.columns = contents.columns
+            self.values = np.array(contents.values)
+            self.frequencies = contents.frequencies
+            self.sweep_ids = contents.sweep_ids
+            self.is_power = bool(contents.meta.get('is_power', False))
+        self.n_sweeps = len(self.sweep_ids)
+
+    def locate(self, position: int) -> Tuple[int, int]:
+        """测量位置 → (数据块编号, 块内偏移)"""
+        return 0, position
+
+    def load_block(self, block_idx: int) -> TraceBlock:
+        """日志在打开时已整体读入，直接组装数据块"""
+        columns = self.columns
+        magnitude, phase = magnitude_phase_columns(self.values, columns)
+        data = combine_columns(self.values, columns) if 'real' in columns else None
+        return TraceBlock(self.sweep_ids, magnitude, phase, values=data)
+
+
+class ResultReader:
+    """测量结果读取器 - 懒加载 + LRU块缓存"""
+
+    def __init__(self, results_dir: Optional[str] = None, cache_blocks: Optional[int] = None):
+        """
+        初始化结果读取器
+
+        Args:
+            results_dir: 结果目录（默认 AppSettings.RESULTS_DIR）
+            cache_blocks: LRU缓存的数据块数量
+        """
+        self.results_dir = results_dir or AppSettings.RESULTS_DIR
+        self.cache = LRUCache(cache_blocks or AppSettings.RESULT_CACHE_BLOCKS)
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    # ==================== 路径与数据源 ====================
+
+    def run_path(self, run_id: str) -> str:
+        """获取运行目录路径并校验运行ID"""
+        if not run_id or not RUN_ID_PATTERN.match(run_id):
+            raise ValueError(f"无效的运行ID: {run_id}")
+        path = os.path.join(self.results_dir, run_id)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"运行不存在: {run_id}")
+        return path
+
+    def _source_files(self, run_id: str) -> Dict[str, str]:
+        """
+        列出运行目录下的参数数据文件 {参数: 路径}
+
+        优先级：压缩轨迹文件 > CSV > 未提交的测量日志
+        """
+        run_dir = self.run_path(run_id)
+        candidates = [os.path.join(run_dir, name) for name in os.listdir(run_dir)]
+        journal_dir = os.path.join(run_dir, JOURNAL_DIR)
+        if os.path.isdir(journal_dir):
+            candidates += [os.path.join(journal_dir, name) for name in os.listdir(journal_dir)]
+
+        priority = {TRACE_EXTENSION: 0, '.csv': 1, JOURNAL_EXTENSION: 2}
+        files = {}
+        for path in sorted(candidates, key=lambda p: priority.get(os.path.splitext(p)[1].lower(), 3)):
+            stem, ext = os.path.splitext(os.path.basename(path))
+            if ext.lower() in priority and PARAMETER_PATTERN.match(stem):
+                files.setdefault(stem.upper(), path)
+        return dict(sorted(files.items()))
+
+    def _open_source(self, run_id: str, parameter: str):
+        """打开（或复用）参数数据源，文件被修改后自动重新打开"""
+        if not parameter or not PARAMETER_PATTERN.match(parameter):
+            raise ValueError(f"无效的参数: {parameter}")
+        files = self._source_files(run_id)
+        path = files.get(parameter.upper())
+        if not path:
+            raise FileNotFoundError(f"运行 {run_id} 中没有参数 {parameter.upper()} 的数据")
+
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            source = self._sources.get(path)
+            if source is None or source.mtime_ns != mtime_ns:
+                if path.lower().endswith(TRACE_EXTENSION):
+                    source = VtrTraceSource(path)
+                elif path.lower().endswith(JOURNAL_EXTENSION):
+                    source = JournalTraceSource(path)
+                else:
+                    source = CsvTraceSource(path)
+                self._sources[path] = source
+        return source
+
+    def _load_block(self, source, block_idx: int) -> TraceBlock:
+        """通过LRU缓存加载数据块"""
+        key = (source.path, source.mtime_ns, block_idx)
+        block = self.cache.get(key)
+        if block is None:
+            block = source.load_block(block_idx)
+            self.cache.put(key, block)
+        return block
+
+    # ==================== 查询接口 ====================
+
+    def list_runs(self) -> List[Dict]:
+        """列出所有已保存的测量运行（按时间倒序）"""
+        if not os.path.isdir(self.results_dir):
+            return []
+        runs = []
+        for name in sorted(os.listdir(self.results_dir), reverse=True):
+            if not RUN_ID_PATTERN.match(name) or not os.path.isdir(os.path.join(self.results_dir, name)):
+                continue
+            try:
+                parameters = list(self._source_files(name).keys())
+            except (OSError, ValueError):
+                continue
+            if parameters:
+                runs.append({'run_id': name, 'parameters': parameters})
+        return runs
+
+    def get_run_info(self, run_id: str) -> Dict:
+        """获取运行的参数、测量次数等概要信息（只读取表头）"""
+        parameters = []
+        for parameter in self._source_files(run_id):
+            source = self._open_source(run_id, parameter)
+            parameters.append({
+                'parameter': parameter,
+                'sweeps': source.n_sweeps,
+                'sweep_ids': source.sweep_ids,
+                'is_power': source.is_power
+            })
+        return {'run_id': run_id, 'parameters': parameters}
+
+    def read_trace(self, run_id: str, parameter: str,
+                   start: Optional[int] = None, stop: Optional[int] = None,
+                   freq_min: Optional[float] = None, freq_max: Optional[float] = None,
+                   max_points: Optional[int] = None) -> Dict:
+        """
+        读取一次或多次测量的数据
+
+        Args:
+            run_id: 运行ID（results/ 下的时间戳目录名）
+            parameter: 测量参数（如 S21）
+            start: 起始测量序号（从1开始，包含），默认第一次
+            stop: 结束测量序号（包含），默认与 start 相同；start 也未指定时为最后一次
+            freq_min: 频率窗口下限（Hz）
+            freq_max: 频率窗口上限（Hz）
+            max_points: 返回的最大频点数，超出时等间隔抽取
+
+        Returns:
+            包含 frequencies 与 sweeps 列表的字典
+        """
+        source = self._open_source(run_id, parameter)
+        if source.n_sweeps == 0:
+            raise FileNotFoundError(f"参数 {parameter.upper()} 没有测量数据")
+
+        first = 1 if start is None else int(start)
+        last = (source.n_sweeps if start is None else first) if stop is None else int(stop)
+        if first < 1 or last > source.n_sweeps or first > last:
+            raise ValueError(f"测量序号超出范围: 1 - {source.n_sweeps}")
+
+        # 频率窗口
+        frequencies = source.frequencies
+        if frequencies is None:
+            frequencies = self._load_block(source, 0).frequencies
+        lo = 0 if freq_min is None else int(np.searchsorted(frequencies, freq_min, side='left'))
+        hi = len(frequencies) if freq_max is None else int(np.searchsorted(frequencies, freq_max, side='right'))
+        point_idx = np.arange(lo, hi)
+
+        # 可选抽取
+        decimated = False
+        if max_points and len(point_idx) > max_points > 1:
+            picks = np.unique(np.linspace(0, len(point_idx) - 1, int(max_points)).round().astype(int))
+            point_idx = point_idx[picks]
+            decimated = True
+
+        sweeps = []
+        for position in range(first - 1, last):
+            block_idx, offset = source.locate(position)
+            block = self._load_block(source, block_idx)
+            item = {
+                'sweep': block.sweep_ids[offset],
+                'magnitude': block.magnitude[offset, point_idx].tolist()
+            }
+            if block.phase is not None:
+                item['phase'] = block.phase[offset, point_idx].tolist()
+            sweeps.append(item)
+
+        return {
+            'run_id': run_id,
+            'parameter': parameter.upper(),
+            'is_power': source.is_power,
+            'total_sweeps': source.n_sweeps,
+            'total_points': int(len(frequencies)),
+            'decimated': decimated,
+            'frequencies': frequencies[point_idx].tolist(),
+            'sweeps': sweeps
+        }
+
+    def read_complex(self, run_id: str, parameter: str,
+                     start: Optional[int] = None, stop: Optional[int] = None) -> Dict:
+        """
+        读取复数数据（时域变换等复数分析使用，不抽取频点）
+
+        Args:
+            run_id: 运行ID
+            parameter: 测量参数
+            start: 起始测量序号（从1开始，包含），默认第一次
+            stop: 结束测量序号（包含），默认最后一次
+
+        Returns:
+            {'frequencies': 频率数组, 'sweep_ids': 测量序号列表, 'values': 复数数组 [sweep, point]}
+        """
+        source = self._open_source(run_id, parameter)
+        if source.n_sweeps == 0:
+            raise FileNotFoundError(f"参数 {parameter.upper()} 没有测量数据")
+        if source.is_power:
+            raise ValueError(f"功率参数 {parameter.upper()} 没有复数数据")
+        first = 1 if start is None else int(start)
+        last = source.n_sweeps if stop is None else int(stop)
+        if first < 1 or last > source.n_sweeps or first > last:
+            raise ValueError(f"测量序号超出范围: 1 - {source.n_sweeps}")
+
+        frequencies = source.frequencies
+        sweep_ids, rows = [], []
+        for position in range(first - 1, last):
+            block_idx, offset = source.locate(position)
+            block = self._load_block(source, block_idx)
+            if frequencies is None:
+                frequencies = block.frequencies
+            sweep_ids.append(block.sweep_ids[offset])
+            rows.append(block.complex()[offset])
+        return {
+            'frequencies': np.asarray(frequencies, dtype=np.float64),
+            'sweep_ids': sweep_ids,
+            'values': np.stack(rows)
+        }
+
+    def get_statistics(self, run_id: str, parameter: str) -> Dict:
+        """读取测量时保存的按频点统计结果"""
+        if not parameter or not PARAMETER_PATTERN.match(parameter):
+            raise ValueError(f"无效的参数: {parameter}")
+        return {'run_id': run_id, **load_statistics(self.run_path(run_id), parameter)}
@@ -0,0 +1,342 @@
+"""
+测量运行预写日志（WAL）
+测量过程中每次测量只追加写入日志，按批次 fsync；
+参数测量结束后一次性生成最终结果文件，并通过原子重命名提交。
+进程异常退出后，重启时可从日志恢复到最后一次完整的测量。
+提交与恢复时日志以内存映射方式读取，测量数据按需从文件页读出，不整体载入内存。
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import AppSettings
+from monitoring.metrics import RESULT_BYTES_WRITTEN
+from storage.result_csv import write_measurement_csv
+from storage.trace_codec import TRACE_EXTENSION, TraceWriter
+
+logger = logging.getLogger('multi_channel_system')
+
+JOURNAL_DIR = '.journal'
+JOURNAL_EXTENSION = '.wal'
+JOURNAL_MAGIC = b'WAL1'
+
+RECORD_HEADER = struct.Struct('<4sI')
+RECORD_CRC = struct.Struct('<I')
+SWEEP_ID = struct.Struct('<i')
+
+_JOURNAL_BYTES = RESULT_BYTES_WRITTEN.labels('journal')
+
+
+def _fsync_file(path: str):
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: str):
+    """同步目录项，保证重命名落盘（Windows不支持，忽略）"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_replace(tmp_path: str, final_path: str, kind: str = 'other'):
+    _fsync_file(tmp_path)
+    RESULT_BYTES_WRITTEN.labels(kind).inc(os.path.getsize(tmp_path))
+    os.replace(tmp_path, final_path)
+    _fsync_dir(os.path.dirname(final_path) or '.')
+
+
+class JournalContents:
+    """
+    从日志中读出的完整测量
+
+    values 为日志文件的内存映射视图（不复制数据）；使用完毕后调用 close()（或用 with 语句），
+    之后不能再访问 values 及由它得到的视图。
+    """
+
+    def __init__(self, meta: Dict, frequencies: np.ndarray, sweep_ids: List[int], values: np.ndarray,
+                 buffer: Optional[mmap.mmap] = None):
+        self.meta = meta
+        self.frequencies = frequencies
+        self.sweep_ids = sweep_ids
+        self.values = values  # [sweep, column, point]
+        self._buffer = buffer
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta.get('columns', []))
+
+    def close(self):
+        """释放内存映射（删除或重命名日志文件前必须调用）"""
+        self.values = None
+        if self._buffer is not None:
+            try:
+                self._buffer.close()
+            except BufferError:
+                pass  # 仍有视图引用映射（如异常回溯中的局部变量），由垃圾回收释放
+            self._buffer = None
+
+    def __enter__(self) -> 'JournalContents':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_journal(path: str) -> JournalContents:
+    """
+    读取日志文件的有效前缀
+
+    逐条校验记录（每次只读入一条），遇到不完整或校验失败的记录即停止，之前的测量全部保留；
+    测量记录定长且连续存放，数据以跨步视图映射到文件，不在内存中复制。
+    """
+    meta = {}
+    frequencies = np.empty(0)
+    sweep_ids = []
+    first_offset = record_size = None
+    with open(path, 'rb') as f:
+        if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+            raise ValueError(f"不是有效的日志文件: {path}")
+        while True:
+            offset = f.tell()
+            head = f.read(RECORD_HEADER.size)
+            if len(head) < RECORD_HEADER.size:
+                break
+            tag, length = RECORD_HEADER.unpack(head)
+            payload = f.read(length)
+            tail = f.read(RECORD_CRC.size)
+            if len(payload) < length or len(tail) < RECORD_CRC.size:
+                break
+            if zlib.crc32(payload) != RECORD_CRC.unpack(tail)[0]:
+                break
+            if tag == b'SWP ':
+                size = RECORD_HEADER.size + length + RECORD_CRC.size
+                if first_offset is None:
+                    first_offset, record_size = offset, size
+                elif size != record_size or offset != first_offset + len(sweep_ids) * record_size:
+                    break
+                sweep_ids.append(SWEEP_ID.unpack_from(payload)[0])
+            elif sweep_ids:
+                break  # 测量记录之后不应再有其他记录
+            elif tag == b'META':
+                meta = json.loads(payload.decode('utf-8'))
+            elif tag == b'STIM':
+                frequencies = np.frombuffer(payload, dtype=np.float64)
+
+        n_columns = len(meta.get('columns', [])) or 1
+        shape = (len(sweep_ids), n_columns, len(frequencies))
+        if not sweep_ids or not len(frequencies):
+            return JournalContents(meta, frequencies, sweep_ids, np.empty(shape))
+        if record_size != RECORD_HEADER.size + SWEEP_ID.size + n_columns * len(frequencies) * 8 + RECORD_CRC.size:
+            raise ValueError(f"日志记录长度与数据列数/频率点数不一致: {path}")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    values = np.ndarray(shape, dtype=np.float64, buffer=buffer,
+                        offset=first_offset + RECORD_HEADER.size + SWEEP_ID.size,
+                        strides=(record_size, len(frequencies) * 8, 8))
+    return JournalContents(meta, frequencies, sweep_ids, values, buffer)
+
+
+def _write_trace(contents: JournalContents, path: str, parameter: str, is_power: bool,
+                 value_label: Optional[str]):
+    """逐次测量写入压缩轨迹文件（每次只读取一次测量的数据）"""
+    writer = TraceWriter(
+        path, contents.frequencies, contents.columns,
+        chunk_sweeps=AppSettings.TRACE_CHUNK_SWEEPS,
+        compression=AppSettings.TRACE_COMPRESSION,
+        quantum=AppSettings.TRACE_QUANTUM,
+        metadata={'parameter': parameter, 'is_power': is_power, 'value_label': value_label}
+    )
+    try:
+        for index, sweep_id in enumerate(contents.sweep_ids):
+            writer.append(sweep_id, contents.values[index])
+    finally:
+        writer.close()
+
+
+def commit_journal(path: str, formats: Sequence[str]) -> List[str]:
+    """
+    由日志生成最终结果文件（写入临时文件后原子重命名），成功后删除日志
+
+    Args:
+        path: 日志文件路径
+        formats: 要生成的格式 'csv' / 'trace'
+
+    Returns:
+        生成的文件路径列表
+    """
+    with read_journal(path) as contents:
+        run_dir = os.path.dirname(os.path.dirname(path))
+        parameter = contents.meta.get('parameter') or os.path.splitext(os.path.basename(path))[0]
+        is_power = bool(contents.meta.get('is_power', False))
+        value_label = contents.meta.get('value_label')
+        outputs = []
+
+        if contents.sweep_ids:
+            if 'trace' in formats:
+                final_path = os.path.join(run_dir, f"{parameter}{TRACE_EXTENSION}")
+                tmp_path = final_path + '.tmp'
+                _write_trace(contents, tmp_path, parameter, is_power, value_label)
+                _atomic_replace(tmp_path, final_path, 'trace')
+                outputs.append(final_path)
+
+            if 'csv' in formats:
+                final_path = os.path.join(run_dir, f"{parameter}.csv")
+                tmp_path = final_path + '.tmp'
+                with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                    write_measurement_csv(f, contents.frequencies, contents.sweep_ids,
+                                          contents.values, contents.columns, is_power, value_label=value_label)
+                _atomic_replace(tmp_path, final_path, 'csv')
+                outputs.append(final_path)
+
+    os.remove(path)
+    journal_dir = os.path.dirname(path)
+    try:
+        os.rmdir(journal_dir)  # 目录为空时一并删除
+    except OSError:
+        _fsync_dir(journal_dir)
+    return outputs
+
+
+class RunJournal:
+    """单个参数的测量日志写入器"""
+
+    def __init__(self, run_dir: str, parameter: str, frequencies: Sequence[float],
+                 columns: Sequence[str], is_power: bool = False,
+                 fsync_records: Optional[int] = None, fsync_interval: Optional[float] = None,
+                 value_label: Optional[str] = None):
+        """
+        创建日志文件并写入元数据与频率轴
+
+        Args:
+            run_dir: 运行结果目录（results/<timestamp>）
+            parameter: 测量参数
+            frequencies: 频率轴（Hz）
+            columns: 每次测量的数据列名
+            is_power: 是否为功率参数
+            fsync_records: 每累计多少条记录 fsync 一次（0 或 1 表示每条都 fsync）
+            fsync_interval: 距上次 fsync 超过多少秒时强制 fsync
+            value_label: 结果CSV的数值列名（派生曲线使用）
+        """
+        self.run_dir = run_dir
+        self.parameter = parameter.upper()
+        self.columns = list(columns)
+        self.n_points = len(frequencies)
+        self.fsync_records = AppSettings.JOURNAL_FSYNC_RECORDS if fsync_records is None else fsync_records
+        self.fsync_interval = AppSettings.JOURNAL_FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.n_sweeps = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        journal_dir = os.path.join(run_dir, JOURNAL_DIR)
+        os.makedirs(journal_dir, exist_ok=True)
+        self.path = os.path.join(journal_dir, f"{self.parameter}{JOURNAL_EXTENSION}")
+        self._file = open(self.path, 'wb')
+        self._file.write(JOURNAL_MAGIC)
+        meta = {'parameter': self.parameter, 'columns': self.columns, 'is_power': is_power}
+        if value_label:
+            meta['value_label'] = value_label
+        self._write_record(b'META', json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        self._write_record(b'STIM', np.asarray(frequencies, dtype=np.float64).tobytes())
+        self._sync()
+
+    def _write_record(self, tag: bytes, payload: bytes):
+        self._file.write(RECORD_HEADER.pack(tag, len(payload)) + payload + RECORD_CRC.pack(zlib.crc32(payload)))
+        _JOURNAL_BYTES.inc(RECORD_HEADER.size + len(payload) + RECORD_CRC.size)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, sweep_id: int, values: Sequence[Sequence[float]]):
+        """
+        追加一次测量
+
+        Args:
+            sweep_id: 测量序号
+            values: 各数据列的值，顺序与 columns 一致
+        """
+        row = np.asarray(values, dtype=np.float64).reshape(len(self.columns), -1)
+        if row.shape[1] != self.n_points:
+            raise ValueError(f"数据点数({row.shape[1]})与频率点数({self.n_points})不一致")
+        self._write_record(b'SWP ', SWEEP_ID.pack(int(sweep_id)) + row.tobytes())
+        self.n_sweeps += 1
+        self._unsynced += 1
+        if (self._unsynced >= self.fsync_records
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self._sync()
+        else:
+            self._file.flush()
+
+    def commit(self, formats: Sequence[str]) -> List[str]:
+        """关闭日志并生成最终结果文件"""
+        self.close()
+        return commit_journal(self.path, formats)
+
+    def close(self):
+        """同步并关闭日志文件（不提交）"""
+        if self._file is None:
+            return
+        try:
+            self._sync()
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def journal_path(run_dir: str, parameter: str) -> str:
+    """参数对应的日志文件路径"""
+    return os.path.join(run_dir, JOURNAL_DIR, f"{parameter.upper()}{JOURNAL_EXTENSION}")
+
+
+def find_pending_journals(results_dir: str) -> List[Tuple[str, str]]:
+    """查找未提交的日志 [(运行ID, 日志路径)]"""
+    pending = []
+    if not os.path.isdir(results_dir):
+        return pending
+    for run_id in sorted(os.listdir(results_dir)):
+        journal_dir = os.path.join(results_dir, run_id, JOURNAL_DIR)
+        if not os.path.isdir(journal_dir):
+            continue
+        for name in sorted(os.listdir(journal_dir)):
+            if name.endswith(JOURNAL_EXTENSION):
+                pending.append((run_id, os.path.join(journal_dir, name)))
+    return pending
+
+
+def recover_runs(results_dir: str, formats: Sequence[str]) -> List[Dict]:
+    """
+    恢复异常中断的测量运行
+
+    Args:
+        results_dir: 结果目录
+        formats: 要生成的格式
+
+    Returns:
+        恢复结果列表
+    """
+    recovered = []
+    for run_id, path in find_pending_journals(results_dir):
+        try:
+            outputs = commit_journal(path, formats)
+            recovered.append({'run_id': run_id, 'journal': path, 'files': outputs})
+            logger.warning(f"[恢复] 运行 {run_id} 从日志恢复: {os.path.basename(path)} -> {outputs}")
+        except Exception as e:
+            logger.error(f"[恢复] 运行 {run_id} 日志恢复失败 {path}: {e}")
+    return recovered
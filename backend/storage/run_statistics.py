@@ -0,0 +1,143 @@
+"""
+测量统计结果存储
+参数测量结束时将在线统计结果保存到运行目录（与结果文件放在同一目录）：
+    <参数>.stats.json  测量次数、频率范围等与频点数无关的信息
+    <参数>.mean.npz    按频点的统计数组（均值、标准差、最值、分位数，及相位/复数统计），
+                       多通道分析与结果回放直接读取，不经过 JSON 文本
+旧版本的运行把按频点数组也写在 .stats.json 中，读取时兼容。
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from analysis.complex_trace import magnitude_db, phase_deg
+from analysis.statistics import finite_list
+from storage.run_journal import _atomic_replace
+
+STATISTICS_SUFFIX = '.stats.json'
+MEAN_TRACE_SUFFIX = '.mean.npz'
+
+
+def statistics_path(run_dir: str, parameter: str) -> str:
+    """参数对应的统计文件路径"""
+    return os.path.join(run_dir, f"{parameter.upper()}{STATISTICS_SUFFIX}")
+
+
+def save_statistics(run_dir: str, parameter: str, statistics: Dict,
+                    arrays: Optional[Dict[str, np.ndarray]] = None) -> str:
+    """
+    保存统计结果（写入临时文件后原子重命名）
+
+    Args:
+        run_dir: 运行结果目录
+        parameter: 测量参数
+        statistics: 统计信息（TraceStatistics.metadata() 的格式，只含标量）
+        arrays: 按频点的统计数组（TraceStatistics.arrays() 的格式）
+
+    Returns:
+        统计文件路径
+    """
+    if arrays is not None:
+        save_mean_trace(run_dir, parameter, arrays)
+    path = statistics_path(run_dir, parameter)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(statistics, f, ensure_ascii=False)
+    _atomic_replace(tmp_path, path, 'statistics')
+    return path
+
+
+def mean_trace_path(run_dir: str, parameter: str) -> str:
+    """参数对应的统计数组文件路径"""
+    return os.path.join(run_dir, f"{parameter.upper()}{MEAN_TRACE_SUFFIX}")
+
+
+def save_mean_trace(run_dir: str, parameter: str, arrays: Dict[str, np.ndarray]) -> str:
+    """
+    保存按频点的统计数组
+
+    Args:
+        run_dir: 运行结果目录
+        parameter: 测量参数
+        arrays: {'frequencies', 'magnitude.mean', ...}
+
+    Returns:
+        统计数组文件路径
+    """
+    path = mean_trace_path(run_dir, parameter)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    _atomic_replace(tmp_path, path, 'statistics')
+    return path
+
+
+def _load_arrays(path: str, names=None) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files if names is None or name in names}
+
+
+def load_mean_trace(run_dir: str, parameter: str) -> Dict[str, np.ndarray]:
+    """
+    读取均值曲线；没有二进制文件的运行（旧版本）从统计结果中提取
+
+    Returns:
+        {'frequencies', 'magnitude', 可选 'phase'、'complex'}
+    """
+    path = mean_trace_path(run_dir, parameter)
+    if os.path.isfile(path):
+        data = _load_arrays(path, ('frequencies', 'magnitude.mean', 'phase.mean', 'complex.mean',
+                                   'magnitude', 'phase', 'complex'))
+        # 旧版本的文件直接以 magnitude/phase/complex 保存均值
+        return {name.split('.')[0]: values for name, values in data.items()}
+
+    statistics = load_statistics(run_dir, parameter)
+    if statistics.get('decimated'):
+        raise ValueError(f"参数 {parameter.upper()} 的统计结果为抽取数据")
+    trace = {
+        'frequencies': np.asarray(statistics['frequencies'], dtype=np.float64),
+        'magnitude': np.asarray(statistics['magnitude']['mean'], dtype=np.float64),
+    }
+    if 'phase' in statistics:
+        trace['phase'] = np.asarray(statistics['phase']['mean'], dtype=np.float64)
+    if 'complex' in statistics:
+        trace['complex'] = (np.asarray(statistics['complex']['real'], dtype=np.float64)
+                            + 1j * np.asarray(statistics['complex']['imag'], dtype=np.float64))
+    return trace
+
+
+def load_statistics(run_dir: str, parameter: str, arrays: bool = True) -> Dict:
+    """
+    读取统计结果
+
+    Args:
+        run_dir: 运行结果目录
+        parameter: 测量参数
+        arrays: 是否合并按频点的统计数组（转换为可JSON序列化的列表，格式同 TraceStatistics.to_dict()）
+    """
+    path = statistics_path(run_dir, parameter)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"没有参数 {parameter.upper()} 的统计结果")
+    with open(path, 'r', encoding='utf-8') as f:
+        statistics = json.load(f)
+    array_path = mean_trace_path(run_dir, parameter)
+    if not arrays or 'frequencies' in statistics or not os.path.isfile(array_path):
+        return statistics
+
+    for name, values in _load_arrays(array_path).items():
+        if name == 'frequencies':
+            statistics['frequencies'] = values.tolist()
+            continue
+        block, _, key = name.partition('.')
+        if not key:
+            continue
+        target = statistics.setdefault(block, {})
+        if block == 'complex' and key == 'mean':
+            target.update(magnitude=finite_list(magnitude_db(values)), phase=finite_list(phase_deg(values)),
+                          real=finite_list(values.real), imag=finite_list(values.imag))
+        else:
+            target[key] = finite_list(values)
+    return statistics
@@ -0,0 +1,41 @@
+"""
+极限判定结果存储
+运行结束时将极限模板与判定结论保存为运行目录下的 verdict.json
+"""
+
+import json
+import os
+from typing import Dict
+
+from storage.run_journal import _atomic_replace
+
+VERDICT_FILENAME = 'verdict.json'
+
+
+def save_verdict(run_dir: str, verdict: Dict) -> str:
+    """
+    保存判定结果（写入临时文件后原子重命名）
+
+    Args:
+        run_dir: 运行结果目录
+        verdict: 判定结果字典
+
+    Returns:
+        判定文件路径
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    path = os.path.join(run_dir, VERDICT_FILENAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(verdict, f, ensure_ascii=False)
+    _atomic_replace(tmp_path, path, 'verdict')
+    return path
+
+
+def load_verdict(run_dir: str) -> Dict:
+    """读取判定结果"""
+    path = os.path.join(run_dir, VERDICT_FILENAME)
+    if not os.path.isfile(path):
+        raise FileNotFoundError("该运行没有极限判定结果")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,263 @@
+"""
+压缩轨迹存储格式（.vtr）
+频率轴每个文件只保存一次，测量数据按块做差分编码后用标准库压缩
+
+文件结构：
+    b'VTR1' 文件头
+    记录 = 标签(4字节) + 负载长度(uint32) + 负载 + CRC32(uint32)
+        META  JSON元数据（参数、列名、压缩方式等）
+        STIM  频率轴（float64，压缩）
+        CHNK  数据块：块头 + 测量序号 + 编码后的测量数据
+
+数据块编码：
+    - 无损模式：相邻两次测量的 float64 位模式做异或（XOR）差分
+    - 量化模式：按 quantum 量化为整数后做算术差分
+    差分结果按字节平面重排（byte shuffle）后再用 zlib/LZMA 压缩。
+    每个数据块的第一次测量保存原值，因此数据块可独立解码。
+"""
+
+import json
+import lzma
+import os
+import struct
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b'VTR1'
+TRACE_EXTENSION = '.vtr'
+
+RECORD_HEADER = struct.Struct('<4sI')
+RECORD_CRC = struct.Struct('<I')
+CHUNK_HEADER = struct.Struct('<IIBBd')  # 起始位置, 测量次数, 压缩方式, 编码模式, 量化步长
+
+COMPRESSORS = {'none': 0, 'zlib': 1, 'lzma': 2}
+MODE_XOR = 0
+MODE_QUANTIZED = 1
+
+
+def _compress(raw: bytes, compressor: int) -> bytes:
+    if compressor == COMPRESSORS['zlib']:
+        return zlib.compress(raw, 6)
+    if compressor == COMPRESSORS['lzma']:
+        return lzma.compress(raw, preset=1)
+    return raw
+
+
+def _decompress(payload: bytes, compressor: int) -> bytes:
+    if compressor == COMPRESSORS['zlib']:
+        return zlib.decompress(payload)
+    if compressor == COMPRESSORS['lzma']:
+        return lzma.decompress(payload)
+    return payload
+
+
+def _shuffle(words: np.ndarray) -> bytes:
+    """按字节平面重排 8 字节整数，使高位字节连续排列，便于压缩"""
+    return np.ascontiguousarray(words.view(np.uint8).reshape(-1, 8).T).tobytes()
+
+
+def _unshuffle(raw: bytes, count: int) -> np.ndarray:
+    planes = np.frombuffer(raw, dtype=np.uint8).reshape(8, count)
+    return np.ascontiguousarray(planes.T).view(np.uint64).reshape(-1)
+
+
+def encode_chunk(values: np.ndarray, compressor: int, quantum: Optional[float] = None) -> Tuple[int, float, bytes]:
+    """
+    编码数据块
+
+    Args:
+        values: 测量数据，形状 [sweep, column, point]，float64
+        compressor: 压缩方式编号
+        quantum: 量化步长；None 或数据含非有限值时使用无损模式
+
+    Returns:
+        (编码模式, 量化步长, 压缩后的字节)
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if quantum and np.isfinite(values).all():
+        q = np.rint(values / quantum).astype(np.int64)
+        q[1:] -= q[:-1].copy()
+        return MODE_QUANTIZED, float(quantum), _compress(_shuffle(q.view(np.uint64)), compressor)
+
+    bits = values.view(np.uint64).copy()
+    bits[1:] ^= values.view(np.uint64)[:-1]
+    return MODE_XOR, 0.0, _compress(_shuffle(bits), compressor)
+
+
+def decode_chunk(payload: bytes, shape: Tuple[int, int, int], compressor: int,
+                 mode: int, quantum: float) -> np.ndarray:
+    """解码数据块，返回形状为 [sweep, column, point] 的 float64 数组"""
+    count = int(np.prod(shape))
+    words = _unshuffle(_decompress(payload, compressor), count).reshape(shape)
+    if mode == MODE_QUANTIZED:
+        return np.cumsum(words.view(np.int64), axis=0) * quantum
+    np.bitwise_xor.accumulate(words, axis=0, out=words)
+    return words.view(np.float64)
+
+
+def _write_record(f, tag: bytes, payload: bytes):
+    f.write(RECORD_HEADER.pack(tag, len(payload)))
+    f.write(payload)
+    f.write(RECORD_CRC.pack(zlib.crc32(payload)))
+
+
+class TraceWriter:
+    """压缩轨迹文件写入器（追加写入，满一个数据块落盘一次）"""
+
+    def __init__(self, path: str, frequencies: Sequence[float], columns: Sequence[str],
+                 chunk_sweeps: int = 16, compression: str = 'zlib',
+                 quantum: Optional[float] = None, metadata: Optional[Dict] = None):
+        """
+        初始化写入器并写入文件头
+
+        Args:
+            path: 文件路径（.vtr）
+            frequencies: 频率轴（Hz），每个文件只保存一次
+            columns: 每次测量的数据列名（如 ['magnitude', 'phase']）
+            chunk_sweeps: 每个数据块包含的测量次数
+            compression: 压缩方式 'zlib' / 'lzma' / 'none'
+            quantum: 量化步长（None 表示无损）
+            metadata: 附加元数据（参数名等）
+        """
+        if compression not in COMPRESSORS:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        self.path = path
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.columns = list(columns)
+        self.chunk_sweeps = max(1, int(chunk_sweeps))
+        self.compressor = COMPRESSORS[compression]
+        self.quantum = quantum
+        self.n_sweeps = 0
+        self._pending = []
+        self._pending_ids = []
+
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        meta = {
+            'version': 1,
+            'columns': self.columns,
+            'points': int(len(self.frequencies)),
+            'compression': compression,
+            'quantum': quantum,
+            **(metadata or {})
+        }
+        _write_record(self._file, b'META', json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        _write_record(self._file, b'STIM', _compress(self.frequencies.tobytes(), self.compressor))
+
+    def append(self, sweep_id: int, values: Sequence[Sequence[float]]):
+        """
+        追加一次测量
+
+        Args:
+            sweep_id: 测量序号
+            values: 各数据列的值，顺序与 columns 一致
+        """
+        row = np.asarray(values, dtype=np.float64).reshape(len(self.columns), -1)
+        if row.shape[1] != len(self.frequencies):
+            raise ValueError(f"数据点数({row.shape[1]})与频率点数({len(self.frequencies)})不一致")
+        self._pending.append(row)
+        self._pending_ids.append(int(sweep_id))
+        if len(self._pending) >= self.chunk_sweeps:
+            self.flush()
+
+    def flush(self):
+        """将缓冲的测量编码为一个数据块写入文件"""
+        if not self._pending:
+            return
+        values = np.stack(self._pending)
+        mode, quantum, payload = encode_chunk(values, self.compressor, self.quantum)
+        header = CHUNK_HEADER.pack(self.n_sweeps, len(self._pending), self.compressor, mode, quantum)
+        ids = np.asarray(self._pending_ids, dtype=np.int32).tobytes()
+        _write_record(self._file, b'CHNK', header + ids + payload)
+        self._file.flush()
+        self.n_sweeps += len(self._pending)
+        self._pending = []
+        self._pending_ids = []
+
+    def close(self):
+        """写入剩余数据并关闭文件"""
+        if self._file is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class TraceFile:
+    """压缩轨迹文件读取器（打开时只扫描记录头，数据块按需解码）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta = {}
+        self.frequencies = np.empty(0)
+        self.chunks = []  # (负载偏移, 负载长度, 起始位置, 测量次数)
+        self.sweep_ids = []
+        self._scan()
+
+    def _scan(self):
+        """扫描记录索引；末尾不完整的记录（写入中断）被忽略"""
+        file_size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是有效的轨迹文件: {self.path}")
+            while True:
+                head = f.read(RECORD_HEADER.size)
+                if len(head) < RECORD_HEADER.size:
+                    break
+                tag, length = RECORD_HEADER.unpack(head)
+                offset = f.tell()
+                if offset + length + RECORD_CRC.size > file_size:
+                    break
+                if tag == b'CHNK':
+                    chunk_head = f.read(CHUNK_HEADER.size)
+                    first, count = CHUNK_HEADER.unpack(chunk_head)[:2]
+                    ids = np.frombuffer(f.read(4 * count), dtype=np.int32)
+                    self.chunks.append((offset, length, first, count))
+                    self.sweep_ids.extend(int(x) for x in ids)
+                    f.seek(offset + length + RECORD_CRC.size)
+                    continue
+                payload = f.read(length)
+                crc, = RECORD_CRC.unpack(f.read(RECORD_CRC.size))
+                if zlib.crc32(payload) != crc:
+                    break
+                if tag == b'META':
+                    self.meta = json.loads(payload.decode('utf-8'))
+                elif tag == b'STIM':
+                    compressor = COMPRESSORS.get(self.meta.get('compression', 'none'), 0)
+                    self.frequencies = np.frombuffer(_decompress(payload, compressor), dtype=np.float64)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta.get('columns', []))
+
+    @property
+    def n_sweeps(self) -> int:
+        return len(self.sweep_ids)
+
+    @property
+    def chunk_sweeps(self) -> int:
+        return self.chunks[0][3] if self.chunks else 1
+
+    def read_chunk(self, index: int) -> Tuple[List[int], np.ndarray]:
+        """
+        读取并解码一个数据块
+
+        Returns:
+            (测量序号列表, 形状为 [sweep, column, point] 的数组)
+        """
+        offset, length, _, count = self.chunks[index]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            payload = f.read(length)
+            crc, = RECORD_CRC.unpack(f.read(RECORD_CRC.size))
+        if zlib.crc32(payload) != crc:
+            raise ValueError(f"数据块校验失败: {self.path} #{index}")
+        first, count, compressor, mode, quantum = CHUNK_HEADER.unpack_from(payload)
+        ids_end = CHUNK_HEADER.size + 4 * count
+        ids = np.frombuffer(payload[CHUNK_HEADER.size:ids_end], dtype=np.int32).tolist()
+        shape = (count, len(self.columns), len(self.frequencies))
+        return ids, decode_chunk(payload[ids_end:], shape, compressor, mode, quantum)
@@ -3,27 +3,59 @@
 封装VNA设备的连接、测量等功能
 """
 
+import json
 import logging
 import threading
 import time
 import os
-import io
-import zipfile
-import csv
 import math
 from datetime import datetime
-from flask import jsonify, send_file
+from flask import Response, jsonify, send_file
+
+from analysis.complex_trace import (
+    COMPLEX_COLUMNS, complex_trace, magnitude_db, phase_deg, trace_magnitude, trace_phase
+)
+from analysis.correction import TWO_PORT_PARAMETERS, CorrectionPipeline, ErrorCorrection
+from analysis.group_delay import DerivedTraces, derived_header
+from analysis.limits import LimitEvaluator
+from analysis.statistics import (
+    ComplexRunningStatistics, ConvergenceCriterion, PhaseStatistics, RunningStatistics, TraceStatistics
+)
+from config.settings import AppSettings
+from devices.base import DATA_FORMATS
+from devices.io_metrics import io_metrics
+from devices.session_recording import SESSION_EXTENSION
+from devices.sweep_time import sweep_predictor
+from monitoring.metrics import (CONNECTIONS_TOTAL, INSTRUMENT_CONNECTED, MEASUREMENT_RUNNING, QUEUE_DEPTH,
+                                RECONNECTS_TOTAL, SWEEP_STAGE_SECONDS, SWEEPS_TOTAL)
+from monitoring.tracing import tracer
+from storage.calibration_store import CalibrationStore
+from storage.export_jobs import ExportJobManager
+from storage.result_index import ResultIndex, channel_label
+from storage.run_journal import RunJournal, recover_runs
+from storage.run_statistics import save_statistics
+from storage.run_verdict import save_verdict
+from storage.trace_codec import TRACE_EXTENSION
+
+# 使用主logger（将在app.py中配置）
+logger = logging.getLogger('multi_channel_system')
 
 try:
     from devices.siyi import Siyi3674L
     from devices.rohde import RohdeZNA26
     from devices.keysight import KeysightE5071C
 except ImportError as e:
-    print(f"警告: 无法导入设备驱动: {e}")
+    logger.warning(f"警告: 无法导入设备驱动: {e}")
     Siyi3674L = RohdeZNA26 = KeysightE5071C = None
 
-# 使用主logger（将在app.py中配置）
-logger = logging.getLogger('multi_channel_system')
+# 单次测量各阶段的耗时直方图（预先绑定标签）
+_STAGE = {stage: SWEEP_STAGE_SECONDS.labels(stage) for stage in (
+    'acquire', 'journal', 'statistics', 'correction', 'derived', 'limits', 'commit')}
+_SWEEP_OK = SWEEPS_TOTAL.labels('ok')
+_SWEEP_FAILED = SWEEPS_TOTAL.labels('failed')
+
+# 修正后数据的参数名后缀（如 S21_CORR）
+CORRECTED_SUFFIX = '_CORR'
 
 # 模拟的设备配置
 SUPPORTED_DEVICES = [
@@ -69,6 +101,17 @@ class VNAController:
             'total_measurements': 0,
             'results': []
         }
+        self.results_format = AppSettings.RESULTS_FORMAT
+        self.live_statistics = {}  # 参数 -> TraceStatistics（当前/最近一次测量任务）
+        self.correction = None  # 当前启用的误差修正（ErrorCorrection）
+        self.limits = None  # 当前启用的极限模板（LimitEvaluator，每次运行复制一份判定）
+        self.limit_evaluator = None  # 当前/最近一次运行的极限判定
+        self.derived_traces = None  # 本次运行的派生曲线（群时延等，DerivedTraces）
+        self.convergence = None  # 本次运行的自适应测量次数判据（ConvergenceCriterion）
+        self.calibrations = CalibrationStore()
+        self.export_jobs = ExportJobManager()
+        self.measurement_channel = None  # 当前测量的矩阵输出通道（如 'CH12'）
+        self.correction_channel = None  # 本次运行使用的误差项行号（逐通道误差项）
         
         # 混频器配置（支持多种设备）
         self.mixer_config = {
@@ -92,6 +135,17 @@ class VNAController:
         
         # 创建结果目录
         os.makedirs('results', exist_ok=True)
+        
+        # 恢复上次异常中断时未提交的测量日志
+        recover_runs('results', self._result_formats())
+        self.result_index = ResultIndex('results')
+        self._connected_once = False  # 本进程内是否连接过设备（用于统计重连次数）
+        
+        # 采集时计算的指标
+        MEASUREMENT_RUNNING.set_function(lambda: self.measurement_status['is_running'])
+        INSTRUMENT_CONNECTED.labels('vna').set_function(self.is_connected)
+        for state in ('pending', 'running'):
+            QUEUE_DEPTH.labels('export', state).set_function(lambda state=state: self.export_jobs.count(state))
     
     def is_connected(self):
         """检查是否已连接"""
@@ -159,6 +213,7 @@ class VNAController:
             
             if not success:
                 logger.error(f"[错误] 设备连接失败: {message}")
+                CONNECTIONS_TOTAL.labels('vna', 'failure').inc()
                 self.device_driver = None
                 return jsonify({
                     'success': False,
@@ -196,6 +251,12 @@ class VNAController:
             
             logger.info(f"[成功] 设备连接成功: {device_type}")
             logger.info(f"[信息] 设备信息: {message}")
+            if AppSettings.SCPI_RECORD_ON_CONNECT:
+                self._start_recording()
+            CONNECTIONS_TOTAL.labels('vna', 'success').inc()
+            if self._connected_once:
+                RECONNECTS_TOTAL.labels('vna').inc()
+            self._connected_once = True
             
             return jsonify({
                 'success': True,
@@ -209,6 +270,7 @@ class VNAController:
             
         except Exception as e:
             logger.error(f"[错误] 连接失败: {str(e)}")
+            CONNECTIONS_TOTAL.labels('vna', 'failure').inc()
             import traceback
             traceback.print_exc()
             self.device_driver = None
@@ -327,10 +389,53 @@ class VNAController:
         frequency_points = data.get('frequencyPoints', 201)
         start_frequency = data.get('startFrequency', 500) * 1e6
         stop_frequency = data.get('stopFrequency', 2500) * 1e6
+        data_format = data.get('dataFormat', AppSettings.VNA_DATA_FORMAT)
+        channel = channel_label(data.get('channel'))
         
         if not parameters:
             return jsonify({'success': False, 'message': '参数不能为空'}), 400
         
+        # 以下先完成全部校验，校验通过后才更新测量状态与设备设置
+        # 自适应测量次数：measurementCount 为最大次数，各频点标准误差达到目标后提前结束该参数
+        # （最大次数少于2次时无法提前结束，不启用；最少次数默认不低于2次）
+        try:
+            convergence = ConvergenceCriterion(
+                data.get('targetSem', AppSettings.ADAPTIVE_TARGET_SEM),
+                data.get('minCount', max(2, min(AppSettings.ADAPTIVE_MIN_COUNT, measurement_count))),
+                measurement_count
+            ) if data.get('adaptive') and measurement_count >= 2 else None
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        # 逐通道误差项只使用当前测量通道的一行
+        try:
+            correction_channel = self.correction.channel_index(channel) if self.correction else None
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        # 派生曲线（群时延、线性相位偏差）
+        derived = data.get('derived') or []
+        try:
+            derived_traces = DerivedTraces(
+                derived, data.get('groupDelayAperture', AppSettings.GROUP_DELAY_APERTURE)
+            ) if derived else None
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        # 矢量参数的数据格式（SDATA 获取复数并在复数域平均；误差修正与派生曲线需要复数数据）
+        if self.correction is not None or derived_traces is not None:
+            data_format = 'SDATA'
+        if str(data_format or 'FDATA').upper() not in DATA_FORMATS:
+            return jsonify({'success': False, 'message': f"不支持的数据格式: {data_format}"}), 400
+        
+        self.measurement_channel = channel
+        self.convergence = convergence
+        self.correction_channel = correction_channel
+        self.derived_traces = derived_traces
+        # 录制会话时记下测量请求，回放时重新发起
+        self.device_driver.mark_recording('measurement', {**data, 'dataFormat': data_format})
+        self.device_driver.set_data_format(data_format)
+        
         # 启动测量线程
         self.measurement_thread = threading.Thread(
             target=self._measurement_worker,
@@ -359,14 +464,262 @@ class VNAController:
         """获取VNA测量状态"""
         return jsonify(self.measurement_status)
     
-    def export_data(self, data):
-        """导出VNA测量数据"""
-        results = data.get('results', [])
+    def get_measurement_statistics(self, args):
+        """
+        获取测量过程中的实时按频点统计结果
+
+        查询参数：
+            parameter: 测量参数（必填）
+            max_points: 最大返回频点数（超出时抽取）
+        """
+        parameter = args.get('parameter', '').strip().upper()
+        if not parameter:
+            return jsonify({'success': False, 'message': '参数不能为空'}), 400
         
-        if not results:
-            return jsonify({'success': False, 'message': '没有可导出的数据'}), 400
+        stats = self.live_statistics.get(parameter)
+        if stats is None:
+            return jsonify({'success': False, 'message': f'没有参数 {parameter} 的统计数据'}), 404
         
-        # 收集文件列表
+        try:
+            max_points = int(args['max_points']) if args.get('max_points') else None
+        except ValueError:
+            return jsonify({'success': False, 'message': 'max_points 必须为整数'}), 400
+        return jsonify({'success': True, **stats.to_dict(max_points)})
+    
+    def get_correction(self):
+        """获取当前启用的误差修正"""
+        if self.correction is None:
+            return jsonify({'success': True, 'enabled': False})
+        return jsonify({'success': True, 'enabled': True, **self.correction.to_dict()})
+    
+    def set_correction(self, data):
+        """
+        启用误差修正（之后的测量实时输出修正后的数据）
+
+        请求格式：
+            calibration_id: 使用已保存的校准集（测量时自动插值到测量频率轴）
+        或直接给出误差项：
+            kind: 'one_port' / 'response' / 'two_port'
+            port: 单端口/响应修正的测量参数
+            frequencies: 误差项频率轴（Hz）
+            terms: {误差项: {'real': [...], 'imag': [...]}}
+        """
+        if self.measurement_status['is_running']:
+            return jsonify({'success': False, 'message': '测量进行中，无法更改误差修正'}), 400
+        data = data or {}
+        try:
+            if data.get('calibration_id'):
+                self.correction = self.calibrations.load(data['calibration_id'])
+            else:
+                self.correction = ErrorCorrection.from_dict(data)
+        except (ValueError, TypeError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+        logger.info(f"误差修正已启用: {self.correction.to_dict()}")
+        return jsonify({'success': True, 'enabled': True, **self.correction.to_dict()})
+    
+    def clear_correction(self):
+        """停用误差修正"""
+        if self.measurement_status['is_running']:
+            return jsonify({'success': False, 'message': '测量进行中，无法更改误差修正'}), 400
+        self.correction = None
+        return jsonify({'success': True, 'enabled': False})
+    
+    def get_limits(self):
+        """获取当前启用的极限模板"""
+        if self.limits is None:
+            return jsonify({'success': True, 'enabled': False})
+        return jsonify({'success': True, 'enabled': True, **self.limits.to_dict()})
+    
+    def set_limits(self, data):
+        """
+        启用极限模板（之后的测量逐次判定）
+
+        请求格式：
+            masks: [{parameter, quantity, upper: [[频率Hz, 值], ...], lower: [...], hard, name}]
+            on_fail: 'continue'（只记录）/ 'skip_parameter'（跳过该参数剩余测量）/ 'abort'（结束本次运行）
+        """
+        if self.measurement_status['is_running']:
+            return jsonify({'success': False, 'message': '测量进行中，无法更改极限模板'}), 400
+        try:
+            self.limits = LimitEvaluator.from_dict(data or {})
+        except (ValueError, TypeError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        logger.info(f"极限模板已启用: {len(self.limits.masks)} 个模板, 失败处理 {self.limits.on_fail}")
+        return jsonify({'success': True, 'enabled': True, **self.limits.to_dict()})
+    
+    def clear_limits(self):
+        """停用极限模板"""
+        if self.measurement_status['is_running']:
+            return jsonify({'success': False, 'message': '测量进行中，无法更改极限模板'}), 400
+        self.limits = None
+        return jsonify({'success': True, 'enabled': False})
+    
+    def get_io_metrics(self):
+        """获取仪器读写统计（按命令类别的耗时直方图、字节数与超时次数）"""
+        return jsonify({'success': True, **io_metrics.snapshot()})
+    
+    def set_io_metrics(self, data):
+        """
+        开启/关闭仪器读写统计
+
+        请求格式：
+            enabled: 是否统计
+            reset: 是否清空已有统计
+        """
+        data = data or {}
+        if 'enabled' in data:
+            if not isinstance(data['enabled'], bool):
+                return jsonify({'success': False, 'message': 'enabled 必须为布尔值'}), 400
+            io_metrics.set_enabled(data['enabled'])
+            logger.info(f"仪器读写统计已{'开启' if io_metrics.enabled else '关闭'}")
+        if data.get('reset'):
+            io_metrics.reset()
+        return jsonify({'success': True, **io_metrics.snapshot()})
+    
+    def clear_io_metrics(self):
+        """清空仪器读写统计"""
+        io_metrics.reset()
+        return jsonify({'success': True, **io_metrics.snapshot()})
+    
+    def get_timelines(self):
+        """获取时间线缓冲区中的运行列表"""
+        return jsonify({'success': True, 'enabled': tracer.enabled, 'runs': tracer.runs()})
+    
+    def set_timeline(self, data):
+        """
+        开启/关闭测量时间线记录
+
+        请求格式：
+            enabled: 是否记录
+            clear: 是否清空缓冲区
+        """
+        data = data or {}
+        if 'enabled' in data:
+            if not isinstance(data['enabled'], bool):
+                return jsonify({'success': False, 'message': 'enabled 必须为布尔值'}), 400
+            tracer.set_enabled(data['enabled'])
+            logger.info(f"测量时间线记录已{'开启' if tracer.enabled else '关闭'}")
+        if data.get('clear'):
+            tracer.clear()
+        return jsonify({'success': True, 'enabled': tracer.enabled, 'runs': tracer.runs()})
+    
+    def download_timeline(self, run_id):
+        """下载运行的时间线（Chrome / Perfetto trace-event JSON）"""
+        trace = tracer.chrome_trace(run_id)
+        if trace is None:
+            return jsonify({'success': False, 'message': f'时间线不存在: {run_id}'}), 404
+        return Response(
+            json.dumps(trace, ensure_ascii=False),
+            mimetype='application/json',
+            headers={'Content-Disposition': f'attachment; filename=timeline_{run_id}.json'}
+        )
+    
+    def _start_recording(self):
+        """开始录制当前设备的SCPI会话，返回录制概况"""
+        name = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{self.device_type}{SESSION_EXTENSION}"
+        return self.device_driver.start_recording(os.path.join(AppSettings.SCPI_RECORDING_DIR, name)).summary()
+    
+    def _list_recordings(self):
+        directory = AppSettings.SCPI_RECORDING_DIR
+        if not os.path.isdir(directory):
+            return []
+        recordings = []
+        for name in sorted(os.listdir(directory), reverse=True):
+            if name.endswith(SESSION_EXTENSION):
+                stat = os.stat(os.path.join(directory, name))
+                recordings.append({
+                    'name': name,
+                    'size': stat.st_size,
+                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                })
+        return recordings
+    
+    def get_recording(self):
+        """获取SCPI会话录制状态与已保存的录制文件"""
+        recorder = self.device_driver.recorder if self.device_driver else None
+        return jsonify({
+            'success': True,
+            'recording': recorder.summary() if recorder is not None else None,
+            'recordings': self._list_recordings()
+        })
+    
+    def set_recording(self, data):
+        """
+        开始/结束SCPI会话录制
+
+        请求格式：
+            enabled: 是否录制（开始录制需要已连接设备；录制中再次开始会结束之前的录制）
+        """
+        data = data or {}
+        if not isinstance(data.get('enabled'), bool):
+            return jsonify({'success': False, 'message': 'enabled 必须为布尔值'}), 400
+        if data['enabled']:
+            if not self.device_driver or not self.device_driver.connected:
+                return jsonify({'success': False, 'message': '请先连接VNA设备'}), 400
+            try:
+                summary = self._start_recording()
+            except OSError as e:
+                logger.error(f"开始录制失败: {e}")
+                return jsonify({'success': False, 'message': f'开始录制失败: {e}'}), 500
+        else:
+            summary = self.device_driver.stop_recording() if self.device_driver else None
+        return jsonify({'success': True, 'recording': summary, 'recordings': self._list_recordings()})
+    
+    def download_recording(self, name):
+        """下载SCPI会话录制文件"""
+        name = os.path.basename(name)
+        path = os.path.join(AppSettings.SCPI_RECORDING_DIR, name)
+        if not name.endswith(SESSION_EXTENSION) or not os.path.isfile(path):
+            return jsonify({'success': False, 'message': f'录制文件不存在: {name}'}), 404
+        return send_file(
+            os.path.abspath(path),
+            mimetype='application/gzip',
+            as_attachment=True,
+            download_name=name
+        )
+    
+    def list_calibrations(self):
+        """列出已保存的校准集"""
+        try:
+            sets = self.calibrations.list()
+            return jsonify({'success': True, 'calibrations': sets, 'count': len(sets)})
+        except Exception as e:
+            logger.error(f"获取校准集列表失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    def save_calibration(self, data):
+        """保存校准集（格式同 set_correction 的误差项），返回校准集ID"""
+        data = data or {}
+        try:
+            correction = ErrorCorrection.from_dict(data)
+            set_id = self.calibrations.save(correction, data.get('id'))
+        except (ValueError, TypeError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        return jsonify({'success': True, 'id': set_id, **correction.to_dict()})
+    
+    def get_calibration(self, set_id):
+        """获取校准集概要"""
+        try:
+            return jsonify({'success': True, 'id': set_id, **self.calibrations.load(set_id).to_dict()})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+    
+    def delete_calibration(self, set_id):
+        """删除校准集"""
+        try:
+            self.calibrations.delete(set_id)
+            return jsonify({'success': True, 'message': f'校准集 {set_id} 已删除'})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'success': False, 'message': str(e)}), 404
+    
+    def _collect_export_files(self, results):
+        """从测量结果列表中收集可导出的文件"""
         file_paths = []
         for item in results:
             path = item.get('filename')
@@ -376,27 +729,68 @@ class VNAController:
                 continue
             if os.path.isfile(path):
                 file_paths.append(path)
+        return file_paths
+    
+    def start_export_job(self, data):
+        """提交后台导出任务，立即返回任务ID"""
+        results = data.get('results', [])
+        
+        if not results:
+            return jsonify({'success': False, 'message': '没有可导出的数据'}), 400
         
+        file_paths = self._collect_export_files(results)
         if not file_paths:
             return jsonify({'success': False, 'message': '未找到可导出的CSV文件'}), 404
         
-        # 创建内存ZIP
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for fp in file_paths:
-                arcname = os.path.relpath(fp, start='results')
-                zf.write(fp, arcname)
-        zip_buffer.seek(0)
-        
-        zip_name = f"measurement_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        job = self.export_jobs.submit(file_paths)
+        return jsonify({'success': True, **job.to_dict()})
+    
+    def get_export_job(self, job_id):
+        """查询导出任务进度"""
+        job = self.export_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'message': f'导出任务不存在: {job_id}'}), 404
+        return jsonify({'success': True, **job.to_dict()})
+    
+    def download_export(self, job_id):
+        """下载已完成的导出文件"""
+        job = self.export_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'message': f'导出任务不存在: {job_id}'}), 404
+        if job.state != 'done':
+            return jsonify({'success': False, 'message': '导出尚未完成', **job.to_dict()}), 409
         
         return send_file(
-            zip_buffer,
+            os.path.abspath(job.archive_path),
             mimetype='application/zip',
             as_attachment=True,
-            download_name=zip_name
+            download_name=job.download_name
         )
     
+    def export_data(self, data):
+        """
+        导出VNA测量数据（兼容接口）
+
+        在 EXPORT_SYNC_WAIT 秒内完成（或命中缓存）时直接返回ZIP；
+        否则返回 202 与任务ID，之后通过 /api/vna/export-jobs/<job_id> 查询进度并下载，不再占用服务线程等待压缩
+        """
+        results = data.get('results', [])
+        
+        if not results:
+            return jsonify({'success': False, 'message': '没有可导出的数据'}), 400
+        
+        file_paths = self._collect_export_files(results)
+        if not file_paths:
+            return jsonify({'success': False, 'message': '未找到可导出的CSV文件'}), 404
+        
+        job = self.export_jobs.submit(file_paths)
+        if not job.done_event.wait(AppSettings.EXPORT_SYNC_WAIT):
+            return jsonify({'success': True, **job.to_dict()}), 202
+        if job.state != 'done':
+            return jsonify({'success': False, 'message': job.message}), 500
+        
+        return self.download_export(job.job_id)
+    
     def open_results_folder(self, data):
         """直接打开结果文件夹"""
         import subprocess
@@ -510,91 +904,235 @@ class VNAController:
         self.measurement_status['current_measurement'] = 0
         self.measurement_status['total_measurements'] = len(parameters) * measurement_count
         self.measurement_status['results'] = []
+        self.measurement_status['statistics'] = {}
+        self.measurement_status['channel'] = self.measurement_channel
+        self.measurement_status['adaptive'] = self.convergence.to_dict() if self.convergence else None
+        self.measurement_status['sweep_estimate'] = None
+        self.measurement_status['eta_seconds'] = None
+        self.live_statistics = {}
+        sweep_seconds = None  # 单次测量（扫描、保存与间隔）实测耗时的滑动平均
         
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        tracer.begin_run(
+            timestamp, device=self.device_type, parameters=[p.upper() for p in parameters],
+            measurement_count=measurement_count, frequency_points=frequency_points
+        )
+        journals = {}  # 参数 -> 日志
+        extra_journals = {}  # 修正后/派生参数 -> 日志（运行结束时统一提交）
+        pipeline = CorrectionPipeline(self.correction, self.correction_channel) if self.correction else None
+        derived = self.derived_traces
+        self.measurement_status.pop('correction_error', None)
+        self.measurement_status.pop('correction_incomplete', None)
+        self.measurement_status.pop('derived_error', None)
+        self.limit_evaluator = self.limits.reset() if self.limits else None
+        self.measurement_status['limit_verdict'] = 'NOT_TESTED' if self.limit_evaluator else None
+        self.measurement_status.pop('limit_action', None)
+        stop_run = False  # 硬模板失败且处理动作为 abort
+        
+        # 双端口修正需要同一序号的四个参数：按测量序号交错测量（每次依次测 S11/S21/S12/S22），
+        # 修正结果随每个序号实时输出，缓存最多一个序号的原始数据
+        interleave = False
+        if pipeline is not None and pipeline.correction.kind == 'two_port':
+            measured = {p.upper() for p in parameters}
+            if measured.issuperset(TWO_PORT_PARAMETERS):
+                interleave = True
+            else:
+                message = f"双端口修正需要同时测量 {'/'.join(TWO_PORT_PARAMETERS)}，本次运行不进行修正"
+                logger.warning(message)
+                self.measurement_status['correction_error'] = message
+                pipeline = None
+        if interleave:
+            schedule = [(p, i) for i in range(1, measurement_count + 1) for p in parameters]
+        else:
+            schedule = [(p, i) for p in parameters for i in range(1, measurement_count + 1)]
+        started = []  # 已开始测量的参数（按开始顺序）
+        completed = {}  # 参数 -> 完成的测量次数
+        finished = set()  # 已结束的参数（测量完成、收敛、跳过）
         
         try:
             logger.info(f"开始测量任务: {len(parameters)}个参数, 每个{measurement_count}次")
-            logger.info(f"使用软件循环模式 - 每次单独测量并保存原始数据")
+            logger.info(f"使用软件循环模式 - 每次单独测量并保存原始数据"
+                        + ("（双端口修正，按测量序号交错测量各参数）" if interleave else ""))
             
             total_count = 0
             
-            for param_idx, parameter in enumerate(parameters):
+            for parameter, measurement_idx in schedule:
                 if not self.measurement_status['is_running']:
                     logger.info("测量已停止")
                     break
+                if stop_run:
+                    break
+                if parameter in finished:
+                    continue
+                
+                if parameter not in completed:
+                    logger.info(f"\n{'='*60}")
+                    logger.info(f"参数 {parameters.index(parameter) + 1}/{len(parameters)}: {parameter.upper()}")
+                    logger.info(f"{'='*60}")
+                    
+                    # 检查设备连接状态（防止测量过程中断开）
+                    if not self.device_driver or not self.device_driver.connected:
+                        logger.error(f"[错误] 设备连接已断开，测量中止")
+                        self.measurement_status['is_running'] = False
+                        self.measurement_status['error'] = '设备连接已断开'
+                        break
+                    
+                    # 设置频率范围（每个参数只需设置一次）
+                    try:
+                        with tracer.span('stimulus', parameter=parameter.upper()):
+                            self.device_driver.set_frequency_range(
+                                start_frequency, stop_frequency, frequency_points
+                            )
+                            self.measurement_status['sweep_estimate'] = self.device_driver.refresh_sweep_estimate()
+                        self._update_eta(sweep_seconds)
+                    except Exception as e:
+                        logger.error(f"[错误] 设置频率范围失败: {e}")
+                        self.measurement_status['is_running'] = False
+                        self.measurement_status['error'] = f'设置频率范围失败: {str(e)}'
+                        break
+                    started.append(parameter)
+                    completed[parameter] = 0
+                
+                logger.debug(f"[{parameter.upper()}] 第 {measurement_idx}/{measurement_count} 次测量")
+                sweep_start = tracer.now()
+                iteration_start = time.perf_counter()
                 
-                logger.info(f"\n{'='*60}")
-                logger.info(f"参数 {param_idx + 1}/{len(parameters)}: {parameter.upper()}")
-                logger.info(f"{'='*60}")
+                # 单次测量（count=1，不使用硬件平均）
+                with _STAGE['acquire'].time(), tracer.span('acquire'):
+                    data, error_msg = self.device_driver.get_measurement_data(
+                        parameter, frequency_points, measurement_count=1
+                    )
                 
-                # 检查设备连接状态（防止测量过程中断开）
-                if not self.device_driver or not self.device_driver.connected:
-                    logger.error(f"[错误] 设备连接已断开，测量中止")
+                if data is None:
+                    _SWEEP_FAILED.inc()
+                    logger.error(f"[错误] 第 {measurement_idx} 次测量失败: {error_msg}")
                     self.measurement_status['is_running'] = False
-                    self.measurement_status['error'] = '设备连接已断开'
+                    self.measurement_status['error'] = f'测量失败: {error_msg}'
                     break
                 
-                # 设置频率范围（只需设置一次）
+                # 保存每次测量的数据（追加写入日志）
                 try:
-                    self.device_driver.set_frequency_range(
-                        start_frequency, stop_frequency, frequency_points
-                    )
+                    with _STAGE['journal'].time(), tracer.span('journal'):
+                        journals[parameter] = self._append_journal(
+                            journals.get(parameter), data, parameter, measurement_idx, timestamp
+                        )
                 except Exception as e:
-                    logger.error(f"[错误] 设置频率范围失败: {e}")
-                    self.measurement_status['is_running'] = False
-                    self.measurement_status['error'] = f'设置频率范围失败: {str(e)}'
-                    break
+                    logger.error(f"[错误] 保存第 {measurement_idx} 次测量数据失败: {e}")
                 
-                # 循环测量 measurement_count 次
-                for measurement_idx in range(1, measurement_count + 1):
-                    if not self.measurement_status['is_running']:
-                        logger.info("测量已停止")
-                        break
-                    
-                    logger.info(f"\n[{parameter.upper()}] 第 {measurement_idx}/{measurement_count} 次测量")
-                    
-                    # 单次测量（count=1，不使用硬件平均）
-                    data, error_msg = self.device_driver.get_measurement_data(
-                        parameter, frequency_points, measurement_count=1
-                    )
-                    
-                    if data is None:
-                        logger.error(f"[错误] 第 {measurement_idx} 次测量失败: {error_msg}")
-                        self.measurement_status['is_running'] = False
-                        self.measurement_status['error'] = f'测量失败: {error_msg}'
-                        break
-                    
-                    # 保存每次测量的数据
-                    success, filename = self._save_measurement_data(
-                        data, parameter, measurement_idx, timestamp, do_excel=False
-                    )
-                    
-                    if not success:
-                        logger.error(f"[错误] 保存第 {measurement_idx} 次测量数据失败")
-                    
-                    # 更新进度
-                    total_count += 1
-                    self.measurement_status['current_measurement'] = total_count
+                # 更新在线统计（每次测量到达时增量更新，无需二次遍历）
+                try:
+                    with _STAGE['statistics'].time(), tracer.span('statistics'):
+                        self._update_statistics(data, parameter)
+                except Exception as e:
+                    logger.error(f"[错误] 更新第 {measurement_idx} 次测量统计失败: {e}")
+                
+                # 实时误差修正
+                outputs = [(parameter.upper(), data)]
+                if pipeline is not None and data.get("complex") is not None:
+                    try:
+                        with _STAGE['correction'].time(), tracer.span('correction'):
+                            outputs += self._apply_correction(
+                                pipeline, extra_journals, data, parameter, measurement_idx, timestamp
+                            )
+                    except Exception as e:
+                        logger.error(f"[错误] 误差修正失败，本次运行停止修正: {e}")
+                        self.measurement_status['correction_error'] = str(e)
+                        pipeline = None
+                
+                # 派生曲线（原始数据与修正后的数据各自计算）
+                if derived is not None:
+                    try:
+                        with _STAGE['derived'].time(), tracer.span('derived'):
+                            for name, item in list(outputs):
+                                if item.get("complex") is not None:
+                                    outputs += self._apply_derived(
+                                        derived, extra_journals, item, name, measurement_idx, timestamp
+                                    )
+                    except Exception as e:
+                        logger.error(f"[错误] 派生曲线计算失败，本次运行停止计算: {e}")
+                        self.measurement_status['derived_error'] = str(e)
+                        derived = None
+                
+                # 极限判定（原始、修正后与派生数据）
+                if self.limit_evaluator is not None:
+                    with _STAGE['limits'].time(), tracer.span('limits'):
+                        for name, item in outputs:
+                            self._check_limits(item, name, measurement_idx)
+                
+                # 更新进度
+                _SWEEP_OK.inc()
+                tracer.add('sweep', sweep_start, args={'parameter': parameter.upper(), 'index': measurement_idx})
+                completed[parameter] += 1
+                total_count += 1
+                self.measurement_status['current_measurement'] = total_count
+                self.measurement_status['progress'] = (
+                    total_count / self.measurement_status['total_measurements'] * 100
+                )
+                
+                # 硬模板失败时的处理动作
+                action = self.limit_evaluator.take_action() if self.limit_evaluator else None
+                if action:
+                    self.measurement_status['limit_action'] = action
+                    logger.warning(f"[{parameter.upper()}] 第 {measurement_idx} 次测量超出极限模板，执行: {action}")
+                    stop_run = action == 'abort'
+                    finished.add(parameter)
+                
+                # 自适应测量次数：标准误差达到目标后结束该参数，剩余次数不再计入进度
+                elif self._converged(parameter) and measurement_idx < measurement_count:
+                    self.measurement_status['total_measurements'] -= measurement_count - measurement_idx
                     self.measurement_status['progress'] = (
                         total_count / self.measurement_status['total_measurements'] * 100
                     )
-                    
-                    # 短暂延迟，避免设备过载
-                    time.sleep(0.1)
+                    logger.info(
+                        f"[{parameter.upper()}] 第 {measurement_idx} 次测量后标准误差已达到目标 "
+                        f"({self.convergence.target_sem:g})，结束该参数"
+                    )
+                    finished.add(parameter)
+                
+                elif measurement_idx == measurement_count:
+                    finished.add(parameter)
+                
+                # 参数测量结束：提交日志，生成最终结果文件
+                if parameter in finished:
+                    self._finish_parameter(parameter, journals.pop(parameter, None), completed[parameter], timestamp)
+                    if stop_run:
+                        break
                 
-                # 所有测量完成后，记录结果
+                # 短暂延迟，避免设备过载
+                time.sleep(0.1)
+                
+                elapsed = time.perf_counter() - iteration_start
+                sweep_seconds = elapsed if sweep_seconds is None else sweep_seconds + 0.3 * (elapsed - sweep_seconds)
+                self._update_eta(sweep_seconds)
+            
+            # 停止或出错时，已开始但未结束的参数同样提交
+            for parameter in started:
+                if parameter not in finished:
+                    finished.add(parameter)
+                    self._finish_parameter(parameter, journals.pop(parameter, None), completed[parameter], timestamp)
+            
+            # 提交修正后与派生的数据
+            for name, extra in extra_journals.items():
+                self._commit_journal(extra)
+                self._save_statistics(name, timestamp)
                 if self.measurement_status['is_running']:
-                    # 使用第一次测量的文件名作为代表
-                    representative_filename = f"results/{timestamp}/{parameter.upper()}.csv"
-                    self.measurement_status['results'].append({
-                        'parameter': parameter.upper(),
-                        'measurements': measurement_count,
-                        'filename': representative_filename,
+                    extension = '.csv' if self.results_format in ('csv', 'both') else TRACE_EXTENSION
+                    result = {
+                        'parameter': name,
+                        'measurements': extra.n_sweeps,
+                        'filename': f"results/{timestamp}/{name}{extension}",
                         'timestamp': datetime.now().isoformat()
-                    })
-                    
-                    logger.info(f"参数 {parameter.upper()} 测量完成 ({measurement_count}次单独测量)")
+                    }
+                    if CORRECTED_SUFFIX in name:
+                        result['corrected'] = True
+                    if derived_header(name):
+                        result['derived'] = name.rsplit('_', 1)[-1]
+                    self.measurement_status['results'].append(result)
+            extra_journals = {}
+            
+            # 记录极限判定结论
+            if self.limit_evaluator is not None:
+                self._save_verdict(timestamp)
             
             logger.info("\n所有测量完成")
             logger.info(f"共测量 {len(parameters)} 个参数，每个{measurement_count}次单独测量")
@@ -605,113 +1143,240 @@ class VNAController:
             import traceback
             traceback.print_exc()
         finally:
+            for journal in journals.values():
+                self._commit_journal(journal)
+            for extra in extra_journals.values():
+                self._commit_journal(extra)
+            if pipeline is not None:
+                incomplete = pipeline.flush()
+                if incomplete:
+                    logger.warning(f"双端口修正: {len(incomplete)} 次测量未收齐 S11/S21/S12/S22，未输出修正结果: {incomplete}")
+                    self.measurement_status['correction_incomplete'] = incomplete
             self.measurement_status['is_running'] = False
+            self.measurement_status['eta_seconds'] = None
+            tracer.end_run(timestamp)
+            sweep_predictor.save()
+    
+    def _finish_parameter(self, parameter, journal, completed, timestamp):
+        """参数测量结束：提交日志、保存统计，运行未中止时记录结果"""
+        if journal:
+            self._commit_journal(journal)
+        self._save_statistics(parameter, timestamp)
+        
+        if self.measurement_status['is_running']:
+            # 使用第一次测量的文件名作为代表
+            extension = '.csv' if self.results_format in ('csv', 'both') else TRACE_EXTENSION
+            representative_filename = f"results/{timestamp}/{parameter.upper()}{extension}"
+            result = {
+                'parameter': parameter.upper(),
+                'measurements': completed,
+                'filename': representative_filename,
+                'timestamp': datetime.now().isoformat()
+            }
+            if self.convergence is not None:
+                result['converged'] = self._converged(parameter)
+                result['max_sem'] = self.measurement_status['statistics'].get(
+                    parameter.upper(), {}).get('max_sem')
+            self.measurement_status['results'].append(result)
+            
+            logger.info(f"参数 {parameter.upper()} 测量完成 ({completed}次单独测量)")
+    
+    def _update_eta(self, sweep_seconds):
+        """
+        更新测量剩余时间
+
+        已有实测的单次测量耗时时按实测计算，否则按预测的扫描时间加上测量间隔估计。
+        """
+        estimate = self.measurement_status.get('sweep_estimate')
+        if sweep_seconds is None:
+            if estimate is None:
+                return
+            sweep_seconds = estimate['seconds'] + 0.1
+        remaining = self.measurement_status['total_measurements'] - self.measurement_status['current_measurement']
+        self.measurement_status['eta_seconds'] = round(max(remaining, 0) * sweep_seconds, 1)
     
     def _average_measurement_data(self, all_data):
         """对多次测量的数据进行软件平均"""
         if not all_data:
             return None
-
+        
         # 假设所有测量都有相同的频率点
         frequencies = all_data[0]['frequencies']
-        num_points = len(frequencies)
-        num_measurements = len(all_data)
-
-        # 初始化累加器
-        sum_magnitude = [0.0] * num_points
-        sum_phase = [0.0] * num_points # 仅用于S参数
-
-        # 检查是否是功率参数
-        is_power = 'Power(dBm)' in all_data[0].get('headers2', []) # Assuming headers2 might be present or infer from keys
-        if 'magnitude' in all_data[0] and 'phase' not in all_data[0]:
-            is_power = True # More robust check
-
+        
+        # 复数数据在复数域平均，幅度与相位由平均后的复数导出
+        if all(item.get('complex') is not None for item in all_data):
+            vector = ComplexRunningStatistics(len(frequencies))
+            for data_item in all_data:
+                vector.update(data_item['complex'])
+            return {
+                'frequencies': frequencies,
+                'magnitude': magnitude_db(vector.mean).tolist(),
+                'phase': phase_deg(vector.mean).tolist(),
+                'complex': vector.mean
+            }
+        
+        is_power = trace_phase(all_data[0]) is None
+        
+        magnitude = RunningStatistics(len(frequencies))
+        phase = None if is_power else PhaseStatistics(len(frequencies))
         for data_item in all_data:
-            for i in range(num_points):
-                sum_magnitude[i] += data_item['magnitude'][i]
-                if not is_power and data_item.get('phase'):
-                    sum_phase[i] += data_item['phase'][i]
-
-        # 计算平均值
-        avg_magnitude = [s / num_measurements for s in sum_magnitude]
-        avg_phase = [s / num_measurements for s in sum_phase] if not is_power else None
-
+            magnitude.update(trace_magnitude(data_item))
+            if phase is not None and trace_phase(data_item) is not None:
+                phase.update(trace_phase(data_item))
+        
         averaged_result = {
             'frequencies': frequencies,
-            'magnitude': avg_magnitude,
+            'magnitude': magnitude.mean.tolist(),
         }
-        if not is_power:
-            averaged_result['phase'] = avg_phase
+        if phase is not None:
+            averaged_result['phase'] = phase.summary()['mean'].tolist()
         
         return averaged_result
     
-    def _save_measurement_data(self, data, parameter, measurement_idx, timestamp, do_excel=False):
-        """保存测量数据（仅CSV格式）"""
-        try:
-            results_dir = f"results/{timestamp}"
-            os.makedirs(results_dir, exist_ok=True)
-            
-            filename = f"{results_dir}/{parameter.upper()}.csv"
-            
-            # 判断参数类型
+    def _result_formats(self):
+        """当前配置要生成的结果文件格式"""
+        if self.results_format == 'both':
+            return ['csv', 'trace']
+        return [self.results_format]
+    
+    def _append_journal(self, journal, data, parameter, measurement_idx, timestamp):
+        """追加一次测量到日志（首次调用时创建日志，频率轴只保存一次；复数数据按实部/虚部保存）"""
+        values = data.get("complex")
+        phase = trace_phase(data) if values is None else None
+        if journal is None:
             power_params = {"IPWR", "OPWR", "REVIPWR", "REVOPWR"}
-            is_power = parameter.upper() in power_params
-            
-            # 准备当前测量的数据行
-            frequencies = data["frequencies"]
-            magnitude = data["magnitude"]
-            phase = data.get("phase")
-            
-            # 构建CSV数据
-            if is_power:
-                # 功率数据：频率 + 功率
-                headers1 = [str(measurement_idx), str(measurement_idx)]
-                headers2 = ["Freq(Hz)", "Power(dBm)"]
-                rows = [[f, m] for f, m in zip(frequencies, magnitude)]
+            if values is not None:
+                columns = COMPLEX_COLUMNS
             else:
-                # S参数数据：频率 + 幅度 + 相位
-                headers1 = [str(measurement_idx), str(measurement_idx), str(measurement_idx)]
-                headers2 = ["Freq(Hz)", "Mag(dB)", "Phase(deg)"]
-                rows = [[f, m, p] for f, m, p in zip(frequencies, magnitude, phase or [0]*len(frequencies))]
-            
-            # 如果文件已存在，读取并追加列
-            if os.path.exists(filename):
-                with open(filename, 'r', newline='', encoding='utf-8') as f:
-                    reader = csv.reader(f)
-                    existing_data = list(reader)
-                
-                # 扩展标题行
-                if len(existing_data) >= 2:
-                    existing_data[0].extend(headers1)
-                    existing_data[1].extend(headers2)
-
-                    
-                    # 扩展数据行
-                    for i, row_data in enumerate(rows):
-                        if i + 2 < len(existing_data):
-                            existing_data[i + 2].extend(row_data)
-                        else:
-                            # 补齐前面的空列
-                            new_row = [''] * (len(existing_data[0]) - len(row_data)) + row_data
-                            existing_data.append(new_row)
-                    
-                    # 写入完整数据
-                    with open(filename, 'w', newline='', encoding='utf-8') as f:
-                        writer = csv.writer(f)
-                        writer.writerows(existing_data)
-            else:
-                # 新文件：直接写入
-                with open(filename, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers1)
-                    writer.writerow(headers2)
-                    writer.writerows(rows)
-            
-            logger.info(f"数据已保存到: {filename}")
-            return True, filename
+                columns = ['magnitude', 'phase'] if phase is not None else ['magnitude']
+            journal = RunJournal(
+                f"results/{timestamp}",
+                parameter,
+                data["frequencies"],
+                columns,
+                is_power=parameter.upper() in power_params,
+                value_label=derived_header(parameter) or None
+            )
+        
+        if journal.columns == COMPLEX_COLUMNS:
+            journal.append(measurement_idx, [values.real, values.imag])
+            return journal
+        
+        row = [data["magnitude"]]
+        if len(journal.columns) > 1:
+            row.append(phase if phase is not None else [0.0] * len(data["magnitude"]))
+        journal.append(measurement_idx, row)
+        return journal
+    
+    def _commit_journal(self, journal):
+        """提交日志：一次性写出结果文件并原子替换"""
+        try:
+            with _STAGE['commit'].time(), tracer.span('commit', 'save'):
+                files = journal.commit(self._result_formats())
+            for filename in files:
+                logger.info(f"数据已保存到: {filename}")
         except Exception as e:
             logger.error(f"保存数据失败: {str(e)}")
             import traceback
             traceback.print_exc()
-            return False, f"保存失败: {str(e)}"
 
+    
+    def _update_statistics(self, data, parameter):
+        """用一次测量更新参数的在线统计，并刷新测量状态中的简要统计"""
+        key = parameter.upper()
+        stats = self.live_statistics.get(key)
+        if stats is None:
+            stats = TraceStatistics(
+                key, data["frequencies"], trace_phase(data) is not None,
+                percentiles=AppSettings.STATISTICS_PERCENTILES,
+                has_complex=data.get("complex") is not None
+            )
+            self.live_statistics[key] = stats
+        stats.update(trace_magnitude(data), trace_phase(data), data.get("complex"))
+        self.measurement_status['statistics'][key] = stats.digest()
+    
+    def _converged(self, parameter):
+        """自适应模式下参数的在线统计是否已满足目标标准误差"""
+        if self.convergence is None:
+            return False
+        stats = self.live_statistics.get(parameter.upper())
+        return stats is not None and self.convergence.converged(stats)
+    
+    def _save_statistics(self, parameter, timestamp):
+        """将参数的统计结果保存到运行目录，并登记到结果索引"""
+        stats = self.live_statistics.get(parameter.upper())
+        if stats is None or not stats.count:
+            return
+        try:
+            result = {**stats.metadata(), 'channel': self.measurement_channel}
+            with tracer.span('save_statistics', 'save'):
+                path = save_statistics(f"results/{timestamp}", parameter, result, stats.arrays())
+            logger.info(f"统计结果已保存到: {path}")
+            self.result_index.record(timestamp, parameter, result, self.measurement_channel)
+        except Exception as e:
+            logger.error(f"保存统计结果失败: {str(e)}")
+    
+    def _check_limits(self, data, parameter, measurement_idx):
+        """按极限模板判定一次测量，失败时刷新测量状态中的判定结论"""
+        evaluator = self.limit_evaluator
+        if not evaluator.accepts(parameter):
+            return
+        try:
+            passed = evaluator.evaluate(
+                parameter, measurement_idx, data["frequencies"], trace_magnitude(data), trace_phase(data)
+            )
+        except Exception as e:
+            logger.error(f"[错误] 第 {measurement_idx} 次测量极限判定失败: {e}")
+            return
+        if not passed:
+            self.measurement_status['limit_verdict'] = 'FAIL'
+        elif self.measurement_status.get('limit_verdict') == 'NOT_TESTED':
+            self.measurement_status['limit_verdict'] = 'PASS'
+    
+    def _save_verdict(self, timestamp):
+        """将极限判定结论保存到运行目录"""
+        verdict = self.limit_evaluator.verdict()
+        self.measurement_status['limit_verdict'] = verdict['verdict']
+        try:
+            path = save_verdict(f"results/{timestamp}", {
+                **verdict,
+                'channel': self.measurement_channel,
+                'action': self.measurement_status.get('limit_action'),
+                'timestamp': datetime.now().isoformat()
+            })
+            logger.info(f"极限判定结论 {verdict['verdict']} 已保存到: {path}")
+        except Exception as e:
+            logger.error(f"保存极限判定结论失败: {str(e)}")
+    
+    def _apply_correction(self, pipeline, extra_journals, data, parameter, measurement_idx, timestamp):
+        """对一次测量进行误差修正，修正结果以 <参数>_CORR 保存并统计，返回 [(修正后参数, 数据)]"""
+        if not pipeline.accepts(parameter):
+            return []
+        if not pipeline.correction.matches_grid(data["frequencies"]):
+            # 已保存的校准集插值到测量频率轴（结果缓存，同一测试计划不重复插值）
+            if pipeline.correction.set_id is None:
+                raise ValueError("测量频率轴与误差项频率轴不一致")
+            pipeline.correction = self.calibrations.resample(pipeline.correction.set_id, data["frequencies"])
+        
+        outputs = []
+        for corrected_param, values in pipeline.process(parameter, measurement_idx, data["complex"]):
+            name = f"{corrected_param}{CORRECTED_SUFFIX}"
+            corrected_data = complex_trace(data["frequencies"], values)
+            extra_journals[name] = self._append_journal(
+                extra_journals.get(name), corrected_data, name, measurement_idx, timestamp
+            )
+            self._update_statistics(corrected_data, name)
+            outputs.append((name, corrected_data))
+        return outputs
+    
+    def _apply_derived(self, derived, extra_journals, data, parameter, measurement_idx, timestamp):
+        """由一次测量的复数数据计算派生曲线，以 <参数>_<输出> 保存并统计，返回 [(派生参数, 数据)]"""
+        outputs = []
+        for name, values in derived.compute(parameter, data["frequencies"], data["complex"]):
+            derived_data = {'frequencies': data["frequencies"], 'magnitude': values, 'phase': None}
+            extra_journals[name] = self._append_journal(
+                extra_journals.get(name), derived_data, name, measurement_idx, timestamp
+            )
+            self._update_statistics(derived_data, name)
+            outputs.append((name, derived_data))
+        return outputs
@@ -90,8 +90,31 @@ export const vnaAPI = {
     // 获取测量状态
     getMeasurementStatus: () => apiClient.get('/api/vna/measurement-status'),
 
-    // 导出数据
-    exportData: (results) => apiClient.post('/api/vna/export-data', { results }, {
+    // 导出数据：提交后台导出任务，轮询至完成后下载ZIP（服务端不阻塞等待压缩）
+    exportData: async (results, { interval = 500, onProgress } = {}) => {
+        const { data: job } = await apiClient.post('/api/vna/export-jobs', { results })
+        let status = job
+        while (status.state !== 'done') {
+            if (status.state === 'failed') {
+                throw { message: status.message || '导出失败', data: status }
+            }
+            onProgress?.(status)
+            await new Promise((resolve) => setTimeout(resolve, interval))
+            status = (await apiClient.get(`/api/vna/export-jobs/${job.job_id}`)).data
+        }
+        return apiClient.get(`/api/vna/export-jobs/${job.job_id}/download`, {
+            responseType: 'blob'
+        })
+    },
+
+    // 提交后台导出任务（返回 job_id）
+    startExportJob: (results) => apiClient.post('/api/vna/export-jobs', { results }),
+
+    // 查询导出任务进度
+    getExportJob: (jobId) => apiClient.get(`/api/vna/export-jobs/${jobId}`),
+
+    // 下载导出文件
+    downloadExport: (jobId) => apiClient.get(`/api/vna/export-jobs/${jobId}/download`, {
         responseType: 'blob'
     }),
 
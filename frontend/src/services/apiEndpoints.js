@@ -24,11 +24,20 @@ export const VNA_ENDPOINTS = {
     STOP_MEASUREMENT: '/api/vna/stop-measurement',
     MEASUREMENT_STATUS: '/api/vna/measurement-status',
     EXPORT_DATA: '/api/vna/export-data',
+    EXPORT_JOBS: '/api/vna/export-jobs',
     MIXER_CONFIG: '/api/vna/mixer-config',
     CONNECTION_HISTORY: '/api/vna/connection-history',
     CONNECTION_HISTORY_CLEAR: '/api/vna/connection-history/clear',
 }
 
+// ==================== 测量结果回放API ====================
+export const RESULTS_ENDPOINTS = {
+    LIST: '/api/results',
+    RUN: (runId) => `/api/results/${runId}`,
+    TRACE: (runId) => `/api/results/${runId}/trace`,
+    SWEEP: (runId, sweep) => `/api/results/${runId}/trace/${sweep}`,
+}
+
 // ==================== 系统API ====================
 export const SYSTEM_ENDPOINTS = {
     HEALTH: '/api/health',